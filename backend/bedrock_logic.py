@@ -3,16 +3,31 @@ import json
 import os
 import requests
 import re
+import asyncio
+import time
+from typing import Optional
 from bs4 import BeautifulSoup
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel
 from backend.routes.ai_challenge_router import AICallengeCreateRequest, create_and_join_ai_challenge
-from backend.routes.dashboard import get_dashboard # Import get_dashboard
-from backend.database import get_db
-from backend.dependencies import get_current_user
+from backend.database import SessionLocal
+from backend.dependencies import AdmissionSlot, get_current_user, get_current_admin_user, llm_admission
 from sqlalchemy.orm import Session
-from backend import crud # crud 모듈 임포트
+from backend import models, schemas
 from backend.models import User, TransportMode, Challenge, ChallengeMember # User 모델 임포트
+from backend.services.kb_answer_cache import kb_answer_cache
+from backend.services.kb_local_index import get_local_kb_index, is_confident
+from backend.utils.context_compression import CONTEXT_FALLBACK_MAX_CHARS, compress_context
+from backend.services.tip_pool import tip_pool
+from backend.services.user_profile_service import UserActivityProfileService
+from backend.services.challenge_recommender import challenge_recommender
+from backend.services.chat_tracing import annotate, chat_metrics, finish_trace, record_event, record_tokens, span, start_trace
+from backend.services.admission_control import llm_admission_controller
+from backend.services.ws_topics import publish_ledger_change
+from backend.services.conversation_memory import conversation_memory
+from backend.services.single_flight import coalesce, prompt_key, single_flight
+from backend.utils.korean_text import normalize_query
+from backend.services.hedged_retrieval import HEDGE_RETRIEVAL_ENABLED, hedged_retrieve, hedge_delay_for, hedge_stats
 
 # --- 설정 ---
 AWS_DEFAULT_REGION = "us-east-1"
@@ -20,11 +35,15 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "AIzaSyBgs37kJYWB7zsTfIrDTqe1hpOxBh
 GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID", "01354cc88406341ec") # 환경 변수에서 가져오도록 변경
 BEDROCK_MODEL_ARN = os.getenv("BEDROCK_MODEL_ARN", "arn:aws:bedrock:us-east-1:327784329358:inference-profile/us.anthropic.claude-opus-4-20250514-v1:0")
 BEDROCK_KNOWLEDGE_BASE_ID = os.getenv("BEDROCK_KNOWLEDGE_BASE_ID", "PUGB1AL6L1")
+# 부하 테스트 때 대역 서버(fake_upstream)로 연결하려면 설정 (비워 두면 실제 AWS/Google 사용)
+BEDROCK_RUNTIME_ENDPOINT_URL = os.getenv("BEDROCK_RUNTIME_ENDPOINT_URL") or None
+BEDROCK_AGENT_RUNTIME_ENDPOINT_URL = os.getenv("BEDROCK_AGENT_RUNTIME_ENDPOINT_URL") or None
+GOOGLE_SEARCH_URL = os.getenv("GOOGLE_SEARCH_URL", "https://www.googleapis.com/customsearch/v1")
 
 # --- Boto3 클라이언트 초기화 ---
 try:
-    bedrock_runtime_client = boto3.client('bedrock-runtime', region_name=AWS_DEFAULT_REGION)
-    bedrock_agent_runtime_client = boto3.client('bedrock-agent-runtime', region_name=AWS_DEFAULT_REGION)
+    bedrock_runtime_client = boto3.client('bedrock-runtime', region_name=AWS_DEFAULT_REGION, endpoint_url=BEDROCK_RUNTIME_ENDPOINT_URL)
+    bedrock_agent_runtime_client = boto3.client('bedrock-agent-runtime', region_name=AWS_DEFAULT_REGION, endpoint_url=BEDROCK_AGENT_RUNTIME_ENDPOINT_URL)
     print("[알림] AWS Bedrock 클라이언트가 성공적으로 초기화되었습니다.")
 except Exception as e:
     print(f"[오류] AWS 클라이언트 생성 중 오류가 발생했습니다: {e}")
@@ -37,9 +56,11 @@ router = APIRouter(
 )
 
 class ChatRequest(BaseModel):
-    user_id: int
+    # 이전 클라이언트 호환용으로만 받음. 사용자는 토큰(get_current_user)으로 정함
+    user_id: Optional[int] = None
     message: str
 
+@coalesce("llm", lambda system_prompt, user_prompt: prompt_key(system_prompt, user_prompt))
 def invoke_llm(system_prompt, user_prompt):
     """
     범용 Bedrock LLM 호출 함수
@@ -59,49 +80,76 @@ def invoke_llm(system_prompt, user_prompt):
             body=json.dumps(request_body)
         )
         response_body = json.loads(response.get('body').read())
+        usage = response_body.get('usage') or {}
+        record_tokens(usage.get('input_tokens', 0), usage.get('output_tokens', 0))
         return response_body['content'][0]['text']
     except Exception as e:
         print(f"Bedrock 모델 호출 중 오류가 발생했습니다: {e}")
         return None
 
+def _retrieve_and_generate(query):
+    """
+    Bedrock 지식 기반 retrieve_and_generate 호출. (답변, 출처 목록) 또는 None을 반환
+    """
+    response = bedrock_agent_runtime_client.retrieve_and_generate(
+        input={'text': query},
+        retrieveAndGenerateConfiguration={
+            'type': 'KNOWLEDGE_BASE',
+            'knowledgeBaseConfiguration': {
+                'knowledgeBaseId': BEDROCK_KNOWLEDGE_BASE_ID,
+                'modelArn': BEDROCK_MODEL_ARN
+            }
+        }
+    )
+
+    if not (response and response.get('output') and response.get('citations')):
+        return None
+
+    answer = response['output']['text']
+    source_details = []
+    for citation in response['citations']:
+        if citation.get('retrievedReferences'):
+            retrieved_ref = citation['retrievedReferences'][0]
+            location = retrieved_ref.get('location', {}).get('s3Location', {}).get('uri')
+            if location:
+                source_details.append(f"- {location}")
+    return answer, source_details
+
+def _format_kb_answer(answer, source_details):
+    if source_details:
+        return f"{answer}\n\n--- 출처 ---\n" + "\n".join(source_details)
+    return answer
+
+# 오래된 대화를 요약할 때도 같은 Bedrock 모델을 사용
+conversation_memory.set_summarizer(invoke_llm)
+
+@coalesce("knowledge_base", lambda query: normalize_query(query))
 def query_knowledge_base(query):
     """
     Bedrock 지식 기반에 질문하고 답변과 출처를 받아오는 함수
+    - 비슷한 질문에 대한 답변이 캐시에 있으면 Bedrock을 호출하지 않음
     """
+    cached = kb_answer_cache.get(query)
+    if cached:
+        print(f"[알림] 지식 기반 캐시 적중 (유사도 {cached['similarity']}, 원 질문: '{cached['matched_query']}')")
+        record_event("kb_cache_hit")
+        return _format_kb_answer(cached["answer"], cached["citations"])
+
     if not bedrock_agent_runtime_client:
         raise ConnectionError("Bedrock agent runtime client is not initialized.")
     print(f"\n[알림] Bedrock 지식 기반에서 '{query}'에 대한 정보를 검색합니다...")
     try:
-        response = bedrock_agent_runtime_client.retrieve_and_generate(
-            input={'text': query},
-            retrieveAndGenerateConfiguration={
-                'type': 'KNOWLEDGE_BASE',
-                'knowledgeBaseConfiguration': {
-                    'knowledgeBaseId': BEDROCK_KNOWLEDGE_BASE_ID,
-                    'modelArn': BEDROCK_MODEL_ARN
-                }
-            }
-        )
-        
-        if response and response.get('output') and response.get('citations'):
-            answer = response['output']['text']
-            citations = response['citations']
-            
-            source_details = []
-            for citation in citations:
-                if citation.get('retrievedReferences'):
-                    retrieved_ref = citation['retrievedReferences'][0]
-                    location = retrieved_ref.get('location', {}).get('s3Location', {}).get('uri')
-                    if location:
-                        source_details.append(f"- {location}")
-
-            if source_details:
-                formatted_answer = f"{answer}\n\n--- 출처 ---\n" + "\n".join(source_details)
-            else:
-                formatted_answer = answer
-
+        started = time.perf_counter()
+        with span("kb_retrieve_and_generate") as kb_span:
+            result = _retrieve_and_generate(query)
+            kb_span.attrs["found"] = bool(result)
+        elapsed = time.perf_counter() - started
+
+        if result:
+            answer, source_details = result
+            kb_answer_cache.put(query, answer, source_details, elapsed)
             print("[알림] 지식 기반에서 답변을 성공적으로 찾았습니다.")
-            return formatted_answer
+            return _format_kb_answer(answer, source_details)
         else:
             print("[알림] 지식 기반에서 관련 정보를 찾지 못했습니다.")
             return None
@@ -110,18 +158,55 @@ def query_knowledge_base(query):
         print(f"Bedrock 지식 기반 검색 중 오류가 발생했습니다: {e}")
         return None
 
+def search_local_kb(query, top_k=5):
+    """
+    로컬 BM25 색인에서 관련 문단을 찾는 함수 (색인이 없으면 빈 목록)
+    """
+    index = get_local_kb_index()
+    if index is None:
+        return []
+    try:
+        return index.search(query, top_k=top_k)
+    except Exception as e:
+        print(f"[오류] 로컬 지식 기반 검색 중 오류가 발생했습니다: {e}")
+        return []
+
+def format_local_passages(hits):
+    return "".join(f"--- 내부 문서: {hit['doc']}의 내용 ---\n{hit['text']}\n\n" for hit in hits)
+
+def answer_from_local_passages(query, hits):
+    """
+    로컬 색인에서 찾은 문단만으로 한 번의 LLM 호출로 답변을 생성하는 함수
+    """
+    system_prompt = """
+    당신은 주어진 내부 문서(<documents>)만을 근거로 사용자의 질문에 친절하게 답변하는 AI 어시스턴트입니다.
+    문서에 없는 내용은 추측하지 말고, 답변할 수 없다면 빈 문자열만 출력하세요.
+    """
+    answer = invoke_llm(system_prompt, f"<documents>\n{format_local_passages(hits)}</documents>\n\n사용자 질문: {query}")
+    if not answer or not answer.strip():
+        return None
+    sources = "\n".join(dict.fromkeys(f"- {hit['doc']}" for hit in hits))
+    return f"{answer}\n\n--- 출처 ---\n{sources}"
+
+def is_web_result_ok(search_results):
+    """perform_web_search 결과가 실제 본문인지 (오류/결과 없음 안내 문구가 아닌지)"""
+    return bool(search_results) and "오류가 발생했습니다" not in search_results and "결과가 없습니다" not in search_results
+
+@coalesce("web_search", lambda query: normalize_query(query), reuse_if=lambda result: is_web_result_ok(result))
 def perform_web_search(query):
     """
     Google 검색으로 URL을 찾고, 중요도 순으로(제목->본문) 실제 본문 내용을 추출하는 함수
     """
     print(f"\n[알림] 웹에서 '{query}'에 대한 최신 정보를 검색합니다...")
     try:
-        search_url = "https://www.googleapis.com/customsearch/v1"
+        search_url = GOOGLE_SEARCH_URL
         search_params = {'key': GOOGLE_API_KEY, 'cx': GOOGLE_CSE_ID, 'q': query, 'num': 3}
-        search_response = requests.get(search_url, params=search_params)
-        search_response.raise_for_status()
-        search_results = search_response.json()
-        items = search_results.get('items', [])
+        with span("google_search") as search_span:
+            search_response = requests.get(search_url, params=search_params)
+            search_response.raise_for_status()
+            search_results = search_response.json()
+            items = search_results.get('items', [])
+            search_span.attrs["results"] = len(items)
 
         if not items:
             return "웹 검색 결과가 없습니다."
@@ -134,19 +219,22 @@ def perform_web_search(query):
         for url in urls:
             if not url: continue
             try:
-                page_response = requests.get(url, headers=headers, timeout=5)
-                page_response.raise_for_status()
-                soup = BeautifulSoup(page_response.text, 'lxml')
-                text_parts = []
-                tags_to_extract = ['h1', 'h2', 'h3', 'p']
-                for tag in tags_to_extract:
-                    elements = soup.find_all(tag)
-                    for element in elements:
-                        text_parts.append(element.get_text(strip=True))
-                page_text = '\n'.join(text_parts)
+                with span("page_fetch", url=url) as fetch_span:
+                    page_response = requests.get(url, headers=headers, timeout=5)
+                    page_response.raise_for_status()
+                    soup = BeautifulSoup(page_response.text, 'lxml')
+                    text_parts = []
+                    tags_to_extract = ['h1', 'h2', 'h3', 'p']
+                    for tag in tags_to_extract:
+                        elements = soup.find_all(tag)
+                        for element in elements:
+                            text_parts.append(element.get_text(strip=True))
+                    page_text = '\n'.join(text_parts)
+                    fetch_span.attrs["chars"] = len(page_text)
                 full_context += f"--- URL: {url}의 내용 ---\n{page_text}\n\n"
             except requests.exceptions.RequestException as e:
                 print(f"  - URL {url} 방문 실패: {e}")
+                record_event("page_fetch_failed")
                 continue
 
         if not full_context:
@@ -159,17 +247,155 @@ def perform_web_search(query):
         print(f"웹 검색 과정에서 오류가 발생했습니다: {e}")
         return "정보 검색 과정에서 오류가 발생했습니다."
 
+def pick_from_tip_pool(kind, user_id):
+    """
+    사용자의 이동수단 통계, 정원 레벨, 진행 중인 챌린지 목표에 맞는 팁/전략을 풀에서 고르는 함수
+    - 알맞은 항목이 없으면 None (LLM 생성으로 대체)
+    """
+    db = SessionLocal()
+    try:
+        profile = UserActivityProfileService.get_profile(db, user_id)
+        mode_counts = profile["mode_trip_counts"]
+        garden_level = profile["garden_level"]
+        goal_type = profile["active_goal_types"][0] if profile["active_goal_types"] else None
+    except Exception as e:
+        print(f"[오류] 팁 선택용 사용자 정보를 조회하는 중 오류가 발생했습니다: {e}")
+        mode_counts, garden_level, goal_type = {}, 1, None
+    finally:
+        db.close()
+
+    item = tip_pool.pick(kind, user_id, mode_counts, garden_level=garden_level, goal_type=goal_type)
+    record_event("tip_pool_hit" if item else "tip_pool_miss")
+    return item["text"] if item else None
+
+def join_recommended_challenge(db, user_id, recommendation):
+    """추천기가 고른 기존 챌린지에 사용자를 참여시키고 답변 문자열을 반환"""
+    db.add(models.ChallengeMember(challenge_id=recommendation["challenge_id"], user_id=user_id))
+    db.commit()
+    UserActivityProfileService.invalidate(user_id)
+    print(f"[알림] 기존 챌린지 '{recommendation['title']}'를 추천했습니다. (점수 {recommendation['score']})")
+    answer = f"회원님의 활동에 맞는 챌린지를 찾아 참여 신청했어요! 챌린지 제목: {recommendation['title']}"
+    if recommendation.get("description"):
+        answer += f"\n{recommendation['description']}"
+    return answer
+
+async def recommend_ai_challenge(db, current_user, profile, user_intent):
+    """
+    사용자 활동 프로필을 바탕으로 LLM이 챌린지 아이디어를 만들고, 생성한 챌린지에 사용자를 참여시키는 함수
+    - 반환값: 사용자에게 보여줄 답변 문자열
+    """
+    mode_stats = [
+        {"mode": mode, "trips": stats["trips"], "saved_g": stats["saved_g"]}
+        for mode, stats in profile["modes"].items()
+    ]
+    # LLM에게 챌린지 아이디어를 요청하는 프롬프트
+    challenge_prompt = f"""
+    You are an AI assistant that generates eco-friendly challenge ideas.
+    Based on the user's intent and their recent activity data, generate a single challenge idea in JSON format.
+    The challenge should be simple, actionable, and encourage carbon reduction.
+    Prioritize light challenges that the user hasn't done much recently, or suggest new types of activities.
+    Avoid recommending challenges for activities the user has frequently done in the last 7 days.
+
+    User's recent activity data:
+    - Last 7 days carbon saved (g): {json.dumps(profile["last7days"])}
+    - Mode statistics: {json.dumps(mode_stats)}
+    - Total carbon saved (kg): {profile["total_saved_kg"]}
+    - Current garden level: {profile["garden_level"]}
+    - Consecutive active days: {profile["streak_days"]}
+    - Days since last trip: {profile["days_since_last_trip"] if profile["days_since_last_trip"] is not None else "no trips yet"}
+
+    Provide a title, a short description, a reward (integer, e.g., 100), a goal_type (CO2_SAVED, DISTANCE_KM, TRIP_COUNT), a goal_target_value (float), and optionally a target_mode (ANY, WALK, BIKE, PUBLIC_TRANSPORT).
+    If no specific mode is implied, use default values.
+
+    Example JSON format for a light challenge:
+    {{
+        "title": "분리수거 챌린지",
+        "description": "오늘 하루 분리수거를 완벽하게 실천해 보세요!",
+        "reward": 20,
+        "target_mode": "ANY"
+    }}
+    Example JSON format for another light challenge:
+    {{
+        "title": "샤워 10분 챌린지",
+        "description": "샤워 시간을 10분 이내로 줄여 물과 에너지를 절약해 보세요!",
+        "reward": 30,
+        "target_mode": "ANY"
+    }}
+
+    User intent: "{user_intent}"
+    Your JSON response:
+    """
+
+    challenge_idea_str = await asyncio.to_thread(invoke_llm, challenge_prompt, "")
+
+    try:
+        challenge_idea = json.loads(challenge_idea_str)
+
+        # AICallengeCreateRequest 모델에 맞게 데이터 준비
+        challenge_request = AICallengeCreateRequest(
+            title=challenge_idea.get("title", "AI 추천 챌린지"),
+            description=challenge_idea.get("description", "AI가 추천하는 친환경 챌린지입니다."),
+            reward=challenge_idea.get("reward", 30),
+            target_mode=TransportMode[challenge_idea.get("target_mode", "ANY").upper()] if challenge_idea.get("target_mode") else TransportMode.ANY,
+            goal_type=schemas.ChallengeGoalType[challenge_idea.get("goal_type", "CO2_SAVED").upper()],
+            goal_target_value=challenge_idea.get("goal_target_value", 1000.0)
+        )
+
+        challenge_response = await create_and_join_ai_challenge(
+            request=challenge_request,
+            db=db,
+            current_user=current_user # 실제 User 객체 전달
+        )
+
+        answer = challenge_response.get("message", "AI 챌린지 생성 및 참여에 실패했습니다.")
+        if challenge_response.get("challenge"):
+            answer += f" 챌린지 제목: {challenge_response['challenge'].title}"
+        return answer
+
+    except (json.JSONDecodeError, TypeError) as e:
+        print(f"[오류] AI 챌린지 아이디어 파싱 중 오류 발생: {e}")
+        return "AI 챌린지 아이디어를 이해하는 데 문제가 발생했습니다."
+    except Exception as e:
+        print(f"[오류] AI 챌린지 생성 및 참여 중 오류 발생: {e}")
+        return f"AI 챌린지 생성 및 참여 중 오류가 발생했습니다: {e}"
+
 @router.post("/")
-async def chatbot_endpoint(request: ChatRequest):
+async def chatbot_endpoint(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    admission: AdmissionSlot = Depends(llm_admission),
+):
+    # 대화 기록/크레딧/챌린지는 본문의 user_id 가 아니라 인증된 사용자 기준
+    user_id = current_user.user_id
+    # 단계별 소요 시간/토큰 수를 기록하고, 끝나면 action 별 히스토그램과 JSON 로그에 반영
+    trace = start_trace(user_id)
+    try:
+        return await _handle_chat(request, background_tasks, user_id)
+    finally:
+        finish_trace(trace)
+        # 대화 요약(백그라운드 작업)이 LLM 실행 자리를 붙잡지 않도록 응답 전에 반납
+        admission.release()
+
+async def _handle_chat(request: ChatRequest, background_tasks: BackgroundTasks, user_id: int):
     user_query = request.message
-    user_id = request.user_id # user_id는 현재 사용되지 않지만, 추후 확장성을 위해 유지
 
     print(f"사용자 질문: {user_query}\n")
 
+    # 이전 대화 요약 + 최근 대화 (후속 질문을 이해하기 위한 맥락)
+    with span("conversation_context"):
+        conversation_context = await asyncio.to_thread(conversation_memory.context, user_id)
+    conversation_block = f"<conversation>\n{conversation_context}\n</conversation>\n\n" if conversation_context else ""
+    router_conversation_section = (
+        f"Conversation so far (use it to resolve follow-up questions and make the query self-contained):\n{conversation_context}"
+        if conversation_context else ""
+    )
+
     print("[1단계] 사용자의 질문 의도를 파악합니다...")
     router_system_prompt = f"""
     You are a smart orchestrator that analyzes the user's question and decides which action to take.
     You must choose one of the following six actions and respond only in JSON format. Do not add any other explanations.
+    Always include a "confidence" field (a number between 0.0 and 1.0) indicating how sure you are about the chosen action.
 
     1. "knowledge_base_search": Choose this when the user's question is likely to be answered by a private knowledge base, containing specific information about people, projects, or internal documents. Specific topics like 'carbon reduction' or 'recycling' can also belong here.
        - Example: {{"action": "knowledge_base_search", "query": "information about ecomileage-seoul"}}
@@ -196,16 +422,20 @@ async def chatbot_endpoint(request: ChatRequest):
     7. "detect_activity_and_suggest_challenge": Choose this when the user mentions a specific eco-friendly action they have taken, like "I walked to work" or "I took the bus today". This is different from asking for a recommendation.
        - Example: {{"action": "detect_activity_and_suggest_challenge", "activity": "rode a bike"}}
 
+    {router_conversation_section}
+
     User question: "{user_query}"
     Your JSON response:
     """
     
-    router_output_str = invoke_llm(router_system_prompt, user_query)
+    with span("router_llm"):
+        router_output_str = await asyncio.to_thread(invoke_llm, router_system_prompt, user_query)
     
     action = None
     router_decision = {}
     if router_output_str is None:
         print("[오류] Bedrock 모델 호출 실패: router_output_str이 None입니다. 일반 검색을 시도합니다.")
+        record_event("router_fallback")
         action = "general_search"
         router_decision = {"query": user_query}
     else:
@@ -219,19 +449,56 @@ async def chatbot_endpoint(request: ChatRequest):
                 raise ValueError("No JSON object found in the router output")
         except (json.JSONDecodeError, ValueError, AttributeError, ConnectionError) as e:
             print(f"[오류] 조율자(Router)의 결정을 이해할 수 없습니다 또는 Bedrock 연결 오류: {e}. 일반 검색을 시도합니다.")
+            record_event("router_fallback")
             action = "general_search"
             router_decision = {"query": user_query}
 
     final_answer = ""
     query = router_decision.get("query", user_query)
     original_action = action
+    annotate(action=action, router_confidence=router_decision.get("confidence"))
+
+    prefetched_search_results = None
 
     if action == "knowledge_base_search":
         print(f"[알림] 조율자 판단: '{action}'. 지식 기반 검색을 시작합니다.")
-        final_answer = query_knowledge_base(query)
+
+        def search_knowledge_base():
+            with span("local_kb_search"):
+                local_hits = search_local_kb(query)
+            if is_confident(local_hits):
+                print("[알림] 로컬 색인에서 관련도가 높은 문단을 찾았습니다. 지식 기반 호출 없이 답변을 생성합니다.")
+                with span("local_kb_answer"):
+                    answer = answer_from_local_passages(user_query, local_hits)
+                if answer:
+                    record_event("local_kb_answered")
+                    return answer
+            try:
+                with span("knowledge_base"):
+                    return query_knowledge_base(query)
+            except ConnectionError as e:
+                print(f"[오류] {e}")
+                return None
+
+        if HEDGE_RETRIEVAL_ENABLED:
+            # 지식 기반이 늦거나 실패할 때 웹 검색 지연을 순차로 더하지 않도록 동시에 실행
+            with span("hedged_retrieval") as hedge_span:
+                winner, final_answer, prefetched_search_results = await hedged_retrieve(
+                    search_knowledge_base,
+                    lambda: perform_web_search(query),
+                    kb_ok=bool,
+                    web_ok=is_web_result_ok,
+                    delay=hedge_delay_for(router_decision.get("confidence")),
+                )
+                hedge_span.attrs["winner"] = winner
+            if winner != "kb":
+                final_answer = ""
+        else:
+            final_answer = search_knowledge_base()
         
         if not final_answer:
             print("[알림] 지식 기반에서 답변을 찾지 못했습니다. 웹 검색으로 전환합니다.")
+            record_event("kb_to_web_fallback")
             action = "general_search"
 
     if action == "general_search":
@@ -240,15 +507,36 @@ async def chatbot_endpoint(request: ChatRequest):
         else:
             print(f"[알림] 조율자 판단: '{action}'. 웹 검색을 시작합니다.")
 
-        search_results = perform_web_search(query)
-
-        if "오류가 발생했습니다" in search_results or "결과가 없습니다" in search_results:
+        if prefetched_search_results:
+            search_results = prefetched_search_results
+        else:
+            with span("web_search"):
+                search_results = await asyncio.to_thread(perform_web_search, query)
+        # 로컬 색인에서 찾은 내부 문서 문단도 함께 근거로 사용
+        with span("local_kb_search"):
+            local_context = format_local_passages(hit for hit in search_local_kb(query, top_k=3) if hit["score"] > 0)
+        web_failed = not is_web_result_ok(search_results)
+        if local_context:
+            search_results = local_context if web_failed else local_context + search_results
+            web_failed = False
+
+        if web_failed:
             final_answer = search_results
         else:
-            max_context_length = 20000
-            if len(search_results) > max_context_length:
-                print(f"\n[알림] 추출된 정보가 너무 길어({len(search_results)}자), 핵심 내용만 요약하도록 {max_context_length}자로 축소합니다.")
-                search_results = search_results[:max_context_length]
+            # 압축(BM25/MinHash)은 입력 길이에 비례하므로 먼저 길이를 제한하고, 이벤트 루프를 막지 않도록 스레드에서 실행
+            if len(search_results) > CONTEXT_FALLBACK_MAX_CHARS:
+                print(f"\n[알림] 추출된 정보가 너무 길어({len(search_results)}자), 핵심 내용만 요약하도록 {CONTEXT_FALLBACK_MAX_CHARS}자로 축소합니다.")
+                search_results = search_results[:CONTEXT_FALLBACK_MAX_CHARS]
+            with span("context_compression") as compression_span:
+                compressed_results, compression_stats = await asyncio.to_thread(compress_context, user_query, search_results)
+                compression_span.attrs.update(
+                    original_tokens=compression_stats["original_tokens"],
+                    compressed_tokens=compression_stats["compressed_tokens"],
+                )
+            if compressed_results:
+                print(f"\n[알림] 검색 결과를 질문과 관련된 문단 {compression_stats['selected_passages']}/{compression_stats['passages']}개로 압축했습니다. "
+                      f"(약 {compression_stats['original_tokens']} → {compression_stats['compressed_tokens']} 토큰, 중복 {compression_stats['duplicates_removed']}개 제거)")
+                search_results = compressed_results
             
             print("\n[3단계] 검색 결과를 바탕으로 최종 답변을 생성합니다...")
             final_answer_system_prompt = """
@@ -261,208 +549,185 @@ async def chatbot_endpoint(request: ChatRequest):
             if original_action == "general_search":
                 final_answer_system_prompt += "\n\n답변을 마친 후, 마지막에는 **주어진 검색 결과와 사용자의 질문 내용을 모두 고려하여** 자연스럽게 연결되는 환경 보호나 탄소 절감 관련 제안을 한 문장 덧붙여주세요. \n    예를 들어, 날씨가 좋다는 내용이 있으면 자전거 타기를 추천하고, 미세먼지가 많다는 내용이 있으면 대중교통 이용을 추천하고, 탄소 절감 관련 내용이 있으면 일상생활에서 실천할 수 있는 팁을 제공할 수 있습니다."
 
-            final_answer = invoke_llm(final_answer_system_prompt, f"<search_results>\n{search_results}\n</search_results>\n\n사용자 질문: {user_query}")
+            with span("final_generation"):
+                final_answer = await asyncio.to_thread(invoke_llm, final_answer_system_prompt, f"{conversation_block}<search_results>\n{search_results}\n</search_results>\n\n사용자 질문: {user_query}")
 
     elif action == "detect_activity_and_suggest_challenge":
         print("[알림] 조율자 판단: 'detect_activity_and_suggest_challenge'. 활동 감지 및 챌린지 추천/검증을 시작합니다.")
-        db = next(get_db())
-        
-        # 활동 키워드 및 해당 TransportMode 매핑
-        activity_keywords = {
-            "자전거": TransportMode.BIKE,
-            "걸어서": TransportMode.WALK,
-            "도보": TransportMode.WALK,
-            "버스": TransportMode.BUS,
-            "지하철": TransportMode.SUBWAY,
-        }
+        db = SessionLocal()
+        try:
+            # 활동 키워드 및 해당 TransportMode 매핑
+            activity_keywords = {
+                "자전거": TransportMode.BIKE,
+                "걸어서": TransportMode.WALK,
+                "도보": TransportMode.WALK,
+                "버스": TransportMode.BUS,
+                "지하철": TransportMode.SUBWAY,
+            }
         
-        detected_activity_mode = None
-        detected_keyword = None
-        for keyword, mode in activity_keywords.items():
-            if keyword in user_query:
-                detected_activity_mode = mode
-                detected_keyword = keyword
-                break
-
-        if not detected_activity_mode:
-            # 관련 활동이 감지되지 않으면 일반 답변으로 전환
-            final_answer = invoke_llm("You are a friendly AI assistant.", user_query)
-            return {"response": final_answer}
-
-        # 사용자의 오늘 활동 기록 확인 (Task 2.3)
-        from datetime import date, timedelta
-        today_start = date.today()
-        # KST 고려 (UTC+9)
-        utc_today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(hours=9)
-        if datetime.utcnow().hour < 9: # UTC 기준 00:00-08:59는 한국의 같은 날
-             utc_today_start -= timedelta(days=1)
-        utc_today_end = utc_today_start + timedelta(days=1)
-
-
-        mobility_log = db.query(models.MobilityLog).filter(
-            models.MobilityLog.user_id == user_id,
-            models.MobilityLog.transport_mode == detected_activity_mode,
-            models.MobilityLog.started_at >= utc_today_start,
-            models.MobilityLog.started_at < utc_today_end
-        ).order_by(models.MobilityLog.started_at.desc()).first()
-
-        if mobility_log:
-            # True Case (2.3): 활동 기록이 있을 경우
-            print(f"[알림] 사용자의 '{detected_activity_mode.value}' 활동 기록을 확인했습니다.")
+            detected_activity_mode = None
+            detected_keyword = None
+            for keyword, mode in activity_keywords.items():
+                if keyword in user_query:
+                    detected_activity_mode = mode
+                    detected_keyword = keyword
+                    break
+
+            if not detected_activity_mode:
+                # 관련 활동이 감지되지 않으면 일반 답변으로 전환
+                record_event("activity_not_detected")
+                with span("general_llm"):
+                    final_answer = await asyncio.to_thread(invoke_llm, "You are a friendly AI assistant.", user_query)
+                return {"response": final_answer}
+
+            # 사용자의 오늘 활동 기록 확인 (Task 2.3)
+            from datetime import date, datetime, timedelta
+            today_start = date.today()
+            # KST 고려 (UTC+9)
+            utc_today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(hours=9)
+            if datetime.utcnow().hour < 9: # UTC 기준 00:00-08:59는 한국의 같은 날
+                 utc_today_start -= timedelta(days=1)
+            utc_today_end = utc_today_start + timedelta(days=1)
+
+
+            record_event("activity_detected")
+            mobility_log = db.query(models.MobilityLog).filter(
+                models.MobilityLog.user_id == user_id,
+                models.MobilityLog.mode == detected_activity_mode,
+                models.MobilityLog.started_at >= utc_today_start,
+                models.MobilityLog.started_at < utc_today_end
+            ).order_by(models.MobilityLog.started_at.desc()).first()
+
+            if mobility_log:
+                # True Case (2.3): 활동 기록이 있을 경우
+                print(f"[알림] 사용자의 '{detected_activity_mode.value}' 활동 기록을 확인했습니다.")
             
-            # 추가 크레딧 지급 로직 (예: 거리 1km당 5 크레딧)
-            bonus_credits = int(mobility_log.distance_km * 5)
+                # 추가 크레딧 지급 로직 (예: 거리 1km당 5 크레딧)
+                bonus_credits = int(mobility_log.distance_km * 5)
             
-            # 크레딧 추가
-            crud.create_credit_log(db, user_id=user_id, points=bonus_credits, reason=f"챗봇 활동 확인 보너스: {detected_keyword}")
+                # 크레딧 추가
+                db.add(models.CreditsLedger(
+                    user_id=user_id,
+                    ref_log_id=mobility_log.log_id,
+                    type=schemas.CreditType.EARN,
+                    points=bonus_credits,
+                    reason=f"챗봇 활동 확인 보너스: {detected_keyword}",
+                    created_at=datetime.utcnow()
+                ))
+                db.commit()
+                UserActivityProfileService.invalidate(user_id)
+                publish_ledger_change(user_id, bonus_credits)
+                record_event("activity_bonus_granted")
             
-            response_text = f"네! 오늘 {mobility_log.distance_km:.1f}km를 {detected_keyword}(으)로 이동하신 기록을 확인했어요. 정말 멋져요! 추가 보너스로 {bonus_credits}C를 드렸습니다. 🎁"
-            final_answer = response_text
-            return {"response": final_answer}
+                response_text = f"네! 오늘 {mobility_log.distance_km:.1f}km를 {detected_keyword}(으)로 이동하신 기록을 확인했어요. 정말 멋져요! 추가 보너스로 {bonus_credits}C를 드렸습니다. 🎁"
+                final_answer = response_text
+                return {"response": final_answer}
 
-        else:
-            # False Case (2.3) / Challenge Suggestion (2.2): 활동 기록이 없을 경우
-            print(f"[알림] 사용자의 '{detected_activity_mode.value}' 활동 기록이 없습니다. 관련 챌린지를 찾아봅니다.")
+            else:
+                # False Case (2.3) / Challenge Suggestion (2.2): 활동 기록이 없을 경우
+                print(f"[알림] 사용자의 '{detected_activity_mode.value}' 활동 기록이 없습니다. 관련 챌린지를 찾아봅니다.")
             
-            # 참여 가능한 관련 챌린지 검색
-            joined_challenge_ids = {m.challenge_id for m in db.query(models.ChallengeMember).filter(models.ChallengeMember.user_id == user_id).all()}
+                # 참여 가능한 관련 챌린지 검색
+                joined_challenge_ids = {m.challenge_id for m in db.query(models.ChallengeMember).filter(models.ChallengeMember.user_id == user_id).all()}
             
-            available_challenges = db.query(models.Challenge).filter(
-                models.Challenge.challenge_id.notin_(joined_challenge_ids),
-                models.Challenge.title.contains(detected_keyword)
-            ).all()
-
-            if available_challenges:
-                # 관련 챌린지가 있을 경우 제안
-                suggested_challenge = available_challenges[0]
+                available_challenges = db.query(models.Challenge).filter(
+                    models.Challenge.challenge_id.notin_(joined_challenge_ids),
+                    models.Challenge.title.contains(detected_keyword)
+                ).all()
+
+                if available_challenges:
+                    # 관련 챌린지가 있을 경우 제안
+                    suggested_challenge = available_challenges[0]
                 
-                suggestion_prompt = f'''
-                You are a friendly and encouraging AI assistant.
-                A user mentioned they did an activity: "{user_query}".
-                Your task is to naturally praise their action and suggest the following challenge.
-                Keep the response concise and friendly.
+                    suggestion_prompt = f'''
+                    You are a friendly and encouraging AI assistant.
+                    A user mentioned they did an activity: "{user_query}".
+                    Your task is to naturally praise their action and suggest the following challenge.
+                    Keep the response concise and friendly.
                 
-                Challenge to suggest:
-                - Title: {suggested_challenge.title}
-                - Description: {suggested_challenge.description}
+                    Challenge to suggest:
+                    - Title: {suggested_challenge.title}
+                    - Description: {suggested_challenge.description}
                 
-                Your response should end with a question asking if they want to join.
-                Example: "자전거를 타셨군요! 정말 좋은 습관이에요. 혹시 '{suggested_challenge.title}'에 참여해보시는 건 어떨까요?"
-                '''
+                    Your response should end with a question asking if they want to join.
+                    Example: "자전거를 타셨군요! 정말 좋은 습관이에요. 혹시 '{suggested_challenge.title}'에 참여해보시는 건 어떨까요?"
+                    '''
                 
-                response_text = invoke_llm(suggestion_prompt, "")
+                    with span("suggestion_llm"):
+                        response_text = await asyncio.to_thread(invoke_llm, suggestion_prompt, "")
                 
-                return {{
-                    "response": response_text,
-                    "suggestion": {{
-                        "type": "challenge",
-                        "challenge_id": suggested_challenge.challenge_id,
-                        "title": suggested_challenge.title
-                    }}
-                }}
-            else:
-                # 관련 챌린지가 없을 경우
-                final_answer = f"아, 그러셨군요! 아쉽게도 오늘 {detected_keyword} 이동 기록이 확인되지 않네요. 이동 기록이 있어야 보너스 크레딧을 받을 수 있어요."
-                return {{"response": final_answer}}
+                    return {
+                        "response": response_text,
+                        "suggestion": {
+                            "type": "challenge",
+                            "challenge_id": suggested_challenge.challenge_id,
+                            "title": suggested_challenge.title
+                        }
+                    }
+                else:
+                    # 관련 챌린지가 없을 경우
+                    final_answer = f"아, 그러셨군요! 아쉽게도 오늘 {detected_keyword} 이동 기록이 확인되지 않네요. 이동 기록이 있어야 보너스 크레딧을 받을 수 있어요."
+                    return {"response": final_answer}
+        finally:
+            db.close()
 
     elif action == "recommend_challenge":
         print("[알림] 조율자 판단: 'recommend_challenge'. AI 챌린지를 추천하고 생성합니다.")
         
-        # 사용자 대시보드 데이터 가져오기
-        db_session = next(get_db())
-        current_user_obj = db_session.query(User).filter(User.user_id == user_id).first()
-        if not current_user_obj:
-            raise HTTPException(status_code=404, detail="User not found for challenge recommendation.")
-        
-        dashboard_data = await get_dashboard(current_user=current_user_obj, db=db_session)
-        
-        # LLM에게 챌린지 아이디어를 요청하는 프롬프트
-        challenge_prompt = f"""
-        You are an AI assistant that generates eco-friendly challenge ideas.
-        Based on the user's intent and their recent activity data, generate a single challenge idea in JSON format.
-        The challenge should be simple, actionable, and encourage carbon reduction.
-        Prioritize light challenges that the user hasn't done much recently, or suggest new types of activities.
-        Avoid recommending challenges for activities the user has frequently done in the last 7 days.
-        
-        User's recent activity data:
-        - Last 7 days carbon saved (g): {json.dumps([{{"date": str(d.date), "saved_g": d.saved_g}} for d in dashboard_data.last7days])}
-        - Mode statistics: {json.dumps([{{"mode": m.mode, "saved_g": m.saved_g}} for m in dashboard_data.modeStats])}
-        - Total carbon saved (kg): {dashboard_data.total_saved}
-        - Current garden level: {dashboard_data.garden_level}
-        
-        Provide a title, a short description, a reward (integer, e.g., 100), a goal_type (CO2_SAVED, DISTANCE_KM, TRIP_COUNT), a goal_target_value (float), and optionally a target_mode (ANY, WALK, BIKE, PUBLIC_TRANSPORT).
-        If no specific mode is implied, use default values.
-        
-        Example JSON format for a light challenge:
-        {{
-            "title": "분리수거 챌린지",
-            "description": "오늘 하루 분리수거를 완벽하게 실천해 보세요!",
-            "reward": 20,
-            "target_mode": "ANY"
-        }}
-        Example JSON format for another light challenge:
-        {{
-            "title": "샤워 10분 챌린지",
-            "description": "샤워 시간을 10분 이내로 줄여 물과 에너지를 절약해 보세요!",
-            "reward": 30,
-            "target_mode": "ANY"
-        }}
-        
-        User intent: "{router_decision.get("user_intent", user_query)}"
-        Your JSON response:
-        """
-        
-        challenge_idea_str = invoke_llm(challenge_prompt, "")
-        
+        # 사용자 활동 프로필 가져오기 (대시보드 전체를 다시 계산하지 않고 캐시된 요약 사용)
+        db_session = SessionLocal()
         try:
-            challenge_idea = json.loads(challenge_idea_str)
-            
-            # AICallengeCreateRequest 모델에 맞게 데이터 준비
-            challenge_request = AICallengeCreateRequest(
-                title=challenge_idea.get("title", "AI 추천 챌린지"),
-                description=challenge_idea.get("description", "AI가 추천하는 친환경 챌린지입니다."),
-                reward=challenge_idea.get("reward", 30),
-                target_mode=TransportMode[challenge_idea.get("target_mode", "ANY").upper()] if challenge_idea.get("target_mode") else TransportMode.ANY,
-                goal_type=schemas.ChallengeGoalType[challenge_idea.get("goal_type", "CO2_SAVED").upper()],
-                goal_target_value=challenge_idea.get("goal_target_value", 1000.0)
-            )
-            
-            # 실제 User 객체를 데이터베이스에서 조회 (이미 위에서 current_user_obj로 가져옴)
-            
-            challenge_response = await create_and_join_ai_challenge(
-                request=challenge_request,
-                db=db_session,
-                current_user=current_user_obj # 실제 User 객체 전달
-            )
-            
-            final_answer = challenge_response.get("message", "AI 챌린지 생성 및 참여에 실패했습니다.")
-            if challenge_response.get("challenge"):
-                final_answer += f" 챌린지 제목: {challenge_response['challenge'].title}"
-            
-        except json.JSONDecodeError as e:
-            print(f"[오류] AI 챌린지 아이디어 파싱 중 오류 발생: {e}")
-            final_answer = "AI 챌린지 아이디어를 이해하는 데 문제가 발생했습니다."
-        except Exception as e:
-            print(f"[오류] AI 챌린지 생성 및 참여 중 오류 발생: {e}")
-            final_answer = f"AI 챌린지 생성 및 참여 중 오류가 발생했습니다: {e}"
+            current_user_obj = db_session.query(User).filter(User.user_id == user_id).first()
+            if not current_user_obj:
+                raise HTTPException(status_code=404, detail="User not found for challenge recommendation.")
+            with span("user_profile"):
+                profile = await asyncio.to_thread(UserActivityProfileService.get_profile, db_session, user_id)
+            # 참여 가능한 기존 챌린지 중 점수가 충분한 것이 있으면 LLM 생성 없이 바로 참여
+            with span("challenge_recommender") as recommender_span:
+                recommendations = await asyncio.to_thread(
+                    challenge_recommender.recommend, db_session, user_id, profile["mode_trip_counts"]
+                )
+                recommender_span.attrs["top_score"] = recommendations[0]["score"] if recommendations else None
+            if recommendations:
+                record_event("challenge_recommended")
+                final_answer = join_recommended_challenge(db_session, user_id, recommendations[0])
+            else:
+                print("[알림] 추천 점수가 기준보다 낮습니다. LLM으로 새 챌린지를 생성합니다.")
+                record_event("challenge_llm_fallback")
+                with span("challenge_llm"):
+                    final_answer = await recommend_ai_challenge(db_session, current_user_obj, profile, router_decision.get("user_intent", user_query))
+        finally:
+            db_session.close()
 
     elif action == "get_carbon_reduction_tip":
         print("[알림] 조율자 판단: 'get_carbon_reduction_tip'. 탄소 절감 팁을 생성합니다.")
-        tip_system_prompt = f"""
-        You are an AI assistant that provides concise and actionable tips for carbon reduction and eco-friendly practices.
-        Generate a single, practical tip based on the user's intent.
-        The tip should be encouraging and easy to understand.
-        """
-        final_answer = invoke_llm(tip_system_prompt, router_decision.get("user_intent", user_query))
+        with span("tip_pool"):
+            final_answer = await asyncio.to_thread(pick_from_tip_pool, "tip", user_id)
+        if final_answer:
+            print("[알림] 미리 생성된 팁 풀에서 답변합니다.")
+        else:
+            tip_system_prompt = f"""
+            You are an AI assistant that provides concise and actionable tips for carbon reduction and eco-friendly practices.
+            Generate a single, practical tip based on the user's intent.
+            The tip should be encouraging and easy to understand.
+            """
+            with span("tip_llm"):
+                final_answer = await asyncio.to_thread(invoke_llm, tip_system_prompt, router_decision.get("user_intent", user_query))
 
     elif action == "get_goal_strategy":
         print("[알림] 조율자 판단: 'get_goal_strategy'. 목표 달성 전략을 생성합니다.")
-        strategy_system_prompt = f"""
-        You are an AI assistant that provides effective strategies for achieving eco-friendly goals and improving progress.
-        Generate a single, actionable strategy based on the user's intent.
-        The strategy should be motivating and provide clear steps.
-        """
-        final_answer = invoke_llm(strategy_system_prompt, router_decision.get("user_intent", user_query))
+        with span("tip_pool"):
+            final_answer = await asyncio.to_thread(pick_from_tip_pool, "strategy", user_id)
+        if final_answer:
+            print("[알림] 미리 생성된 전략 풀에서 답변합니다.")
+        else:
+            strategy_system_prompt = f"""
+            You are an AI assistant that provides effective strategies for achieving eco-friendly goals and improving progress.
+            Generate a single, actionable strategy based on the user's intent.
+            The strategy should be motivating and provide clear steps.
+            """
+            with span("strategy_llm"):
+                final_answer = await asyncio.to_thread(invoke_llm, strategy_system_prompt, router_decision.get("user_intent", user_query))
 
     elif action == "direct_answer":
         print("[알림] 조율자 판단: 'direct_answer'. 즉시 답변합니다.")
@@ -470,7 +735,70 @@ async def chatbot_endpoint(request: ChatRequest):
     
     if not final_answer:
         final_answer = "죄송합니다. 요청을 처리하는 데 문제가 발생했습니다."
+        record_event("empty_answer")
+    annotate(final_action=action)
 
     print("\n--- 최종 답변 ---")
     print(final_answer)
-    return {"response": final_answer}
\ No newline at end of file
+    # 응답을 보낸 뒤 대화 기록에 추가 (필요하면 오래된 대화를 요약)
+    background_tasks.add_task(conversation_memory.add_turn, user_id, user_query, final_answer)
+    return {"response": final_answer}
+
+@router.get("/kb-cache/stats")
+async def get_kb_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    """지식 기반 답변 캐시 적중률과 절약한 Bedrock 호출 시간 (관리자 전용)"""
+    return kb_answer_cache.stats()
+
+@router.post("/kb-cache/purge")
+async def purge_kb_cache(current_user: User = Depends(get_current_admin_user)):
+    """지식 기반 재동기화 후 캐시를 비웁니다. (관리자 전용)"""
+    removed = kb_answer_cache.purge()
+    return {"message": f"지식 기반 답변 캐시 {removed}건을 삭제했습니다.", "removed": removed}
+
+@router.get("/hedge/stats")
+async def get_hedge_stats(current_user: User = Depends(get_current_admin_user)):
+    """지식 기반/웹 검색 동시 실행(hedged retrieval) 승패와 절약 시간 (관리자 전용)"""
+    return hedge_stats.snapshot()
+
+@router.get("/single-flight/stats")
+async def get_single_flight_stats(current_user: User = Depends(get_current_admin_user)):
+    """동일 요청 합치기(single-flight)로 줄어든 LLM/검색 호출 수 (관리자 전용)"""
+    return single_flight.stats()
+
+@router.get("/tip-pool/stats")
+async def get_tip_pool_stats(current_user: User = Depends(get_current_admin_user)):
+    """미리 생성된 팁/전략 풀 상태와 LLM 대체 횟수 (관리자 전용)"""
+    return tip_pool.stats()
+
+@router.get("/profile-cache/stats")
+async def get_profile_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    """사용자 활동 프로필 캐시 적중률 (관리자 전용)"""
+    return UserActivityProfileService.stats()
+
+@router.get("/challenge-recommender/stats")
+async def get_challenge_recommender_stats(current_user: User = Depends(get_current_admin_user)):
+    """기존 챌린지 추천 비율(LLM 생성 대체)과 평균 추천 시간 (관리자 전용)"""
+    return challenge_recommender.stats()
+
+@router.get("/metrics")
+async def get_chat_metrics(current_user: User = Depends(get_current_admin_user)):
+    """action 별 응답 시간 히스토그램, 단계별 소요 시간, Bedrock 토큰 수, 캐시 적중/대체 경로 횟수 (관리자 전용)"""
+    return chat_metrics.snapshot()
+
+@router.get("/admission/stats")
+async def get_admission_stats(current_user: User = Depends(get_current_admin_user)):
+    """LLM 엔드포인트(/chat/, /api/ai-challenges/*) 동시 실행 수, 대기열 길이, 대기 시간, 거절 횟수 (관리자 전용)"""
+    return llm_admission_controller.stats()
+
+@router.get("/memory/stats")
+async def get_conversation_memory_stats(current_user: User = Depends(get_current_admin_user)):
+    """대화 기록 요약으로 절약한 토큰 수 (전체 기록을 보냈을 때 대비, 관리자 전용)"""
+    return conversation_memory.stats()
+
+@router.delete("/memory/{user_id}")
+async def clear_conversation_memory(user_id: int, current_user: User = Depends(get_current_user)):
+    """사용자의 챗봇 대화 기록을 삭제합니다. (본인 또는 관리자)"""
+    if current_user.user_id != user_id and current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="본인의 대화 기록만 삭제할 수 있습니다.")
+    await asyncio.to_thread(conversation_memory.clear, user_id)
+    return {"message": "대화 기록이 삭제되었습니다."}
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+챗봇(/chat/) 부하 테스트 스크립트
+- N명의 동시 사용자가 질문 목록을 돌아가며 보내고 처리량과 지연 시간 분위수를 출력
+- 실제 Bedrock/Google 대신 대역 서버를 쓰려면 먼저 fake_upstream 을 띄우고 백엔드를 그쪽으로 연결
+    python -m backend.fake_upstream --port 8900
+    BEDROCK_RUNTIME_ENDPOINT_URL=http://localhost:8900 BEDROCK_AGENT_RUNTIME_ENDPOINT_URL=http://localhost:8900 \\
+    GOOGLE_SEARCH_URL=http://localhost:8900/customsearch/v1 AWS_ACCESS_KEY_ID=fake AWS_SECRET_ACCESS_KEY=fake \\
+    uvicorn backend.main:app --port 8000
+    python -m backend.bench_chat --users 50 --requests-per-user 10
+- /chat/ 는 로그인이 필요하므로 서버와 같은 SECRET_KEY/ALGORITHM 으로 사용자별 토큰을 만들어 보냄
+  (--user-id-base 부터 --users 명의 사용자가 DB 에 있어야 함, 서버 집계는 --admin-user-id 의 관리자 토큰으로 조회)
+"""
+import argparse
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from dotenv import load_dotenv
+from jose import jwt
+
+load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+
+QUESTIONS = [
+    "탄소 중립이 뭐야?",
+    "오늘 서울 날씨 어때?",
+    "탄소 줄이는 팁 하나 알려줘",
+    "이번 달 목표 달성 전략 알려줘",
+    "안녕하세요",
+    "재활용 분리배출 방법 알려줘",
+    "대중교통 이용하면 탄소가 얼마나 줄어?",
+    "최신 기후 변화 뉴스 알려줘",
+]
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def bearer(user_id):
+    token = jwt.encode({"sub": str(user_id)}, os.getenv("SECRET_KEY"), algorithm=os.getenv("ALGORITHM"))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def run_user(session, url, user_id, count, timeout, latencies, errors, lock):
+    for i in range(count):
+        question = QUESTIONS[(user_id + i) % len(QUESTIONS)]
+        started = time.perf_counter()
+        try:
+            response = session.post(url, json={"message": question}, timeout=timeout)
+            ok = response.status_code == 200
+            key = None if ok else f"HTTP {response.status_code}"
+        except requests.exceptions.RequestException as e:
+            ok, key = False, type(e).__name__
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors[key] = errors.get(key, 0) + 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="챗봇 부하 테스트")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=10, help="동시 사용자 수")
+    parser.add_argument("--requests-per-user", type=int, default=5)
+    parser.add_argument("--user-id-base", type=int, default=1, help="첫 사용자 ID (사용자마다 1씩 증가)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--admin-user-id", type=int, default=None, help="서버 집계(/chat/metrics, 관리자 전용)를 조회할 관리자 ID")
+    args = parser.parse_args()
+
+    url = f"{args.base_url.rstrip('/')}/chat/"
+    latencies, errors, lock = [], {}, threading.Lock()
+    print(f"부하 테스트 시작: 동시 사용자 {args.users}명 x {args.requests_per_user}회 -> {url}")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        for n in range(args.users):
+            session = requests.Session()
+            session.headers.update(bearer(args.user_id_base + n))
+            executor.submit(run_user, session, url, args.user_id_base + n, args.requests_per_user,
+                            args.timeout, latencies, errors, lock)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    total = len(latencies) + sum(errors.values())
+    print(f"\n총 {total}건 / {elapsed:.2f}초 -> 처리량 {len(latencies) / elapsed:.2f} req/s (성공 기준)")
+    print(f"성공 {len(latencies)}건, 실패 {sum(errors.values())}건 {errors if errors else ''}")
+    if latencies:
+        print("응답 시간 (ms): " + ", ".join(
+            f"p{int(q * 100)}={percentile(latencies, q):.0f}" for q in (0.5, 0.9, 0.95, 0.99)
+        ) + f", max={latencies[-1]:.0f}, mean={sum(latencies) / len(latencies):.0f}")
+
+    # 서버 쪽 단계별 집계 (/chat/metrics)
+    metrics = {}
+    if args.admin_user_id is not None:
+        try:
+            response = requests.get(f"{args.base_url.rstrip('/')}/chat/metrics", headers=bearer(args.admin_user_id), timeout=10)
+            if response.status_code == 200:
+                metrics = response.json()
+            else:
+                print(f"\n서버 집계 조회 실패: HTTP {response.status_code}")
+        except (requests.exceptions.RequestException, ValueError):
+            pass
+    for action, entry in sorted(metrics.items()):
+        latency = entry["latency"]
+        print(f"\n[{action}] {latency['count']}건, p50={latency['p50_ms']}ms, p95={latency['p95_ms']}ms, "
+              f"토큰 in/out={entry['input_tokens']}/{entry['output_tokens']}")
+        slowest = sorted(entry["stages"].items(), key=lambda item: -item[1]["p95_ms"])[:5]
+        for stage, hist in slowest:
+            print(f"  - {stage}: {hist['count']}회, p50={hist['p50_ms']}ms, p95={hist['p95_ms']}ms")
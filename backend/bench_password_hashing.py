@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+로그인 비밀번호 검증 벤치마크 (services/password_hasher.py)
+- 요청 스레드풀(FastAPI 동기 라우트와 같은 크기, 기본 40)에 로그인 N건을 한꺼번에 넣고 처리량과 p50/p99 를 측정
+- 같은 시간에 가벼운 라우트(해시 없음) 요청도 섞어 넣어 그 지연을 함께 측정
+- 비교: 요청 스레드에서 바로 bcrypt 계산(이전 방식에 해시만 붙인 경우) vs 전용 풀 + 대기 상한(넘으면 503)
+- cost 변경 후 재해시, 평문 저장값 이전도 확인
+    python -m backend.bench_password_hashing --logins 200 --rounds 10
+"""
+import argparse
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from backend.services.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def fmt(samples):
+    return ", ".join(f"p{int(q * 100)}={percentile(samples, q):.1f}" for q in (0.5, 0.99)) + " ms"
+
+
+def run(label, login, args):
+    """요청 스레드풀에 로그인 args.logins 건과 가벼운 요청 args.light 건을 섞어 넣음"""
+    requests = ThreadPoolExecutor(max_workers=args.request_threads)
+    login_lat, light_lat = [], []
+    outcome = {"ok": 0, "busy": 0}
+    lock = threading.Lock()
+
+    def login_request(submitted):
+        try:
+            login()
+            key = "ok"
+        except PasswordHasherBusy:
+            key = "busy"
+        with lock:
+            outcome[key] += 1
+            if key == "ok":
+                login_lat.append((time.perf_counter() - submitted) * 1000)
+
+    def light_request(submitted):
+        with lock:
+            light_lat.append((time.perf_counter() - submitted) * 1000)
+
+    started = time.perf_counter()
+    futures = []
+    every = max(1, args.logins // max(1, args.light))
+    for i in range(args.logins):
+        futures.append(requests.submit(login_request, time.perf_counter()))
+        if i % every == 0:
+            futures.append(requests.submit(light_request, time.perf_counter()))
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - started
+    requests.shutdown()
+    login_lat.sort()
+    light_lat.sort()
+    print(f"{label:<26} 로그인 성공 {outcome['ok']:>4} / 503 {outcome['busy']:>4} | "
+          f"{outcome['ok'] / elapsed:>6.1f}/초 {fmt(login_lat)} | 가벼운 요청 {fmt(light_lat)}")
+
+
+def check_migration(args):
+    old = PasswordHasher(rounds=args.rounds - 1, workers=1)
+    new = PasswordHasher(rounds=args.rounds, workers=1)
+    stored = old.hash("secret-pw")
+    ok, rehashed = new.verify_and_update("secret-pw", stored)
+    print(f"\n[cost 변경 {args.rounds - 1} -> {args.rounds}] 일치 {ok}, 새 해시 {'있음' if rehashed else '없음'}"
+          f" ({rehashed[:7] if rehashed else '-'})")
+    ok, migrated = new.verify_and_update("secret-pw", "secret-pw")
+    wrong, _ = new.verify_and_update("wrong-pw", "secret-pw")
+    print(f"[평문 저장값] 일치 {ok}, 해시로 이전 {'예' if migrated else '아니오'}, 틀린 비밀번호 일치 {wrong}")
+    ok, again = new.verify_and_update("secret-pw", migrated)
+    print(f"[이전된 해시로 다시 로그인] 일치 {ok}, 재해시 {'예' if again else '아니오'}")
+
+
+def main(args):
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds)
+    stored = context.hash("secret-pw")
+    started = time.perf_counter()
+    context.verify("secret-pw", stored)
+    print(f"bcrypt rounds={args.rounds}: 검증 1회 {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"요청 스레드 {args.request_threads}개, 로그인 {args.logins}건 동시\n")
+
+    run("요청 스레드에서 바로 계산", lambda: context.verify("secret-pw", stored), args)
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers, max_pending=args.max_pending,
+                            max_wait=args.max_wait)
+    run(f"전용 풀 ({args.workers}개, 상한 {args.max_pending})",
+        lambda: hasher.verify_and_update("secret-pw", stored), args)
+    print(f"  통계: {hasher.stats()}")
+    check_migration(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로그인 비밀번호 검증 벤치마크")
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--light", type=int, default=50, help="섞어 넣을 가벼운 요청 수")
+    parser.add_argument("--request-threads", type=int, default=40, help="요청 스레드풀 크기 (anyio 기본 40)")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=16)
+    parser.add_argument("--max-wait", type=float, default=5.0)
+    main(parser.parse_args())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+세션 저장소 구현별 벤치마크 (memory / sqlite / redis)
+- 세션 N개를 만든 뒤 스레드 T개로 get(조회)과 update(데이터 변경) 처리량과 지연을 측정
+- sqlite 는 last_activity 모아 쓰기(기본) 와 조회마다 바로 쓰기(--flush-seconds 0 과 같음)를 함께 비교
+- redis 는 --redis-url 이 없으면 backend/fake_redis.py 대역 서버를 이 프로세스 안에 띄워 사용
+  (대역 서버는 파이썬이라 실제 Redis 보다 느림. 왕복 수와 파이프라인 효과를 보는 용도)
+- 각 구현마다 저장소 인스턴스 두 개(= 워커 두 개) 사이에 생성/변경/연장/삭제가 보이는지도 확인
+    python -m backend.bench_session_backends --sessions 20000 --ops 20000 --threads 8
+"""
+import argparse
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+
+from backend.services.session_store import (
+    EXPIRED,
+    MemorySessionBackend,
+    RedisSessionBackend,
+    SqliteSessionBackend,
+)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_ops(store, session_ids, op, ops, threads):
+    """스레드 threads 개가 ops 번 나눠 실행. (초당 처리량, 지연 목록 ms)"""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(seed, count):
+        rng = random.Random(seed)
+        local = []
+        for i in range(count):
+            session_id = session_ids[rng.randrange(len(session_ids))]
+            started = time.perf_counter()
+            if op == "get":
+                store.get(session_id)
+            else:
+                store.update(session_id, {"page": f"/p/{i % 50}", "step": i})
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(seed, ops // threads)) for seed in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, latencies
+
+
+def check_shared(first, second):
+    """두 인스턴스(워커) 사이에서 세션이 보이는지"""
+    session_id, _ = first.create(7, {"device": "web"})
+    seen = second.get(session_id) is not None
+    first.update(session_id, {"page": "/credits"})
+    updated = (second.get(session_id) or {}).get("page") == "/credits"
+    second.extend(session_id, 3 * 3600)
+    listed = any(sid == session_id for sid, _ in first.user_sessions(7))
+    second.delete(session_id)
+    deleted = first.get(session_id) in (None, EXPIRED)
+    return all((seen, updated, listed, deleted))
+
+
+def bench(label, store, args, peer=None):
+    rng = random.Random(1)
+    started = time.perf_counter()
+    session_ids = [store.create(rng.randint(1, args.users), {"device": "web", "page": "/dashboard"})[0]
+                   for _ in range(args.sessions)]
+    created = args.sessions / (time.perf_counter() - started)
+    get_rate, get_lat = run_ops(store, session_ids, "get", args.ops, args.threads)
+    update_rate, update_lat = run_ops(store, session_ids, "update", args.ops, args.threads)
+    shared = "-" if peer is None else ("예" if check_shared(store, peer) else "아니오")
+    print(f"{label:<22} 생성 {created:>8,.0f}/초 | get {get_rate:>8,.0f}/초 p50={percentile(get_lat, 0.5):.3f} "
+          f"p99={percentile(get_lat, 0.99):.3f} ms | update {update_rate:>8,.0f}/초 "
+          f"p50={percentile(update_lat, 0.5):.3f} p99={percentile(update_lat, 0.99):.3f} ms | 워커 간 공유 {shared}")
+    if args.verbose:
+        print(f"  통계: {store.stats()}")
+
+
+def main(args):
+    print(f"세션 {args.sessions}개, 스레드 {args.threads}개, 작업 {args.ops}회씩\n")
+    bench("memory", MemorySessionBackend(max_bytes=0, max_sessions=0), args)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, flush_seconds in (("sqlite (모아 쓰기)", args.flush_seconds), ("sqlite (바로 쓰기)", 0)):
+            path = os.path.join(directory, f"sessions_{flush_seconds}.db")
+            store = SqliteSessionBackend(path=path, flush_seconds=flush_seconds)
+            peer = SqliteSessionBackend(path=path, flush_seconds=flush_seconds)
+            bench(label, store, args, peer)
+            store.close()
+            peer.close()
+
+    url = args.redis_url
+    if not url:
+        from backend.fake_redis import start_in_thread
+        url, _ = start_in_thread()
+    for label, flush_seconds in (("redis (모아 쓰기)", args.flush_seconds), ("redis (바로 쓰기)", 0)):
+        prefix = f"bench:{flush_seconds}:{time.time()}:"
+        store = RedisSessionBackend(url=url, prefix=prefix, flush_seconds=flush_seconds)
+        peer = RedisSessionBackend(url=url, prefix=prefix, flush_seconds=flush_seconds)
+        bench(label, store, args, peer)
+        store.close()
+        peer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="세션 저장소 구현별 벤치마크")
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--ops", type=int, default=20000, help="get/update 각각의 작업 수")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--flush-seconds", type=float, default=2.0, help="last_activity 모아 쓰기 주기")
+    parser.add_argument("--redis-url", default="", help="실제 Redis (없으면 대역 서버)")
+    parser.add_argument("--verbose", action="store_true")
+    main(parser.parse_args())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+세션 저장소 벤치마크
+- 세션 N개(사용자 U명)를 만들고 생성 속도, 메모리, 사용자 세션 조회/상태 확인 시간을 측정
+- 비교: 이전 routes/session.py 방식(평범한 dict 를 통째로 훑는 사용자 조회/상태 확인)
+- 시계를 주입해 시간을 TTL 만큼 흘려보내며 만료 처리 비용, /extend 후 만료 시각 이동, 메모리 상한 LRU 제거를 확인
+    python -m backend.bench_session_store --sessions 1000000 --users 100000
+"""
+import argparse
+import gc
+import math
+import random
+import time
+import tracemalloc
+
+from backend.services.session_store import EXPIRED, MemorySessionBackend
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples
+
+
+def fmt(samples):
+    return ", ".join(f"p{int(q * 100)}={percentile(samples, q):.3f}" for q in (0.5, 0.99)) + " ms"
+
+
+def compare_lookups(store, session_ids, rng, args):
+    """사용자 세션 조회 / 상태 확인: 인덱스 vs 이전 전체 훑기 (비교용 dict 는 함수가 끝나면 해제)"""
+    legacy = {session_id: store.get(session_id) for session_id in session_ids}
+    users = [rng.randint(1, args.users) for _ in range(args.lookups)]
+    index_samples = timed(lambda: store.user_sessions(users[rng.randrange(len(users))]), args.lookups)
+    scan_samples = timed(lambda: [
+        s for s in legacy.values() if s.get("user_id") == users[0] and s.get("is_active", False)
+    ], args.scans)
+    print(f"\n[사용자 세션 조회] 인덱스 {fmt(index_samples)} / 이전 전체 훑기 {fmt(scan_samples)}")
+    stats_samples = timed(store.stats, args.lookups)
+    scan_samples = timed(lambda: len([s for s in legacy.values() if s.get("is_active", False)]), args.scans)
+    print(f"[상태 확인] 카운터 {fmt(stats_samples)} / 이전 전체 훑기 {fmt(scan_samples)}")
+    get_samples = timed(lambda: store.get(session_ids[rng.randrange(len(session_ids))]), args.lookups)
+    print(f"[세션 조회] {fmt(get_samples)}")
+
+
+def run(args):
+    clock = FakeClock()
+    ttl = args.ttl_hours * 3600
+    store = MemorySessionBackend(ttl_seconds=ttl, max_bytes=0, max_sessions=0, clock=clock)
+    rng = random.Random(1)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    started = time.perf_counter()
+    session_ids = []
+    for i in range(args.sessions):
+        # 생성 시각을 TTL 전체에 고르게 퍼뜨림
+        clock.now += ttl / args.sessions
+        session_id, _ = store.create(rng.randint(1, args.users), {"device": "web", "page": "/dashboard"})
+        session_ids.append(session_id)
+    created = time.perf_counter() - started
+    grown = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+    print(f"세션 {args.sessions}개 (사용자 {args.users}명) 생성 {created:.1f}초 "
+          f"({args.sessions / created:,.0f}/초), 세션당 메모리 {grown / args.sessions:.0f} bytes "
+          f"(저장소 추정 {store.stats()['estimated_bytes'] / args.sessions:.0f} bytes)")
+
+    compare_lookups(store, session_ids, rng, args)
+
+    # /extend: 앞쪽(곧 만료될) 세션 일부를 연장
+    extended = session_ids[: args.extend]
+    for session_id in extended:
+        store.extend(session_id, ttl)
+
+    # 시간 흐름: TTL 의 절반만큼 1초 단위로 진행하며 tick 당 만료 처리 비용 측정
+    # (연장된 세션은 남고, 그 사이 만들어진 순서대로 절반 정도가 만료돼야 함)
+    tick_samples = []
+    steps = int(ttl / 2)
+    for _ in range(steps):
+        clock.now += 1
+        started = time.perf_counter()
+        store.stats()
+        tick_samples.append((time.perf_counter() - started) * 1000)
+    tick_samples.sort()
+    stats = store.stats()
+    survived = sum(1 for session_id in extended if store.get(session_id) not in (None, EXPIRED))
+    print(f"\n[만료] {steps}초 진행: 만료 {stats['expired']}개, 남은 세션 {stats['total_sessions']}개, "
+          f"tick 당 처리 {fmt(tick_samples)}, max={tick_samples[-1]:.1f} ms")
+    print(f"  연장한 세션 {len(extended)}개 중 남은 세션 {survived}개 (연장 안 했으면 모두 만료될 세션)")
+
+    # 메모리 상한: 현재 추정 크기의 절반으로 상한을 걸고 새 세션을 만들면 LRU 순서로 제거
+    store.max_bytes = stats["estimated_bytes"] // 2
+    hot = session_ids[-10:]
+    for session_id in hot:
+        store.get(session_id)
+    started = time.perf_counter()
+    store.create(1, {"device": "web"})
+    evict_seconds = time.perf_counter() - started
+    stats = store.stats()
+    print(f"\n[메모리 상한 {store.max_bytes / 1024 / 1024:.0f}MB] 한 번에 제거 {stats['evicted']}개 ({evict_seconds * 1000:.0f} ms), "
+          f"남은 추정 {stats['estimated_bytes'] / 1024 / 1024:.0f}MB, 최근 사용 세션 유지 "
+          f"{sum(1 for session_id in hot if session_id in store)}/{len(hot)}")
+    print(f"  통계: {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="세션 저장소 벤치마크")
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--ttl-hours", type=float, default=1.0, help="벤치용 TTL (진행할 시간이 이 값에 비례)")
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--scans", type=int, default=5, help="이전 전체 훑기 반복 수")
+    parser.add_argument("--extend", type=int, default=1000, help="연장할 세션 수")
+    args = parser.parse_args()
+    run(args)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+지갑 SSE 스트림 벤치마크
+- 프로세스 안에서 WalletHub 에 쉬는 스트림 N개(사용자 U명, 사용자당 탭 N/U개)를 열고
+  쉬는 동안의 DB 조회 수, 스트림당 메모리, 변경 한 건이 그 사용자의 모든 탭에 도착하는 지연과 조회 수를 측정
+- 비교: 이전 클라이언트 폴링(UserContext 1초 localStorage 확인 + 화면마다 잔액/정원/이동 3개 API 재조회)을
+  --poll-interval 초마다 한다고 가정한 분당 조회 수
+- DB 대신 --load-ms 만큼 걸리는 가짜 조회 함수를 사용
+    python -m backend.bench_wallet_stream --streams 1000 --users 250 --idle 5
+"""
+import argparse
+import asyncio
+import math
+import time
+import tracemalloc
+
+from backend.services.wallet_stream import WalletHub
+from backend.services.ws_broker import InProcessBroker
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def consume(body, arrivals, user_id):
+    async for chunk in body:
+        if chunk.startswith("id:"):
+            arrivals.append((user_id, time.perf_counter()))
+
+
+async def run(args):
+    loads = [0]
+    balances = {}
+
+    def loader(user_id):
+        loads[0] += 1
+        time.sleep(args.load_ms / 1000)
+        return {"balance": balances.get(user_id, 0), "total_saved_g": 0.0, "trips": 0, "last_trip": None, "garden": {}}
+
+    broker = InProcessBroker()
+    hub = WalletHub(broker, loader, keepalive=args.keepalive, max_streams=args.streams)
+    await broker.start(lambda message: hub.handle_broker_message(message))
+
+    arrivals = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tasks = []
+    started = time.perf_counter()
+    for i in range(args.streams):
+        user_id = i % args.users + 1
+        body = await hub.open_stream(user_id)
+        tasks.append(asyncio.create_task(consume(body, arrivals, user_id)))
+    await asyncio.sleep(0.1)
+    opened = time.perf_counter() - started
+    grown = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+    initial_loads = loads[0]
+    print(f"스트림 {args.streams}개 (사용자 {args.users}명) 여는 데 {opened:.2f}초, 첫 상태 조회 {initial_loads}회 "
+          f"(같은 사용자 탭은 조회 공유), 스트림당 메모리 {grown / args.streams:.0f} bytes")
+
+    arrivals.clear()
+    loads[0] = 0
+    await asyncio.sleep(args.idle)
+    print(f"\n[쉬는 {args.idle:.0f}초] 상태 조회 {loads[0]}회, 보낸 이벤트 {len(arrivals)}건 (keepalive 주석 제외)")
+    polling_per_minute = args.streams * 3 * 60 / args.poll_interval
+    print(f"  이전 폴링 방식 가정 ({args.poll_interval:.0f}초마다 3개 API): 분당 {polling_per_minute:.0f}회 조회")
+
+    # 변경: 사용자마다 한 번씩 잔액 변경 신호
+    latencies = []
+    loads[0] = 0
+    arrivals.clear()
+    for user_id in range(1, args.changes + 1):
+        balances[user_id] = balances.get(user_id, 0) + 10
+        sent = time.perf_counter()
+        hub.mark_changed(user_id, ("balance",))
+        # 같은 사용자에게 연달아 오는 신호 (적립 + 이동 기록) 도 한 번 조회로 합쳐짐
+        hub.mark_changed(user_id, ("trip",))
+        expected = sum(1 for i in range(args.streams) if i % args.users + 1 == user_id)
+        deadline = sent + 5
+        while sum(1 for uid, _ in arrivals if uid == user_id) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.001)
+        latencies.extend((at - sent) * 1000 for uid, at in arrivals if uid == user_id)
+    latencies.sort()
+    print(f"\n[변경 {args.changes}건] 조회 {loads[0]}회, 도착 이벤트 {len(latencies)}건, 도착 지연 (ms): " + ", ".join(
+        f"p{int(q * 100)}={percentile(latencies, q):.1f}" for q in (0.5, 0.95, 0.99)
+    ) + f" (조회 모음 대기 {hub.coalesce * 1000:.0f}ms 포함)")
+    print(f"  통계: {hub.stats()}")
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await broker.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="지갑 SSE 스트림 벤치마크")
+    parser.add_argument("--streams", type=int, default=1000, help="열어 둘 스트림(탭) 수")
+    parser.add_argument("--users", type=int, default=250)
+    parser.add_argument("--idle", type=float, default=5.0, help="쉬는 시간(초)")
+    parser.add_argument("--changes", type=int, default=50, help="잔액을 바꿀 사용자 수")
+    parser.add_argument("--load-ms", type=float, default=2.0, help="가짜 상태 조회 시간(ms)")
+    parser.add_argument("--keepalive", type=float, default=20.0)
+    parser.add_argument("--poll-interval", type=float, default=60.0, help="비교용 이전 폴링 간격(초)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+WebSocket broadcast 벤치마크
+- 프로세스 안에서 가짜 WebSocket N개(기본 10,000)를 ConnectionManager 에 등록하고 broadcast 를 여러 번 보냄
+- 일부 연결은 느린 클라이언트(전송마다 지연)나 끊긴 클라이언트(전송 시 예외)로 만들어 나머지 연결에 주는 영향을 측정
+- --legacy 를 주면 이전 방식(연결마다 순서대로 send_text 를 await)과 비교
+- --tabs 로 사용자당 연결 수를 정하고 사용자별 전송(send_personal_message) 시간도 측정, --memory 로 쉬는 연결당 메모리 측정
+- --heartbeat 는 일부 연결을 응답 없는(half-open) 연결로 두고 타이머 휠 heartbeat 가 정리하는 시간,
+  tick 당 비용, 연결마다 sleep 태스크를 두는 방식과의 메모리 차이를 측정
+    python -m backend.bench_websocket --connections 10000 --messages 20 --slow 10 --dead 20 --legacy
+    python -m backend.bench_websocket --connections 10000 --tabs 3 --memory
+    python -m backend.bench_websocket --connections 50000 --heartbeat --half-open 5000
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+import tracemalloc
+
+from backend.services.timer_wheel import TimerWheel
+from backend.services.ws_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    """전송된 메시지의 도착 시각만 기록하는 가짜 WebSocket"""
+
+    def __init__(self, delay: float = 0.0, dead: bool = False, deliveries=None, on_ping=None):
+        self.delay = delay
+        self.dead = dead
+        self.deliveries = deliveries
+        # 서버 heartbeat ping 을 받으면 호출 (응답하는 클라이언트 흉내)
+        self.on_ping = on_ping
+        self.closed_code = None
+        # 인코딩 협상(services/ws_codec.negotiate)용: 서브프로토콜/쿼리/헤더 없음 -> JSON
+        self.scope = {}
+        self.query_params = {}
+        self.headers = {}
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, message: str):
+        if self.dead:
+            raise RuntimeError("connection reset")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            # 실제 소켓 쓰기처럼 이벤트 루프에 한 번 양보
+            await asyncio.sleep(0)
+        if self.deliveries is not None:
+            self.deliveries.append((message, time.perf_counter()))
+        if self.on_ping is not None and message.startswith('{"type":"ping"'):
+            self.on_ping()
+
+    async def close(self, code: int = 1000):
+        self.closed_code = code
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def make_sockets(args, deliveries):
+    sockets = []
+    for i in range(args.connections):
+        if i < args.dead:
+            sockets.append(FakeWebSocket(dead=True))
+        elif i < args.dead + args.slow:
+            sockets.append(FakeWebSocket(delay=args.slow_delay))
+        else:
+            sockets.append(FakeWebSocket(deliveries=deliveries))
+    return sockets
+
+
+def report(title, sent_at, deliveries, broadcast_ms, elapsed, healthy, messages):
+    latencies = sorted((arrived - sent_at[message]) * 1000 for message, arrived in deliveries)
+    expected = healthy * messages
+    print(f"\n[{title}] 전체 {elapsed:.2f}초, 정상 연결 도착 {len(deliveries)}/{expected}건")
+    print(f"  broadcast 호출 시간 (ms): p50={percentile(broadcast_ms, 0.5):.1f}, max={max(broadcast_ms):.1f}")
+    if latencies:
+        print("  정상 연결 도착 지연 (ms): " + ", ".join(
+            f"p{int(q * 100)}={percentile(latencies, q):.1f}" for q in (0.5, 0.95, 0.99)
+        ) + f", max={latencies[-1]:.1f}")
+
+
+async def run_manager(args):
+    deliveries = []
+    manager = ConnectionManager(max_connections=args.connections, max_connections_per_user=args.tabs)
+    sockets = make_sockets(args, deliveries)
+    if args.memory:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+    for i, websocket in enumerate(sockets):
+        await manager.connect(websocket, i // args.tabs + 1)
+    await asyncio.sleep(0)
+    if args.memory:
+        grown = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+        tracemalloc.stop()
+        print(f"쉬는 연결당 메모리 (송신 대기열/태스크, 가짜 소켓 포함): {grown / len(sockets):.0f} bytes")
+
+    sent_at, broadcast_ms = {}, []
+    started = time.perf_counter()
+    for n in range(args.messages):
+        message = json.dumps({"type": "statistics_update", "seq": n})
+        sent_at[message] = time.perf_counter()
+        await manager.broadcast(message)
+        broadcast_ms.append((time.perf_counter() - sent_at[message]) * 1000)
+        await asyncio.sleep(args.interval)
+    await manager.drain(timeout=args.slow_delay * args.messages + 10)
+    elapsed = time.perf_counter() - started
+
+    report("ConnectionManager", sent_at, deliveries, broadcast_ms, elapsed,
+           args.connections - args.slow - args.dead, args.messages)
+
+    # 사용자별 전송: 사용자의 연결 수만큼만 일하므로 전체 연결 수와 무관
+    users = max(1, args.connections // args.tabs)
+    deliveries.clear()
+    started = time.perf_counter()
+    reached = 0
+    for user_id in range(1, users + 1):
+        reached += await manager.send_personal_message('{"type":"notification"}', user_id)
+    enqueue_us = (time.perf_counter() - started) * 1e6 / users
+    await manager.drain(timeout=args.slow_delay * args.messages + 10)
+    print(f"  사용자별 전송: 사용자 {users}명, 연결 {reached}개에 전송, 사용자당 {enqueue_us:.1f}us, 도착 {len(deliveries)}건")
+    stats = manager.stats()
+    print(f"  남은 연결 {stats['connections']}개, 버린 메시지 {stats['dropped']}건, 합친 메시지 {stats['coalesced']}건, "
+          f"전송 오류 {stats['send_errors']}건, 느린 클라이언트 종료 {stats['slow_consumer_disconnects']}건")
+
+
+async def run_legacy(args):
+    deliveries = []
+    sockets = make_sockets(args, deliveries)
+    active = list(sockets)
+
+    sent_at, broadcast_ms = {}, []
+    started = time.perf_counter()
+    for n in range(args.messages):
+        message = json.dumps({"type": "statistics_update", "seq": n})
+        sent_at[message] = time.perf_counter()
+        # 이전 ConnectionManager.broadcast 와 같은 방식: 순서대로 await, 실패한 연결은 목록에서 제거
+        for websocket in list(active):
+            try:
+                await websocket.send_text(message)
+            except Exception:
+                active.remove(websocket)
+        broadcast_ms.append((time.perf_counter() - sent_at[message]) * 1000)
+        await asyncio.sleep(args.interval)
+    elapsed = time.perf_counter() - started
+
+    report("이전 방식 (순차 전송)", sent_at, deliveries, broadcast_ms, elapsed,
+           args.connections - args.slow - args.dead, args.messages)
+
+
+async def run_heartbeat(args):
+    manager = ConnectionManager(max_connections=args.connections, heartbeat_interval=args.heartbeat_interval,
+                                idle_timeout=args.idle_timeout, heartbeat_tick=args.heartbeat_tick)
+    half_open = []
+    started = time.perf_counter()
+    for i in range(args.connections):
+        websocket = FakeWebSocket()
+        conn = await manager.connect(websocket, i + 1)
+        if i < args.half_open:
+            # 보내기는 성공하지만 아무것도 돌아오지 않는 연결
+            half_open.append(conn)
+        else:
+            websocket.on_ping = lambda conn=conn: manager.touch(conn)
+        if i % 1000 == 999:
+            # 실제 서버처럼 연결을 받는 사이사이 이벤트 루프가 다른 일(heartbeat tick, 송신)을 하도록 양보
+            await asyncio.sleep(0)
+    print(f"연결 {args.connections}개 (응답 없는 연결 {args.half_open}개), ping {args.heartbeat_interval}초, "
+          f"정리 {args.idle_timeout}초, tick {args.heartbeat_tick}초")
+
+    while any(not conn.closed for conn in half_open):
+        if time.perf_counter() - started > args.idle_timeout * 3 + 10:
+            break
+        await asyncio.sleep(0.05)
+    evicted_after = time.perf_counter() - started
+    # 응답하는 연결이 한 번 더 ping 을 받고도 살아 있는지 확인
+    await asyncio.sleep(args.heartbeat_interval)
+    stats = manager.stats()
+    remaining = sum(1 for conn in half_open if not conn.closed)
+    print(f"\n[타이머 휠 heartbeat] 응답 없는 연결 정리까지 {evicted_after:.2f}초 (남은 {remaining}개), "
+          f"살아 있는 연결 {stats['connections']}/{args.connections - args.half_open}개")
+    tick_ms = stats["heartbeat"]["tick_ms"]
+    print(f"  ping {stats['pings_sent']}건, idle 종료 {stats['idle_disconnects']}건, tick {stats['heartbeat_ticks']}회, "
+          f"tick 시간 (ms) p50={tick_ms['p50_ms']}, p99={tick_ms['p99_ms']}, max={tick_ms['max_ms']}")
+    print(f"  종료 원인 {stats['close_reasons']}, churn {stats['churn']}")
+
+    if args.memory:
+        # 타이머 휠 항목 vs 연결마다 asyncio.sleep 태스크 하나
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        wheel = TimerWheel(tick=args.heartbeat_tick, now=time.monotonic())
+        for i in range(args.connections):
+            wheel.schedule(f"c{i}", time.monotonic() + args.heartbeat_interval)
+        wheel_bytes = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+        before = tracemalloc.take_snapshot()
+
+        async def sleeper():
+            while True:
+                await asyncio.sleep(args.heartbeat_interval)
+
+        tasks = [asyncio.create_task(sleeper()) for _ in range(args.connections)]
+        await asyncio.sleep(0)
+        task_bytes = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+        for task in tasks:
+            task.cancel()
+        tracemalloc.stop()
+        print(f"  연결당 타이머 메모리: 타이머 휠 {wheel_bytes / args.connections:.0f} bytes, "
+              f"sleep 태스크 {task_bytes / args.connections:.0f} bytes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebSocket broadcast 벤치마크")
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=20, help="broadcast 횟수")
+    parser.add_argument("--interval", type=float, default=0.05, help="broadcast 간격(초)")
+    parser.add_argument("--slow", type=int, default=10, help="느린 클라이언트 수")
+    parser.add_argument("--slow-delay", type=float, default=0.2, help="느린 클라이언트의 전송당 지연(초)")
+    parser.add_argument("--dead", type=int, default=20, help="끊긴 클라이언트 수")
+    parser.add_argument("--tabs", type=int, default=1, help="사용자당 연결 수")
+    parser.add_argument("--memory", action="store_true", help="쉬는 연결당 메모리 측정 (tracemalloc)")
+    parser.add_argument("--legacy", action="store_true", help="이전 순차 전송 방식도 측정")
+    parser.add_argument("--heartbeat", action="store_true", help="heartbeat/쉬는 연결 정리 측정")
+    parser.add_argument("--half-open", type=int, default=1000, help="응답 없는 연결 수 (--heartbeat)")
+    parser.add_argument("--heartbeat-interval", type=float, default=1.0)
+    parser.add_argument("--idle-timeout", type=float, default=3.0)
+    parser.add_argument("--heartbeat-tick", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.heartbeat:
+        asyncio.run(run_heartbeat(args))
+        raise SystemExit
+
+    print(f"연결 {args.connections}개 (느린 {args.slow}개, 끊긴 {args.dead}개), broadcast {args.messages}회")
+    asyncio.run(run_manager(args))
+    if args.legacy:
+        asyncio.run(run_legacy(args))
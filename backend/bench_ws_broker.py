@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+WebSocket 브로커 워커 간 전달 벤치마크
+- 워커 프로세스 N개(기본 4개, uvicorn --workers 4 와 같은 구성)가 같은 unix 브로커에 붙고,
+  각 워커가 메시지를 발행하면 모든 워커가 받음. 다른 워커에서 온 메시지의 도착 지연과 전체 처리량을 출력
+- 비교용으로 memory 브로커(한 프로세스 안 전달)도 측정
+    python -m backend.bench_ws_broker --workers 4 --messages 20000 --rate 5000
+"""
+import argparse
+import asyncio
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+
+from backend.services.ws_broker import InProcessBroker, UnixSocketBroker
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_worker(index, broker, workers, messages, rate, barrier, payload_bytes):
+    latencies, received = [], [0]
+    expected = workers * messages
+    done = asyncio.Event()
+
+    def handler(message):
+        received[0] += 1
+        if message["w"] != index:
+            latencies.append((time.time() - message["t"]) * 1000)
+        if received[0] >= expected:
+            done.set()
+
+    await broker.start(handler)
+    if barrier is not None:
+        # 모든 워커가 허브에 접속한 뒤 동시에 시작
+        await asyncio.sleep(0.5)
+        await asyncio.to_thread(barrier.wait)
+
+    padding = "x" * payload_bytes
+    started = time.perf_counter()
+    batch = max(1, rate // 100)
+    for seq in range(messages):
+        broker.publish({"w": index, "s": seq, "t": time.time(), "p": padding})
+        if (seq + 1) % batch == 0:
+            # 초당 rate 개 속도로 발행 (10ms 마다 batch 개)
+            target = started + (seq + 1) / rate
+            await asyncio.sleep(max(0.0, target - time.perf_counter()))
+    try:
+        await asyncio.wait_for(done.wait(), timeout=30)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - started
+    stats = broker.stats()
+    if barrier is not None:
+        # 허브 워커가 먼저 끝나 다른 워커가 새 허브로 바뀌지 않도록 모두 끝난 뒤 닫음
+        await asyncio.to_thread(barrier.wait)
+    await broker.close()
+    return {"index": index, "received": received[0], "expected": expected, "elapsed": elapsed,
+            "latencies": latencies, "dropped": stats.get("dropped", 0), "role": stats.get("role", "memory")}
+
+
+def worker_process(index, socket_path, workers, messages, rate, barrier, payload_bytes, results):
+    broker = UnixSocketBroker(socket_path)
+    results.put(asyncio.run(run_worker(index, broker, workers, messages, rate, barrier, payload_bytes)))
+
+
+def report(title, results, workers, messages):
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    received = sum(result["received"] for result in results)
+    expected = sum(result["expected"] for result in results)
+    elapsed = max(result["elapsed"] for result in results)
+    dropped = sum(result["dropped"] for result in results)
+    print(f"\n[{title}] 워커 {workers}개 x 발행 {messages}건, 도착 {received}/{expected}건, 버림 {dropped}건")
+    print(f"  전체 {elapsed:.2f}초 -> 발행 {workers * messages / elapsed:.0f} msg/s, 전달 {received / elapsed:.0f} msg/s")
+    if latencies:
+        print("  다른 워커 메시지 도착 지연 (ms): " + ", ".join(
+            f"p{int(q * 100)}={percentile(latencies, q):.2f}" for q in (0.5, 0.95, 0.99)
+        ) + f", max={latencies[-1]:.2f}")
+    roles = sorted(result["role"] for result in results)
+    print(f"  역할: {roles}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebSocket 브로커 벤치마크")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--messages", type=int, default=20000, help="워커당 발행 수")
+    parser.add_argument("--rate", type=int, default=5000, help="워커당 초당 발행 수")
+    parser.add_argument("--payload-bytes", type=int, default=200, help="메시지 본문 크기 (토픽 delta 정도)")
+    args = parser.parse_args()
+
+    memory_result = asyncio.run(run_worker(0, InProcessBroker(), 1, args.messages, args.rate, None, args.payload_bytes))
+    report("memory (단일 프로세스)", [memory_result], 1, args.messages)
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "bench_ws_broker.sock")
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(args.workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker_process, args=(i, socket_path, args.workers, args.messages, args.rate,
+                                                     barrier, args.payload_bytes, results))
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    report("unix (워커 프로세스 간)", collected, args.workers, args.messages)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+WebSocket 메시지 인코딩 벤치마크
+- 리더보드 snapshot/delta, 알림, 본인 통계 delta 메시지를 인코딩별로 직렬화해 크기와 CPU 시간을 비교
+- 인코딩: 이전 방식 json.dumps(기본 옵션), 압축 없는 JSON(ensure_ascii=False, 공백 제거), MessagePack
+- permessage-deflate 는 zlib raw deflate(wbits=-15) 로 흉내냄
+  context takeover: 연결마다 압축 사전을 유지 (websockets/uvicorn 기본값, 연결당 메모리를 더 씀)
+  no takeover: 메시지마다 새로 압축
+    python -m backend.bench_ws_codec --iterations 2000 --leaderboard-size 20
+"""
+import argparse
+import json
+import random
+import time
+import zlib
+from datetime import datetime
+
+from backend.services.ws_codec import JSON, MSGPACK, encode, msgpack
+
+
+def sample_messages(size, seed=42):
+    """실제 토픽 메시지와 같은 모양의 예시 메시지 (이름은 한글, seed 마다 점수/시각/순서가 조금씩 다름)"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    rows = [
+        {"rank": i + 1, "user_id": 1000 + i, "name": f"에코사용자{i:03d}",
+         "total_credits": 50000 - i * 137 + rng.randint(0, 100), "carbon_reduced_kg": round(820.5 - i * 3.7 + rng.random(), 3)}
+        for i in range(size)
+    ]
+    moved = rng.sample(range(size), min(3, size))
+    return {
+        "leaderboard snapshot": {"type": "subscribed", "topic": "leaderboard", "subscription": "leaderboard",
+                                 "seq": 0, "snapshot": rows},
+        "leaderboard delta": {"type": "delta", "topic": "leaderboard", "seq": seed, "delta": {
+            "set": {str(i): {**rows[i], "total_credits": rows[i]["total_credits"] + 50} for i in moved},
+            "remove": [], "size": size}},
+        "notification": {"type": "notification", "data": {
+            "title": "새로운 배지 획득!", "message": "에코 워리어 배지를 획득했습니다! 🛡️",
+            "timestamp": now.isoformat()}},
+        "user_stats delta": {"type": "delta", "topic": "user_stats:1001", "seq": seed, "delta": {
+            "inc": {"balance": 120, "total_saved_g": 1530.0, "trips": 1},
+            "last_trip": {"log_id": 98765 + seed, "mode": rng.choice(["SUBWAY", "BUS", "BIKE", "WALK"]),
+                          "distance_km": round(rng.uniform(1, 20), 1), "co2_saved_g": round(rng.uniform(50, 2000), 1),
+                          "points": rng.randint(5, 200), "started_at": now.isoformat(), "ended_at": now.isoformat()}}},
+    }
+
+
+def encoders():
+    table = {
+        "json (이전)": lambda data: json.dumps(data, default=str).encode("utf-8"),
+        "json": lambda data: encode(data, JSON).encode("utf-8"),
+    }
+    if msgpack is not None:
+        table["msgpack"] = lambda data: encode(data, MSGPACK)
+    return table
+
+
+def deflate_sizes(frames, takeover):
+    """같은 메시지를 연속으로 보낼 때 프레임당 압축 후 크기 (permessage-deflate 와 같이 끝의 00 00 ff ff 제거)"""
+    sizes = []
+    compressor = zlib.compressobj(wbits=-15)
+    for frame in frames:
+        if not takeover:
+            compressor = zlib.compressobj(wbits=-15)
+        data = compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        sizes.append(len(data) - 4)
+    return sizes
+
+
+def time_us(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) * 1e6 / iterations
+
+
+def run(args):
+    if msgpack is None:
+        print("[알림] msgpack 이 설치되어 있지 않아 MessagePack 은 건너뜁니다. (pip install msgpack)")
+    for title, message in sample_messages(args.leaderboard_size).items():
+        print(f"\n[{title}]")
+        print(f"  {'인코딩':<14}{'크기(B)':>9}{'인코딩(us)':>12}{'디코딩(us)':>12}"
+              f"{'+deflate(B)':>13}{'takeover(B)':>13}{'압축(us)':>10}")
+        for name, fn in encoders().items():
+            frame = fn(message)
+            encode_us = time_us(lambda: fn(message), args.iterations)
+            if name == "msgpack":
+                decode_us = time_us(lambda: msgpack.unpackb(frame, raw=False), args.iterations)
+            else:
+                decode_us = time_us(lambda: json.loads(frame), args.iterations)
+            # 같은 종류지만 내용이 조금씩 다른 메시지가 이어지는 실제 스트림처럼 연속 전송
+            stream = [fn(sample_messages(args.leaderboard_size, seed=n)[title]) for n in range(args.stream)]
+            fresh = deflate_sizes(stream, takeover=False)
+            kept = deflate_sizes(stream, takeover=True)
+            compress_us = time_us(lambda: deflate_sizes([frame], takeover=False), args.iterations // 4 or 1)
+            print(f"  {name:<14}{len(frame):>9}{encode_us:>12.1f}{decode_us:>12.1f}"
+                  f"{sum(fresh) / len(fresh):>13.0f}{sum(kept[1:]) / max(1, len(kept) - 1):>13.0f}{compress_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebSocket 메시지 인코딩 벤치마크")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--leaderboard-size", type=int, default=20)
+    parser.add_argument("--stream", type=int, default=50, help="압축 사전 유지 효과를 볼 연속 메시지 수")
+    args = parser.parse_args()
+    run(args)
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+챌린지 추천 모델 생성 스크립트 (야간 배치)
+- 사용법: python -m backend.build_challenge_model [--output 경로]
+  예) 매일 새벽 cron: 30 3 * * * cd /app && python -m backend.build_challenge_model
+- 실행 중인 서버는 파일이 바뀐 것을 감지해 다음 추천 요청부터 새 모델을 사용합니다.
+"""
+import argparse
+
+from backend.database import SessionLocal
+from backend.services.challenge_recommender import build_model, CHALLENGE_MODEL_PATH
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="챌린지 추천 모델 생성")
+    parser.add_argument("--output", default=CHALLENGE_MODEL_PATH)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        summary = build_model(db, args.output)
+    finally:
+        db.close()
+
+    print(f"✅ 챌린지 추천 모델 생성 완료: {args.output}")
+    for key, value in summary.items():
+        print(f"  - {key}: {value}")
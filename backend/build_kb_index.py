@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+로컬 지식 기반 BM25 색인 생성 스크립트
+- 사용법: python -m backend.build_kb_index [문서 폴더] [색인 폴더]
+- 이전 색인이 있으면 바뀐 문서만 다시 토큰화합니다.
+"""
+import sys
+import time
+
+from backend.services.kb_local_index import build_index, KB_DOCS_DIR, KB_INDEX_DIR
+
+if __name__ == "__main__":
+    docs_dir = sys.argv[1] if len(sys.argv) > 1 else KB_DOCS_DIR
+    index_dir = sys.argv[2] if len(sys.argv) > 2 else KB_INDEX_DIR
+
+    started = time.perf_counter()
+    summary = build_index(docs_dir, index_dir)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ 색인 생성 완료 ({elapsed:.2f}초): {docs_dir} -> {index_dir}")
+    for key, value in summary.items():
+        print(f"  - {key}: {value}")
@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine, Column, BigInteger, String, Enum, DateTime, ForeignKey
 from sqlalchemy.orm import sessionmaker, declarative_base, relationship
 from datetime import datetime
+from passlib.context import CryptContext
 import enum
 
 # Define Base for declarative models
@@ -43,6 +44,15 @@ DATABASE_URL = "sqlite:///ecoooo.db"
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# services/password_hasher.py 와 같은 형식 (bcrypt). 평문으로 저장된 이전 값도 비교
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def password_is_current(stored, password):
+    """bcrypt 해시로 저장되어 있고 password 와 일치하면 True (평문 저장값은 다시 저장 대상)"""
+    if not stored or pwd_context.identify(stored) is None:
+        return False
+    return pwd_context.verify(password, stored)
+
 def check_and_update_admin_user():
     db = SessionLocal()
     try:
@@ -55,7 +65,6 @@ def check_and_update_admin_user():
         if admin_user:
             print(f"Found admin user: {admin_user.username}")
             print(f"Current email: {admin_user.email}")
-            print(f"Current password_hash: {admin_user.password_hash}")
 
             needs_update = False
             if admin_user.email != target_email:
@@ -63,10 +72,10 @@ def check_and_update_admin_user():
                 needs_update = True
                 print(f"Updating email to: {target_email}")
             
-            if admin_user.password_hash != target_password:
-                admin_user.password_hash = target_password
+            if not password_is_current(admin_user.password_hash, target_password):
+                admin_user.password_hash = pwd_context.hash(target_password)
                 needs_update = True
-                print(f"Updating password_hash to: {target_password}")
+                print("Updating password_hash (bcrypt)")
             
             if needs_update:
                 db.commit()
@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
-from sqlalchemy import func
+from sqlalchemy import and_, func, or_
+from typing import List
 from . import models, schemas
 from .schemas import UserContext
+from .services.password_hasher import password_hasher
+from .services.user_profile_service import UserActivityProfileService
 
 # =========================
 # UserGroup
@@ -29,7 +32,8 @@ def create_user(db: Session, user: schemas.UserCreate):
     db_user = models.User(
         username=user.username,
         email=user.email,
-        password_hash=user.password_hash,
+        # UserCreate.password_hash 로 받은 평문 비밀번호를 bcrypt 해시로 저장
+        password_hash=password_hasher.hash(user.password_hash),
         role=user.role,
         user_group_id=user.user_group_id
     )
@@ -87,14 +91,23 @@ def get_user_with_group(db: Session, user_id: int) -> UserContext | None:
     return None
 
 def authenticate_user(db: Session, username: str, password: str):
-    # In a real application, you would hash the password and compare it with the stored hash.
-    # For simplicity, we're doing a direct comparison here.
-    # Also, you might want to allow login with email as well.
+    """
+    아이디(또는 이메일)와 비밀번호 확인
+    - 해시 계산은 services/password_hasher.py 전용 스레드풀에서 (바쁘면 PasswordHasherBusy)
+    - cost 가 바뀌었거나 이전 평문 저장값이면 새 해시로 바꿔 저장
+    """
     user = db.query(models.User).filter(
         (models.User.username == username) | (models.User.email == username)
     ).first()
-    if not user or user.password_hash != password: # Assuming password_hash stores plain password for now
+    if not user:
+        password_hasher.dummy_verify(password)
         return None
+    ok, new_hash = password_hasher.verify_and_update(password, user.password_hash)
+    if not ok:
+        return None
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
     return user
 
 # =========================
@@ -199,6 +212,8 @@ def join_challenge(db: Session, user_id: int, challenge_id: int):
     db.add(db_member)
     db.commit()
     db.refresh(db_member)
+    # 진행 중인 챌린지 목표 유형(active_goal_types)이 바뀜
+    UserActivityProfileService.invalidate(user_id)
     return db_member
 
 def leave_challenge(db: Session, user_id: int, challenge_id: int):
@@ -209,6 +224,7 @@ def leave_challenge(db: Session, user_id: int, challenge_id: int):
     if db_member:
         db.delete(db_member)
         db.commit()
+        UserActivityProfileService.invalidate(user_id)
     return db_member
 
 def get_user_challenges(db: Session, user_id: int, skip: int = 0, limit: int = 100):
@@ -281,3 +297,56 @@ def update_personal_challenge_progress(db: Session, user_id: int):
             update_challenge_status_if_completed(db, challenge, progress)
             
     db.commit()
+
+def update_personal_challenge_progress_bulk(db: Session, user_id: int) -> List[models.Challenge]:
+    """
+    update_personal_challenge_progress 의 묶음 처리용 (/mobility/log/batch)
+    - 활성 개인 챌린지 목록 1번 + 챌린지별 합계를 한 번의 GROUP BY 집계로 계산 (챌린지마다 SUM 을 따로 하지 않음)
+    - 커밋하지 않음: 호출한 쪽 트랜잭션에 포함. 이번에 완료된 챌린지 목록 반환
+    """
+    user_challenges = db.query(models.Challenge).join(models.ChallengeMember).filter(
+        models.ChallengeMember.user_id == user_id,
+        models.Challenge.scope == 'PERSONAL',
+        models.Challenge.status == models.ChallengeStatus.ACTIVE
+    ).all()
+    if not user_challenges:
+        return []
+
+    # calculate_challenge_progress 와 같은 조건 (기간 안, 대상 수단이 ANY 가 아니면 그 수단만)
+    log_filter = and_(
+        models.MobilityLog.user_id == user_id,
+        models.MobilityLog.started_at >= models.Challenge.start_at,
+        models.MobilityLog.ended_at <= models.Challenge.end_at,
+        or_(
+            models.Challenge.target_mode == models.TransportMode.ANY,
+            models.MobilityLog.mode == models.Challenge.target_mode,
+        ),
+    )
+    totals = {
+        row.challenge_id: row
+        for row in db.query(
+            models.Challenge.challenge_id,
+            func.sum(models.MobilityLog.co2_saved_g).label("co2_saved"),
+            func.sum(models.MobilityLog.distance_km).label("distance_km"),
+            func.count(models.MobilityLog.log_id).label("trip_count"),
+        ).outerjoin(models.MobilityLog, log_filter).filter(
+            models.Challenge.challenge_id.in_([challenge.challenge_id for challenge in user_challenges])
+        ).group_by(models.Challenge.challenge_id).all()
+    }
+
+    completed = []
+    for challenge in user_challenges:
+        row = totals.get(challenge.challenge_id)
+        total_achieved_value = None
+        if row is not None:
+            if challenge.goal_type == schemas.ChallengeGoalType.CO2_SAVED:
+                total_achieved_value = row.co2_saved
+            elif challenge.goal_type == schemas.ChallengeGoalType.DISTANCE_KM:
+                total_achieved_value = row.distance_km
+            elif challenge.goal_type == schemas.ChallengeGoalType.TRIP_COUNT:
+                total_achieved_value = row.trip_count
+        progress = (float(total_achieved_value or 0) / float(challenge.goal_target_value)) * 100 if challenge.goal_target_value > 0 else 0.0
+        if progress >= 100.0:
+            challenge.status = models.ChallengeStatus.COMPLETED
+            completed.append(challenge)
+    return completed
@@ -1,9 +1,15 @@
-from fastapi import Depends, HTTPException, status
+import asyncio
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, WebSocket, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from . import models, schemas
-from .database import get_db
+from .database import SessionLocal, get_db
+from .services.admission_control import AdmissionRejected, BATCH, INTERACTIVE, llm_admission_controller
+from .services.principal_cache import load_principal
 import os
 
 # .env 파일에서 SECRET_KEY와 ALGORITHM 로드
@@ -15,7 +21,15 @@ if not SECRET_KEY or not ALGORITHM:
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    JWT 의 사용자를 요청 세션(db)의 User 로 반환
+    - 사용자 행은 services/principal_cache.py 캐시에서 가져와 SELECT 없이 세션에 붙임 (캐시에 없을 때만 조회)
+    - 같은 요청 안에서는 request.state.user 로 다시 쓸 수 있음 (라우트에서 users 를 다시 조회하지 말 것)
+    """
+    cached = getattr(request.state, "user", None)
+    if cached is not None:
+        return cached
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -29,12 +43,111 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         token_data = schemas.TokenData(user_id=user_id)
     except JWTError:
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.user_id == token_data.user_id).first()
+    user = load_principal(db, int(token_data.user_id))
     if user is None:
         raise credentials_exception
+    request.state.user = user
     return user
 
+def _user_exists(user_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return db.query(models.User.user_id).filter(models.User.user_id == user_id).first() is not None
+    finally:
+        db.close()
+
+async def _token_user_id(token: Optional[str]) -> Optional[int]:
+    """JWT 의 sub 가 있는 사용자면 user_id, 아니면 None (짧은 세션으로 존재만 확인)"""
+    if not token:
+        return None
+    try:
+        user_id = int(jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub"))
+    except (JWTError, TypeError, ValueError):
+        return None
+    if not await asyncio.to_thread(_user_exists, user_id):
+        return None
+    return user_id
+
+async def get_stream_user_id(request: Request, token: Optional[str] = None) -> int:
+    """
+    SSE/long-poll 처럼 오래 열려 있는 요청의 인증
+    - EventSource 는 Authorization 헤더를 보낼 수 없으므로 ?token= 쿼리도 받음 (헤더가 있으면 헤더 우선)
+    - get_db 세션을 요청이 끝날 때까지 붙잡지 않도록 짧은 세션으로 사용자 존재만 확인하고 user_id 만 반환
+    """
+    authorization = request.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        token = authorization[7:]
+    user_id = await _token_user_id(token)
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user_id
+
+async def get_websocket_user_id(websocket: WebSocket, token: Optional[str] = None) -> Optional[int]:
+    """
+    WebSocket 인증: 브라우저 WebSocket 은 헤더를 보낼 수 없으므로 ?token= 쿼리 (Authorization 헤더가 있으면 헤더 우선)
+    - 토큰이 없거나 유효하지 않으면 None
+    """
+    authorization = websocket.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        token = authorization[7:]
+    return await _token_user_id(token)
+
 def get_current_admin_user(current_user: models.User = Depends(get_current_user)):
-    if current_user.role != schemas.UserRole.ADMIN:
+    if current_user.role != models.UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
     return current_user
+
+async def _admission_user_key(request: Request):
+    """
+    동시 실행 한도를 적용할 사용자 식별 값 (검증된 JWT sub, 없으면 클라이언트 주소)
+    - 본문의 user_id 는 바꿔 보내면 한도를 피할 수 있으므로 쓰지 않음
+    """
+    authorization = request.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        try:
+            subject = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+            if subject is not None:
+                return f"user:{subject}"
+        except JWTError:
+            pass
+    return f"client:{request.client.host if request.client else 'unknown'}"
+
+class AdmissionSlot:
+    """llm_admission 이 잡은 실행 자리. release 는 여러 번 호출해도 한 번만 반영"""
+
+    def __init__(self, user_key: str):
+        self.user_key = user_key
+        self.started = time.perf_counter()
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            llm_admission_controller.release(self.user_key, time.perf_counter() - self.started)
+
+async def llm_admission(request: Request):
+    """
+    LLM 을 호출하는 엔드포인트의 동시 실행 수 제한 (자리가 없으면 대기, 오래 걸릴 것 같으면 429)
+    - X-Request-Priority: batch 헤더를 보낸 요청은 대화형 요청보다 나중에 처리
+    - yield 의존성의 정리 코드는 백그라운드 작업이 끝난 뒤에 실행되므로, 백그라운드 작업을 추가하는
+      엔드포인트는 받은 AdmissionSlot 을 응답 전에 직접 release 해야 함
+    """
+    user_key = await _admission_user_key(request)
+    priority = BATCH if request.headers.get("X-Request-Priority", "").lower() == "batch" else INTERACTIVE
+    try:
+        await llm_admission_controller.acquire(user_key, priority)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="요청이 많아 지금은 처리할 수 없습니다. 잠시 후 다시 시도해 주세요.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    slot = AdmissionSlot(user_key)
+    try:
+        yield slot
+    finally:
+        slot.release()
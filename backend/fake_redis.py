@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Redis 대역(fake) 서버 - 세션 저장소(SESSION_BACKEND=redis) 개발/부하 테스트용
+- RESP2 로 세션 저장소가 쓰는 명령만 흉내 냄:
+  PING AUTH SELECT GET MGET SET(PX/XX/NX/KEEPTTL) DEL EXISTS PEXPIRE PTTL
+  SADD SREM SMEMBERS SCARD ZADD ZREM ZCOUNT ZREMRANGEBYSCORE DBSIZE FLUSHDB
+- 데이터는 메모리에만 있고 DB 번호/비밀번호는 무시. 만료는 읽을 때 확인하고 주기적으로도 정리
+- 사용법: python -m backend.fake_redis [--port 6390]
+- 백엔드를 이 서버로 연결 (.env):
+    SESSION_BACKEND=redis
+    SESSION_REDIS_URL=redis://localhost:6390/0
+"""
+import argparse
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.services.redis_protocol import RedisError
+
+# 만료된 키를 정리하는 주기(초)
+_SWEEP_SECONDS = 1.0
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _encode_reply(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RedisError):
+        return b"-" + str(value).encode("utf-8") + b"\r\n"
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+" + value.encode("utf-8") + b"\r\n"
+    if isinstance(value, (bytes, bytearray)):
+        return b"$%d\r\n" % len(value) + bytes(value) + b"\r\n"
+    if isinstance(value, (list, tuple)):
+        return b"*%d\r\n" % len(value) + b"".join(_encode_reply(item) for item in value)
+    raise TypeError(f"unsupported reply: {type(value)}")
+
+
+def _score(raw: bytes) -> float:
+    text = raw.decode("ascii").lower()
+    if text in ("-inf", "+inf", "inf"):
+        return float(text if text != "inf" else "+inf")
+    if text.startswith("("):
+        raise RedisError("ERR exclusive ranges are not supported")
+    return float(text)
+
+
+class FakeRedis:
+    """키 공간과 명령 처리 (한 이벤트 루프에서만 사용)"""
+
+    def __init__(self):
+        # key -> bytes | set | dict(member -> score)
+        self._data: Dict[bytes, Any] = {}
+        # key -> 만료 시각(ms)
+        self._expires: Dict[bytes, int] = {}
+        self.commands = 0
+
+    def _alive(self, key: bytes) -> bool:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= _now_ms():
+            self._data.pop(key, None)
+            del self._expires[key]
+        return key in self._data
+
+    def _get(self, key: bytes, kind: type) -> Any:
+        if not self._alive(key):
+            return None
+        value = self._data[key]
+        if not isinstance(value, kind):
+            raise RedisError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _delete(self, key: bytes) -> bool:
+        self._expires.pop(key, None)
+        return self._data.pop(key, None) is not None
+
+    def sweep(self) -> int:
+        now = _now_ms()
+        expired = [key for key, deadline in self._expires.items() if deadline <= now]
+        for key in expired:
+            self._delete(key)
+        return len(expired)
+
+    def handle(self, args: List[bytes]) -> Any:
+        self.commands += 1
+        if not args:
+            return RedisError("ERR empty command")
+        name = args[0].decode("ascii", "replace").upper()
+        method = getattr(self, f"cmd_{name.lower()}", None)
+        if method is None:
+            return RedisError(f"ERR unknown command '{name}'")
+        try:
+            return method(*args[1:])
+        except RedisError as e:
+            return e
+        except (TypeError, ValueError, IndexError):
+            return RedisError(f"ERR wrong arguments for '{name}' command")
+
+    # ---- 연결/서버 ----
+
+    def cmd_ping(self, *args):
+        return args[0] if args else "PONG"
+
+    def cmd_auth(self, *args):
+        return "OK"
+
+    def cmd_select(self, db):
+        return "OK"
+
+    def cmd_dbsize(self):
+        self.sweep()
+        return len(self._data)
+
+    def cmd_flushdb(self, *args):
+        self._data.clear()
+        self._expires.clear()
+        return "OK"
+
+    # ---- 문자열 ----
+
+    def cmd_get(self, key):
+        return self._get(key, bytes)
+
+    def cmd_mget(self, *keys):
+        return [self._data[key] if self._alive(key) and isinstance(self._data[key], bytes) else None for key in keys]
+
+    def cmd_set(self, key, value, *options):
+        px: Optional[int] = None
+        mode = None
+        keepttl = False
+        i = 0
+        while i < len(options):
+            option = options[i].upper()
+            if option in (b"PX", b"EX"):
+                px = int(options[i + 1]) * (1 if option == b"PX" else 1000)
+                i += 1
+            elif option in (b"NX", b"XX"):
+                mode = option
+            elif option == b"KEEPTTL":
+                keepttl = True
+            else:
+                raise RedisError("ERR syntax error")
+            i += 1
+        exists = self._alive(key)
+        if (mode == b"NX" and exists) or (mode == b"XX" and not exists):
+            return None
+        self._data[key] = bytes(value)
+        if px is not None:
+            self._expires[key] = _now_ms() + px
+        elif not keepttl:
+            self._expires.pop(key, None)
+        return "OK"
+
+    def cmd_del(self, *keys):
+        return sum(1 for key in keys if self._alive(key) and self._delete(key))
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    def cmd_pexpire(self, key, ms):
+        if not self._alive(key):
+            return 0
+        self._expires[key] = _now_ms() + int(ms)
+        return 1
+
+    def cmd_pttl(self, key):
+        if not self._alive(key):
+            return -2
+        deadline = self._expires.get(key)
+        return -1 if deadline is None else max(0, deadline - _now_ms())
+
+    # ---- 집합 ----
+
+    def cmd_sadd(self, key, *members):
+        value = self._get(key, set)
+        if value is None:
+            value = self._data[key] = set()
+        before = len(value)
+        value.update(members)
+        return len(value) - before
+
+    def cmd_srem(self, key, *members):
+        value = self._get(key, set)
+        if value is None:
+            return 0
+        before = len(value)
+        value.difference_update(members)
+        if not value:
+            self._delete(key)
+        return before - len(value)
+
+    def cmd_smembers(self, key):
+        return sorted(self._get(key, set) or ())
+
+    def cmd_scard(self, key):
+        return len(self._get(key, set) or ())
+
+    # ---- 정렬 집합 (점수 범위 조회만) ----
+
+    def cmd_zadd(self, key, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise RedisError("ERR syntax error")
+        value = self._get(key, dict)
+        if value is None:
+            value = self._data[key] = {}
+        added = 0
+        for i in range(0, len(pairs), 2):
+            member = pairs[i + 1]
+            added += member not in value
+            value[member] = _score(pairs[i])
+        return added
+
+    def cmd_zrem(self, key, *members):
+        value = self._get(key, dict)
+        if value is None:
+            return 0
+        removed = sum(1 for member in members if value.pop(member, None) is not None)
+        if not value:
+            self._delete(key)
+        return removed
+
+    def cmd_zcount(self, key, low, high):
+        low, high = _score(low), _score(high)
+        return sum(1 for score in (self._get(key, dict) or {}).values() if low <= score <= high)
+
+    def cmd_zremrangebyscore(self, key, low, high):
+        value = self._get(key, dict)
+        if value is None:
+            return 0
+        low, high = _score(low), _score(high)
+        doomed = [member for member, score in value.items() if low <= score <= high]
+        for member in doomed:
+            del value[member]
+        if not value:
+            self._delete(key)
+        return len(doomed)
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # 인라인 명령 (redis-cli 로 손으로 칠 때)
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        size = int(header[1:])
+        args.append((await reader.readexactly(size + 2))[:-2])
+    return args
+
+
+async def _serve_client(store: FakeRedis, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            args = await _read_command(reader)
+            if args is None:
+                break
+            writer.write(_encode_reply(store.handle(args)))
+            # 파이프라인으로 들어온 명령은 모아서 한 번에 보냄
+            if not reader._buffer:
+                await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, store: Optional[FakeRedis] = None, ready=None) -> None:
+    store = store or FakeRedis()
+    server = await asyncio.start_server(lambda r, w: _serve_client(store, r, w), host, port)
+    if ready is not None:
+        ready(server.sockets[0].getsockname()[1])
+    async with server:
+        while True:
+            await asyncio.sleep(_SWEEP_SECONDS)
+            store.sweep()
+
+
+def start_in_thread(host: str = "127.0.0.1", port: int = 0) -> Tuple[str, FakeRedis]:
+    """벤치/점검용: 데몬 스레드에서 대역 서버를 띄우고 (redis:// URL, 저장소) 반환"""
+    store = FakeRedis()
+    started = threading.Event()
+    bound = []
+
+    def ready(actual_port):
+        bound.append(actual_port)
+        started.set()
+
+    threading.Thread(target=lambda: asyncio.run(serve(host, port, store, ready)), daemon=True).start()
+    if not started.wait(5):
+        raise RuntimeError("fake redis 가 시작되지 않았습니다")
+    return f"redis://{host}:{bound[0]}/0", store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Redis 대역 서버 (세션 저장소용)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    print(f"[알림] fake redis 시작: redis://{args.host}:{args.port}/0")
+    asyncio.run(serve(args.host, args.port, ready=lambda port: None))
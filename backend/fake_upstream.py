@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Bedrock / Google Custom Search 대역(fake) 서버 - 부하 테스트용
+- 챗봇이 쓰는 API만 흉내 냄:
+  bedrock-runtime InvokeModel / InvokeModelWithResponseStream,
+  bedrock-agent-runtime RetrieveAndGenerate, Google Custom Search JSON API, 검색 결과 웹페이지
+- 사용법: python -m backend.fake_upstream [--port 8900] [--config 설정.json] [--seed 42]
+- 백엔드를 이 서버로 연결 (.env):
+    BEDROCK_RUNTIME_ENDPOINT_URL=http://localhost:8900
+    BEDROCK_AGENT_RUNTIME_ENDPOINT_URL=http://localhost:8900
+    GOOGLE_SEARCH_URL=http://localhost:8900/customsearch/v1
+    AWS_ACCESS_KEY_ID=fake  AWS_SECRET_ACCESS_KEY=fake  (boto3 서명용, 값은 검사하지 않음)
+- 설정 파일(JSON)은 DEFAULT_CONFIG 와 같은 구조이며, 지정한 키만 덮어씀
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+
+from backend.utils.context_compression import estimate_tokens
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    # 지연 시간 분포 (ms): fixed(value_ms) | uniform(min_ms, max_ms) | normal(mean_ms, std_ms) | lognormal(median_ms, sigma)
+    # per_output_token_ms: 응답 토큰 수에 비례해 더하는 시간 (LLM 생성 시간 흉내)
+    "latency": {
+        "invoke_model": {"dist": "lognormal", "median_ms": 600, "sigma": 0.4, "per_output_token_ms": 4},
+        "stream_chunk": {"dist": "fixed", "value_ms": 20},
+        "retrieve_and_generate": {"dist": "lognormal", "median_ms": 2500, "sigma": 0.5},
+        "custom_search": {"dist": "lognormal", "median_ms": 300, "sigma": 0.3},
+        "page": {"dist": "uniform", "min_ms": 100, "max_ms": 600},
+    },
+    # 오류 주입: rate 확률로 status 응답 (code 는 AWS 오류 유형 헤더로 전달)
+    "errors": {
+        "invoke_model": {"rate": 0.0, "status": 429, "code": "ThrottlingException"},
+        "retrieve_and_generate": {"rate": 0.0, "status": 500, "code": "InternalServerException"},
+        "custom_search": {"rate": 0.0, "status": 429, "code": "rateLimitExceeded"},
+        "page": {"rate": 0.0, "status": 503, "code": "ServiceUnavailable"},
+    },
+    # 프롬프트(system + user) 정규식 -> 고정 응답. 위에서부터 처음 맞는 항목 사용
+    "responses": [
+        {
+            "pattern": r"smart orchestrator[\s\S]*User question: \"[^\"]*(날씨|뉴스|오늘|최신)",
+            "text": "{\"action\": \"general_search\", \"query\": \"서울 날씨\", \"confidence\": 0.9}",
+        },
+        {
+            "pattern": r"smart orchestrator[\s\S]*User question: \"[^\"]*팁",
+            "text": "{\"action\": \"get_carbon_reduction_tip\", \"user_intent\": \"탄소 절감 팁\", \"confidence\": 0.9}",
+        },
+        {
+            "pattern": r"smart orchestrator[\s\S]*User question: \"[^\"]*(전략|목표)",
+            "text": "{\"action\": \"get_goal_strategy\", \"user_intent\": \"목표 달성 전략\", \"confidence\": 0.85}",
+        },
+        {
+            "pattern": r"smart orchestrator[\s\S]*User question: \"[^\"]*(안녕|고마워|누구)",
+            "text": "{\"action\": \"direct_answer\", \"answer\": \"안녕하세요! 무엇이든 물어보세요.\", \"confidence\": 0.95}",
+        },
+        {
+            "pattern": r"smart orchestrator",
+            "text": "{\"action\": \"knowledge_base_search\", \"query\": \"탄소 중립 실천 방법\", \"confidence\": 0.7}",
+        },
+        {
+            "pattern": r"summarize chat history",
+            "text": "사용자는 탄소 절감 방법과 친환경 이동에 관심이 많으며, 최근 대중교통 이용 팁을 물어봤습니다.",
+        },
+        {
+            "pattern": r"generates eco-friendly challenge ideas",
+            "text": "{\"title\": \"계단 이용 챌린지\", \"description\": \"오늘은 엘리베이터 대신 계단을 이용해 보세요!\", "
+                    "\"reward\": 20, \"goal_type\": \"TRIP_COUNT\", \"goal_target_value\": 1, \"target_mode\": \"ANY\"}",
+        },
+        {
+            "pattern": r"[\s\S]*",
+            "text": "탄소 배출을 줄이려면 가까운 거리는 걷거나 자전거를 이용하고, 먼 거리는 대중교통을 이용하는 것이 좋습니다. "
+                    "작은 실천이 모여 큰 변화를 만듭니다.",
+        },
+    ],
+    "retrieve_and_generate": {
+        "text": "탄소 중립은 배출한 온실가스만큼 흡수하거나 줄여 순배출을 0으로 만드는 것입니다.",
+        "citations": ["s3://fake-kb/carbon_neutral.pdf", "s3://fake-kb/seoul_climate_plan.pdf"],
+        # 이 확률로 인용 없는(지식 기반에서 못 찾은) 응답을 돌려줌
+        "miss_rate": 0.0,
+    },
+    "custom_search": {"results": 3},
+    "page": {
+        "paragraphs": 12,
+        "text": "서울시는 2050 탄소중립을 목표로 대중교통 이용 확대와 자전거 도로 확충을 추진하고 있습니다.",
+    },
+}
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class FakeUpstream:
+    """설정에 따른 지연 시간, 오류 주입, 고정 응답 선택과 호출 통계"""
+
+    def __init__(self, config: Dict[str, Any], seed: Optional[int] = None):
+        self.config = config
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._responses = [(re.compile(item["pattern"]), item["text"]) for item in config["responses"]]
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, service: str, key: str) -> None:
+        with self._lock:
+            service_stats = self._stats.setdefault(service, {"requests": 0, "errors": 0})
+            service_stats[key] = service_stats.get(key, 0) + 1
+
+    def sample_latency(self, service: str, output_tokens: int = 0) -> float:
+        """초 단위 지연 시간 (분포에서 표본 추출)"""
+        spec = self.config["latency"].get(service, {"dist": "fixed", "value_ms": 0})
+        with self._lock:
+            dist = spec.get("dist", "fixed")
+            if dist == "uniform":
+                value = self._random.uniform(spec["min_ms"], spec["max_ms"])
+            elif dist == "normal":
+                value = self._random.gauss(spec["mean_ms"], spec["std_ms"])
+            elif dist == "lognormal":
+                value = spec["median_ms"] * self._random.lognormvariate(0, spec["sigma"])
+            else:
+                value = spec.get("value_ms", 0)
+        value += spec.get("per_output_token_ms", 0) * output_tokens
+        return max(0.0, value) / 1000
+
+    def injected_error(self, service: str) -> Optional[JSONResponse]:
+        self._count(service, "requests")
+        spec = self.config["errors"].get(service) or {}
+        with self._lock:
+            failed = spec.get("rate", 0) > 0 and self._random.random() < spec["rate"]
+        if not failed:
+            return None
+        self._count(service, "errors")
+        code = spec.get("code", "InternalServerException")
+        return JSONResponse(
+            status_code=spec.get("status", 500),
+            content={"message": f"Injected {code}", "error": {"code": spec.get("status", 500), "message": code}},
+            headers={"x-amzn-ErrorType": code},
+        )
+
+    def canned_text(self, prompt: str) -> str:
+        for pattern, text in self._responses:
+            if pattern.search(prompt):
+                return text
+        return ""
+
+    def chance(self, rate: float) -> bool:
+        with self._lock:
+            return rate > 0 and self._random.random() < rate
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {service: dict(values) for service, values in self._stats.items()}
+
+
+def _prompt_of(body: Dict[str, Any]) -> str:
+    system = body.get("system") or ""
+    if isinstance(system, list):
+        system = "\n".join(part.get("text", "") for part in system)
+    parts = [system]
+    for message in body.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(content)
+    return "\n".join(parts)
+
+
+def _event_stream_message(payload: bytes) -> bytes:
+    """AWS event stream 메시지 하나 (prelude + headers + payload + CRC)"""
+    headers = b""
+    for name, value in ((":event-type", "chunk"), (":content-type", "application/json"), (":message-type", "event")):
+        name_bytes, value_bytes = name.encode(), value.encode()
+        headers += struct.pack(">B", len(name_bytes)) + name_bytes + struct.pack(">BH", 7, len(value_bytes)) + value_bytes
+    total_length = 12 + len(headers) + len(payload) + 4
+    prelude = struct.pack(">II", total_length, len(headers))
+    message = prelude + struct.pack(">I", zlib.crc32(prelude) & 0xFFFFFFFF) + headers + payload
+    return message + struct.pack(">I", zlib.crc32(message) & 0xFFFFFFFF)
+
+
+def _chunk_event(event: Dict[str, Any]) -> bytes:
+    encoded = base64.b64encode(json.dumps(event, ensure_ascii=False).encode("utf-8")).decode()
+    return _event_stream_message(json.dumps({"bytes": encoded}).encode())
+
+
+def create_app(upstream: FakeUpstream) -> FastAPI:
+    app = FastAPI(title="Fake Bedrock / Google upstream")
+
+    @app.post("/model/{model_id:path}/invoke")
+    async def invoke_model(model_id: str, request: Request):
+        body = await request.json()
+        error = upstream.injected_error("invoke_model")
+        prompt = _prompt_of(body)
+        text = upstream.canned_text(prompt)
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(text)
+        await asyncio.sleep(upstream.sample_latency("invoke_model", 0 if error else output_tokens))
+        if error:
+            return error
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model_id,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }
+
+    @app.post("/model/{model_id:path}/invoke-with-response-stream")
+    async def invoke_model_stream(model_id: str, request: Request):
+        body = await request.json()
+        error = upstream.injected_error("invoke_model")
+        prompt = _prompt_of(body)
+        text = upstream.canned_text(prompt)
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(text)
+        # 첫 토큰까지의 시간
+        await asyncio.sleep(upstream.sample_latency("invoke_model"))
+        if error:
+            return error
+
+        async def events():
+            started = time.perf_counter()
+            yield _chunk_event({
+                "type": "message_start",
+                "message": {"id": f"msg_{uuid.uuid4().hex[:24]}", "type": "message", "role": "assistant", "model": model_id,
+                            "content": [], "usage": {"input_tokens": input_tokens, "output_tokens": 0}},
+            })
+            yield _chunk_event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+            for start in range(0, len(text), 8):
+                await asyncio.sleep(upstream.sample_latency("stream_chunk"))
+                yield _chunk_event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text[start:start + 8]}})
+            yield _chunk_event({"type": "content_block_stop", "index": 0})
+            yield _chunk_event({"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": output_tokens}})
+            yield _chunk_event({
+                "type": "message_stop",
+                "amazon-bedrock-invocationMetrics": {
+                    "inputTokenCount": input_tokens,
+                    "outputTokenCount": output_tokens,
+                    "invocationLatency": int((time.perf_counter() - started) * 1000),
+                },
+            })
+
+        return StreamingResponse(events(), media_type="application/vnd.amazon.eventstream")
+
+    @app.post("/retrieveAndGenerate")
+    async def retrieve_and_generate(request: Request):
+        body = await request.json()
+        error = upstream.injected_error("retrieve_and_generate")
+        await asyncio.sleep(upstream.sample_latency("retrieve_and_generate"))
+        if error:
+            return error
+        spec = upstream.config["retrieve_and_generate"]
+        session_id = body.get("sessionId") or uuid.uuid4().hex
+        if upstream.chance(spec.get("miss_rate", 0)):
+            return {"output": {"text": "죄송합니다. 요청하신 정보를 찾을 수 없습니다."}, "citations": [], "sessionId": session_id}
+        text = spec["text"]
+        return {
+            "output": {"text": text},
+            "citations": [
+                {
+                    "generatedResponsePart": {"textResponsePart": {"text": text, "span": {"start": 0, "end": len(text)}}},
+                    "retrievedReferences": [
+                        {"content": {"text": text}, "location": {"type": "S3", "s3Location": {"uri": uri}}}
+                    ],
+                }
+                for uri in spec["citations"]
+            ],
+            "sessionId": session_id,
+        }
+
+    @app.get("/customsearch/v1")
+    async def custom_search(request: Request, q: str = "", num: int = 10):
+        error = upstream.injected_error("custom_search")
+        await asyncio.sleep(upstream.sample_latency("custom_search"))
+        if error:
+            return error
+        base_url = str(request.base_url).rstrip("/")
+        count = min(num, upstream.config["custom_search"]["results"])
+        return {
+            "kind": "customsearch#search",
+            "searchInformation": {"totalResults": str(count)},
+            "items": [
+                {
+                    "kind": "customsearch#result",
+                    "title": f"{q} - 검색 결과 {i + 1}",
+                    "link": f"{base_url}/pages/{i + 1}?q={q}",
+                    "snippet": upstream.config["page"]["text"][:80],
+                }
+                for i in range(count)
+            ],
+        }
+
+    @app.get("/pages/{page_id}", response_class=HTMLResponse)
+    async def page(page_id: int, q: str = ""):
+        error = upstream.injected_error("page")
+        await asyncio.sleep(upstream.sample_latency("page"))
+        if error:
+            return HTMLResponse("Service Unavailable", status_code=error.status_code)
+        spec = upstream.config["page"]
+        paragraphs = "".join(f"<p>{q} 관련 내용 {page_id}-{i + 1}. {spec['text']}</p>" for i in range(spec["paragraphs"]))
+        return f"<html><body><h1>{q} - 문서 {page_id}</h1>{paragraphs}</body></html>"
+
+    @app.get("/_fake/stats")
+    async def fake_stats():
+        return upstream.stats()
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bedrock / Google 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--config", help="DEFAULT_CONFIG 를 덮어쓸 JSON 파일")
+    parser.add_argument("--seed", type=int, default=42, help="지연 시간/오류 주입 난수 시드 (재현 가능한 부하 테스트용)")
+    args = parser.parse_args()
+
+    config = DEFAULT_CONFIG
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config = _merge(DEFAULT_CONFIG, json.load(f))
+    uvicorn.run(create_app(FakeUpstream(config, seed=args.seed)), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+탄소 절감 팁 / 목표 달성 전략 풀 생성 스크립트 (오프라인 배치)
+- 사용법: python -m backend.generate_tip_pool [--if-stale] [--per-combination N]
+- --if-stale: 기존 풀이 TIP_POOL_REFRESH_DAYS 보다 오래된 경우에만 다시 생성
+  예) 매일 새벽 cron: 0 4 * * * cd /app && python -m backend.generate_tip_pool --if-stale
+- 실행 중인 서버는 파일이 바뀐 것을 감지해 다음 요청부터 새 풀을 사용합니다.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+from backend.bedrock_logic import invoke_llm
+from backend.services.tip_pool import (
+    TIP_POOL_PATH, TIP_POOL_REFRESH_DAYS, SEASONS, POOL_MODES, POOL_GOAL_TYPES, GARDEN_LEVEL_BANDS,
+)
+
+MODE_NAMES = {"WALK": "도보", "BIKE": "자전거", "BUS": "버스", "SUBWAY": "지하철", "CAR": "자동차"}
+SEASON_NAMES = {"spring": "봄", "summer": "여름", "autumn": "가을", "winter": "겨울"}
+GOAL_NAMES = {"CO2_SAVED": "탄소 절감량", "DISTANCE_KM": "친환경 이동 거리", "TRIP_COUNT": "친환경 이동 횟수"}
+BAND_NAMES = {"beginner": "이제 막 시작한", "growing": "꾸준히 실천 중인", "advanced": "오래 실천해 온"}
+
+SYSTEM_PROMPT = """
+You write short Korean eco-friendly advice for a carbon-reduction mobility app in Seoul.
+Respond ONLY with a JSON array of strings. Each string is one self-contained item of 1-3 sentences,
+friendly and actionable. Do not number the items and do not add any other text.
+"""
+
+
+def _generate(user_prompt, count):
+    output = invoke_llm(SYSTEM_PROMPT, f"{user_prompt}\n서로 겹치지 않는 항목을 {count}개 작성해 주세요.")
+    if not output:
+        return []
+    match = re.search(r"\[.*\]", output, re.DOTALL)
+    try:
+        items = json.loads(match.group()) if match else []
+    except json.JSONDecodeError:
+        return []
+    return [item.strip() for item in items if isinstance(item, str) and item.strip()]
+
+
+def build_pool(per_combination):
+    items = []
+
+    def add(kind, texts, **tags):
+        for text in texts:
+            items.append({"id": f"{kind}-{len(items) + 1}", "kind": kind, "text": text, **tags})
+
+    for mode in POOL_MODES:
+        for season in SEASONS:
+            prompt = (f"{SEASON_NAMES[season]}철에 주로 {MODE_NAMES[mode]}(으)로 이동하는 사용자를 위한 "
+                      f"탄소 절감 팁을 작성해 주세요.")
+            add("tip", _generate(prompt, per_combination), modes=[mode], seasons=[season])
+            print(f"  - tip {mode}/{season}: 누적 {len(items)}개")
+    add("tip", _generate("누구에게나 해당하는 일상 속 탄소 절감 팁을 작성해 주세요.", per_combination * 2))
+
+    for goal_type in POOL_GOAL_TYPES:
+        for band in GARDEN_LEVEL_BANDS:
+            prompt = (f"{BAND_NAMES[band]} 사용자가 '{GOAL_NAMES[goal_type]}' 목표를 달성하기 위한 "
+                      f"단계별 전략을 작성해 주세요.")
+            add("strategy", _generate(prompt, per_combination), goal_types=[goal_type], garden_bands=[band])
+            print(f"  - strategy {goal_type}/{band}: 누적 {len(items)}개")
+    return items
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="팁/전략 풀 생성")
+    parser.add_argument("--if-stale", action="store_true", help="기존 풀이 오래된 경우에만 생성")
+    parser.add_argument("--per-combination", type=int, default=10, help="태그 조합별 생성 개수")
+    parser.add_argument("--output", default=TIP_POOL_PATH)
+    args = parser.parse_args()
+
+    if args.if_stale and os.path.exists(args.output):
+        age_days = (time.time() - os.path.getmtime(args.output)) / 86400
+        if age_days < TIP_POOL_REFRESH_DAYS:
+            print(f"풀이 아직 최신입니다. ({age_days:.1f}일 경과, 갱신 주기 {TIP_POOL_REFRESH_DAYS}일)")
+            sys.exit(0)
+
+    items = build_pool(args.per_combination)
+    if not items:
+        print("❌ 생성된 항목이 없습니다. 기존 풀을 유지합니다.")
+        sys.exit(1)
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    tmp_path = args.output + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"generated_at": datetime.utcnow().isoformat(), "items": items}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, args.output)
+    print(f"✅ 팁/전략 풀 생성 완료: {len(items)}개 -> {args.output}")
@@ -8,9 +8,12 @@ from dotenv import load_dotenv
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
 from .database import init_db, SessionLocal
-from .routes import dashboard, credits, challenges, auth, achievements, users, admin, mobility, ai_challenge_router, groups, group_challenges # mobility 라우터 추가, AI 챌린지 라우터 추가
+from .routes import dashboard, credits, challenges, auth, achievements, users, admin, mobility, ai_challenge_router, groups, group_challenges, websocket, wallet, ingest # mobility 라우터 추가, AI 챌린지 라우터 추가
 from .seed_admin_user import seed_admin_user
 from .bedrock_logic import router as chat_router
+from .services.ws_broker import ws_broker
+from .services.ws_topics import start_broker
+from .services.ingest_pipeline import ingest_pipeline
 
 # FastAPI 앱 생성
 app = FastAPI(
@@ -49,6 +52,9 @@ app.include_router(mobility.router) # mobility 라우터 추가
 app.include_router(ai_challenge_router.router) # AI 챌린지 라우터 추가
 app.include_router(groups.router)
 app.include_router(group_challenges.router)
+app.include_router(websocket.router)
+app.include_router(wallet.router)
+app.include_router(ingest.router)
 
 @app.on_event("startup")
 async def startup_event():
@@ -63,6 +69,18 @@ async def startup_event():
     finally:
         db.close()
 
+    # WebSocket 브로커 시작 (WS_BROKER=unix 면 같은 호스트의 다른 워커와 메시지 공유)
+    await start_broker()
+
+    # 수집 원본(ingest_raw) -> 이동 기록 정규화 백그라운드 스레드 (INGEST_WORKERS=0 이면 이 프로세스는 수집만)
+    ingest_pipeline.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """앱 종료시 실행되는 이벤트"""
+    ingest_pipeline.stop()
+    await ws_broker.close()
+
 @app.get("/")
 async def root():
     """루트 엔드포인트"""
@@ -79,4 +97,6 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # WebSocket permessage-deflate 압축 (CLI 로 실행할 때는 --ws-per-message-deflate true/false)
+    uvicorn.run(app, host="0.0.0.0", port=8000,
+                ws_per_message_deflate=os.getenv("WS_PER_MESSAGE_DEFLATE", "true").lower() == "true")
\ No newline at end of file
@@ -2,7 +2,7 @@ from datetime import datetime
 import enum
 
 from sqlalchemy import (
-    Column, BigInteger, Enum, DateTime, Numeric, String, Integer, ForeignKey, Boolean, Text
+    Column, BigInteger, Enum, DateTime, Numeric, String, Integer, ForeignKey, Boolean, Text, Index
 )
 from sqlalchemy.dialects.mysql import JSON
 from sqlalchemy.orm import relationship
@@ -214,7 +214,7 @@ class MobilityLog(Base):
     distance_km = Column(Numeric(8, 3), nullable=False)
     started_at = Column(DateTime, nullable=False)
     ended_at = Column(DateTime, nullable=False)
-    raw_ref_id = Column(String(100))
+    raw_ref_id = Column(String(100), index=True)  # 원본 참조 (ingest: "raw:<raw_id>", 묶음 저장: "batch:...")
     co2_baseline_g = Column(Numeric(12, 3))
     co2_actual_g = Column(Numeric(12, 3))
     co2_saved_g = Column(Numeric(12, 3))
@@ -323,6 +323,26 @@ class IngestRaw(Base):
     # Relationships
     source = relationship("IngestSource", backref="raw_data")
 
+# Ingest Jobs: ingest_raw 를 mobility_logs 로 정규화할 작업 (services/ingest_pipeline.py)
+# 원본과 같은 트랜잭션으로 추가되고, 처리되면 지워짐. dead=True 는 재시도를 다 쓴 실패(dead letter)
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    raw_id = Column(BigInteger, ForeignKey("ingest_raw.raw_id"), primary_key=True)
+    source_id = Column(BigInteger, ForeignKey("ingest_sources.source_id"), nullable=False)
+    enqueued_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String(255))
+    dead = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        Index("ix_ingest_jobs_due", "dead", "next_attempt_at"),
+        Index("ix_ingest_jobs_source", "source_id", "dead"),
+    )
+
+    raw = relationship("IngestRaw")
+
 # Subway Distances
 class SubwayDistance(Base):
     __tablename__ = "subway_distances"
@@ -4,6 +4,8 @@ from typing import List
 
 from .. import database, schemas, models
 from backend.services.mobility_service import MobilityService # NEW IMPORT
+from backend.services.user_profile_service import UserActivityProfileService
+from backend.services.ws_topics import publish_ledger_change
 
 router = APIRouter(
     prefix="/admin",
@@ -43,6 +45,8 @@ def grant_points(
     db.add(credit_entry)
     db.commit()
     db.refresh(credit_entry)
+    UserActivityProfileService.invalidate(user_id_int)
+    publish_ledger_change(user_id_int, request.points)
 
     return {"message": f"{request.points} points {transaction_type.lower()}ed for user {user_id_int}"}
 
@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 
 from backend.database import get_db
 from backend.dependencies import get_current_user
+from backend.services.user_profile_service import UserActivityProfileService
 from backend.models import User, Challenge, ChallengeMember, ChallengeCompletionType, TransportMode
 
 class AICallengeCreateRequest(BaseModel):
@@ -57,6 +58,7 @@ async def create_and_join_ai_challenge(
         db.add(enrollment)
         db.commit()
         db.refresh(new_challenge)
+        UserActivityProfileService.invalidate(current_user.user_id)
 
         return {
             "message": "새로운 챌린지가 생성되고 참여가 완료되었습니다!",
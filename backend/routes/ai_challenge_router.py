@@ -5,7 +5,8 @@ from typing import Optional # Optional 임포트 추가
 from datetime import datetime, timedelta
 
 from backend.database import get_db
-from backend.dependencies import get_current_user
+from backend.dependencies import get_current_user, llm_admission
+from backend.services.user_profile_service import UserActivityProfileService
 from backend.models import User, Challenge, ChallengeMember, ChallengeCompletionType, TransportMode, ChallengeGoalType
 from backend import schemas
 
@@ -20,6 +21,7 @@ class AICallengeCreateRequest(BaseModel):
 router = APIRouter(
     prefix="/api/ai-challenges",
     tags=["ai-challenges"],
+    dependencies=[Depends(llm_admission)],
 )
 
 @router.post("/create-and-join")
@@ -58,6 +60,7 @@ async def create_and_join_ai_challenge(
         db.add(enrollment)
         db.commit()
         db.refresh(new_challenge)
+        UserActivityProfileService.invalidate(current_user.user_id)
 
         return {
             "message": "새로운 챌린지가 생성되고 참여가 완료되었습니다!",
@@ -7,6 +7,7 @@ from typing import Optional
 
 from .. import crud, schemas
 from ..database import get_db
+from ..services.password_hasher import PasswordHasherBusy
 
 # .env 파일에서 SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES 로드
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -33,7 +34,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 @router.post("/login", response_model=schemas.Token)
 def login_for_access_token(user_login: schemas.UserLogin, db: Session = Depends(get_db)):
-    user = crud.authenticate_user(db, user_login.username, user_login.password)
+    try:
+        user = crud.authenticate_user(db, user_login.username, user_login.password)
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="로그인 요청이 많아 지금은 처리할 수 없습니다. 잠시 후 다시 시도해 주세요.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -49,7 +57,13 @@ def login_for_access_token(user_login: schemas.UserLogin, db: Session = Depends(
 
 @router.post("/register", response_model=schemas.User)
 def register_user(user_create: schemas.UserCreate, db: Session = Depends(get_db)):
-    # In a real application, you would hash the password before storing.
-    # For simplicity, we're storing it directly for now.
-    db_user = crud.create_user(db=db, user=user_create)
+    # 비밀번호는 crud.create_user 에서 해시로 저장
+    try:
+        db_user = crud.create_user(db=db, user=user_create)
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="요청이 많아 지금은 처리할 수 없습니다. 잠시 후 다시 시도해 주세요.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     return db_user
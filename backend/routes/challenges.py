@@ -6,6 +6,7 @@ from typing import List
 
 from .. import database, models, schemas, crud
 from ..dependencies import get_current_user
+from ..services.user_profile_service import UserActivityProfileService
 
 # /api/challenges 경로로 설정
 router = APIRouter(
@@ -60,6 +61,8 @@ def join_challenge(
     )
     db.add(new_member)
     db.commit()
+    # 챗봇 추천에 쓰는 활동 프로필의 진행 중인 챌린지 목표 유형이 바뀜
+    UserActivityProfileService.invalidate(user_id)
 
     return {"message": f"Successfully joined challenge '{challenge.title}'"}
 
@@ -12,6 +12,8 @@ from backend.schemas import (
     GardenStatus, WateringRequest, WateringResponse, AddPointsRequest
 )
 from backend.dependencies import get_current_user
+from backend.services.user_profile_service import UserActivityProfileService
+from backend.services.ws_topics import publish_garden_change, publish_ledger_change
 
 router = APIRouter(prefix="/api/credits", tags=["credits"])
 
@@ -20,9 +22,6 @@ router = APIRouter(prefix="/api/credits", tags=["credits"])
 async def get_credit_balance(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """사용자의 크레딧 잔액을 조회합니다."""
     user_id = current_user.user_id
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
     
     # 총 포인트 계산
     total_points = db.query(CreditsLedger).filter(
@@ -67,9 +66,6 @@ async def get_credit_history(
 ):
     """사용자의 크레딧 거래 내역을 조회합니다."""
     user_id = current_user.user_id
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
     
     transactions = db.query(CreditsLedger).filter(
         CreditsLedger.user_id == user_id
@@ -104,10 +100,6 @@ async def earn_points(
     if points <= 0:
         raise HTTPException(status_code=400, detail="Points must be positive")
     
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # 크레딧 장부에 기록
     credit_entry = CreditsLedger(
         user_id=user_id,
@@ -120,6 +112,8 @@ async def earn_points(
     
     db.add(credit_entry)
     db.commit()
+    UserActivityProfileService.invalidate(user_id)
+    publish_ledger_change(user_id, credit_entry.points)
     db.refresh(credit_entry)
     
     return CreditTransaction(
@@ -145,10 +139,6 @@ async def spend_points(
     if points <= 0:
         raise HTTPException(status_code=400, detail="Points must be positive")
     
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # 현재 잔액 확인
     current_balance = db.query(CreditsLedger).filter(
         CreditsLedger.user_id == user_id
@@ -170,6 +160,8 @@ async def spend_points(
     
     db.add(credit_entry)
     db.commit()
+    UserActivityProfileService.invalidate(user_id)
+    publish_ledger_change(user_id, credit_entry.points)
     db.refresh(credit_entry)
     
     return CreditTransaction(
@@ -191,9 +183,6 @@ async def water_garden(
     """정원에 물을 줍니다."""
     user_id = current_user.user_id
     # request.user_id는 더 이상 사용하지 않음 (JWT에서 추출한 user_id 사용)
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
     
     # 사용자 정원 조회
     garden = db.query(UserGarden).filter(
@@ -269,6 +258,9 @@ async def water_garden(
             new_level = next_level
     
     db.commit()
+    UserActivityProfileService.invalidate(user_id)
+    publish_ledger_change(user_id, -request.points_spent)
+    publish_garden_change(user_id)
     db.refresh(garden)
     
     # After commit, re-query balance to confirm
@@ -295,9 +287,6 @@ async def water_garden(
 async def get_garden_status(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """사용자의 정원 상태를 조회합니다."""
     user_id = current_user.user_id
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
     
     garden = db.query(UserGarden).filter(
         UserGarden.user_id == user_id
@@ -335,9 +324,6 @@ async def get_total_points(current_user: User = Depends(get_current_user), db: S
     """사용자의 총 포인트를 조회합니다."""
     user_id = current_user.user_id
     try:
-        user = db.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            return {"total_points": 0}  # 사용자 없으면 0 반환
         
         total_points = db.query(CreditsLedger).filter(
             CreditsLedger.user_id == user_id
@@ -360,9 +346,6 @@ async def update_total_points(
     """사용자의 총 포인트를 업데이트합니다."""
     user_id = current_user.user_id
     try:
-        user = db.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            return {"success": False, "message": "User not found"}
         
         # 현재 총 포인트와의 차이 계산
         current_total = db.query(CreditsLedger).filter(
@@ -384,6 +367,8 @@ async def update_total_points(
             )
             db.add(credit_entry)
             db.commit()
+            UserActivityProfileService.invalidate(user_id)
+            publish_ledger_change(user_id, points_diff)
         
         return {"success": True, "message": "Points updated successfully"}
     except Exception as e:
@@ -401,9 +386,6 @@ async def add_points(
     user_id = current_user.user_id
     try:
         # request.user_id는 더 이상 사용하지 않음 (JWT에서 추출한 user_id 사용)
-        user = db.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            return {"success": False, "message": "User not found"}
         
         # 음수 포인트인 경우 잔액 확인
         if request.points < 0:
@@ -429,6 +411,8 @@ async def add_points(
         )
         db.add(credit_entry)
         db.commit()
+        UserActivityProfileService.invalidate(user_id)
+        publish_ledger_change(user_id, request.points)
         
         action = "Added" if request.points > 0 else "Deducted"
         return {"success": True, "message": f"{action} {abs(request.points)} points successfully"}
@@ -446,9 +430,6 @@ async def get_mobility_history(
 ):
     """사용자의 대중교통 이용 내역을 조회합니다."""
     user_id = current_user.user_id
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
     
     logs = db.query(MobilityLog).filter(
         MobilityLog.user_id == user_id
@@ -1,5 +1,5 @@
 # backend/routes/dashboard.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import text, func
 from typing import Dict, Any, List
@@ -29,10 +29,6 @@ async def get_dashboard(current_user: User = Depends(get_current_user), db: Sess
     - 챌린지 진행 상황
     """
     user_id = current_user.user_id
-    # 사용자 존재 확인
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
     # 📌 오늘 절약량 (g)
     co2_saved_today = db.query(func.sum(MobilityLog.co2_saved_g)).filter(
@@ -99,9 +95,6 @@ async def get_dashboard(current_user: User = Depends(get_current_user), db: Sess
 async def get_daily_stats(days: int = 7, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> List[DailyStats]:
     """최근 N일간의 일별 통계를 조회합니다."""
     user_id = current_user.user_id
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
     daily_query = text("""
         SELECT 
@@ -132,9 +125,6 @@ async def get_daily_stats(days: int = 7, current_user: User = Depends(get_curren
 async def get_weekly_stats(weeks: int = 4, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> List[WeeklyStats]:
     """최근 N주간의 주별 통계를 조회합니다."""
     user_id = current_user.user_id
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
     weekly_query = text("""
         SELECT 
@@ -169,9 +159,6 @@ async def get_weekly_stats(weeks: int = 4, current_user: User = Depends(get_curr
 async def get_transport_mode_stats(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> List[Dict[str, Any]]:
     """교통수단별 절감 통계를 조회합니다."""
     user_id = current_user.user_id
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
     mode_query = text("""
         SELECT 
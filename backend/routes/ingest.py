@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import get_db
+from ..dependencies import get_current_admin_user, get_current_user
+from ..services.ingest_pipeline import INGEST_MAX_PAYLOADS, UnknownIngestSource, ingest_pipeline
+
+router = APIRouter(
+    prefix="/ingest",
+    tags=["ingest"],
+)
+
+
+@router.get("/stats")
+def get_ingest_stats(db: Session = Depends(get_db), admin: models.User = Depends(get_current_admin_user)):
+    """제공처별 대기/재시도/dead letter 수와 지연"""
+    return ingest_pipeline.stats(db)
+
+
+@router.get("/dead-letters")
+def list_dead_letters(
+    source: Optional[str] = None,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(get_current_admin_user),
+):
+    try:
+        return ingest_pipeline.dead_letters(db, source, min(max(limit, 1), 1000))
+    except UnknownIngestSource:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"알 수 없는 제공처: {source}")
+
+
+@router.post("/dead-letters/retry")
+def retry_dead_letters(
+    raw_ids: List[int] = Body(..., embed=True),
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(get_current_admin_user),
+):
+    return {"requeued": ingest_pipeline.requeue(db, raw_ids)}
+
+
+@router.post("/{source_name}", status_code=status.HTTP_202_ACCEPTED)
+def ingest_payloads(
+    source_name: str,
+    payload: Union[List[Dict[str, Any]], Dict[str, Any]] = Body(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    제공처 원본(객체 하나 또는 목록)을 그대로 저장하고 바로 202 반환. 이동 기록 변환은 백그라운드에서
+    - 관리자 토큰(서버 간 동기화)은 원본마다 user_id 를 지정할 수 있음. 그 밖에는 로그인한 사용자의 원본
+    """
+    payloads = payload if isinstance(payload, list) else [payload]
+    if len(payloads) > INGEST_MAX_PAYLOADS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"한 번에 최대 {INGEST_MAX_PAYLOADS}건까지 올릴 수 있습니다."
+        )
+    is_admin = current_user.role == models.UserRole.ADMIN
+    items = [
+        (item.get("user_id") if is_admin and item.get("user_id") is not None else current_user.user_id, item)
+        for item in payloads
+    ]
+    if not items:
+        return {"accepted": 0, "raw_ids": []}
+    try:
+        raw_ids = ingest_pipeline.accept(db, source_name, items)
+    except UnknownIngestSource:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"알 수 없는 제공처: {source_name}")
+    return {"accepted": len(raw_ids), "raw_ids": raw_ids}
@@ -8,7 +8,7 @@ from typing import Optional, List, Dict, Any
 from .. import schemas, models, database # Import database module
 from ..database import get_db # Import get_db function
 from ..dependencies import get_current_user # Assuming authentication is required
-from backend.services.mobility_service import MobilityService # NEW IMPORT
+from backend.services.mobility_service import MobilityService, MOBILITY_BATCH_MAX_TRIPS # NEW IMPORT
 
 router = APIRouter(
     prefix="/mobility",
@@ -30,6 +30,35 @@ async def log_mobility_data(
 
     db_mobility_log = MobilityService.log_mobility(db, log_data, current_user)
     
+    return _to_response(db_mobility_log)
+
+@router.post("/log/batch", response_model=schemas.MobilityLogBatchResponse)
+def log_mobility_batch(
+    batch: schemas.MobilityLogBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """교통카드/앱 동기화처럼 여러 건을 한 번에 올리는 경로. 전부 저장되거나 전부 실패 (한 트랜잭션)"""
+    if len(batch.logs) > MOBILITY_BATCH_MAX_TRIPS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"한 번에 최대 {MOBILITY_BATCH_MAX_TRIPS}건까지 올릴 수 있습니다."
+        )
+    if any(log_data.user_id != current_user.user_id for log_data in batch.logs):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot log data for another user"
+        )
+
+    db_mobility_logs = MobilityService.log_mobility_batch(db, batch.logs, current_user)
+    responses = [_to_response(db_mobility_log) for db_mobility_log in db_mobility_logs]
+    return schemas.MobilityLogBatchResponse(
+        logs=responses,
+        total_co2_saved_g=sum(response.co2_saved_g for response in responses),
+        total_eco_credits_earned=sum(response.eco_credits_earned for response in responses),
+    )
+
+def _to_response(db_mobility_log: models.MobilityLog) -> schemas.MobilityLogResponse:
     return schemas.MobilityLogResponse(
         log_id=db_mobility_log.log_id,
         user_id=db_mobility_log.user_id,
@@ -1,19 +1,29 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
-import json
+from datetime import datetime
 
 from backend.database import get_db
 from backend.models import User
+from backend.services.session_store import EXPIRED, create_session_backend
 
 router = APIRouter(prefix="/api/session", tags=["session"])
 
-# 세션 데이터 저장 (메모리 기반 - 실제 운영에서는 Redis 등 사용)
-session_store: Dict[str, Dict[str, Any]] = {}
+# 세션 저장소 (SESSION_BACKEND: memory / sqlite / redis). sqlite, redis 는 여러 워커가 공유하고 재시작해도 유지
+# 저장소 호출이 블로킹(디스크/네트워크)일 수 있어 핸들러는 스레드풀에서 도는 def 로 둠
+session_store = create_session_backend()
+
+
+def _session_or_error(result):
+    """저장소 반환값을 확인해 없으면 404, 만료됐으면 410"""
+    if result is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if result is EXPIRED:
+        raise HTTPException(status_code=410, detail="Session expired")
+    return result
 
 @router.post("/create")
-async def create_session(
+def create_session(
     user_id: int,
     session_data: Optional[Dict[str, Any]] = None,
     db: Session = Depends(get_db)
@@ -25,42 +35,25 @@ async def create_session(
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        # 세션 ID 생성
-        session_id = f"session_{user_id}_{int(datetime.now().timestamp())}"
-        
-        # 세션 데이터 저장
-        session_data = session_data or {}
-        session_data.update({
-            "user_id": user_id,
-            "created_at": datetime.now().isoformat(),
-            "last_activity": datetime.now().isoformat(),
-            "is_active": True
-        })
-        
-        session_store[session_id] = session_data
+        # 세션 생성 (ID 는 추측할 수 없는 임의 값, 같은 초에 만들어도 겹치지 않음)
+        session_id, session_data = session_store.create(user_id, session_data)
         
         return {
             "success": True,
             "session_id": session_id,
             "user_id": user_id,
-            "created_at": session_data["created_at"]
+            "created_at": session_data["created_at"],
+            "expires_at": session_data["expires_at"]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"세션 생성 실패: {str(e)}")
 
 @router.get("/{session_id}")
-async def get_session(session_id: str):
+def get_session(session_id: str):
     """세션 정보를 조회합니다."""
-    if session_id not in session_store:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session_data = session_store[session_id]
-    
-    # 세션 만료 확인 (24시간)
-    created_at = datetime.fromisoformat(session_data["created_at"])
-    if datetime.now() - created_at > timedelta(hours=24):
-        del session_store[session_id]
-        raise HTTPException(status_code=410, detail="Session expired")
+    session_data = _session_or_error(session_store.get(session_id))
     
     return {
         "session_id": session_id,
@@ -68,17 +61,12 @@ async def get_session(session_id: str):
     }
 
 @router.put("/{session_id}/update")
-async def update_session(
+def update_session(
     session_id: str,
     update_data: Dict[str, Any]
 ):
     """세션 데이터를 업데이트합니다."""
-    if session_id not in session_store:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session_data = session_store[session_id]
-    session_data.update(update_data)
-    session_data["last_activity"] = datetime.now().isoformat()
+    session_data = _session_or_error(session_store.update(session_id, update_data))
     
     return {
         "success": True,
@@ -87,25 +75,24 @@ async def update_session(
     }
 
 @router.delete("/{session_id}")
-async def delete_session(session_id: str):
+def delete_session(session_id: str):
     """세션을 삭제합니다."""
-    if session_id not in session_store:
+    if not session_store.delete(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    del session_store[session_id]
-    
     return {
         "success": True,
         "message": "세션이 삭제되었습니다"
     }
 
 @router.get("/user/{user_id}/sessions")
-async def get_user_sessions(user_id: int):
+def get_user_sessions(user_id: int):
     """사용자의 모든 활성 세션을 조회합니다."""
     user_sessions = []
     
-    for session_id, session_data in session_store.items():
-        if session_data.get("user_id") == user_id and session_data.get("is_active", False):
+    # 사용자 인덱스로 그 사용자의 세션만 확인 (전체 세션을 훑지 않음)
+    for session_id, session_data in session_store.user_sessions(user_id):
+        if session_data.get("is_active", False):
             user_sessions.append({
                 "session_id": session_id,
                 "created_at": session_data["created_at"],
@@ -119,14 +106,13 @@ async def get_user_sessions(user_id: int):
     }
 
 @router.post("/{session_id}/extend")
-async def extend_session(session_id: str, hours: int = 24):
+def extend_session(session_id: str, hours: int = 24):
     """세션을 연장합니다."""
-    if session_id not in session_store:
-        raise HTTPException(status_code=404, detail="Session not found")
+    if hours <= 0:
+        raise HTTPException(status_code=400, detail="hours must be positive")
     
-    session_data = session_store[session_id]
-    session_data["last_activity"] = datetime.now().isoformat()
-    session_data["expires_at"] = (datetime.now() + timedelta(hours=hours)).isoformat()
+    # 만료 시각 자체를 옮김 (만료 타이머도 다시 등록)
+    session_data = _session_or_error(session_store.extend(session_id, hours * 3600))
     
     return {
         "success": True,
@@ -135,13 +121,13 @@ async def extend_session(session_id: str, hours: int = 24):
     }
 
 @router.get("/health/check")
-async def session_health_check():
+def session_health_check():
     """세션 시스템 상태를 확인합니다."""
-    active_sessions = len([s for s in session_store.values() if s.get("is_active", False)])
+    # 저장소가 유지하는 카운터를 그대로 사용 (전체 세션을 훑지 않음)
+    stats = session_store.stats()
     
     return {
         "status": "healthy",
-        "total_sessions": len(session_store),
-        "active_sessions": active_sessions,
+        **stats,
         "timestamp": datetime.now().isoformat()
     }
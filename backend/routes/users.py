@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from backend import crud, schemas
 from backend.database import get_db
+from backend.services.password_hasher import PasswordHasherBusy
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.post("/", response_model=schemas.UserRead)
 def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    return crud.create_user(db, user)
+    # 비밀번호 해시 풀이 바쁘면 /auth/register 와 같이 503
+    try:
+        return crud.create_user(db, user)
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="요청이 많아 지금은 처리할 수 없습니다. 잠시 후 다시 시도해 주세요.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
 @router.get("/", response_model=list[schemas.UserRead])
 def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
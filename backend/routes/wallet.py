@@ -0,0 +1,72 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+
+from backend import models
+from backend.dependencies import get_current_admin_user, get_stream_user_id
+from backend.services.wallet_stream import (
+    WALLET_LONG_POLL_TIMEOUT_SECONDS, WalletStreamFull, WalletUnavailable,
+)
+from backend.services.ws_topics import wallet_hub
+
+router = APIRouter(prefix="/api/wallet", tags=["wallet"])
+
+
+def _unavailable(e: Exception) -> HTTPException:
+    if isinstance(e, WalletStreamFull):
+        return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                             detail="연결이 많아 잠시 후 다시 시도해 주세요.", headers={"Retry-After": "5"})
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="지갑 상태를 불러오지 못했습니다.")
+
+
+# 지갑 변경 스트림 (Server-Sent Events)
+@router.get("/stream")
+async def wallet_stream(
+    user_id: int = Depends(get_stream_user_id),
+    last_event_id: Optional[str] = Header(None),
+    last_id: Optional[str] = None,
+):
+    """
+    잔액/탄소 절감량/정원/최근 이동 변경을 커밋 직후 전송하는 SSE 스트림 (event: wallet, data: 전체 상태 JSON)
+    - 연결 직후 현재 상태를 한 번 보내고, 이후 변경될 때마다 전송
+    - EventSource 는 재연결 때 Last-Event-ID 헤더를 자동으로 보냄. 마지막으로 받은 상태와 같으면 다시 보내지 않음
+      (헤더를 보낼 수 없는 경우 ?last_id= 로 전달)
+    - 인증: Authorization 헤더 또는 ?token= (EventSource 용)
+    """
+    try:
+        body = await wallet_hub.open_stream(user_id, last_event_id or last_id)
+    except (WalletStreamFull, WalletUnavailable) as e:
+        raise _unavailable(e)
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        # 프록시(nginx 등)가 스트림을 버퍼링하거나 캐시하지 않도록
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# 스트림을 유지할 수 없는 클라이언트용 long-poll
+@router.get("/poll")
+async def wallet_poll(
+    user_id: int = Depends(get_stream_user_id),
+    since: Optional[str] = None,
+    timeout: float = WALLET_LONG_POLL_TIMEOUT_SECONDS,
+):
+    """
+    since(마지막으로 받은 이벤트 ID)와 다른 상태가 있으면 바로 반환, 없으면 변경될 때까지 최대 timeout 초 대기
+    - 변경이 없으면 204. 클라이언트는 응답을 받는 즉시 받은 id 를 since 로 다시 요청
+    """
+    try:
+        event = await wallet_hub.poll(user_id, since, min(max(timeout, 0.0), WALLET_LONG_POLL_TIMEOUT_SECONDS))
+    except (WalletStreamFull, WalletUnavailable) as e:
+        raise _unavailable(e)
+    if event is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return event
+
+
+@router.get("/stats")
+async def wallet_stats(admin: models.User = Depends(get_current_admin_user)):
+    """열린 스트림/long-poll 수와 변경 신호, 재조회 통계 (관리자 전용)"""
+    return wallet_hub.stats()
@@ -1,117 +1,120 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List, Dict, Any
-import json
-import asyncio
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
+from typing import Optional
 from datetime import datetime
 
-router = APIRouter(prefix="/ws", tags=["websocket"])
+from .. import models
+from ..dependencies import get_current_admin_user, get_websocket_user_id
 
-# 연결된 클라이언트들을 관리
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.user_connections: Dict[int, WebSocket] = {}
+from ..services.ws_manager import connection_manager
+from ..services.ws_broker import ws_broker
+from ..services.ws_codec import Payload, decode
+from ..services.ws_topics import LEADERBOARD, publish_broadcast, publish_to_user, topic_hub, user_stats_topic
 
-    async def connect(self, websocket: WebSocket, user_id: int = None):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        if user_id:
-            self.user_connections[user_id] = websocket
+router = APIRouter(prefix="/ws", tags=["websocket"])
 
-    def disconnect(self, websocket: WebSocket, user_id: int = None):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        if user_id and user_id in self.user_connections:
-            del self.user_connections[user_id]
+# 연결된 클라이언트들을 관리 (연결별 송신 대기열/송신 태스크는 services/ws_manager.py)
+manager = connection_manager
 
-    async def send_personal_message(self, message: str, user_id: int):
-        if user_id in self.user_connections:
-            websocket = self.user_connections[user_id]
-            try:
-                await websocket.send_text(message)
-            except:
-                # 연결이 끊어진 경우 제거
-                self.disconnect(websocket, user_id)
+async def _connect(websocket: WebSocket, user_id: int = None):
+    """연결을 등록하고 클라이언트에 연결 ID 를 알려줌 (연결 수 제한에 걸리면 None)"""
+    conn = await manager.connect(websocket, user_id)
+    if conn is not None:
+        manager.send(conn, Payload({
+            "type": "connected",
+            "connection_id": conn.id,
+            "encoding": conn.codec,
+            "timestamp": datetime.utcnow().isoformat()
+        }))
+    return conn
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                # 연결이 끊어진 경우 제거
-                self.active_connections.remove(connection)
+async def _receive_loop(websocket: WebSocket, conn):
+    """
+    클라이언트 메시지 처리: ping 에 pong 응답, subscribe/unsubscribe/resync 는 토픽 허브로 전달
+    - 받은 메시지는 모두 연결이 살아 있다는 표시 (서버 heartbeat ping 에는 {"type": "pong"} 으로 응답하면 됨)
+    """
+    while True:
+        # 클라이언트로부터 메시지 수신 대기 (MessagePack 연결은 바이너리 프레임으로 보낼 수 있음)
+        event = await websocket.receive()
+        if event["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(event.get("code", 1000))
+        message = decode(event.get("text"), event.get("bytes"))
+        manager.touch(conn)
+        
+        if message.get("type") == "pong":
+            # 서버 heartbeat 응답
+            continue
+        if message.get("type") == "ping":
+            # 핑 메시지에 퐁 응답
+            manager.send(conn, Payload({
+                "type": "pong",
+                "timestamp": datetime.utcnow().isoformat()
+            }))
+        elif await topic_hub.handle_message(conn, message):
+            # 토픽 구독: user_stats:{user_id}, leaderboard, group_ranking, group_challenges:{group_id}
+            continue
+        else:
+            yield message
 
-manager = ConnectionManager()
+async def _authenticate(websocket: WebSocket, user_id: int, token: Optional[str]) -> bool:
+    """토큰(?token=)의 사용자가 경로의 user_id 와 같아야 연결 (아니면 accept 전에 닫아 핸드셰이크 거절)"""
+    if await get_websocket_user_id(websocket, token) != user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return False
+    return True
 
 @router.websocket("/statistics/{user_id}")
-async def websocket_statistics(websocket: WebSocket, user_id: int):
-    """실시간 통계 업데이트 WebSocket"""
-    await manager.connect(websocket, user_id)
+async def websocket_statistics(websocket: WebSocket, user_id: int, token: Optional[str] = None):
+    """실시간 통계 업데이트 WebSocket (본인 통계 토픽은 자동 구독, ?token= 으로 인증)"""
+    if not await _authenticate(websocket, user_id, token):
+        return
+    conn = await _connect(websocket, user_id)
+    if conn is None:
+        return
     
     try:
-        while True:
-            # 클라이언트로부터 메시지 수신 대기
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            if message.get("type") == "ping":
-                # 핑 메시지에 퐁 응답
-                await websocket.send_text(json.dumps({
-                    "type": "pong",
-                    "timestamp": datetime.utcnow().isoformat()
-                }))
-            elif message.get("type") == "subscribe":
-                # 특정 통계 구독
-                await websocket.send_text(json.dumps({
-                    "type": "subscribed",
-                    "subscription": message.get("subscription"),
-                    "timestamp": datetime.utcnow().isoformat()
-                }))
+        await topic_hub.subscribe(conn, user_stats_topic(user_id))
+        async for _ in _receive_loop(websocket, conn):
+            pass
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, user_id)
+        manager.disconnect(conn)
     except Exception as e:
         print(f"WebSocket error: {e}")
-        manager.disconnect(websocket, user_id)
+        manager.disconnect(conn)
 
 @router.websocket("/leaderboard")
-async def websocket_leaderboard(websocket: WebSocket):
-    """실시간 리더보드 업데이트 WebSocket"""
-    await manager.connect(websocket)
+async def websocket_leaderboard(websocket: WebSocket, token: Optional[str] = None):
+    """
+    실시간 리더보드 업데이트 WebSocket
+    - 연결 시 리더보드 snapshot 을 받고, 이후에는 공용 ticker 가 계산한 순위 변경분만 받음
+    - 토큰 없이도 연결 가능 (본인/그룹 토픽을 추가로 구독하려면 ?token= 필요)
+    """
+    conn = await _connect(websocket, await get_websocket_user_id(websocket, token))
+    if conn is None:
+        return
     
     try:
-        while True:
-            # 30초마다 리더보드 업데이트 브로드캐스트
-            await asyncio.sleep(30)
-            
-            # 실제로는 데이터베이스에서 최신 리더보드 데이터를 가져와야 함
-            leaderboard_update = {
-                "type": "leaderboard_update",
-                "data": {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "message": "리더보드가 업데이트되었습니다!"
-                }
-            }
-            
-            await websocket.send_text(json.dumps(leaderboard_update))
+        await topic_hub.subscribe(conn, LEADERBOARD)
+        async for _ in _receive_loop(websocket, conn):
+            pass
             
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        manager.disconnect(conn)
     except Exception as e:
         print(f"WebSocket error: {e}")
-        manager.disconnect(websocket)
+        manager.disconnect(conn)
 
 @router.websocket("/notifications/{user_id}")
-async def websocket_notifications(websocket: WebSocket, user_id: int):
-    """실시간 알림 WebSocket"""
-    await manager.connect(websocket, user_id)
+async def websocket_notifications(websocket: WebSocket, user_id: int, token: Optional[str] = None):
+    """실시간 알림 WebSocket (?token= 으로 인증)"""
+    if not await _authenticate(websocket, user_id, token):
+        return
+    conn = await _connect(websocket, user_id)
+    if conn is None:
+        return
     
     try:
-        while True:
-            # 클라이언트로부터 메시지 수신 대기
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
+        async for message in _receive_loop(websocket, conn):
             if message.get("type") == "get_notifications":
                 # 사용자별 알림 조회
                 notifications = {
@@ -133,13 +136,13 @@ async def websocket_notifications(websocket: WebSocket, user_id: int):
                         }
                     ]
                 }
-                await websocket.send_text(json.dumps(notifications))
+                manager.send(conn, Payload(notifications))
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, user_id)
+        manager.disconnect(conn)
     except Exception as e:
         print(f"WebSocket error: {e}")
-        manager.disconnect(websocket, user_id)
+        manager.disconnect(conn)
 
 # 실시간 업데이트를 위한 헬퍼 함수들
 async def broadcast_statistics_update():
@@ -151,10 +154,10 @@ async def broadcast_statistics_update():
             "message": "통계가 업데이트되었습니다!"
         }
     }
-    await manager.broadcast(json.dumps(update_message))
+    publish_broadcast(update_message, coalesce_key="statistics_update")
 
 async def send_user_notification(user_id: int, title: str, message: str):
-    """특정 사용자에게 알림 전송"""
+    """특정 사용자의 모든 연결(탭/기기, 다른 워커에 붙은 연결 포함)에 알림 전송"""
     notification = {
         "type": "notification",
         "data": {
@@ -163,6 +166,9 @@ async def send_user_notification(user_id: int, title: str, message: str):
             "timestamp": datetime.utcnow().isoformat()
         }
     }
-    await manager.send_personal_message(json.dumps(notification), user_id)
-
+    publish_to_user(user_id, notification)
 
+@router.get("/stats")
+async def websocket_stats(admin: models.User = Depends(get_current_admin_user)):
+    """연결 수, 송신 대기열 길이, 버린 메시지 수 등 WebSocket 전송 통계와 토픽 구독 통계 (관리자 전용)"""
+    return {**manager.stats(), "topics": topic_hub.stats(), "broker": ws_broker.stats()}
@@ -156,6 +156,9 @@ class MobilityLogCreate(BaseModel):
     start_point: Optional[str] = None
     end_point: Optional[str] = None
 
+class MobilityLogBatchCreate(BaseModel):
+    logs: List[MobilityLogCreate]
+
 # 챌린지 관련 스키마
 class Challenge(BaseModel):
     challenge_id: int
@@ -415,6 +418,11 @@ class MobilityLogResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class MobilityLogBatchResponse(BaseModel):
+    logs: List[MobilityLogResponse]
+    total_co2_saved_g: float
+    total_eco_credits_earned: int
+
 # 개인 탄소 발자국 스키마
 class PersonalCarbonFootprint(BaseModel):
     user_id: int
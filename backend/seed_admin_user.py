@@ -9,7 +9,7 @@ models.Base.metadata.create_all(bind=engine)
 
 def seed_admin_user(db: Session):
     admin_username = "admin"
-    admin_password = "12345678" # In a real app, this would be hashed!
+    admin_password = "12345678" # crud.create_user 에서 해시로 저장
 
     # Check if admin user already exists
     existing_admin = db.query(models.User).filter(models.User.username == admin_username).first()
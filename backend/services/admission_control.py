@@ -0,0 +1,187 @@
+# services/admission_control.py
+import asyncio
+import bisect
+import itertools
+import math
+import os
+import time
+from typing import Any, Dict, Hashable, List, Optional
+
+from backend.services.chat_tracing import LatencyHistogram
+
+# LLM 을 호출하는 요청(/chat/, /api/ai-challenges/*)을 동시에 처리할 최대 개수 (워커 프로세스별)
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", 16))
+ADMISSION_MAX_PER_USER = int(os.getenv("ADMISSION_MAX_PER_USER", 2))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 64))
+# 이 시간(초) 안에 처리를 시작할 수 없을 것 같으면 바로 429 로 거절
+ADMISSION_INTERACTIVE_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_INTERACTIVE_MAX_WAIT_SECONDS", 10))
+ADMISSION_BATCH_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_BATCH_MAX_WAIT_SECONDS", 60))
+# 처리 시간 측정값이 쌓이기 전에 대기 시간 추정에 쓸 요청당 처리 시간(초)
+ADMISSION_INITIAL_SERVICE_SECONDS = float(os.getenv("ADMISSION_INITIAL_SERVICE_SECONDS", 5))
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "user_key", "future", "enqueued_at")
+
+    def __init__(self, priority: int, seq: int, user_key: Hashable, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.user_key = user_key
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class AdmissionController:
+    """
+    전체/사용자별 동시 실행 수 제한과 우선순위 대기열
+    - 자리가 없으면 (우선순위, 도착 순서) 로 정렬된 대기열에서 기다림. 사용자별 한도에 걸린 요청은 건너뛰고 다음 요청을 먼저 처리
+    - 예상 대기 시간이 우선순위별 최대 대기 시간을 넘으면 기다리게 하지 않고 바로 거절 (Retry-After 제공)
+    - 대기열이 가득 차면 대화형 요청이 가장 뒤의 배치 요청을 밀어냄
+    - 하나의 이벤트 루프(uvicorn 워커) 안에서만 동작하므로 한도는 워커 프로세스별로 적용됨
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_per_user: int = ADMISSION_MAX_PER_USER,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.max_wait = {INTERACTIVE: ADMISSION_INTERACTIVE_MAX_WAIT_SECONDS, BATCH: ADMISSION_BATCH_MAX_WAIT_SECONDS}
+        self._running = 0
+        self._running_by_user: Dict[Hashable, int] = {}
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._service_seconds = ADMISSION_INITIAL_SERVICE_SECONDS
+        self._stats: Dict[str, Any] = {
+            "admitted": {name: 0 for name in PRIORITY_NAMES.values()},
+            "rejected": {"queue_full": 0, "deadline": 0, "timeout": 0, "evicted": 0},
+            "max_queue_depth": 0,
+        }
+        self._wait_ms = {name: LatencyHistogram() for name in PRIORITY_NAMES.values()}
+
+    def _can_start(self, user_key: Hashable) -> bool:
+        return self._running < self.max_concurrent and self._running_by_user.get(user_key, 0) < self.max_per_user
+
+    def _start(self, user_key: Hashable, priority: int, waited: float) -> None:
+        self._running += 1
+        self._running_by_user[user_key] = self._running_by_user.get(user_key, 0) + 1
+        self._stats["admitted"][PRIORITY_NAMES[priority]] += 1
+        self._wait_ms[PRIORITY_NAMES[priority]].observe(waited * 1000)
+
+    def _estimated_wait(self, priority: int) -> float:
+        """앞에 있는 요청 수와 평균 처리 시간으로 추정한 대기 시간(초)"""
+        ahead = sum(1 for waiter in self._queue if waiter.priority <= priority)
+        return (ahead + 1) / self.max_concurrent * self._service_seconds
+
+    def _reject(self, reason: str, retry_after: float) -> AdmissionRejected:
+        self._stats["rejected"][reason] += 1
+        return AdmissionRejected(reason, max(1, math.ceil(retry_after)))
+
+    def _dispatch(self) -> None:
+        """빈 자리에 대기 중인 요청을 우선순위 순으로 배정"""
+        index = 0
+        while index < len(self._queue) and self._running < self.max_concurrent:
+            waiter = self._queue[index]
+            if waiter.future.done() or not self._can_start(waiter.user_key):
+                index += 1
+                continue
+            del self._queue[index]
+            self._start(waiter.user_key, waiter.priority, time.perf_counter() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+
+    async def acquire(self, user_key: Hashable, priority: int = INTERACTIVE) -> None:
+        """처리 자리를 얻을 때까지 기다림. 얻지 못하면 AdmissionRejected"""
+        ahead = any(waiter.priority <= priority for waiter in self._queue)
+        if not ahead and self._can_start(user_key):
+            self._start(user_key, priority, 0.0)
+            return
+
+        if len(self._queue) >= self.max_queue:
+            lowest = self._queue[-1]
+            if lowest.priority <= priority:
+                raise self._reject("queue_full", self._service_seconds)
+            # 가장 뒤의 배치 요청을 밀어내고 자리를 만듦
+            self._queue.pop()
+            lowest.future.set_exception(self._reject("evicted", self._estimated_wait(lowest.priority)))
+
+        estimated = self._estimated_wait(priority)
+        if estimated > self.max_wait[priority]:
+            raise self._reject("deadline", estimated)
+
+        waiter = _Waiter(priority, next(self._seq), user_key, asyncio.get_running_loop().create_future())
+        bisect.insort(self._queue, waiter)
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._queue))
+        # 앞선 요청이 모두 사용자별 한도에 걸려 있으면 바로 자리를 받을 수 있음
+        self._dispatch()
+        try:
+            done, _ = await asyncio.wait({waiter.future}, timeout=self.max_wait[priority])
+        except asyncio.CancelledError:
+            # 대기 중 클라이언트 연결이 끊긴 경우: 이미 자리를 받았다면 반납
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                self.release(user_key, None)
+            else:
+                self._remove(waiter)
+            raise
+        if not done:
+            self._remove(waiter)
+            raise self._reject("timeout", self._estimated_wait(priority))
+        waiter.future.result()  # 밀려난 경우 AdmissionRejected 발생
+
+    def _remove(self, waiter: _Waiter) -> None:
+        if waiter in self._queue:
+            self._queue.remove(waiter)
+        if not waiter.future.done():
+            waiter.future.cancel()
+
+    def release(self, user_key: Hashable, service_seconds: Optional[float]) -> None:
+        self._running -= 1
+        remaining = self._running_by_user.get(user_key, 1) - 1
+        if remaining > 0:
+            self._running_by_user[user_key] = remaining
+        else:
+            self._running_by_user.pop(user_key, None)
+        if service_seconds is not None:
+            # 지수 이동 평균으로 요청당 처리 시간 갱신 (대기 시간 추정용)
+            self._service_seconds = 0.9 * self._service_seconds + 0.1 * service_seconds
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._running,
+            "users_in_flight": len(self._running_by_user),
+            "queue_depth": {
+                name: sum(1 for waiter in self._queue if waiter.priority == priority)
+                for priority, name in PRIORITY_NAMES.items()
+            },
+            "max_queue_depth": self._stats["max_queue_depth"],
+            "admitted": dict(self._stats["admitted"]),
+            "rejected": dict(self._stats["rejected"]),
+            "wait_ms": {name: histogram.snapshot() for name, histogram in self._wait_ms.items()},
+            "avg_service_seconds": round(self._service_seconds, 3),
+            "limits": {
+                "max_concurrent": self.max_concurrent,
+                "max_per_user": self.max_per_user,
+                "max_queue": self.max_queue,
+                "max_wait_seconds": {PRIORITY_NAMES[p]: seconds for p, seconds in self.max_wait.items()},
+            },
+        }
+
+
+llm_admission_controller = AdmissionController()
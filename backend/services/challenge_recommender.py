@@ -0,0 +1,291 @@
+# services/challenge_recommender.py
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.models import Challenge, ChallengeMember, ChallengeScope, ChallengeStatus, MobilityLog, TransportMode
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHALLENGE_MODEL_PATH = os.getenv("CHALLENGE_MODEL_PATH", os.path.join(_BASE_DIR, "data", "challenge_model.npz"))
+# 이 점수 이상인 기존 챌린지가 없으면 LLM 으로 새 챌린지를 생성
+CHALLENGE_RECOMMEND_MIN_SCORE = float(os.getenv("CHALLENGE_RECOMMEND_MIN_SCORE", 0.2))
+# 최종 점수 = CF 가중치 * 함께 참여한 이력 유사도 + (1 - CF 가중치) * 이동수단 성향 유사도
+CHALLENGE_CF_WEIGHT = float(os.getenv("CHALLENGE_CF_WEIGHT", 0.7))
+# 사용자가 참여한 챌린지 중 유사도가 높은 이웃 몇 개의 평균을 CF 점수로 쓸지
+CHALLENGE_CF_NEIGHBORS = int(os.getenv("CHALLENGE_CF_NEIGHBORS", 3))
+# 참여자가 이보다 적은 챌린지 쌍은 우연일 가능성이 커서 유사도를 줄임 (shrinkage)
+CHALLENGE_SIMILARITY_SHRINKAGE = float(os.getenv("CHALLENGE_SIMILARITY_SHRINKAGE", 5))
+# 챌린지마다 저장할 유사 챌린지 수 (나머지는 유사도 0 으로 취급해 모델 크기를 챌린지 수에 비례하게 유지)
+CHALLENGE_MODEL_TOP_K = int(os.getenv("CHALLENGE_MODEL_TOP_K", 50))
+
+# 이동수단 성향 벡터의 축 (ANY 는 모든 수단에 고르게 분포)
+MODE_AXES = ("WALK", "BIKE", "BUS", "SUBWAY", "CAR")
+_MODE_INDEX = {mode: i for i, mode in enumerate(MODE_AXES)}
+# Challenge.target_mode 에는 PUBLIC_TRANSPORT 같은 값이 들어오지 않지만 LLM 응답을 대비해 함께 처리
+_TARGET_MODE_AXES = {"PUBLIC_TRANSPORT": ("BUS", "SUBWAY")}
+
+
+def _enum_value(value):
+    return value.value if hasattr(value, "value") else value
+
+
+def mode_vector(mode_counts: Dict[str, float]) -> np.ndarray:
+    """수단별 횟수 -> 단위 벡터 (기록이 없으면 0 벡터)"""
+    vector = np.zeros(len(MODE_AXES), dtype=np.float32)
+    for mode, count in mode_counts.items():
+        index = _MODE_INDEX.get(_enum_value(mode))
+        if index is not None:
+            vector[index] += float(count)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def target_mode_vector(target_mode) -> np.ndarray:
+    mode = _enum_value(target_mode) or TransportMode.ANY.value
+    axes = _TARGET_MODE_AXES.get(mode, (mode,) if mode in _MODE_INDEX else MODE_AXES)
+    return mode_vector({axis: 1.0 for axis in axes})
+
+
+def _co_occurrence(user_index: np.ndarray, item_index: np.ndarray, item_count: int):
+    """
+    (사용자, 챌린지) 쌍(사용자 순 정렬)에서 함께 참여한 챌린지 쌍 (a < b) 과 함께 참여한 사용자 수
+    - 사용자별 참여 목록 안에서 d 칸 떨어진 항목끼리 짝지어 d = 1, 2, ... 순으로 모음 (C x C 행렬 없이)
+    """
+    codes = np.zeros(0, dtype=np.int64)
+    counts = np.zeros(0, dtype=np.int64)
+    for d in range(1, len(user_index)):
+        same_user = user_index[d:] == user_index[:-d]
+        if not same_user.any():
+            break
+        a, b = item_index[:-d][same_user], item_index[d:][same_user]
+        pair_codes = np.minimum(a, b) * item_count + np.maximum(a, b)
+        codes, inverse = np.unique(np.concatenate([codes, pair_codes]), return_inverse=True)
+        counts = np.bincount(
+            inverse, weights=np.concatenate([counts, np.ones(len(pair_codes), dtype=np.int64)]), minlength=len(codes)
+        ).astype(np.int64)
+    return codes // item_count, codes % item_count, counts
+
+
+def build_model(db: Session, output_path: str = CHALLENGE_MODEL_PATH) -> Dict[str, Any]:
+    """
+    challenge_members 참여 이력으로 챌린지별 유사 챌린지 목록을 계산해 .npz 로 저장 (야간 배치)
+    - 유사도: 함께 참여한 사용자 수 기반 코사인 유사도, 참여자가 적은 쌍은 shrinkage 로 감쇠
+    - 챌린지마다 상위 CHALLENGE_MODEL_TOP_K 개만 CSR 형식(neighbor_indptr/neighbor_index/neighbor_score)으로 저장
+    - 챌린지별 참여자들의 평균 이동수단 성향 벡터도 함께 저장
+    """
+    started = time.perf_counter()
+    memberships = np.unique(np.array(
+        db.query(ChallengeMember.user_id, ChallengeMember.challenge_id).all(), dtype=np.int64
+    ).reshape(-1, 2), axis=0)
+    challenge_ids = np.unique(memberships[:, 1])
+    user_ids = np.unique(memberships[:, 0])
+    user_index = np.searchsorted(user_ids, memberships[:, 0])
+    item_index = np.searchsorted(challenge_ids, memberships[:, 1])
+
+    # 사용자별 이동수단 성향 (단위 벡터)
+    user_modes = np.zeros((len(user_ids), len(MODE_AXES)), dtype=np.float32)
+    rows = db.query(MobilityLog.user_id, MobilityLog.mode, func.count(MobilityLog.log_id)).group_by(
+        MobilityLog.user_id, MobilityLog.mode
+    ).all()
+    for user_id, mode, count in rows:
+        position = np.searchsorted(user_ids, user_id)
+        axis = _MODE_INDEX.get(_enum_value(mode))
+        if axis is not None and position < len(user_ids) and user_ids[position] == user_id:
+            user_modes[position, axis] = count
+    row_norms = np.linalg.norm(user_modes, axis=1, keepdims=True)
+    user_modes = np.divide(user_modes, row_norms, out=np.zeros_like(user_modes), where=row_norms > 0)
+
+    item_modes = np.zeros((len(challenge_ids), len(MODE_AXES)), dtype=np.float32)
+    np.add.at(item_modes, item_index, user_modes[user_index])
+    item_norms = np.linalg.norm(item_modes, axis=1, keepdims=True)
+    item_modes = np.divide(item_modes, item_norms, out=np.zeros_like(item_modes), where=item_norms > 0)
+
+    # 함께 참여한 쌍만 계산 (implicit feedback, 0/1)
+    members = np.bincount(item_index, minlength=len(challenge_ids)).astype(np.float32)
+    first, second, together = _co_occurrence(user_index, item_index, len(challenge_ids))
+    together = together.astype(np.float32)
+    pair_scores = together / np.sqrt(members[first] * members[second])
+    pair_scores *= together / (together + CHALLENGE_SIMILARITY_SHRINKAGE)
+
+    # 양방향으로 펼친 뒤 챌린지별 점수 상위 CHALLENGE_MODEL_TOP_K 개만 남김
+    rows = np.concatenate([first, second])
+    cols = np.concatenate([second, first])
+    scores = np.concatenate([pair_scores, pair_scores])
+    order = np.lexsort((-scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    row_starts = np.searchsorted(rows, np.arange(len(challenge_ids)))
+    keep = np.arange(len(rows)) - row_starts[rows] < CHALLENGE_MODEL_TOP_K
+    rows, cols, scores = rows[keep], cols[keep], scores[keep]
+    neighbor_indptr = np.searchsorted(rows, np.arange(len(challenge_ids) + 1))
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = output_path + ".tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        challenge_ids=challenge_ids,
+        neighbor_indptr=neighbor_indptr.astype(np.int64),
+        neighbor_index=cols.astype(np.int32),
+        neighbor_score=scores.astype(np.float32),
+        item_modes=item_modes,
+        built_at=np.array(datetime.utcnow().isoformat()),
+    )
+    os.replace(tmp_path, output_path)
+    return {
+        "users": int(len(user_ids)),
+        "challenges": int(len(challenge_ids)),
+        "memberships": int(len(memberships)),
+        "nonzero_pairs": int(len(first)),
+        "stored_neighbors": int(len(cols)),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+class ChallengeRecommender:
+    """
+    참여 가능한 기존 챌린지를 추천하는 협업 필터링 추천기
+    - 야간 배치(build_challenge_model)가 만든 챌린지별 유사 챌린지 목록을 읽어 요청 시에는 배열 인덱싱만 수행
+    - 모델 파일이 바뀌면 다음 요청 때 자동으로 다시 읽음
+    - 모델에 없는 새 챌린지는 target_mode 와 사용자 이동수단 성향만으로 점수를 매김
+    """
+
+    def __init__(self, path: str = CHALLENGE_MODEL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded_mtime: Optional[float] = None
+        self._challenge_ids = np.zeros(0, dtype=np.int64)
+        self._neighbor_indptr = np.zeros(1, dtype=np.int64)
+        self._neighbor_index = np.zeros(0, dtype=np.int32)
+        self._neighbor_score = np.zeros(0, dtype=np.float32)
+        self._item_modes = np.zeros((0, len(MODE_AXES)), dtype=np.float32)
+        self._built_at: Optional[str] = None
+        self._stats = {"requests": 0, "recommended": 0, "below_threshold": 0, "total_ms": 0.0}
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+        try:
+            with np.load(self.path) as data:
+                self._challenge_ids = data["challenge_ids"]
+                self._neighbor_indptr = data["neighbor_indptr"]
+                self._neighbor_index = data["neighbor_index"]
+                self._neighbor_score = data["neighbor_score"]
+                self._item_modes = data["item_modes"]
+                self._built_at = str(data["built_at"])
+            self._loaded_mtime = mtime
+            print(f"[알림] 챌린지 추천 모델을 불러왔습니다. (챌린지 {len(self._challenge_ids)}개, 생성 시각: {self._built_at})")
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[오류] 챌린지 추천 모델을 읽는 중 오류가 발생했습니다: {e}")
+
+    def _model_index(self, challenge_ids: List[int]) -> np.ndarray:
+        """챌린지 ID -> 모델 행 번호 (모델에 없으면 -1)"""
+        ids = np.asarray(challenge_ids, dtype=np.int64)
+        if not len(self._challenge_ids) or not len(ids):
+            return np.full(len(ids), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self._challenge_ids, ids), len(self._challenge_ids) - 1)
+        return np.where(self._challenge_ids[positions] == ids, positions, -1)
+
+    def _cf_scores(self, joined_index: np.ndarray, candidate_index: np.ndarray) -> np.ndarray:
+        """
+        후보별로, 사용자가 참여한 챌린지들과의 유사도 중 상위 CHALLENGE_CF_NEIGHBORS 개의 평균
+        (저장된 이웃 목록에 없는 쌍은 유사도 0)
+        """
+        scores = np.zeros(len(candidate_index), dtype=np.float32)
+        starts, ends = self._neighbor_indptr[joined_index], self._neighbor_indptr[joined_index + 1]
+        if not len(joined_index) or not (ends > starts).any():
+            return scores
+        entries = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+        # 모델 행 번호 -> 후보 목록 위치
+        candidate_position = np.full(len(self._challenge_ids), -1, dtype=np.int64)
+        known = candidate_index >= 0
+        candidate_position[candidate_index[known]] = np.flatnonzero(known)
+        positions = candidate_position[self._neighbor_index[entries]]
+        values = self._neighbor_score[entries]
+        matched = positions >= 0
+        positions, values = positions[matched], values[matched]
+        if not len(positions):
+            return scores
+        order = np.lexsort((-values, positions))
+        positions, values = positions[order], values[order]
+        rank = np.arange(len(positions)) - np.searchsorted(positions, positions)
+        k = min(CHALLENGE_CF_NEIGHBORS, len(joined_index))
+        top = rank < k
+        np.add.at(scores, positions[top], values[top])
+        return scores / k
+
+    def recommend(self, db: Session, user_id: int, mode_counts: Dict[str, int], top_k: int = 3) -> List[Dict[str, Any]]:
+        """점수 순으로 참여 가능한 챌린지 목록 반환 (CHALLENGE_RECOMMEND_MIN_SCORE 미만은 제외)"""
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        joined_ids = [cid for (cid,) in db.query(ChallengeMember.challenge_id).filter(ChallengeMember.user_id == user_id).all()]
+        query = db.query(Challenge).filter(
+            Challenge.scope == ChallengeScope.PERSONAL,
+            Challenge.status == ChallengeStatus.ACTIVE,
+            Challenge.end_at > now,
+        )
+        if joined_ids:
+            query = query.filter(Challenge.challenge_id.notin_(joined_ids))
+        candidates = query.all()
+
+        with self._lock:
+            self._reload_if_changed()
+            results = []
+            if candidates:
+                candidate_index = self._model_index([c.challenge_id for c in candidates])
+                joined_index = self._model_index(joined_ids)
+                joined_index = joined_index[joined_index >= 0]
+
+                # 1. 함께 참여한 이력 기반 점수: 사용자가 참여한 챌린지들과의 유사도 중 상위 이웃 평균
+                cf_scores = self._cf_scores(joined_index, candidate_index)
+                known = candidate_index >= 0
+
+                # 2. 이동수단 성향 점수: 참여자 평균 성향(모델에 있으면)과 target_mode 를 섞어 사용자 성향과 비교
+                item_modes = np.stack([target_mode_vector(c.target_mode) for c in candidates])
+                if known.any():
+                    item_modes[known] = item_modes[known] + self._item_modes[candidate_index[known]]
+                    item_norms = np.linalg.norm(item_modes, axis=1, keepdims=True)
+                    item_modes = np.divide(item_modes, item_norms, out=np.zeros_like(item_modes), where=item_norms > 0)
+                mode_scores = item_modes @ mode_vector(mode_counts)
+
+                scores = CHALLENGE_CF_WEIGHT * cf_scores + (1 - CHALLENGE_CF_WEIGHT) * mode_scores
+                order = np.argsort(-scores, kind="stable")[:top_k]
+                results = [
+                    {
+                        "challenge_id": candidates[i].challenge_id,
+                        "title": candidates[i].title,
+                        "description": candidates[i].description,
+                        "score": round(float(scores[i]), 4),
+                        "cf_score": round(float(cf_scores[i]), 4),
+                        "mode_score": round(float(mode_scores[i]), 4),
+                    }
+                    for i in order
+                    if scores[i] >= CHALLENGE_RECOMMEND_MIN_SCORE
+                ]
+
+            self._stats["requests"] += 1
+            self._stats["recommended" if results else "below_threshold"] += 1
+            self._stats["total_ms"] += (time.perf_counter() - started) * 1000
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._reload_if_changed()
+            stats = dict(self._stats)
+            stats["model_challenges"] = int(len(self._challenge_ids))
+            stats["built_at"] = self._built_at
+        stats["avg_ms"] = round(stats.pop("total_ms") / stats["requests"], 3) if stats["requests"] else 0.0
+        stats["min_score"] = CHALLENGE_RECOMMEND_MIN_SCORE
+        return stats
+
+
+challenge_recommender = ChallengeRecommender()
@@ -0,0 +1,263 @@
+# services/chat_tracing.py
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 요청별 구간 기록을 한 줄짜리 JSON 으로 남길 파일 (비워 두면 파일 기록 안 함)
+CHAT_TRACE_LOG_PATH = os.getenv("CHAT_TRACE_LOG_PATH", os.path.join(_BASE_DIR, "logs", "chat_traces.log"))
+CHAT_TRACE_LOG_MAX_BYTES = int(os.getenv("CHAT_TRACE_LOG_MAX_BYTES", 10 * 1024 * 1024))
+CHAT_TRACE_LOG_BACKUPS = int(os.getenv("CHAT_TRACE_LOG_BACKUPS", 5))
+
+# 지연 시간 히스토그램 구간 상한 (ms)
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 40000, 80000)
+
+_current_trace: ContextVar[Optional["ChatTrace"]] = ContextVar("chat_trace", default=None)
+_current_span: ContextVar[Optional["_Span"]] = ContextVar("chat_span", default=None)
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "started", "input_tokens", "output_tokens")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+
+class ChatTrace:
+    """
+    챗봇 요청 하나의 구간별 소요 시간, Bedrock 토큰 수, 캐시 적중/대체 경로 기록
+    - asyncio.to_thread 로 실행되는 단계도 contextvars 가 복사되므로 같은 trace 에 기록됨
+    """
+
+    def __init__(self, user_id: int):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.user_id = user_id
+        self.started = time.perf_counter()
+        self.attrs: Dict[str, Any] = {}
+        self.spans: List[Dict[str, Any]] = []
+        self.events: Dict[str, int] = {}
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def add_span(self, span: _Span, ended: float) -> None:
+        record = {
+            "name": span.name,
+            "start_ms": round((span.started - self.started) * 1000, 1),
+            "duration_ms": round((ended - span.started) * 1000, 1),
+        }
+        if span.input_tokens or span.output_tokens:
+            record["input_tokens"] = span.input_tokens
+            record["output_tokens"] = span.output_tokens
+        record.update(span.attrs)
+        with self._lock:
+            self.spans.append(record)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "trace_id": self.trace_id,
+                "user_id": self.user_id,
+                "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                **self.attrs,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "events": dict(self.events),
+                "spans": sorted(self.spans, key=lambda s: s["start_ms"]),
+            }
+
+
+def start_trace(user_id: int) -> ChatTrace:
+    trace = ChatTrace(user_id)
+    _current_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    현재 요청의 한 단계를 측정 (요청 밖에서 호출되면 아무것도 기록하지 않음)
+    - with span("router_llm") as s: s.attrs["ok"] = True 처럼 속성 추가 가능
+    """
+    trace = _current_trace.get()
+    current = _Span(name, attrs)
+    if trace is None:
+        yield current
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.add_span(current, time.perf_counter())
+
+
+def annotate(**attrs) -> None:
+    """현재 요청에 속성 추가 (예: action, hedge_winner)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.attrs.update(attrs)
+
+
+def record_event(name: str) -> None:
+    """캐시 적중, 대체 경로 등 횟수 기록"""
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.events[name] = trace.events.get(name, 0) + 1
+
+
+def record_tokens(input_tokens: int, output_tokens: int) -> None:
+    """Bedrock 응답의 usage 를 현재 요청과 현재 구간에 더함"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    with trace._lock:
+        trace.input_tokens += input_tokens
+        trace.output_tokens += output_tokens
+    current = _current_span.get()
+    if current is not None:
+        current.input_tokens += input_tokens
+        current.output_tokens += output_tokens
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def _quantile(self, q: float) -> float:
+        """구간 상한으로 추정한 분위수 (관측된 최댓값을 넘지 않음)"""
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                bound = LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+                return round(min(bound, self.max_ms), 1)
+        return round(self.max_ms, 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(list(LATENCY_BUCKETS_MS) + ["+Inf"], self.counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": self._quantile(0.5) if self.count else 0.0,
+            "p95_ms": self._quantile(0.95) if self.count else 0.0,
+            "p99_ms": self._quantile(0.99) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "buckets": buckets,
+        }
+
+
+class ChatMetrics:
+    """action 별 전체 지연 시간과 단계별 지연 시간 히스토그램, 토큰 수, 이벤트 집계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._actions: Dict[str, Dict[str, Any]] = {}
+        self._logger: Optional[logging.Logger] = None
+        self._logger_ready = False
+
+    def _action(self, action: str) -> Dict[str, Any]:
+        entry = self._actions.get(action)
+        if entry is None:
+            entry = {"latency": LatencyHistogram(), "stages": {}, "input_tokens": 0, "output_tokens": 0, "events": {}}
+            self._actions[action] = entry
+        return entry
+
+    def _get_logger(self) -> Optional[logging.Logger]:
+        if self._logger_ready:
+            return self._logger
+        self._logger_ready = True
+        if not CHAT_TRACE_LOG_PATH:
+            return None
+        try:
+            os.makedirs(os.path.dirname(CHAT_TRACE_LOG_PATH), exist_ok=True)
+            handler = RotatingFileHandler(
+                CHAT_TRACE_LOG_PATH, maxBytes=CHAT_TRACE_LOG_MAX_BYTES, backupCount=CHAT_TRACE_LOG_BACKUPS, encoding="utf-8"
+            )
+        except OSError as e:
+            print(f"[오류] 챗봇 구간 기록 파일을 열 수 없습니다: {e}")
+            return None
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger("backend.chat_trace")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self._logger = logger
+        return logger
+
+    def record(self, trace: ChatTrace) -> Dict[str, Any]:
+        data = trace.to_dict()
+        action = data.get("action") or "unknown"
+        with self._lock:
+            entry = self._action(action)
+            entry["latency"].observe(data["total_ms"])
+            entry["input_tokens"] += data["input_tokens"]
+            entry["output_tokens"] += data["output_tokens"]
+            for s in data["spans"]:
+                stage = entry["stages"].get(s["name"])
+                if stage is None:
+                    stage = entry["stages"][s["name"]] = LatencyHistogram()
+                stage.observe(s["duration_ms"])
+            for name, value in data["events"].items():
+                entry["events"][name] = entry["events"].get(name, 0) + value
+            logger = self._get_logger()
+        if logger is not None:
+            logger.info(json.dumps(data, ensure_ascii=False, default=str))
+        return data
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                action: {
+                    "latency": entry["latency"].snapshot(),
+                    "stages": {name: hist.snapshot() for name, hist in entry["stages"].items()},
+                    "input_tokens": entry["input_tokens"],
+                    "output_tokens": entry["output_tokens"],
+                    "events": dict(entry["events"]),
+                }
+                for action, entry in self._actions.items()
+            }
+
+
+chat_metrics = ChatMetrics()
+
+
+def finish_trace(trace: ChatTrace) -> Dict[str, Any]:
+    """요청이 끝나면 히스토그램에 반영하고 JSON 로그에 한 줄 기록"""
+    try:
+        return chat_metrics.record(trace)
+    finally:
+        _current_trace.set(None)
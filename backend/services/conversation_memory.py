@@ -0,0 +1,237 @@
+# services/conversation_memory.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from backend.utils.context_compression import estimate_tokens
+
+# 요약 + 최근 대화에 쓸 수 있는 최대 토큰 수
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", 1200))
+CONVERSATION_FOLD_TARGET_RATIO = float(os.getenv("CONVERSATION_FOLD_TARGET_RATIO", 0.6))
+CONVERSATION_SUMMARY_MAX_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", 300))
+# 요약하지 않고 원문 그대로 유지할 최근 메시지 수 (사용자 + 챗봇 메시지 각각 1개로 계산)
+CONVERSATION_RECENT_MESSAGES = int(os.getenv("CONVERSATION_RECENT_MESSAGES", 4))
+CONVERSATION_MAX_USERS = int(os.getenv("CONVERSATION_MAX_USERS", 5000))
+CONVERSATION_TTL_SECONDS = int(os.getenv("CONVERSATION_TTL_SECONDS", 24 * 60 * 60))
+# 비워 두면 메모리에만 저장
+CONVERSATION_SQLITE_PATH = os.getenv("CONVERSATION_SQLITE_PATH", "")
+
+ROLE_LABELS = {"user": "사용자", "assistant": "챗봇"}
+
+
+class _Conversation:
+    __slots__ = ("summary", "messages", "updated_at", "full_history_tokens")
+
+    def __init__(self):
+        self.summary = ""
+        self.messages: Deque[Tuple[str, str]] = deque()
+        self.updated_at = time.time()
+        # 지금까지 주고받은 모든 메시지의 토큰 수 (전체 기록을 보냈다면 필요했을 양)
+        self.full_history_tokens = 0
+
+    def to_blob(self) -> bytes:
+        data = {
+            "s": self.summary,
+            "m": list(self.messages),
+            "u": self.updated_at,
+            "f": self.full_history_tokens,
+        }
+        return zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    @classmethod
+    def from_blob(cls, blob: bytes) -> "_Conversation":
+        data = json.loads(zlib.decompress(blob).decode("utf-8"))
+        conversation = cls()
+        conversation.summary = data["s"]
+        conversation.messages = deque(tuple(m) for m in data["m"])
+        conversation.updated_at = data["u"]
+        conversation.full_history_tokens = data["f"]
+        return conversation
+
+
+def _format_messages(messages) -> str:
+    return "\n".join(f"{ROLE_LABELS.get(role, role)}: {text}" for role, text in messages)
+
+
+class ConversationMemory:
+    """
+    사용자별 챗봇 대화 기록
+    - 토큰 예산을 넘으면 오래된 메시지를 요약(rolling summary)에 접어 넣고 최근 메시지만 원문으로 유지
+    - 사용자 수는 LRU 로 제한하고, CONVERSATION_SQLITE_PATH 가 있으면 SQLite 에도 저장
+    """
+
+    def __init__(
+        self,
+        summarizer: Optional[Callable[[str, str], Optional[str]]] = None,
+        sqlite_path: str = CONVERSATION_SQLITE_PATH,
+        token_budget: int = CONVERSATION_TOKEN_BUDGET,
+        max_users: int = CONVERSATION_MAX_USERS,
+    ):
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.max_users = max_users
+        self._lock = threading.RLock()
+        # 사용자별 잠금: 같은 사용자의 요약(LLM 호출)을 한 번에 하나만 실행 (쓰는 요청이 없으면 사라짐)
+        self._user_locks: "weakref.WeakValueDictionary[int, threading.Lock]" = weakref.WeakValueDictionary()
+        self._conversations: "OrderedDict[int, _Conversation]" = OrderedDict()
+        self._stats = {"context_requests": 0, "context_tokens_sent": 0, "full_history_tokens": 0, "summaries": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS conversations (user_id INTEGER PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def set_summarizer(self, summarizer: Callable[[str, str], Optional[str]]) -> None:
+        self.summarizer = summarizer
+
+    def _get(self, user_id: int, create: bool = False) -> Optional[_Conversation]:
+        conversation = self._conversations.get(user_id)
+        if conversation is None and self._db is not None:
+            row = self._db.execute("SELECT data FROM conversations WHERE user_id = ?", (user_id,)).fetchone()
+            if row:
+                conversation = _Conversation.from_blob(row[0])
+        if conversation is not None and time.time() - conversation.updated_at > CONVERSATION_TTL_SECONDS:
+            self._delete(user_id)
+            conversation = None
+        if conversation is None and create:
+            conversation = _Conversation()
+        if conversation is not None:
+            self._conversations[user_id] = conversation
+            self._conversations.move_to_end(user_id)
+            while len(self._conversations) > self.max_users:
+                # 메모리에서만 내보냄 (SQLite 에는 남아 있음)
+                self._conversations.popitem(last=False)
+        return conversation
+
+    def _delete(self, user_id: int) -> None:
+        self._conversations.pop(user_id, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM conversations WHERE user_id = ?", (user_id,))
+            self._db.commit()
+
+    def _persist(self, user_id: int, conversation: _Conversation) -> None:
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO conversations (user_id, data, updated_at) VALUES (?, ?, ?)",
+                (user_id, conversation.to_blob(), conversation.updated_at),
+            )
+            self._db.commit()
+
+    def _tokens(self, conversation: _Conversation) -> int:
+        return estimate_tokens(conversation.summary) + sum(estimate_tokens(text) for _, text in conversation.messages)
+
+    def _overflow(self, conversation: _Conversation):
+        """
+        예산을 넘으면 요약에 접어 넣을 오래된 메시지 목록 (최근 CONVERSATION_RECENT_MESSAGES 개는 항상 유지)
+        - 매 턴마다 요약 호출이 생기지 않도록 예산의 CONVERSATION_FOLD_TARGET_RATIO 까지 한 번에 줄임
+        - 요약이 끝날 때까지 context() 에서 빠지지 않도록 여기서는 꺼내지 않음
+        """
+        overflow = []
+        tokens = self._tokens(conversation)
+        if tokens <= self.token_budget:
+            return overflow
+        target = self.token_budget * CONVERSATION_FOLD_TARGET_RATIO
+        for role, text in conversation.messages:
+            if len(conversation.messages) - len(overflow) <= CONVERSATION_RECENT_MESSAGES or tokens <= target:
+                break
+            overflow.append((role, text))
+            tokens -= estimate_tokens(text)
+        return overflow
+
+    def _summarize(self, previous_summary: str, overflow) -> str:
+        """꺼낸 메시지를 한 번의 요약 호출로 기존 요약에 접어 넣음"""
+        new_summary = None
+        if self.summarizer is not None:
+            prompt = (
+                "다음은 이전 대화 요약과 그 이후의 대화입니다. 이후 대화에서 참고해야 할 사실, 사용자의 관심사와 "
+                f"요청만 남겨 한국어로 {CONVERSATION_SUMMARY_MAX_TOKENS}토큰 이내로 다시 요약해 주세요.\n\n"
+                f"[이전 요약]\n{previous_summary or '(없음)'}\n\n[대화]\n{_format_messages(overflow)}"
+            )
+            try:
+                new_summary = self.summarizer("You summarize chat history concisely.", prompt)
+            except Exception as e:
+                print(f"[오류] 대화 요약 중 오류가 발생했습니다: {e}")
+        if not new_summary:
+            # 요약 모델을 쓸 수 없으면 각 메시지 앞부분만 남기는 방식으로 대체
+            new_summary = "\n".join(filter(None, [previous_summary, _format_messages((r, t[:80]) for r, t in overflow)]))
+        # 요약도 상한을 넘지 않도록 뒤쪽(최근 내용) 기준으로 자름
+        while estimate_tokens(new_summary) > CONVERSATION_SUMMARY_MAX_TOKENS and len(new_summary) > 1:
+            new_summary = new_summary[len(new_summary) // 5:]
+        return new_summary.strip()
+
+    def _user_lock(self, user_id: int) -> threading.Lock:
+        with self._lock:
+            lock = self._user_locks.get(user_id)
+            if lock is None:
+                lock = self._user_locks[user_id] = threading.Lock()
+            return lock
+
+    def add_turn(self, user_id: int, user_message: str, assistant_message: str) -> None:
+        # 같은 사용자의 턴은 요약까지 차례로 처리 (앞 턴의 요약이 끝나기 전에 같은 메시지를 다시 접지 않도록)
+        with self._user_lock(user_id):
+            with self._lock:
+                conversation = self._get(user_id, create=True)
+                for role, text in (("user", user_message), ("assistant", assistant_message or "")):
+                    conversation.messages.append((role, text))
+                    conversation.full_history_tokens += estimate_tokens(text)
+                conversation.updated_at = time.time()
+                overflow = self._overflow(conversation)
+                previous_summary = conversation.summary
+                if not overflow:
+                    self._persist(user_id, conversation)
+                    return
+
+            # 요약(LLM 호출)은 전체 잠금 밖에서 실행해 다른 사용자의 요청을 막지 않음
+            new_summary = self._summarize(previous_summary, overflow)
+            with self._lock:
+                # 요약이 끝난 뒤에 메시지를 빼고 요약을 바꿈 (그 전까지 context() 는 원문을 그대로 봄)
+                for _ in overflow:
+                    conversation.messages.popleft()
+                conversation.summary = new_summary
+                self._stats["summaries"] += 1
+                self._persist(user_id, conversation)
+
+    def context(self, user_id: int) -> str:
+        """LLM 프롬프트에 붙일 대화 맥락 (요약 + 최근 메시지). 기록이 없으면 빈 문자열"""
+        with self._lock:
+            conversation = self._get(user_id)
+            if conversation is None or not (conversation.summary or conversation.messages):
+                return ""
+            parts = []
+            if conversation.summary:
+                parts.append(f"[이전 대화 요약]\n{conversation.summary}")
+            if conversation.messages:
+                parts.append(f"[최근 대화]\n{_format_messages(conversation.messages)}")
+            context = "\n\n".join(parts)
+            self._stats["context_requests"] += 1
+            self._stats["context_tokens_sent"] += estimate_tokens(context)
+            self._stats["full_history_tokens"] += conversation.full_history_tokens
+            return context
+
+    def clear(self, user_id: int) -> None:
+        # 진행 중인 요약이 끝난 뒤에 지움 (요약 결과가 지운 기록을 되살리지 않도록)
+        with self._user_lock(user_id), self._lock:
+            self._delete(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["users_in_memory"] = len(self._conversations)
+        stats["tokens_saved"] = stats["full_history_tokens"] - stats["context_tokens_sent"]
+        stats["saved_ratio"] = (
+            round(stats["tokens_saved"] / stats["full_history_tokens"], 4) if stats["full_history_tokens"] else 0.0
+        )
+        stats["persistent"] = self._db is not None
+        return stats
+
+
+conversation_memory = ConversationMemory()
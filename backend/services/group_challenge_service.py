@@ -4,7 +4,8 @@ from sqlalchemy import and_, func, text
 from decimal import Decimal
 from backend.models import GroupChallenge, GroupChallengeMember, GroupMember, GroupRole, ChallengeStatus
 from backend.schemas import GroupChallengeCreate
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from backend.services.ws_topics import publish_group_challenge_progress
 from datetime import datetime, date
 
 class GroupChallengeService:
@@ -122,11 +123,22 @@ class GroupChallengeService:
     @staticmethod
     def update_challenge_progress(db: Session, user_id: int, co2_saved: float):
         """Update user progress in active group challenges"""
-        # Find all active challenges user is part of
+        updated = GroupChallengeService.add_contribution(db, user_id, co2_saved)
+        db.commit()
+        for group_id, challenge_id in updated:
+            publish_group_challenge_progress(group_id, challenge_id, user_id, co2_saved)
+
+    @staticmethod
+    def add_contribution(db: Session, user_id: int, co2_saved: float) -> List[Tuple[int, int]]:
+        """
+        사용자가 참여 중인 활성 그룹 챌린지마다 co2_saved 를 한 번씩 더함 (커밋/알림은 호출한 쪽에서)
+        - 챌린지 목록 1번 + 참여 행 1번 조회 (챌린지 수와 무관)
+        - 반환: 바뀐 (group_id, challenge_id) 목록
+        """
         today = datetime.now().date()
-        
+
         query = text("""
-            SELECT gc.challenge_id, gc.goal_value
+            SELECT gc.challenge_id, gc.group_id, gcm.participant_id
             FROM group_challenges gc
             JOIN group_challenge_members gcm ON gc.challenge_id = gcm.challenge_id
             WHERE gcm.user_id = :user_id
@@ -134,23 +146,22 @@ class GroupChallengeService:
             AND DATE(gc.start_date) <= :today
             AND DATE(gc.end_date) >= :today
         """)
-        
-        result = db.execute(query, {"user_id": user_id, "today": today})
-        
-        for row in result.fetchall():
-            challenge_member = db.query(GroupChallengeMember).filter(
-                and_(
-                    GroupChallengeMember.challenge_id == row.challenge_id,
-                    GroupChallengeMember.user_id == user_id
-                )
-            ).first()
-            
-            if challenge_member:
-                challenge_member.contribution += Decimal(str(co2_saved))
-                challenge_member.progress = challenge_member.contribution
-        
-        db.commit()
-    
+        rows = db.execute(query, {"user_id": user_id, "today": today}).fetchall()
+        if not rows:
+            return []
+
+        groups = {row.participant_id: (row.group_id, row.challenge_id) for row in rows}
+        members = db.query(GroupChallengeMember).filter(
+            GroupChallengeMember.participant_id.in_(list(groups))
+        ).all()
+        amount = Decimal(str(float(co2_saved)))
+        updated = []
+        for challenge_member in members:
+            challenge_member.contribution = (challenge_member.contribution or 0) + amount
+            challenge_member.progress = challenge_member.contribution
+            updated.append(groups[challenge_member.participant_id])
+        return updated
+
     @staticmethod
     def join_group_challenge(db: Session, group_id: int, challenge_id: int, user_id: int) -> Optional[GroupChallengeMember]:
         """Allow a user to join a group challenge."""
@@ -0,0 +1,129 @@
+# services/hedged_retrieval.py
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+HEDGE_RETRIEVAL_ENABLED = os.getenv("HEDGE_RETRIEVAL_ENABLED", "true").lower() == "true"
+# 지식 기반 호출 후 이 시간(초) 안에 답이 없으면 웹 검색을 동시에 시작
+HEDGE_DELAY_SECONDS = float(os.getenv("HEDGE_DELAY_SECONDS", 1.5))
+# 조율자(Router)의 confidence 가 이보다 낮으면 웹 검색을 바로 함께 시작
+HEDGE_LOW_CONFIDENCE_THRESHOLD = float(os.getenv("HEDGE_LOW_CONFIDENCE_THRESHOLD", 0.6))
+
+
+class HedgedRetrievalStats:
+    """어느 경로가 이겼는지, 순차 실행 대비 얼마나 시간을 줄였는지 집계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "hedges_started": 0,
+            "immediate_hedges": 0,
+            "kb_wins": 0,
+            "web_wins": 0,
+            "no_winner": 0,
+            "kb_errors": 0,
+            "web_errors": 0,
+            "wasted_web_calls": 0,
+            "latency_saved_seconds": 0.0,
+        }
+
+    def record(self, **increments) -> None:
+        with self._lock:
+            for key, value in increments.items():
+                self._stats[key] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        decided = stats["kb_wins"] + stats["web_wins"]
+        stats["kb_win_rate"] = round(stats["kb_wins"] / decided, 4) if decided else 0.0
+        stats["web_win_rate"] = round(stats["web_wins"] / decided, 4) if decided else 0.0
+        stats["latency_saved_seconds"] = round(stats["latency_saved_seconds"], 3)
+        stats["delay_seconds"] = HEDGE_DELAY_SECONDS
+        return stats
+
+
+hedge_stats = HedgedRetrievalStats()
+
+
+def hedge_delay_for(confidence: Optional[float]) -> float:
+    """조율자 확신도가 낮으면 지연 없이 바로 웹 검색을 함께 시작"""
+    if confidence is not None and confidence < HEDGE_LOW_CONFIDENCE_THRESHOLD:
+        return 0.0
+    return HEDGE_DELAY_SECONDS
+
+
+def _task_result(task: "asyncio.Future", label: str) -> Any:
+    """끝난 작업의 결과. 예외가 났으면 None 으로 보고 다른 쪽 결과를 기다리도록 함"""
+    try:
+        return task.result()
+    except Exception as e:
+        hedge_stats.record(**{f"{label}_errors": 1})
+        print(f"[오류] hedged retrieval 중 {label} 검색이 실패했습니다: {e}")
+        return None
+
+
+async def hedged_retrieve(
+    kb_call: Callable[[], Any],
+    web_call: Callable[[], Any],
+    kb_ok: Callable[[Any], bool],
+    web_ok: Callable[[Any], bool],
+    delay: float = HEDGE_DELAY_SECONDS,
+) -> Tuple[Optional[str], Any, Any]:
+    """
+    지식 기반 검색을 먼저 시작하고, delay 초 뒤에도 만족스러운 답이 없으면 웹 검색을 동시에 실행
+    - 먼저 만족스러운 결과를 낸 쪽을 채택하고 나머지 작업은 취소 (한쪽이 예외로 끝나면 다른 쪽 결과를 기다림)
+      (이미 스레드에서 실행 중인 HTTP 호출은 중단되지 않고, 결과만 버려짐)
+    - 반환값: (승자 "kb" | "web" | None, 지식 기반 결과, 웹 검색 결과)
+    """
+    hedge_stats.record(requests=1)
+    started = time.perf_counter()
+    kb_task = asyncio.ensure_future(asyncio.to_thread(kb_call))
+    kb_result, web_result = None, None
+
+    if delay > 0:
+        done, _ = await asyncio.wait({kb_task}, timeout=delay)
+        if kb_task in done:
+            kb_result = _task_result(kb_task, "kb")
+            if kb_ok(kb_result):
+                hedge_stats.record(kb_wins=1)
+                return "kb", kb_result, None
+    else:
+        hedge_stats.record(immediate_hedges=1)
+
+    # 지식 기반이 늦거나 실패 -> 웹 검색 동시 시작
+    web_started = time.perf_counter()
+    hedge_stats.record(hedges_started=1)
+    web_task = asyncio.ensure_future(asyncio.to_thread(web_call))
+    pending = {web_task} if kb_task.done() else {kb_task, web_task}
+    kb_finished_at = time.perf_counter() if kb_task.done() else None
+
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        now = time.perf_counter()
+        if kb_task in done:
+            kb_result = _task_result(kb_task, "kb")
+            kb_finished_at = now
+            if kb_ok(kb_result):
+                web_task.cancel()
+                hedge_stats.record(kb_wins=1, wasted_web_calls=1)
+                return "kb", kb_result, None
+        if web_task in done:
+            web_result = _task_result(web_task, "web")
+            if web_ok(web_result):
+                kb_task.cancel()
+                # 순차 실행이었다면 지식 기반이 끝난 뒤에야 웹 검색을 시작했을 것
+                # (지식 기반이 아직 실행 중이면 웹 검색 소요 시간이 절약 시간의 하한)
+                if kb_finished_at is not None:
+                    saved = max(0.0, kb_finished_at - web_started)
+                else:
+                    saved = now - web_started
+                hedge_stats.record(web_wins=1, latency_saved_seconds=saved)
+                return "web", kb_result, web_result
+
+    hedge_stats.record(no_winner=1)
+    print(f"[알림] 지식 기반과 웹 검색 모두 만족스러운 결과가 없습니다. ({time.perf_counter() - started:.2f}초)")
+    return None, kb_result, web_result
@@ -0,0 +1,411 @@
+# services/ingest_pipeline.py
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import case, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.database import SessionLocal
+from backend.services.mobility_service import MobilityService
+
+# 받을 수 있는 원본 제공처 이름 (ingest_sources 에 없으면 처음 받을 때 만듦)
+INGEST_SOURCES = [name.strip() for name in os.getenv("INGEST_SOURCES", "transit_card,app_sync").split(",") if name.strip()]
+# 요청 하나에 담을 수 있는 최대 원본 수 (넘으면 413)
+INGEST_MAX_PAYLOADS = int(os.getenv("INGEST_MAX_PAYLOADS", 500))
+# 정규화 백그라운드 스레드 수 (0 이면 이 프로세스에서는 처리하지 않음)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 1))
+# 한 트랜잭션에서 처리하는 최대 작업 수
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 200))
+# 처리할 작업이 없을 때 다시 확인하는 주기(초). 같은 프로세스에서 받은 원본은 바로 깨움
+INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS", 1))
+# 최대 시도 수 (다 쓰면 dead letter), 재시도 대기(초): base * 2^(시도-1), 최대 max
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", 5))
+INGEST_RETRY_BASE_SECONDS = float(os.getenv("INGEST_RETRY_BASE_SECONDS", 5))
+INGEST_RETRY_MAX_SECONDS = float(os.getenv("INGEST_RETRY_MAX_SECONDS", 600))
+
+
+class UnknownIngestSource(Exception):
+    pass
+
+
+class PermanentIngestError(ValueError):
+    """다시 시도해도 결과가 같은 원본 (형식 오류 등): 바로 dead letter"""
+
+
+# 정규화에서 이 예외들은 원본 자체의 문제로 보고 재시도하지 않음
+_PERMANENT_ERRORS = (PermanentIngestError, ValidationError, ValueError, TypeError, KeyError)
+
+
+def normalize_trip(payload: Any) -> Dict[str, Any]:
+    """
+    기본 원본 형식 -> MobilityLogCreate 필드
+    - mode, started_at, ended_at, distance_km (또는 distance_m), description/start_point/end_point 는 선택
+    """
+    if not isinstance(payload, dict):
+        raise PermanentIngestError("payload 가 객체가 아님")
+    trip = {key: payload.get(key) for key in ("mode", "started_at", "ended_at", "description", "start_point", "end_point")}
+    if isinstance(trip["mode"], str):
+        trip["mode"] = trip["mode"].upper()
+    if payload.get("distance_km") is None and payload.get("distance_m") is not None:
+        trip["distance_km"] = float(payload["distance_m"]) / 1000
+    else:
+        trip["distance_km"] = payload.get("distance_km")
+    return trip
+
+
+# 제공처별 정규화 함수 (없으면 normalize_trip)
+_normalizers: Dict[str, Callable[[Any], Dict[str, Any]]] = {}
+
+
+def register_normalizer(source_name: str, normalizer: Callable[[Any], Dict[str, Any]]) -> None:
+    _normalizers[source_name] = normalizer
+
+
+def _raw_ref(raw_id: int) -> str:
+    return f"raw:{raw_id}"
+
+
+def _captured_at(payload: Any, default: datetime) -> datetime:
+    value = payload.get("captured_at") if isinstance(payload, dict) else None
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+        except ValueError:
+            pass
+    return default
+
+
+class IngestPipeline:
+    """
+    원본 수집 -> mobility_logs 정규화
+    - accept: ingest_raw 에 원본을, ingest_jobs 에 작업을 한 트랜잭션으로 추가하고 바로 반환 (요청은 202)
+    - 백그라운드 스레드가 처리할 때가 된 작업을 묶어서 정규화 (MobilityService.store_trips: 포인트/챌린지 포함)
+      raw_ref_id = "raw:<raw_id>" 로 이미 저장된 원본은 건너뜀 (같은 원본을 두 번 처리해도 기록은 하나)
+    - 실패: 형식 오류는 바로, 그 밖의 오류는 INGEST_MAX_ATTEMPTS 번 재시도(지수 대기) 후 dead letter
+      묶음 저장이 DB 오류로 실패하면 한 건씩 나눠 다시 처리해 문제 있는 원본만 실패 처리
+    - 여러 워커/프로세스: 작업 행을 FOR UPDATE SKIP LOCKED 로 가져감 (sqlite 는 프로세스 안 잠금으로 순서대로)
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, batch_size: int = INGEST_BATCH_SIZE,
+                 poll_seconds: float = INGEST_POLL_SECONDS, max_attempts: int = INGEST_MAX_ATTEMPTS,
+                 retry_base_seconds: float = INGEST_RETRY_BASE_SECONDS,
+                 retry_max_seconds: float = INGEST_RETRY_MAX_SECONDS):
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._sources: Dict[str, int] = {}
+        self._source_names: Dict[int, str] = {}
+        self._claim_lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._stats: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
+            "accepted": 0, "normalized": 0, "duplicates": 0, "retries": 0, "dead_lettered": 0,
+            "last_lag_seconds": 0.0,
+        })
+        self._batches = 0
+        self._split_batches = 0
+        self._last_batch_ms = 0.0
+
+    # ---- 수집 ----
+
+    def source_id(self, db: Session, source_name: str) -> int:
+        if source_name in self._sources:
+            return self._sources[source_name]
+        if source_name not in INGEST_SOURCES:
+            raise UnknownIngestSource(source_name)
+        source = db.query(models.IngestSource).filter(models.IngestSource.source_name == source_name).first()
+        if source is None:
+            try:
+                source = models.IngestSource(source_name=source_name)
+                db.add(source)
+                db.commit()
+            except IntegrityError:
+                # 다른 워커가 먼저 만듦
+                db.rollback()
+                source = db.query(models.IngestSource).filter(models.IngestSource.source_name == source_name).one()
+        self._sources[source_name] = source.source_id
+        self._source_names[source.source_id] = source_name
+        return source.source_id
+
+    def accept(self, db: Session, source_name: str, items: List[Tuple[int, Any]]) -> List[int]:
+        """(user_id, payload) 목록을 원본과 작업으로 추가하고 커밋. raw_id 목록 반환"""
+        source_id = self.source_id(db, source_name)
+        now = datetime.utcnow()
+        raws = [
+            models.IngestRaw(source_id=source_id, user_id=user_id, captured_at=_captured_at(payload, now), payload=payload)
+            for user_id, payload in items
+        ]
+        db.add_all(raws)
+        db.flush()
+        raw_ids = [raw.raw_id for raw in raws]
+        db.execute(insert(models.IngestJob), [
+            {"raw_id": raw_id, "source_id": source_id, "enqueued_at": now, "attempts": 0,
+             "next_attempt_at": now, "dead": False}
+            for raw_id in raw_ids
+        ])
+        db.commit()
+        with self._stats_lock:
+            self._stats[source_name]["accepted"] += len(raw_ids)
+        self._wake.set()
+        return raw_ids
+
+    # ---- 정규화 ----
+
+    def process_batch(self, raw_ids: Optional[List[int]] = None) -> int:
+        """처리할 때가 된 작업을 최대 batch_size 개 처리. 처리(성공/실패 포함)한 작업 수 반환"""
+        db = self._session_factory()
+        skip_locked = db.get_bind().dialect.name != "sqlite"
+        if not skip_locked:
+            self._claim_lock.acquire()
+        try:
+            return self._process(db, raw_ids, skip_locked)
+        finally:
+            if not skip_locked:
+                self._claim_lock.release()
+            db.close()
+
+    def _process(self, db: Session, raw_ids: Optional[List[int]], skip_locked: bool) -> int:
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        query = db.query(models.IngestJob).filter(
+            models.IngestJob.dead == False,  # noqa: E712
+            models.IngestJob.next_attempt_at <= now,
+        )
+        if raw_ids is not None:
+            query = query.filter(models.IngestJob.raw_id.in_(raw_ids))
+        query = query.order_by(models.IngestJob.next_attempt_at, models.IngestJob.raw_id).limit(self.batch_size)
+        if skip_locked:
+            query = query.with_for_update(skip_locked=True)
+        jobs = query.all()
+        if not jobs:
+            db.commit()
+            return 0
+
+        try:
+            counts, stored = self._normalize_and_store(db, jobs, now)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if len(jobs) == 1:
+                self._record_error(jobs[0].raw_id, e)
+                return 1
+            # 한 건씩 나눠서 문제 있는 원본만 실패 처리
+            job_ids = [job.raw_id for job in jobs]
+            with self._stats_lock:
+                self._split_batches += 1
+            print(f"[알림] ingest 묶음 {len(job_ids)}건 저장 실패, 한 건씩 다시 처리: {e}")
+            for raw_id in job_ids:
+                self.process_batch([raw_id])
+            return len(job_ids)
+
+        for user_id, result in stored:
+            MobilityService.publish_stored_trips(db, user_id, result)
+        with self._stats_lock:
+            for source_name, source_counts in counts.items():
+                for key, value in source_counts.items():
+                    if key == "last_lag_seconds":
+                        self._stats[source_name][key] = value
+                    else:
+                        self._stats[source_name][key] += value
+            self._batches += 1
+            self._last_batch_ms = (time.perf_counter() - started) * 1000
+        return len(jobs)
+
+    def _normalize_and_store(self, db: Session, jobs: List[models.IngestJob], now: datetime):
+        raws = {
+            raw.raw_id: raw
+            for raw in db.query(models.IngestRaw).filter(models.IngestRaw.raw_id.in_([job.raw_id for job in jobs])).all()
+        }
+        existing = {
+            raw_ref_id for (raw_ref_id,) in db.query(models.MobilityLog.raw_ref_id).filter(
+                models.MobilityLog.raw_ref_id.in_([_raw_ref(job.raw_id) for job in jobs])
+            ).all()
+        }
+        counts: Dict[str, Dict[str, Any]] = defaultdict(lambda: defaultdict(int))
+        by_user: Dict[int, List[Tuple[models.IngestJob, schemas.MobilityLogCreate]]] = defaultdict(list)
+        done: List[int] = []
+
+        for job in jobs:
+            source_name = self._source_name(db, job.source_id)
+            counts[source_name]["last_lag_seconds"] = max(
+                counts[source_name]["last_lag_seconds"], (now - job.enqueued_at).total_seconds()
+            )
+            if _raw_ref(job.raw_id) in existing:
+                # 이미 정규화된 원본 (작업 삭제 전에 멈췄던 경우 등)
+                done.append(job.raw_id)
+                counts[source_name]["duplicates"] += 1
+                continue
+            raw = raws.get(job.raw_id)
+            try:
+                if raw is None or raw.user_id is None:
+                    raise PermanentIngestError("원본 또는 사용자 없음")
+                normalizer = _normalizers.get(source_name, normalize_trip)
+                log_data = schemas.MobilityLogCreate(user_id=raw.user_id, **normalizer(raw.payload))
+            except Exception as e:
+                dead = self._fail(job, e, now, permanent=isinstance(e, _PERMANENT_ERRORS))
+                counts[source_name]["dead_lettered" if dead else "retries"] += 1
+                continue
+            by_user[raw.user_id].append((job, log_data))
+
+        stored = []
+        for user_id, items in by_user.items():
+            result = MobilityService.store_trips(
+                db, user_id,
+                [log_data for _, log_data in items],
+                [_raw_ref(job.raw_id) for job, _ in items],
+                [job.source_id for job, _ in items],
+            )
+            stored.append((user_id, result))
+            for job, _ in items:
+                done.append(job.raw_id)
+                counts[self._source_name(db, job.source_id)]["normalized"] += 1
+
+        if done:
+            db.query(models.IngestJob).filter(models.IngestJob.raw_id.in_(done)).delete(synchronize_session=False)
+        return counts, stored
+
+    def _fail(self, job: models.IngestJob, error: Exception, now: datetime, permanent: bool) -> bool:
+        """실패 기록. dead letter 가 되면 True"""
+        job.attempts += 1
+        job.last_error = f"{type(error).__name__}: {error}"[:255]
+        if permanent or job.attempts >= self.max_attempts:
+            job.dead = True
+            return True
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (job.attempts - 1))
+        job.next_attempt_at = now + timedelta(seconds=delay)
+        return False
+
+    def _record_error(self, raw_id: int, error: Exception) -> None:
+        """한 건 저장이 DB 오류로 실패: 새 트랜잭션으로 실패만 기록 (DB 오류는 재시도 대상)"""
+        db = self._session_factory()
+        try:
+            job = db.get(models.IngestJob, raw_id)
+            if job is None:
+                return
+            source_name = self._source_name(db, job.source_id)
+            dead = self._fail(job, error, datetime.utcnow(), permanent=False)
+            db.commit()
+            with self._stats_lock:
+                self._stats[source_name]["dead_lettered" if dead else "retries"] += 1
+        except Exception as e:
+            db.rollback()
+            print(f"[오류] ingest 실패 기록 실패 (raw_id={raw_id}): {e}")
+        finally:
+            db.close()
+
+    def _source_name(self, db: Session, source_id: int) -> str:
+        name = self._source_names.get(source_id)
+        if name is None:
+            source = db.get(models.IngestSource, source_id)
+            name = source.source_name if source is not None else str(source_id)
+            self._source_names[source_id] = name
+        return name
+
+    # ---- dead letter ----
+
+    def dead_letters(self, db: Session, source_name: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        query = db.query(models.IngestJob, models.IngestRaw).join(
+            models.IngestRaw, models.IngestRaw.raw_id == models.IngestJob.raw_id
+        ).filter(models.IngestJob.dead == True)  # noqa: E712
+        if source_name is not None:
+            query = query.filter(models.IngestJob.source_id == self.source_id(db, source_name))
+        return [
+            {
+                "raw_id": job.raw_id,
+                "source": self._source_name(db, job.source_id),
+                "user_id": raw.user_id,
+                "attempts": job.attempts,
+                "last_error": job.last_error,
+                "enqueued_at": job.enqueued_at,
+                "payload": raw.payload,
+            }
+            for job, raw in query.order_by(models.IngestJob.raw_id).limit(limit).all()
+        ]
+
+    def requeue(self, db: Session, raw_ids: List[int]) -> int:
+        """dead letter 를 다시 처리 대기로 (원본/정규화 규칙을 고친 뒤)"""
+        count = db.query(models.IngestJob).filter(
+            models.IngestJob.raw_id.in_(raw_ids),
+            models.IngestJob.dead == True,  # noqa: E712
+        ).update({"dead": False, "attempts": 0, "next_attempt_at": datetime.utcnow(), "last_error": None},
+                 synchronize_session=False)
+        db.commit()
+        self._wake.set()
+        return count
+
+    # ---- 백그라운드 처리 ----
+
+    def start(self, workers: int = INGEST_WORKERS) -> None:
+        if self._threads or workers <= 0:
+            return
+        self._stop.clear()
+        for i in range(workers):
+            thread = threading.Thread(target=self._run, name=f"ingest-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                processed = self.process_batch()
+            except Exception as e:
+                print(f"[오류] ingest 정규화 실패: {e}")
+                processed = 0
+            if processed == 0:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def stats(self, db: Session) -> Dict[str, Any]:
+        """제공처별 대기/재시도 중/dead letter 수와 지연(가장 오래 기다린 작업의 대기 시간)"""
+        now = datetime.utcnow()
+        rows = db.query(
+            models.IngestJob.source_id,
+            models.IngestJob.dead,
+            func.count(models.IngestJob.raw_id),
+            func.sum(case((models.IngestJob.attempts > 0, 1), else_=0)),
+            func.min(models.IngestJob.enqueued_at),
+        ).group_by(models.IngestJob.source_id, models.IngestJob.dead).all()
+        names = {source_id: self._source_name(db, source_id) for source_id, *_ in rows}
+        with self._stats_lock:
+            sources = {
+                name: {**self._stats[name], "pending": 0, "retrying": 0, "dead": 0, "lag_seconds": 0.0}
+                for name in set(self._stats) | set(names.values())
+            }
+            for source_id, dead, count, retrying, oldest in rows:
+                entry = sources[names[source_id]]
+                if dead:
+                    entry["dead"] = count
+                else:
+                    entry["pending"] = count
+                    entry["retrying"] = int(retrying or 0)
+                    entry["lag_seconds"] = round((now - oldest).total_seconds(), 3) if oldest else 0.0
+            return {
+                "workers": len(self._threads),
+                "batch_size": self.batch_size,
+                "batches": self._batches,
+                "split_batches": self._split_batches,
+                "last_batch_ms": round(self._last_batch_ms, 1),
+                "sources": sources,
+            }
+
+
+ingest_pipeline = IngestPipeline()
@@ -0,0 +1,123 @@
+# services/kb_answer_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from backend.utils.korean_text import normalize_query, char_ngrams, cosine_similarity, number_tokens
+
+KB_CACHE_TTL_SECONDS = int(os.getenv("KB_CACHE_TTL_SECONDS", 6 * 60 * 60))
+# 0.82 에서는 "포인트 주나요"/"포인트 안 주나요" 처럼 뜻이 다른 질의도 같은 답변으로 처리됨
+KB_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("KB_CACHE_SIMILARITY_THRESHOLD", 0.9))
+KB_CACHE_MAX_ENTRIES = int(os.getenv("KB_CACHE_MAX_ENTRIES", 1000))
+
+
+class KBAnswerCache:
+    """
+    지식 기반(retrieve_and_generate) 답변 캐시
+    - 정규화된 질의가 같으면 바로 적중, 아니면 자모 n-gram 코사인 유사도로 가장 가까운 질의를 찾음
+      (연도/금액 같은 숫자가 다르면 유사도와 관계없이 다른 질의로 봄)
+    - 항목은 TTL이 지나면 만료되고, 최대 개수를 넘으면 가장 오래 사용되지 않은 것부터 제거됨
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = KB_CACHE_TTL_SECONDS,
+        similarity_threshold: float = KB_CACHE_SIMILARITY_THRESHOLD,
+        max_entries: int = KB_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "exact_hits": 0, "similar_hits": 0, "misses": 0, "saved_seconds": 0.0}
+
+    def _is_expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return now - entry["created_at"] > self.ttl_seconds
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """캐시된 답변을 찾으면 {"answer", "citations", "matched_query", "similarity"}를, 없으면 None을 반환"""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry = self._entries.get(key)
+            similarity = 1.0
+            if entry is not None and self._is_expired(entry, now):
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                grams = char_ngrams(key)
+                numbers = number_tokens(key)
+                best_key, best_score = None, 0.0
+                for cached_key, cached in list(self._entries.items()):
+                    if self._is_expired(cached, now):
+                        del self._entries[cached_key]
+                        continue
+                    if cached["numbers"] != numbers:
+                        continue
+                    score = cosine_similarity(grams, cached["grams"])
+                    if score > best_score:
+                        best_key, best_score = cached_key, score
+                if best_key is None or best_score < self.similarity_threshold:
+                    self._stats["misses"] += 1
+                    return None
+                key, entry, similarity = best_key, self._entries[best_key], best_score
+                self._stats["similar_hits"] += 1
+            else:
+                self._stats["exact_hits"] += 1
+
+            self._entries.move_to_end(key)
+            entry["hits"] += 1
+            self._stats["saved_seconds"] += entry["latency_seconds"]
+            return {
+                "answer": entry["answer"],
+                "citations": list(entry["citations"]),
+                "matched_query": entry["query"],
+                "similarity": round(similarity, 3),
+            }
+
+    def put(self, query: str, answer: str, citations: List[str], latency_seconds: float) -> None:
+        """Bedrock에서 받은 답변과 출처, 그리고 그 호출에 걸린 시간을 저장"""
+        key = normalize_query(query)
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = {
+                "query": query,
+                "grams": char_ngrams(key),
+                "numbers": number_tokens(key),
+                "answer": answer,
+                "citations": list(citations),
+                "latency_seconds": latency_seconds,
+                "created_at": time.time(),
+                "hits": 0,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def purge(self) -> int:
+        """지식 기반 재동기화 후 호출: 모든 캐시 항목을 지우고 지운 개수를 반환"""
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            hits = stats["exact_hits"] + stats["similar_hits"]
+            stats["hits"] = hits
+            stats["hit_rate"] = round(hits / stats["lookups"], 4) if stats["lookups"] else 0.0
+            stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+            stats["entries"] = len(self._entries)
+            stats["ttl_seconds"] = self.ttl_seconds
+            stats["similarity_threshold"] = self.similarity_threshold
+            return stats
+
+
+kb_answer_cache = KBAnswerCache()
@@ -0,0 +1,257 @@
+# services/kb_local_index.py
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend.utils.korean_text import TOKENIZER_VERSION, search_terms
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 지식 기반(BEDROCK_KNOWLEDGE_BASE_ID)과 같은 원본 문서가 있는 폴더
+KB_DOCS_DIR = os.getenv("KB_DOCS_DIR", os.path.join(_BASE_DIR, "kb_docs"))
+KB_INDEX_DIR = os.getenv("KB_INDEX_DIR", os.path.join(_BASE_DIR, "kb_index"))
+KB_PASSAGE_MAX_CHARS = int(os.getenv("KB_PASSAGE_MAX_CHARS", 800))
+# 로컬 검색 결과만으로 답변할지 판단하는 기준
+KB_LOCAL_MIN_SCORE = float(os.getenv("KB_LOCAL_MIN_SCORE", 8.0))
+KB_LOCAL_MIN_COVERAGE = float(os.getenv("KB_LOCAL_MIN_COVERAGE", 0.5))
+
+SUPPORTED_EXTENSIONS = (".txt", ".md")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+MANIFEST_FILE = "manifest.json"
+LEXICON_FILE = "lexicon.json"
+PASSAGES_FILE = "passages.json"
+POSTINGS_FILE = "postings.bin"
+
+# postings.bin 의 한 항목: (passage_id uint32, term_frequency uint32)
+_POSTING = struct.Struct("<II")
+
+
+def split_passages(text: str, max_chars: int = KB_PASSAGE_MAX_CHARS) -> List[str]:
+    """빈 줄 기준 문단으로 나누고, 짧은 문단은 max_chars 안에서 이어 붙임"""
+    passages, current = [], ""
+    for paragraph in (p.strip() for p in text.split("\n\n")):
+        if not paragraph:
+            continue
+        while len(paragraph) > max_chars:
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if current and len(current) + len(paragraph) + 1 > max_chars:
+            passages.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        passages.append(current)
+    return passages
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_index(docs_dir: str = KB_DOCS_DIR, index_dir: str = KB_INDEX_DIR) -> Dict[str, int]:
+    """
+    문서 폴더로부터 BM25 역색인을 (증분) 생성
+    - manifest.json 에 문서별 해시와 문단별 용어 빈도를 저장해 두고, 바뀐 문서만 다시 토큰화함
+    - 역색인은 postings.bin 에 고정 길이 레코드로 기록하여 검색 시 mmap 으로 읽음
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        # 토큰화 규칙이 바뀌었으면 저장된 문단 용어를 쓰지 않고 모든 문서를 다시 토큰화
+        if manifest.get("tokenizer") == TOKENIZER_VERSION:
+            previous = manifest.get("documents", {})
+
+    documents, reused, tokenized = {}, 0, 0
+    for root, _, files in os.walk(docs_dir):
+        for name in sorted(files):
+            if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, docs_dir)
+            stat = os.stat(path)
+            cached = previous.get(rel_path)
+            if cached and cached["mtime"] == stat.st_mtime and cached["size"] == stat.st_size:
+                documents[rel_path] = cached
+                reused += 1
+                continue
+            digest = _file_digest(path)
+            if cached and cached["sha1"] == digest:
+                cached.update(mtime=stat.st_mtime, size=stat.st_size)
+                documents[rel_path] = cached
+                reused += 1
+                continue
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+            documents[rel_path] = {
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "sha1": digest,
+                "passages": [
+                    {"text": passage, "tf": dict(Counter(search_terms(passage)))}
+                    for passage in split_passages(text)
+                ],
+            }
+            tokenized += 1
+
+    # 문단 번호를 다시 매기고 역색인 구성
+    passages, postings = [], {}
+    for rel_path in sorted(documents):
+        for passage in documents[rel_path]["passages"]:
+            passage_id = len(passages)
+            passages.append({"doc": rel_path, "text": passage["text"], "length": sum(passage["tf"].values())})
+            for term, tf in passage["tf"].items():
+                postings.setdefault(term, []).append((passage_id, tf))
+
+    lexicon = {}
+    offset = 0
+    tmp_postings = os.path.join(index_dir, POSTINGS_FILE + ".tmp")
+    with open(tmp_postings, "wb") as f:
+        for term in sorted(postings):
+            entries = postings[term]
+            lexicon[term] = [offset, len(entries)]
+            f.write(b"".join(_POSTING.pack(pid, tf) for pid, tf in entries))
+            offset += len(entries)
+
+    total_length = sum(p["length"] for p in passages)
+    meta = {
+        "passage_count": len(passages),
+        "avg_length": (total_length / len(passages)) if passages else 0.0,
+    }
+    _write_json(os.path.join(index_dir, LEXICON_FILE), {"meta": meta, "terms": lexicon})
+    _write_json(os.path.join(index_dir, PASSAGES_FILE), passages)
+    os.replace(tmp_postings, os.path.join(index_dir, POSTINGS_FILE))
+    _write_json(manifest_path, {"tokenizer": TOKENIZER_VERSION, "documents": documents})
+
+    return {
+        "documents": len(documents),
+        "reused_documents": reused,
+        "tokenized_documents": tokenized,
+        "passages": len(passages),
+        "terms": len(lexicon),
+    }
+
+
+def _write_json(path: str, data: Any) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class LocalKBIndex:
+    """build_index 로 만든 색인을 읽어 BM25 검색을 수행 (postings.bin 은 mmap)"""
+
+    def __init__(self, index_dir: str = KB_INDEX_DIR):
+        with open(os.path.join(index_dir, LEXICON_FILE), encoding="utf-8") as f:
+            lexicon = json.load(f)
+        with open(os.path.join(index_dir, PASSAGES_FILE), encoding="utf-8") as f:
+            self.passages: List[Dict[str, Any]] = json.load(f)
+        self.terms: Dict[str, List[int]] = lexicon["terms"]
+        self.passage_count: int = lexicon["meta"]["passage_count"]
+        self.avg_length: float = lexicon["meta"]["avg_length"] or 1.0
+        # BM25 분모의 문단 길이 보정값은 질의와 무관하므로 미리 계산
+        self._length_norms = [
+            BM25_K1 * (1 - BM25_B + BM25_B * p["length"] / self.avg_length) for p in self.passages
+        ]
+
+        self._file = open(os.path.join(index_dir, POSTINGS_FILE), "rb")
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            # postings.bin 은 리틀 엔디언(_POSTING)으로 기록하므로 읽을 때도 바이트 순서를 지정
+            self._postings = np.frombuffer(self._mmap, dtype="<u4")
+        else:
+            self._mmap = None
+            self._postings = np.zeros(0, dtype="<u4")
+
+    def close(self) -> None:
+        # mmap 을 참조하는 배열을 먼저 놓아야 닫을 수 있음
+        self._postings = None
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        BM25 상위 문단 목록
+        - 각 결과에는 점수와 함께 질의 용어 중 몇 %가 그 문단에 등장했는지(coverage)를 포함
+        """
+        query_terms = list(dict.fromkeys(search_terms(query)))
+        if not query_terms or not self.passage_count:
+            return []
+
+        scores: Dict[int, float] = {}
+        matched_terms: Dict[int, set] = {}
+        for term in query_terms:
+            entry = self.terms.get(term)
+            if not entry:
+                continue
+            offset, df = entry
+            idf = math.log(1 + (self.passage_count - df + 0.5) / (df + 0.5))
+            postings = self._postings[offset * 2:(offset + df) * 2]
+            length_norms = self._length_norms
+            for passage_id, tf in zip(postings[0::2].tolist(), postings[1::2].tolist()):
+                scores[passage_id] = scores.get(passage_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + length_norms[passage_id])
+                matched = matched_terms.get(passage_id)
+                if matched is None:
+                    matched_terms[passage_id] = {term}
+                else:
+                    matched.add(term)
+
+        top = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [
+            {
+                "passage_id": pid,
+                "doc": self.passages[pid]["doc"],
+                "text": self.passages[pid]["text"],
+                "score": round(score, 4),
+                "coverage": round(len(matched_terms[pid]) / len(query_terms), 4),
+            }
+            for pid, score in top
+        ]
+
+
+_index: Optional[LocalKBIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_local_kb_index() -> Optional[LocalKBIndex]:
+    """색인 파일이 있으면 한 번만 열어서 재사용, 없으면 None"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None and os.path.exists(os.path.join(KB_INDEX_DIR, LEXICON_FILE)):
+                try:
+                    _index = LocalKBIndex(KB_INDEX_DIR)
+                    print(f"[알림] 로컬 지식 기반 색인을 불러왔습니다. (문단 {_index.passage_count}개)")
+                except Exception as e:
+                    print(f"[오류] 로컬 지식 기반 색인을 여는 중 오류가 발생했습니다: {e}")
+    return _index
+
+
+def is_confident(hits: List[Dict[str, Any]]) -> bool:
+    """로컬 검색 결과만으로 답변해도 될 만큼 관련도가 높은지"""
+    if not hits:
+        return False
+    return hits[0]["score"] >= KB_LOCAL_MIN_SCORE and hits[0]["coverage"] >= KB_LOCAL_MIN_COVERAGE
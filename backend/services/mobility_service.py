@@ -1,11 +1,18 @@
 
 import os
 import json
+import uuid
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
 
 from backend import schemas, models, crud
 from backend.services.group_challenge_service import GroupChallengeService
+from backend.services.user_profile_service import UserActivityProfileService
+from backend.services.ws_topics import publish_group_challenge_progress, publish_trip, publish_trips
 
 # Constants from mobility.py
 DEFAULT_CARBON_FACTORS = {
@@ -19,6 +26,46 @@ CARBON_EMISSION_FACTORS_G_PER_KM = json.loads(
     os.getenv("CARBON_EMISSION_FACTORS_JSON", json.dumps(DEFAULT_CARBON_FACTORS))
 )
 CREDIT_PER_G_CO2 = float(os.getenv("CREDIT_PER_G_CO2", 0.1))
+# /mobility/log/batch 한 번에 받는 최대 이동 기록 수
+MOBILITY_BATCH_MAX_TRIPS = int(os.getenv("MOBILITY_BATCH_MAX_TRIPS", 1000))
+
+# CO2 절감이 인정되는 수단 (자동차 대비)
+ECO_MODES = (
+    schemas.TransportMode.WALK.value,
+    schemas.TransportMode.BIKE.value,
+    schemas.TransportMode.BUS.value,
+    schemas.TransportMode.SUBWAY.value,
+)
+
+
+def compute_trip_savings(modes: List[str], distances: List[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    이동 기록 여러 건의 (자동차 기준 배출, 실제 배출, 절감량 g, 적립 포인트) 를 한 번에 계산
+    - log_mobility 의 한 건 계산과 같은 식/같은 순서의 float64 연산 (결과가 같음)
+    - 수단별 배출 계수는 서로 다른 수단마다 한 번만 찾음
+    """
+    mode_array = np.asarray(modes)
+    distance = np.asarray(distances, dtype=np.float64)
+    car_emission_baseline = CARBON_EMISSION_FACTORS_G_PER_KM.get(schemas.TransportMode.CAR.value, 170)
+
+    unique_modes, inverse = np.unique(mode_array, return_inverse=True)
+    factors = np.array([CARBON_EMISSION_FACTORS_G_PER_KM.get(mode, 0) for mode in unique_modes], dtype=np.float64)
+    mode_emission = factors[inverse]
+
+    baseline = car_emission_baseline * distance
+    actual = mode_emission * distance
+    saved = (car_emission_baseline - mode_emission) * distance
+    saved = np.where(np.isin(mode_array, ECO_MODES) & (saved > 0), saved, 0.0)
+    points = (saved * CREDIT_PER_G_CO2).astype(np.int64)
+    return baseline, actual, saved, points
+
+
+class StoredTrips(NamedTuple):
+    """MobilityService.store_trips 결과 (커밋 뒤 publish_stored_trips 에 넘김)"""
+    log_ids: List[int]
+    total_saved: float
+    group_updates: List[Tuple[int, int]]
+
 
 class MobilityService:
     @staticmethod
@@ -78,5 +125,104 @@ class MobilityService:
 
         db.commit()
         db.refresh(db_mobility_log)
+        UserActivityProfileService.invalidate(user.user_id)
+        publish_trip(user.user_id, db_mobility_log)
 
         return db_mobility_log
+
+    @staticmethod
+    def log_mobility_batch(db: Session, logs: List[schemas.MobilityLogCreate], user: models.User) -> List[models.MobilityLog]:
+        """
+        이동 기록 여러 건을 한 트랜잭션으로 저장 (/mobility/log/batch). 중간에 실패하면 전부 되돌림
+        """
+        if not logs:
+            return []
+        user_id = user.user_id
+        # MySQL 은 executemany 에서 RETURNING 이 없으므로, 건마다 raw_ref_id 를 붙여 log_id 를 한 번에 다시 찾음
+        batch_ref = f"batch:{uuid.uuid4().hex}"
+        refs = [f"{batch_ref}:{i}" for i in range(len(logs))]
+        try:
+            stored = MobilityService.store_trips(db, user_id, logs, refs)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return MobilityService.publish_stored_trips(db, user_id, stored)
+
+    @staticmethod
+    def store_trips(db: Session, user_id: int, logs: List[schemas.MobilityLogCreate], refs: List[str],
+                    source_ids: Optional[List[Optional[int]]] = None) -> StoredTrips:
+        """
+        한 사용자의 이동 기록 여러 건 저장 (커밋하지 않음: 호출한 쪽 트랜잭션에 포함)
+        - CO2/포인트는 compute_trip_savings 로 한 번에 계산
+        - 이동 기록과 크레딧 장부는 각각 executemany 한 번 (pymysql 은 여러 행 INSERT 한 문장으로 보냄).
+          refs(건마다 다른 raw_ref_id) 로 log_id 를 한 번에 다시 찾음
+        - 그룹 챌린지는 참여 행마다 이번 묶음의 절감량 합계를 한 번, 개인 챌린지는 GROUP BY 집계 한 번으로 갱신
+        """
+        baseline, actual, saved, points = compute_trip_savings(
+            [log_data.mode.value for log_data in logs], [log_data.distance_km for log_data in logs]
+        )
+        now = datetime.utcnow()
+        log_rows = [
+            {
+                "user_id": user_id,
+                "source_id": source_ids[i] if source_ids else None,
+                "mode": log_data.mode,
+                "distance_km": log_data.distance_km,
+                "started_at": log_data.started_at,
+                "ended_at": log_data.ended_at,
+                "raw_ref_id": refs[i],
+                "co2_baseline_g": float(baseline[i]),
+                "co2_actual_g": float(actual[i]),
+                "co2_saved_g": float(saved[i]),
+                "points_earned": int(points[i]),
+                "description": log_data.description,
+                "start_point": log_data.start_point,
+                "end_point": log_data.end_point,
+                "created_at": now,
+            }
+            for i, log_data in enumerate(logs)
+        ]
+        db.execute(insert(models.MobilityLog), log_rows)
+        log_ids = dict(
+            db.query(models.MobilityLog.raw_ref_id, models.MobilityLog.log_id).filter(
+                models.MobilityLog.user_id == user_id,
+                models.MobilityLog.raw_ref_id.in_(refs),
+            ).all()
+        )
+
+        ledger_rows = [
+            {
+                "user_id": user_id,
+                "ref_log_id": log_ids[refs[i]],
+                "type": schemas.CreditType.EARN,
+                "points": int(points[i]),
+                "reason": f"Mobility: {log_data.mode.value} for {log_data.distance_km:.2f} km",
+                "created_at": now,
+            }
+            for i, log_data in enumerate(logs)
+            if points[i] > 0
+        ]
+        if ledger_rows:
+            db.execute(insert(models.CreditsLedger), ledger_rows)
+
+        total_saved = float(saved.sum())
+        group_updates = []
+        if total_saved > 0:
+            group_updates = GroupChallengeService.add_contribution(db, user_id, total_saved)
+            crud.update_personal_challenge_progress_bulk(db, user_id)
+        return StoredTrips([log_ids[ref] for ref in refs], total_saved, group_updates)
+
+    @staticmethod
+    def publish_stored_trips(db: Session, user_id: int, stored: StoredTrips) -> List[models.MobilityLog]:
+        """store_trips 결과를 커밋한 뒤 호출: 저장된 기록을 한 번에 다시 읽고 캐시 무효화/실시간 알림"""
+        by_id = {
+            db_log.log_id: db_log
+            for db_log in db.query(models.MobilityLog).filter(models.MobilityLog.log_id.in_(stored.log_ids)).all()
+        }
+        db_logs = [by_id[log_id] for log_id in stored.log_ids]
+        UserActivityProfileService.invalidate(user_id)
+        publish_trips(user_id, db_logs)
+        for group_id, challenge_id in stored.group_updates:
+            publish_group_challenge_progress(group_id, challenge_id, user_id, stored.total_saved)
+        return db_logs
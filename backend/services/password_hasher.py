@@ -0,0 +1,112 @@
+# services/password_hasher.py
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+# bcrypt cost (2^rounds 번 반복). 올리면 다음 로그인 때 기존 해시가 새 cost 로 다시 저장됨
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", 12))
+# 해시 계산 전용 스레드 수 (bcrypt 는 계산 중 GIL 을 놓으므로 코어 수만큼 병렬). 요청 스레드풀과 별개
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+# 계산 중 + 대기 중인 해시 작업 상한. 넘으면 바로 거절(503) 해서 로그인 폭주가 요청 스레드풀을 다 잡지 않게 함
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 16))
+# 작업 하나를 기다리는 최대 시간(초)
+PASSWORD_HASH_MAX_WAIT_SECONDS = float(os.getenv("PASSWORD_HASH_MAX_WAIT_SECONDS", 5))
+
+
+class PasswordHasherBusy(Exception):
+    def __init__(self, retry_after: int = 1):
+        super().__init__("password hasher busy")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    비밀번호 해시/검증 (passlib bcrypt)
+    - 계산은 전용 스레드풀(workers 개)에서. 요청 스레드는 결과만 기다리고, 계산 중+대기 중 작업이 max_pending 을
+      넘으면 기다리지 않고 PasswordHasherBusy 로 거절 (다른 라우트가 쓸 요청 스레드를 남겨 둠)
+    - verify_and_update: cost 가 바뀌었거나 이전 평문 저장값이면 새 해시도 함께 반환 (로그인 때 다시 저장)
+    """
+
+    def __init__(self, rounds: int = PASSWORD_BCRYPT_ROUNDS, workers: int = PASSWORD_HASH_WORKERS,
+                 max_pending: int = PASSWORD_HASH_MAX_PENDING, max_wait: float = PASSWORD_HASH_MAX_WAIT_SECONDS):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_wait = max_wait
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._dummy_hash: Optional[str] = None
+        self._stats = {"hashed": 0, "verified": 0, "rehashed": 0, "legacy_migrated": 0, "rejected": 0, "timeouts": 0}
+        self._busy_seconds = 0.0
+
+    def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self._slots.acquire(blocking=False):
+            self._stats["rejected"] += 1
+            raise PasswordHasherBusy()
+        with self._lock:
+            self._pending += 1
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._busy_seconds += time.perf_counter() - started
+                    self._pending -= 1
+                self._slots.release()
+
+        future = self._executor.submit(job)
+        try:
+            return future.result(timeout=self.max_wait)
+        except FutureTimeoutError:
+            # 계산은 풀에서 끝까지 진행되고 자리는 그때 반환됨
+            self._stats["timeouts"] += 1
+            raise PasswordHasherBusy()
+
+    def hash(self, password: str) -> str:
+        self._stats["hashed"] += 1
+        return self._run(self.context.hash, password)
+
+    def verify_and_update(self, password: str, stored: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """(일치 여부, 다시 저장할 해시 또는 None)"""
+        if not stored:
+            return False, None
+        self._stats["verified"] += 1
+        if self.context.identify(stored) is None:
+            # 해시 도입 전 평문 저장값: 맞으면 바로 해시로 바꿔 저장
+            if not hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8")):
+                return False, None
+            self._stats["legacy_migrated"] += 1
+            return True, self.hash(password)
+        ok, new_hash = self._run(self.context.verify_and_update, password, stored)
+        if ok and new_hash:
+            self._stats["rehashed"] += 1
+        return ok, new_hash
+
+    def dummy_verify(self, password: str) -> None:
+        """없는 사용자도 검증 한 번만큼 시간을 써서, 응답 시간으로 사용자 존재를 알 수 없게 함"""
+        if self._dummy_hash is None:
+            self._dummy_hash = self._run(self.context.hash, "dummy-password")
+        self._run(self.context.verify, password, self._dummy_hash)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "busy_seconds": round(self._busy_seconds, 3),
+            **self._stats,
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,172 @@
+# services/principal_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from backend import models
+
+# 인증된 사용자(principal) 캐시 유지 시간(초). 다른 워커/스크립트에서 바뀐 사용자는 길어야 이 시간 뒤에 반영 (0 이면 캐시 안 함)
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 30))
+# 캐시에 두는 최대 사용자 수 (넘으면 가장 오래 사용하지 않은 사용자부터 제거)
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", 10000))
+
+# 캐시에 두지 않는 컬럼 (필요하면 요청 세션에서 따로 읽힘)
+_UNCACHED_COLUMNS = ("password_hash",)
+
+
+class PrincipalCache:
+    """
+    user_id -> 사용자 컬럼 값 캐시 (TTL + LRU)
+    - 요청마다 users 를 다시 조회하지 않고, 캐시된 값으로 만든 detached User 를 요청 세션에 merge(load=False) 로 붙임
+      (SELECT 없이 세션의 persistent 객체가 되고, 관계는 평소처럼 그 세션에서 지연 로딩)
+    - 사용자 변경/삭제(역할 포함)는 SQLAlchemy 이벤트로 커밋 직후 무효화하고, 브로커로 다른 워커에도 알림
+    - 스레드 안전 (내부 잠금)
+    """
+
+    def __init__(self, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS,
+                 max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        # user_id -> (만료 시각, 컬럼 값). 앞쪽이 가장 오래 사용하지 않은 사용자
+        self._entries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # 무효화 순번: 조회 중에 무효화된 사용자만 오래된 값으로 다시 넣지 않기 위함 (다른 사용자의 조회는 그대로 저장)
+        self._generation = 0
+        # user_id -> 마지막으로 무효화된 순번. max_entries 를 넘으면 오래된 것부터 버리고 그 순번을 _stale_before 로 올림
+        self._invalidated: "OrderedDict[int, int]" = OrderedDict()
+        # 이 순번보다 먼저 시작한 조회는 (무효화 기록이 버려졌을 수 있으므로) 저장하지 않음
+        self._stale_before = 0
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "evicted": 0}
+        self._publish: Optional[Callable[[int], None]] = None
+
+    def set_publisher(self, publish: Callable[[int], None]) -> None:
+        """다른 워커에 무효화를 알리는 함수 등록 (ws_topics 가 브로커로 연결)"""
+        self._publish = publish
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._entries[user_id]
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def generation(self) -> int:
+        return self._generation
+
+    def put(self, user_id: int, values: Dict[str, Any], generation: int) -> None:
+        """조회 시작(generation) 뒤에 이 사용자가 무효화됐으면 넣지 않음"""
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if generation < self._stale_before or self._invalidated.get(user_id, 0) > generation:
+                return
+            self._entries[user_id] = (self._clock() + self.ttl_seconds, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evicted"] += 1
+
+    def invalidate(self, user_id: int, publish: bool = True) -> None:
+        with self._lock:
+            self._generation += 1
+            self._invalidated[user_id] = self._generation
+            self._invalidated.move_to_end(user_id)
+            while len(self._invalidated) > self.max_entries:
+                _, self._stale_before = self._invalidated.popitem(last=False)
+            self._entries.pop(user_id, None)
+            self._stats["invalidations"] += 1
+        if publish and self._publish is not None:
+            self._publish(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._stale_before = self._generation
+            self._invalidated.clear()
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+            **self._stats,
+        }
+
+
+principal_cache = PrincipalCache()
+
+_CACHED_KEYS = tuple(
+    attr.key for attr in inspect(models.User).column_attrs if attr.key not in _UNCACHED_COLUMNS
+)
+
+
+def snapshot_user(user: models.User) -> Dict[str, Any]:
+    return {key: getattr(user, key) for key in _CACHED_KEYS}
+
+
+def attach_user(db: Session, values: Dict[str, Any]) -> models.User:
+    """캐시된 컬럼 값으로 detached User 를 만들어 db 에 SELECT 없이 붙임"""
+    user = models.User(**values)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def load_principal(db: Session, user_id: int) -> Optional[models.User]:
+    """캐시에 있으면 SELECT 없이, 없으면 조회해서 캐시에 넣고 요청 세션의 User 반환"""
+    values = principal_cache.get(user_id)
+    if values is not None:
+        existing = db.identity_map.get(Session.identity_key(models.User, user_id))
+        if existing is not None:
+            # 같은 세션에 이미 있으면 그 객체 (merge 가 바뀐 값을 덮어쓰지 않게)
+            return existing
+        return attach_user(db, values)
+    generation = principal_cache.generation()
+    user = db.query(models.User).filter(models.User.user_id == user_id).first()
+    if user is not None:
+        principal_cache.put(user_id, snapshot_user(user), generation)
+    return user
+
+
+# ---- 무효화: 사용자 행이 바뀌거나 지워지면 커밋 직후 ----
+
+_PENDING_KEY = "principal_cache_invalidate"
+
+
+def _mark(mapper, connection, target) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.user_id)
+    # 커밋 전에도 지워 두어 이 사이에 다른 요청이 캐시된 값을 쓰지 않게 함
+    principal_cache.invalidate(target.user_id, publish=False)
+
+
+def _after_commit(session: Session) -> None:
+    user_ids: Set[int] = session.info.pop(_PENDING_KEY, set())
+    for user_id in user_ids:
+        # 커밋 전 무효화와 커밋 사이에 옛 값이 다시 들어갔을 수 있으므로 한 번 더
+        principal_cache.invalidate(user_id)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(models.User, "after_update", _mark)
+event.listen(models.User, "after_delete", _mark)
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_rollback", _after_rollback)
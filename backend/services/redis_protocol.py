@@ -0,0 +1,158 @@
+# services/redis_protocol.py
+import socket
+import threading
+from typing import Any, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlparse
+
+# 명령 하나(또는 파이프라인 하나)를 기다리는 최대 시간(초)
+_SOCKET_TIMEOUT_SECONDS = 5.0
+_READ_CHUNK_BYTES = 64 * 1024
+
+
+class RedisError(Exception):
+    """서버가 보낸 오류 응답 (-ERR ...)"""
+
+
+def encode_command(args: Sequence[Any]) -> bytes:
+    """RESP 배열로 명령 인코딩 (인자는 str/bytes/int/float)"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode("utf-8")
+        elif isinstance(arg, float):
+            data = repr(arg).encode("ascii")
+        else:
+            data = str(arg).encode("ascii")
+        parts.append(b"$%d\r\n" % len(data))
+        parts.append(data)
+        parts.append(b"\r\n")
+    return b"".join(parts)
+
+
+class RespReader:
+    """소켓에서 RESP 응답을 읽음 (오류 응답은 예외로 만들지 않고 RedisError 객체로 반환)"""
+
+    def __init__(self, recv):
+        self._recv = recv
+        self._buffer = bytearray()
+        self._pos = 0
+
+    def _fill(self) -> None:
+        chunk = self._recv(_READ_CHUNK_BYTES)
+        if not chunk:
+            raise ConnectionError("connection closed")
+        if self._pos:
+            del self._buffer[: self._pos]
+            self._pos = 0
+        self._buffer += chunk
+
+    def _line(self) -> bytes:
+        while True:
+            end = self._buffer.find(b"\r\n", self._pos)
+            if end >= 0:
+                line = bytes(self._buffer[self._pos:end])
+                self._pos = end + 2
+                return line
+            self._fill()
+
+    def _exact(self, size: int) -> bytes:
+        while len(self._buffer) - self._pos < size + 2:
+            self._fill()
+        data = bytes(self._buffer[self._pos:self._pos + size])
+        self._pos += size + 2
+        return data
+
+    def read(self) -> Any:
+        line = self._line()
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            return RedisError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            return None if size < 0 else self._exact(size)
+        if kind == b"*":
+            size = int(rest)
+            return None if size < 0 else [self.read() for _ in range(size)]
+        raise ConnectionError(f"unexpected RESP reply: {line[:40]!r}")
+
+
+def parse_url(url: str) -> Tuple[str, int, Optional[str], int]:
+    """redis://[:password@]host[:port][/db] -> (host, port, password, db)"""
+    parsed = urlparse(url)
+    if parsed.scheme != "redis":
+        raise ValueError(f"redis:// URL 이 아님: {url}")
+    password = unquote(parsed.password) if parsed.password else None
+    db = int(parsed.path.lstrip("/") or 0)
+    return parsed.hostname or "localhost", parsed.port or 6379, password, db
+
+
+class RedisClient:
+    """
+    최소한의 동기 Redis(RESP2) 클라이언트 - redis-py 없이 세션 저장소가 쓰는 명령만 보냄
+    - 스레드마다 연결 하나 (FastAPI 스레드풀에서 잠금 없이 사용)
+    - pipeline(명령들): 한 번에 보내고 응답을 순서대로 받음 (왕복 한 번)
+    - 연결이 끊기면 한 번 다시 연결해 재시도. 실제 Redis 와 backend/fake_redis.py 대역 서버 모두에서 동작
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.host, self.port, self._password, self._db = parse_url(url)
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=_SOCKET_TIMEOUT_SECONDS)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = RespReader(sock.recv)
+        setup = []
+        if self._password:
+            setup.append(("AUTH", self._password))
+        if self._db:
+            setup.append(("SELECT", self._db))
+        if setup:
+            sock.sendall(b"".join(encode_command(command) for command in setup))
+            for _ in setup:
+                reply = reader.read()
+                if isinstance(reply, RedisError):
+                    sock.close()
+                    raise reply
+        self._local.conn = (sock, reader)
+        return self._local.conn
+
+    def _drop(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn[0].close()
+            except OSError:
+                pass
+
+    def pipeline(self, commands: Sequence[Sequence[Any]], raise_errors: bool = True) -> List[Any]:
+        payload = b"".join(encode_command(command) for command in commands)
+        for attempt in (0, 1):
+            conn = getattr(self._local, "conn", None) or self._connect()
+            try:
+                conn[0].sendall(payload)
+                replies = [conn[1].read() for _ in commands]
+                break
+            except (ConnectionError, OSError):
+                self._drop()
+                if attempt:
+                    raise
+        if raise_errors:
+            for reply in replies:
+                if isinstance(reply, RedisError):
+                    raise reply
+        return replies
+
+    def execute(self, *args: Any) -> Any:
+        return self.pipeline([args])[0]
+
+    def close(self) -> None:
+        self._drop()
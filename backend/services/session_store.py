@@ -0,0 +1,761 @@
+# services/session_store.py
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.services.redis_protocol import RedisClient
+from backend.services.timer_wheel import TimerWheel
+
+# 세션 저장 방식: memory(워커 하나, 재시작하면 사라짐) / sqlite(같은 호스트의 여러 워커) / redis(여러 호스트)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+# 세션 기본 유효 시간 (생성 또는 /extend 시점부터)
+SESSION_TTL_HOURS = float(os.getenv("SESSION_TTL_HOURS", 24))
+# 세션 전체가 차지하는 (추정) 메모리 상한. 넘으면 가장 오래 사용하지 않은 세션부터 제거 (0 이면 무제한, memory 만)
+SESSION_STORE_MAX_BYTES = int(os.getenv("SESSION_STORE_MAX_BYTES", 256 * 1024 * 1024))
+# 세션 수 상한 (0 이면 무제한, memory 만)
+SESSION_STORE_MAX_SESSIONS = int(os.getenv("SESSION_STORE_MAX_SESSIONS", 1_000_000))
+# 만료 타이머 휠 tick (초, memory 만)
+SESSION_EXPIRY_TICK_SECONDS = float(os.getenv("SESSION_EXPIRY_TICK_SECONDS", 1))
+# sqlite 세션 DB 경로 (같은 호스트의 워커들은 같은 파일을 써야 함)
+SESSION_SQLITE_PATH = os.getenv(
+    "SESSION_SQLITE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "sessions.db")
+)
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_REDIS_PREFIX = os.getenv("SESSION_REDIS_PREFIX", "ecooo:sess:")
+# 조회로 생기는 last_activity 쓰기를 모아 쓰는 주기(초)와 한 번에 쓰는 최대 수 (sqlite/redis). 0 이면 바로 씀
+SESSION_ACTIVITY_FLUSH_SECONDS = float(os.getenv("SESSION_ACTIVITY_FLUSH_SECONDS", 2))
+SESSION_ACTIVITY_BATCH = int(os.getenv("SESSION_ACTIVITY_BATCH", 500))
+# 만료된 세션 행을 지우는 주기(초, sqlite)
+SESSION_SWEEP_SECONDS = float(os.getenv("SESSION_SWEEP_SECONDS", 60))
+
+# 세션 하나의 고정 비용 추정치 (dict/OrderedDict 항목, 타이머, 사용자 인덱스). 데이터는 JSON 길이로 더함
+_SESSION_OVERHEAD_BYTES = 600
+# 저장소가 관리하는 필드 (update 로 바꿀 수 없음)
+_MANAGED_FIELDS = ("user_id", "expires_at", "last_activity")
+# redis: 만료 후에도 이 시간(초) 동안 키를 남겨 두어 '없음(404)' 대신 '만료(410)' 로 알려줌
+_REDIS_EXPIRED_GRACE_SECONDS = 3600
+
+EXPIRED = object()
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts).isoformat()
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def _estimate_size(data: Dict[str, Any]) -> int:
+    return _SESSION_OVERHEAD_BYTES + len(_dumps(data))
+
+
+class SessionBackend:
+    """
+    세션 저장소 인터페이스 (routes/session.py 가 사용)
+    - create(user_id, data) -> (session_id, data)
+    - get / update / extend: 세션 데이터 반환. 없으면 None, 만료됐으면 EXPIRED. 조회도 활동으로 보고 last_activity 갱신
+    - delete -> bool, user_sessions(user_id) -> [(session_id, data)] (만료 제외, 만들어진 순서), stats() -> dict
+    - 세션 데이터 형식은 구현과 무관하게 같음 (user_id, created_at, last_activity, is_active, expires_at + 사용자 데이터)
+    - 모든 메서드는 블로킹이고 스레드 안전 (라우트는 스레드풀에서 호출)
+    """
+
+    name = "base"
+
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float]):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+
+    def _new_session(self, user_id: int, data: Optional[Dict[str, Any]], now: float) -> Tuple[str, Dict[str, Any]]:
+        session_id = f"session_{user_id}_{secrets.token_urlsafe(12)}"
+        stamp = _iso(now)
+        data = dict(data or {})
+        data.update({
+            "user_id": user_id,
+            "created_at": stamp,
+            "last_activity": stamp,
+            "is_active": True,
+            "expires_at": _iso(now + self.ttl_seconds),
+        })
+        return session_id, data
+
+    def create(self, user_id: int, data: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def get(self, session_id: str):
+        raise NotImplementedError
+
+    def update(self, session_id: str, update_data: Dict[str, Any]):
+        raise NotImplementedError
+
+    def extend(self, session_id: str, seconds: float):
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def user_sessions(self, user_id: int) -> List[Tuple[str, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "ttl_seconds": self.ttl_seconds}
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------- memory ----------------
+
+class _Session:
+    __slots__ = ("session_id", "user_id", "data", "expires_at", "size")
+
+    def __init__(self, session_id: str, user_id: int, data: Dict[str, Any], expires_at: float):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.data = data
+        self.expires_at = expires_at
+        self.size = 0
+
+
+class MemorySessionBackend(SessionBackend):
+    """
+    메모리 세션 저장소 (워커 하나용)
+    - 사용자별 보조 인덱스(user_id -> 세션 ID) 로 사용자 세션 조회가 세션 전체 수와 무관
+    - 만료는 타이머 휠(services/timer_wheel.py) 로 관리: 저장소를 쓸 때마다 지난 tick 만큼 진행해 만료된 세션을 제거하므로
+      아무도 다시 읽지 않는 세션도 남지 않음. 만료 시각 직후 tick 전에 읽으면 EXPIRED 로 알려줌
+    - 메모리 상한(추정 바이트)과 세션 수 상한을 넘으면 가장 오래 사용하지 않은 세션부터 제거 (OrderedDict LRU)
+    """
+
+    name = "memory"
+
+    def __init__(
+        self,
+        ttl_seconds: float = SESSION_TTL_HOURS * 3600,
+        max_bytes: int = SESSION_STORE_MAX_BYTES,
+        max_sessions: int = SESSION_STORE_MAX_SESSIONS,
+        tick_seconds: float = SESSION_EXPIRY_TICK_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__(ttl_seconds, clock)
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        # 앞쪽이 가장 오래 사용하지 않은 세션
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._by_user: Dict[int, Dict[str, None]] = {}
+        self._wheel = TimerWheel(tick=tick_seconds, now=clock())
+        self._bytes = 0
+        self._active = 0
+        self._stats = {"created": 0, "expired": 0, "evicted": 0, "deleted": 0, "extended": 0}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    # ---- 내부 ----
+
+    def _expire_due(self, now: float) -> None:
+        for session_id in self._wheel.advance(now):
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._remove(session)
+                self._stats["expired"] += 1
+
+    def _remove(self, session: _Session) -> None:
+        del self._sessions[session.session_id]
+        self._wheel.cancel(session.session_id)
+        user_sessions = self._by_user.get(session.user_id)
+        if user_sessions is not None:
+            user_sessions.pop(session.session_id, None)
+            if not user_sessions:
+                del self._by_user[session.user_id]
+        self._bytes -= session.size
+        if session.data.get("is_active", False):
+            self._active -= 1
+
+    def _resize(self, session: _Session) -> None:
+        size = _estimate_size(session.data)
+        self._bytes += size - session.size
+        session.size = size
+
+    def _enforce_limits(self, keep: Optional[str] = None) -> None:
+        """상한을 넘으면 LRU 순서로 제거 (방금 쓴 세션 keep 은 제외)"""
+        while self._sessions and (
+            (self.max_bytes and self._bytes > self.max_bytes)
+            or (self.max_sessions and len(self._sessions) > self.max_sessions)
+        ):
+            session = next(iter(self._sessions.values()))
+            if session.session_id == keep:
+                break
+            self._remove(session)
+            self._stats["evicted"] += 1
+
+    def _get(self, session_id: str, now: float):
+        self._expire_due(now)
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if session.expires_at <= now:
+            self._remove(session)
+            self._stats["expired"] += 1
+            return EXPIRED
+        self._sessions.move_to_end(session_id)
+        session.data["last_activity"] = _iso(now)
+        return session
+
+    # ---- API ----
+
+    def create(self, user_id: int, data: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        now = self._clock()
+        session_id, data = self._new_session(user_id, data, now)
+        session = _Session(session_id, user_id, data, now + self.ttl_seconds)
+        with self._lock:
+            self._expire_due(now)
+            self._sessions[session_id] = session
+            self._by_user.setdefault(user_id, {})[session_id] = None
+            self._wheel.schedule(session_id, session.expires_at)
+            self._resize(session)
+            self._active += 1
+            self._stats["created"] += 1
+            self._enforce_limits(keep=session_id)
+        return session_id, data
+
+    def get(self, session_id: str):
+        with self._lock:
+            session = self._get(session_id, self._clock())
+            return session if session is None or session is EXPIRED else session.data
+
+    def update(self, session_id: str, update_data: Dict[str, Any]):
+        """데이터를 합치고 last_activity 갱신"""
+        with self._lock:
+            session = self._get(session_id, self._clock())
+            if session is None or session is EXPIRED:
+                return session
+            was_active = session.data.get("is_active", False)
+            session.data.update({k: v for k, v in update_data.items() if k not in _MANAGED_FIELDS})
+            self._active += int(bool(session.data.get("is_active", False))) - int(bool(was_active))
+            self._resize(session)
+            self._enforce_limits(keep=session_id)
+            return session.data
+
+    def extend(self, session_id: str, seconds: float):
+        """만료 시각을 지금부터 seconds 뒤로 옮김"""
+        now = self._clock()
+        with self._lock:
+            session = self._get(session_id, now)
+            if session is None or session is EXPIRED:
+                return session
+            session.expires_at = now + seconds
+            self._wheel.schedule(session_id, session.expires_at)
+            session.data["expires_at"] = _iso(session.expires_at)
+            self._stats["extended"] += 1
+            return session.data
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            self._expire_due(self._clock())
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            self._remove(session)
+            self._stats["deleted"] += 1
+            return True
+
+    def user_sessions(self, user_id: int) -> List[Tuple[str, Dict[str, Any]]]:
+        now = self._clock()
+        with self._lock:
+            self._expire_due(now)
+            return [
+                (session_id, self._sessions[session_id].data)
+                for session_id in self._by_user.get(user_id, ())
+                if self._sessions[session_id].expires_at > now
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire_due(self._clock())
+            return {
+                **super().stats(),
+                "total_sessions": len(self._sessions),
+                "active_sessions": self._active,
+                "users": len(self._by_user),
+                "estimated_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_sessions": self.max_sessions,
+                "expiry_timers": len(self._wheel),
+                **self._stats,
+            }
+
+
+# ---------------- last_activity 쓰기 모음 ----------------
+
+class _ActivityBatcher:
+    """
+    조회마다 생기는 last_activity 쓰기를 모아 write({session_id: ts}) 한 번으로 씀
+    - 주기(flush_seconds) 마다 백그라운드 스레드가 쓰고, 모인 수가 batch_size 에 닿으면 호출한 스레드가 바로 씀
+    - 아직 쓰지 않은 값은 pending() 으로 이 워커의 응답에 반영 (다른 워커에는 최대 flush_seconds 늦게 보임)
+    - flush_seconds <= 0 이면 모으지 않고 바로 씀
+    """
+
+    def __init__(self, write: Callable[[Dict[str, float]], None], flush_seconds: float, batch_size: int):
+        self._write = write
+        self.flush_seconds = flush_seconds
+        self.batch_size = max(1, batch_size)
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._stats = {"touches": 0, "flushes": 0, "written": 0, "write_errors": 0}
+        if flush_seconds > 0:
+            threading.Thread(target=self._run, name="session-activity-flush", daemon=True).start()
+
+    def touch(self, session_id: str, ts: float) -> None:
+        with self._lock:
+            self._stats["touches"] += 1
+            self._pending[session_id] = ts
+            due = self.flush_seconds <= 0 or len(self._pending) >= self.batch_size
+        if due:
+            self.flush()
+
+    def pending(self, session_id: str) -> Optional[float]:
+        return self._pending.get(session_id)
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._pending.pop(session_id, None)
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                self._write(batch)
+                self._stats["flushes"] += 1
+                self._stats["written"] += len(batch)
+            except Exception as e:
+                self._stats["write_errors"] += 1
+                print(f"[오류] 세션 last_activity 쓰기 실패 ({len(batch)}건): {e}")
+                with self._lock:
+                    for session_id, ts in batch.items():
+                        if ts > self._pending.get(session_id, 0):
+                            self._pending[session_id] = ts
+
+    def _run(self) -> None:
+        while not self._closed.wait(self.flush_seconds):
+            self.flush()
+
+    def close(self) -> None:
+        self._closed.set()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending_activity": len(self._pending), "activity_flush_seconds": self.flush_seconds, **self._stats}
+
+
+# ---------------- sqlite ----------------
+
+class SqliteSessionBackend(SessionBackend):
+    """
+    SQLite(WAL) 세션 저장소 - 같은 호스트의 여러 워커가 한 파일을 공유, 재시작해도 유지
+    - WAL 이라 읽기는 쓰기를 기다리지 않음. 데이터 변경(update/extend/delete)은 바로 커밋
+    - 조회로 생기는 last_activity 는 모아서 executemany 한 트랜잭션으로 씀 (조회마다 쓰기 잠금을 잡지 않음)
+    - 만료는 조회 시 확인하고, 만료된 행은 SESSION_SWEEP_SECONDS 마다 expires_at 인덱스로 한 번에 지움
+    - 연결은 스레드마다 하나
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str = SESSION_SQLITE_PATH,
+        ttl_seconds: float = SESSION_TTL_HOURS * 3600,
+        flush_seconds: float = SESSION_ACTIVITY_FLUSH_SECONDS,
+        batch_size: int = SESSION_ACTIVITY_BATCH,
+        sweep_seconds: float = SESSION_SWEEP_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__(ttl_seconds, clock)
+        self.path = path
+        self.sweep_seconds = sweep_seconds
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._last_sweep = clock()
+        self._stats = {"created": 0, "expired": 0, "deleted": 0, "extended": 0, "swept": 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                is_active INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_activity REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_sessions_user ON sessions (user_id);
+            CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires_at);
+            """
+        )
+        self._activity = _ActivityBatcher(self._write_activity, flush_seconds, batch_size)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: 자동 커밋, 여러 문장은 BEGIN 으로 직접 묶음
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _write_activity(self, batch: Dict[str, float]) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE sessions SET last_activity = MAX(last_activity, ?) WHERE session_id = ?",
+                [(ts, session_id) for session_id, ts in batch.items()],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now - self._last_sweep < self.sweep_seconds:
+            return
+        self._last_sweep = now
+        cursor = self._conn().execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        self._stats["swept"] += cursor.rowcount
+
+    def _compose(self, session_id: str, data_json: str, expires_at: float, last_activity: float) -> Dict[str, Any]:
+        data = json.loads(data_json)
+        pending = self._activity.pending(session_id)
+        data["expires_at"] = _iso(expires_at)
+        data["last_activity"] = _iso(max(last_activity, pending or 0))
+        return data
+
+    def _row(self, conn: sqlite3.Connection, session_id: str):
+        return conn.execute(
+            "SELECT data, expires_at, last_activity FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+
+    def _expire(self, conn: sqlite3.Connection, session_id: str):
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self._activity.forget(session_id)
+        self._stats["expired"] += 1
+        return EXPIRED
+
+    def create(self, user_id: int, data: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        now = self._clock()
+        session_id, data = self._new_session(user_id, data, now)
+        stored = {k: v for k, v in data.items() if k not in ("expires_at", "last_activity")}
+        self._conn().execute(
+            "INSERT INTO sessions (session_id, user_id, data, is_active, expires_at, last_activity) VALUES (?, ?, ?, 1, ?, ?)",
+            (session_id, user_id, _dumps(stored), now + self.ttl_seconds, now),
+        )
+        self._stats["created"] += 1
+        self._maybe_sweep(now)
+        return session_id, data
+
+    def get(self, session_id: str):
+        now = self._clock()
+        conn = self._conn()
+        row = self._row(conn, session_id)
+        if row is None:
+            return None
+        if row[1] <= now:
+            return self._expire(conn, session_id)
+        self._activity.touch(session_id, now)
+        return self._compose(session_id, row[0], row[1], now)
+
+    def update(self, session_id: str, update_data: Dict[str, Any]):
+        now = self._clock()
+        conn = self._conn()
+        # 읽고-합치고-쓰기를 쓰기 잠금 아래에서 (다른 워커의 동시 update 를 잃지 않음)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._row(conn, session_id)
+            if row is None:
+                result = None
+            elif row[1] <= now:
+                result = self._expire(conn, session_id)
+            else:
+                data = json.loads(row[0])
+                data.update({k: v for k, v in update_data.items() if k not in _MANAGED_FIELDS})
+                conn.execute(
+                    "UPDATE sessions SET data = ?, is_active = ?, last_activity = ? WHERE session_id = ?",
+                    (_dumps(data), int(bool(data.get("is_active", False))), now, session_id),
+                )
+                data["expires_at"] = _iso(row[1])
+                data["last_activity"] = _iso(now)
+                result = data
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._maybe_sweep(now)
+        return result
+
+    def extend(self, session_id: str, seconds: float):
+        now = self._clock()
+        conn = self._conn()
+        cursor = conn.execute(
+            "UPDATE sessions SET expires_at = ?, last_activity = MAX(last_activity, ?) WHERE session_id = ? AND expires_at > ?",
+            (now + seconds, now, session_id, now),
+        )
+        if cursor.rowcount == 0:
+            if self._row(conn, session_id) is None:
+                return None
+            return self._expire(conn, session_id)
+        self._stats["extended"] += 1
+        row = self._row(conn, session_id)
+        return None if row is None else self._compose(session_id, *row)
+
+    def delete(self, session_id: str) -> bool:
+        self._activity.forget(session_id)
+        cursor = self._conn().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        if cursor.rowcount:
+            self._stats["deleted"] += 1
+        return cursor.rowcount > 0
+
+    def user_sessions(self, user_id: int) -> List[Tuple[str, Dict[str, Any]]]:
+        rows = self._conn().execute(
+            "SELECT session_id, data, expires_at, last_activity FROM sessions "
+            "WHERE user_id = ? AND expires_at > ? ORDER BY rowid",
+            (user_id, self._clock()),
+        ).fetchall()
+        return [(row[0], self._compose(*row)) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        total, active = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(is_active), 0) FROM sessions WHERE expires_at > ?", (self._clock(),)
+        ).fetchone()
+        return {
+            **super().stats(),
+            "path": self.path,
+            "total_sessions": total,
+            "active_sessions": active,
+            **self._stats,
+            **self._activity.stats(),
+        }
+
+    def close(self) -> None:
+        self._activity.close()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+# ---------------- redis ----------------
+
+class RedisSessionBackend(SessionBackend):
+    """
+    Redis 세션 저장소 - 여러 호스트의 워커가 공유
+    - {prefix}{id}: {"user_id", "expires_at", "data"} JSON. 키 TTL = 만료 시각 + 유예(만료 직후 조회는 EXPIRED)
+    - {prefix}{id}:seen: last_activity (조회 활동은 모아서 파이프라인 한 번으로 SET XX KEEPTTL)
+    - {prefix}user:{user_id}: 사용자 세션 ID 집합, {prefix}expiry: 만료 시각 정렬 집합 (세션 수 확인용)
+    - 명령은 파이프라인으로 묶어 조작 하나가 왕복 한두 번. redis-py 없이 services/redis_protocol.py 로 통신
+    - update 는 읽고-합치고-쓰기(SET XX KEEPTTL): 같은 세션을 여러 워커가 동시에 바꾸면 마지막 쓰기가 남음
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        url: str = SESSION_REDIS_URL,
+        prefix: str = SESSION_REDIS_PREFIX,
+        ttl_seconds: float = SESSION_TTL_HOURS * 3600,
+        flush_seconds: float = SESSION_ACTIVITY_FLUSH_SECONDS,
+        batch_size: int = SESSION_ACTIVITY_BATCH,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__(ttl_seconds, clock)
+        self.prefix = prefix
+        self.client = RedisClient(url)
+        self._expiry_key = f"{prefix}expiry"
+        self._stats = {"created": 0, "expired": 0, "deleted": 0, "extended": 0}
+        self._activity = _ActivityBatcher(self._write_activity, flush_seconds, batch_size)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}"
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self.prefix}user:{user_id}"
+
+    def _px(self, expires_at: float, now: float) -> int:
+        return max(1, int((expires_at - now + _REDIS_EXPIRED_GRACE_SECONDS) * 1000))
+
+    def _write_activity(self, batch: Dict[str, float]) -> None:
+        # XX: 그 사이 지워진 세션의 키를 되살리지 않음
+        self.client.pipeline([
+            ("SET", f"{self._key(session_id)}:seen", repr(ts), "XX", "KEEPTTL") for session_id, ts in batch.items()
+        ])
+
+    def _compose(self, session_id: str, record: Dict[str, Any], seen: Optional[bytes]) -> Dict[str, Any]:
+        data = record["data"]
+        last_activity = max(float(seen) if seen else 0.0, self._activity.pending(session_id) or 0.0)
+        data["expires_at"] = _iso(record["expires_at"])
+        data["last_activity"] = _iso(last_activity)
+        return data
+
+    def _load(self, session_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[bytes]]:
+        raw, seen = self.client.execute("MGET", self._key(session_id), f"{self._key(session_id)}:seen")
+        return (json.loads(raw) if raw is not None else None), seen
+
+    def _remove(self, session_id: str, user_id: int) -> int:
+        self._activity.forget(session_id)
+        key = self._key(session_id)
+        return self.client.pipeline([
+            ("DEL", key, f"{key}:seen"),
+            ("SREM", self._user_key(user_id), session_id),
+            ("ZREM", self._expiry_key, session_id),
+        ])[0]
+
+    def _expire(self, session_id: str, record: Dict[str, Any]):
+        self._remove(session_id, record["user_id"])
+        self._stats["expired"] += 1
+        return EXPIRED
+
+    def create(self, user_id: int, data: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        now = self._clock()
+        session_id, data = self._new_session(user_id, data, now)
+        expires_at = now + self.ttl_seconds
+        stored = {k: v for k, v in data.items() if k not in ("expires_at", "last_activity")}
+        key, px = self._key(session_id), self._px(expires_at, now)
+        self.client.pipeline([
+            ("SET", key, _dumps({"user_id": user_id, "expires_at": expires_at, "data": stored}), "PX", px),
+            ("SET", f"{key}:seen", repr(now), "PX", px),
+            ("SADD", self._user_key(user_id), session_id),
+            # 인덱스는 그 사용자의 가장 늦은 세션보다 오래 남기면 됨 (남은 ID 는 user_sessions 에서 정리)
+            ("PEXPIRE", self._user_key(user_id), max(px, self._px(now + self.ttl_seconds, now))),
+            ("ZADD", self._expiry_key, repr(expires_at), session_id),
+        ])
+        self._stats["created"] += 1
+        return session_id, data
+
+    def get(self, session_id: str):
+        now = self._clock()
+        record, seen = self._load(session_id)
+        if record is None:
+            return None
+        if record["expires_at"] <= now:
+            return self._expire(session_id, record)
+        self._activity.touch(session_id, now)
+        return self._compose(session_id, record, seen)
+
+    def update(self, session_id: str, update_data: Dict[str, Any]):
+        now = self._clock()
+        record, seen = self._load(session_id)
+        if record is None:
+            return None
+        if record["expires_at"] <= now:
+            return self._expire(session_id, record)
+        record["data"].update({k: v for k, v in update_data.items() if k not in _MANAGED_FIELDS})
+        stored = self.client.execute("SET", self._key(session_id), _dumps(record), "XX", "KEEPTTL")
+        if stored is None:
+            # 그 사이 삭제됨
+            return None
+        self._activity.touch(session_id, now)
+        return self._compose(session_id, record, seen)
+
+    def extend(self, session_id: str, seconds: float):
+        now = self._clock()
+        record, seen = self._load(session_id)
+        if record is None:
+            return None
+        if record["expires_at"] <= now:
+            return self._expire(session_id, record)
+        record["expires_at"] = now + seconds
+        key, px = self._key(session_id), self._px(record["expires_at"], now)
+        stored, _, _, _ = self.client.pipeline([
+            ("SET", key, _dumps(record), "XX", "PX", px),
+            ("SET", f"{key}:seen", repr(now), "PX", px),
+            ("PEXPIRE", self._user_key(record["user_id"]), max(px, self._px(now + self.ttl_seconds, now))),
+            ("ZADD", self._expiry_key, repr(record["expires_at"]), session_id),
+        ])
+        if stored is None:
+            self._remove(session_id, record["user_id"])
+            return None
+        self._stats["extended"] += 1
+        self._activity.forget(session_id)
+        return self._compose(session_id, record, repr(now).encode("ascii"))
+
+    def delete(self, session_id: str) -> bool:
+        record, _ = self._load(session_id)
+        if record is None:
+            return False
+        removed = self._remove(session_id, record["user_id"]) > 0
+        if removed:
+            self._stats["deleted"] += 1
+        return removed
+
+    def user_sessions(self, user_id: int) -> List[Tuple[str, Dict[str, Any]]]:
+        now = self._clock()
+        session_ids = [member.decode("utf-8") for member in self.client.execute("SMEMBERS", self._user_key(user_id))]
+        if not session_ids:
+            return []
+        keys: List[str] = []
+        for session_id in session_ids:
+            keys.extend((self._key(session_id), f"{self._key(session_id)}:seen"))
+        values = self.client.execute("MGET", *keys)
+        sessions, gone = [], []
+        for i, session_id in enumerate(session_ids):
+            raw, seen = values[2 * i], values[2 * i + 1]
+            if raw is None:
+                gone.append(session_id)
+                continue
+            record = json.loads(raw)
+            if record["expires_at"] > now:
+                sessions.append((session_id, self._compose(session_id, record, seen)))
+        if gone:
+            # 키 TTL 로 사라진 세션을 인덱스에서도 정리
+            self.client.pipeline([("SREM", self._user_key(user_id), *gone), ("ZREM", self._expiry_key, *gone)])
+        sessions.sort(key=lambda item: item[1].get("created_at", ""))
+        return sessions
+
+    def stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        _, total = self.client.pipeline([
+            ("ZREMRANGEBYSCORE", self._expiry_key, "-inf", repr(now - _REDIS_EXPIRED_GRACE_SECONDS)),
+            ("ZCOUNT", self._expiry_key, repr(now), "+inf"),
+        ])
+        return {
+            **super().stats(),
+            "url": f"redis://{self.client.host}:{self.client.port}",
+            "total_sessions": total,
+            **self._stats,
+            **self._activity.stats(),
+        }
+
+    def close(self) -> None:
+        self._activity.close()
+        self.client.close()
+
+
+def create_session_backend(kind: str = SESSION_BACKEND) -> SessionBackend:
+    if kind == "sqlite":
+        return SqliteSessionBackend()
+    if kind == "redis":
+        return RedisSessionBackend()
+    if kind != "memory":
+        print(f"[오류] 알 수 없는 SESSION_BACKEND={kind}, memory 세션 저장소를 사용합니다.")
+    return MemorySessionBackend()
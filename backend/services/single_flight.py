@@ -0,0 +1,137 @@
+# services/single_flight.py
+import functools
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from backend.services.chat_tracing import record_event
+
+# 같은 호출이 끝난 뒤에도 이 시간(초) 동안은 결과를 그대로 재사용
+SINGLE_FLIGHT_FRESHNESS_SECONDS = float(os.getenv("SINGLE_FLIGHT_FRESHNESS_SECONDS", 5))
+SINGLE_FLIGHT_MAX_RECENT = 2048
+# 앞선 호출을 기다리는 최대 시간(초). 넘으면 기다리지 않고 직접 호출 (앞선 호출이 멈춰도 스레드가 묶이지 않도록)
+SINGLE_FLIGHT_MAX_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_MAX_WAIT_SECONDS", 30))
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    동일한 (단계, 정규화된 프롬프트) 호출을 하나로 합치는 single-flight 그룹
+    - 실행 중인 호출이 있으면 새 요청은 그 결과를 기다렸다가 함께 받음
+    - 끝난 호출의 결과는 freshness_seconds 동안 재사용
+    - Bedrock/Google 호출은 동기 함수라서 스레드 동기화(threading.Event)로 구현
+    - 기다리는 시간은 max_wait_seconds 까지. 넘으면 결과를 기다리지 않고 직접 호출
+    """
+
+    def __init__(self, freshness_seconds: float = SINGLE_FLIGHT_FRESHNESS_SECONDS,
+                 max_wait_seconds: float = SINGLE_FLIGHT_MAX_WAIT_SECONDS):
+        self.freshness_seconds = freshness_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Tuple[str, Hashable], _Call] = {}
+        self._recent: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, stage: str, key: str) -> None:
+        stage_stats = self._stats.setdefault(stage, {"executed": 0, "coalesced": 0, "fresh_reused": 0, "wait_timeouts": 0})
+        stage_stats[key] += 1
+        if key != "executed":
+            # 현재 챗봇 요청의 구간 기록에도 남김 (예: llm_coalesced, web_search_fresh_reused)
+            record_event(f"{stage}_{key}")
+
+    def _prune_recent(self, now: float) -> None:
+        expired = [k for k, (finished_at, _) in self._recent.items() if now - finished_at > self.freshness_seconds]
+        for k in expired:
+            del self._recent[k]
+
+    def do(self, stage: str, key: Hashable, fn: Callable[[], Any], reuse_if: Callable[[Any], bool] = lambda r: r is not None) -> Any:
+        full_key = (stage, key)
+        now = time.monotonic()
+        with self._lock:
+            recent = self._recent.get(full_key)
+            if recent and now - recent[0] <= self.freshness_seconds:
+                self._count(stage, "fresh_reused")
+                return recent[1]
+            call = self._in_flight.get(full_key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._in_flight[full_key] = call
+                self._count(stage, "executed")
+            else:
+                call.waiters += 1
+                self._count(stage, "coalesced")
+
+        if not leader:
+            if call.event.wait(self.max_wait_seconds):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            with self._lock:
+                self._count(stage, "wait_timeouts")
+            print(f"[알림] {stage} 단계의 앞선 호출이 {self.max_wait_seconds}초 안에 끝나지 않아 직접 호출합니다.")
+            return fn()
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[full_key]
+                if call.error is None and reuse_if(call.result) and self.freshness_seconds > 0:
+                    finished_at = time.monotonic()
+                    self._recent[full_key] = (finished_at, call.result)
+                    if len(self._recent) > SINGLE_FLIGHT_MAX_RECENT:
+                        self._prune_recent(finished_at)
+            call.event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {stage: dict(values) for stage, values in self._stats.items()}
+            in_flight = len(self._in_flight)
+        for values in stages.values():
+            total = values["executed"] + values["coalesced"] + values["fresh_reused"]
+            values["upstream_calls_saved"] = values["coalesced"] + values["fresh_reused"] - values["wait_timeouts"]
+            values["saved_ratio"] = round(values["upstream_calls_saved"] / total, 4) if total else 0.0
+        return {
+            "freshness_seconds": self.freshness_seconds,
+            "max_wait_seconds": self.max_wait_seconds,
+            "in_flight": in_flight,
+            "stages": stages,
+        }
+
+
+single_flight = SingleFlight()
+
+
+def prompt_key(*parts: str) -> str:
+    """공백 차이만 무시한 프롬프트 해시 (LLM 프롬프트는 의미가 바뀌지 않도록 그 외 정규화는 하지 않음)"""
+    joined = "\x1f".join(_SPACE_RE.sub(" ", part or "").strip() for part in parts)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+def coalesce(stage: str, key_func: Callable[..., Hashable], reuse_if: Callable[[Any], bool] = lambda r: r is not None):
+    """함수 호출을 single_flight 그룹으로 감싸는 데코레이터"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return single_flight.do(stage, key_func(*args, **kwargs), lambda: fn(*args, **kwargs), reuse_if=reuse_if)
+        return wrapper
+    return decorator
@@ -0,0 +1,98 @@
+# services/timer_wheel.py
+import math
+from typing import Any, Dict, Hashable, List
+
+
+class TimerWheel:
+    """
+    계층형 타이머 휠 (hashed hierarchical timing wheel)
+    - 항목 수만큼 asyncio.sleep 태스크나 힙 항목을 두지 않고, 슬롯 배열에 key 만 넣어 두었다가 tick 마다 한 슬롯씩 꺼냄
+    - 단계 L 의 슬롯 하나는 tick * slots**L 초 구간. 가까운 만료는 0단계, 먼 만료는 위 단계에 두고
+      시간이 흐르면 아래 단계로 내려보냄(cascade). 등록/취소 O(1), tick 당 일은 그 tick 에 만료되는 항목 수에 비례
+    - 정밀도는 tick 단위 (만료 시각은 tick 경계로 올림). 표현 범위(tick * slots**levels)를 넘는 만료는
+      맨 위 단계 끝에 두었다가 다시 배치
+    - 스레드 안전하지 않음: 한 이벤트 루프(또는 잠금 아래)에서만 사용
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 3, now: float = 0.0):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._current = int(now // tick)
+        self._wheels: List[List[Dict[Hashable, int]]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        # key -> 단계 * slots + 슬롯 : 취소/재등록 때 슬롯을 바로 찾기 위함 (작은 int 라 항목당 추가 할당 없음)
+        self._where: Dict[Hashable, int] = {}
+        self._horizon = slots ** levels - 1
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """key 를 deadline(초, advance 에 넘기는 시계 기준) 에 만료되도록 등록. 이미 있으면 옮김"""
+        self.cancel(key)
+        self._place(key, max(self._current + 1, math.ceil(deadline / self.tick)))
+
+    def cancel(self, key: Hashable) -> bool:
+        where = self._where.pop(key, None)
+        if where is None:
+            return False
+        level, slot = divmod(where, self.slots)
+        del self._wheels[level][slot][key]
+        return True
+
+    def _place(self, key: Hashable, expires: int) -> None:
+        delta = min(expires - self._current, self._horizon)
+        level, span = 0, self.slots
+        while delta >= span and level < self.levels - 1:
+            level += 1
+            span *= self.slots
+        # 표현 범위를 넘는 항목은 범위 끝 슬롯에 두고, 내려올 때 실제 만료 tick 으로 다시 배치
+        slot = ((self._current + delta) // (span // self.slots)) % self.slots
+        self._wheels[level][slot][key] = expires
+        self._where[key] = level * self.slots + slot
+
+    def advance(self, now: float) -> List[Hashable]:
+        """now 까지 시간을 진행하고 만료된 key 목록 반환 (만료된 key 는 휠에서 빠짐)"""
+        target = int(now // self.tick)
+        expired: List[Hashable] = []
+        if not self._where:
+            # 비어 있으면 돌 슬롯이 없음 (시계가 크게 건너뛰어도 tick 마다 돌지 않음)
+            self._current = max(self._current, target)
+            return expired
+        while self._current < target:
+            self._current += 1
+            # 위 단계부터 내려보내야 같은 tick 에 여러 단계가 경계일 때 순서가 맞음
+            for level in range(self.levels - 1, 0, -1):
+                span = self.slots ** level
+                if self._current % span:
+                    continue
+                bucket = self._wheels[level][(self._current // span) % self.slots]
+                if not bucket:
+                    continue
+                self._wheels[level][(self._current // span) % self.slots] = {}
+                for key, expires in bucket.items():
+                    del self._where[key]
+                    self._place(key, max(expires, self._current))
+            slot = self._current % self.slots
+            bucket = self._wheels[0][slot]
+            if not bucket:
+                continue
+            self._wheels[0][slot] = {}
+            for key, expires in bucket.items():
+                del self._where[key]
+                if expires > self._current:
+                    # 표현 범위를 넘어 잘린 항목
+                    self._place(key, expires)
+                else:
+                    expired.append(key)
+        return expired
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "timers": len(self._where),
+            "tick_seconds": self.tick,
+            "by_level": [sum(len(bucket) for bucket in wheel) for wheel in self._wheels],
+        }
@@ -0,0 +1,168 @@
+# services/tip_pool.py
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TIP_POOL_PATH = os.getenv("TIP_POOL_PATH", os.path.join(_BASE_DIR, "data", "tip_pool.json"))
+# 같은 항목은 이 기간(일) 안에 최대 TIP_POOL_REPEAT_LIMIT 번까지만 같은 사용자에게 보여줌
+TIP_POOL_REPEAT_WINDOW_DAYS = int(os.getenv("TIP_POOL_REPEAT_WINDOW_DAYS", 7))
+TIP_POOL_REPEAT_LIMIT = int(os.getenv("TIP_POOL_REPEAT_LIMIT", 1))
+# 생성 스크립트(generate_tip_pool)가 풀을 다시 만드는 주기
+TIP_POOL_REFRESH_DAYS = int(os.getenv("TIP_POOL_REFRESH_DAYS", 7))
+TIP_POOL_MAX_TRACKED_USERS = 10000
+
+KINDS = ("tip", "strategy")
+SEASONS = ("spring", "summer", "autumn", "winter")
+POOL_MODES = ("WALK", "BIKE", "BUS", "SUBWAY", "CAR")
+POOL_GOAL_TYPES = ("CO2_SAVED", "DISTANCE_KM", "TRIP_COUNT")
+# 정원 레벨 구간 (seed_garden_levels 의 1~11 단계)
+GARDEN_LEVEL_BANDS = {"beginner": (1, 3), "growing": (4, 7), "advanced": (8, 11)}
+
+
+def season_of(moment: Optional[datetime] = None) -> str:
+    month = (moment or datetime.utcnow() + timedelta(hours=9)).month  # KST 기준
+    if month in (3, 4, 5):
+        return "spring"
+    if month in (6, 7, 8):
+        return "summer"
+    if month in (9, 10, 11):
+        return "autumn"
+    return "winter"
+
+
+def garden_band_of(level: int) -> str:
+    for band, (low, high) in GARDEN_LEVEL_BANDS.items():
+        if low <= level <= high:
+            return band
+    return "advanced" if level > 11 else "beginner"
+
+
+class TipPool:
+    """
+    미리 생성해 둔 탄소 절감 팁/목표 달성 전략 풀
+    - 항목 태그: kind, modes, seasons, goal_types, garden_bands (빈 목록은 '모두 해당')
+    - 사용자 이동수단 통계와 현재 계절/정원 레벨에 맞는 항목을 LLM 호출 없이 골라줌
+    - 파일이 바뀌면(생성 스크립트 재실행) 다음 조회 때 자동으로 다시 읽음
+    """
+
+    def __init__(self, path: str = TIP_POOL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._items: List[Dict[str, Any]] = []
+        self._loaded_mtime: Optional[float] = None
+        # user_id -> OrderedDict(item_id -> [보여준 시각, ...]) (LRU 로 추적 사용자 수 제한)
+        self._seen: "OrderedDict[int, Dict[str, List[float]]]" = OrderedDict()
+        self._stats = {"served": 0, "fallbacks": 0}
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._items = [item for item in data.get("items", []) if item.get("kind") in KINDS and item.get("text")]
+            self._loaded_mtime = mtime
+            print(f"[알림] 팁/전략 풀을 불러왔습니다. ({len(self._items)}개, 생성 시각: {data.get('generated_at')})")
+        except (OSError, ValueError) as e:
+            print(f"[오류] 팁/전략 풀을 읽는 중 오류가 발생했습니다: {e}")
+
+    def _score(self, item: Dict[str, Any], context: Dict[str, Any]) -> float:
+        score = 0.0
+        modes = item.get("modes") or []
+        if modes:
+            # 사용자가 자주 쓰는 수단일수록 높은 점수 (자동차는 대체 수단 팁이 필요하므로 그대로 반영)
+            mode_share = context["mode_share"]
+            matched = [mode_share.get(mode, 0.0) for mode in modes]
+            if not any(matched):
+                return -1.0
+            score += 2.0 * max(matched)
+        seasons = item.get("seasons") or []
+        if seasons:
+            if context["season"] not in seasons:
+                return -1.0
+            score += 1.0
+        goal_types = item.get("goal_types") or []
+        if goal_types and context.get("goal_type"):
+            if context["goal_type"] not in goal_types:
+                return -1.0
+            score += 1.0
+        bands = item.get("garden_bands") or []
+        if bands:
+            if context["garden_band"] not in bands:
+                return -1.0
+            score += 0.5
+        return score
+
+    def pick(
+        self,
+        kind: str,
+        user_id: int,
+        mode_counts: Dict[str, int],
+        garden_level: int = 1,
+        goal_type: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """조건에 맞는 항목 하나를 골라 반환 (없으면 None -> 호출자가 LLM 생성으로 대체)"""
+        total_trips = sum(mode_counts.values())
+        context = {
+            "mode_share": {mode: count / total_trips for mode, count in mode_counts.items()} if total_trips else {},
+            "season": season_of(),
+            "goal_type": goal_type,
+            "garden_band": garden_band_of(garden_level),
+        }
+        now = time.time()
+        window = TIP_POOL_REPEAT_WINDOW_DAYS * 86400
+
+        with self._lock:
+            self._reload_if_changed()
+            seen = self._seen.get(user_id, {})
+            candidates = []
+            for item in self._items:
+                if item["kind"] != kind:
+                    continue
+                recent_views = [t for t in seen.get(item["id"], []) if now - t < window]
+                if len(recent_views) >= TIP_POOL_REPEAT_LIMIT:
+                    continue
+                score = self._score(item, context)
+                if score >= 0:
+                    candidates.append((score, item))
+
+            if not candidates:
+                self._stats["fallbacks"] += 1
+                return None
+
+            best = max(score for score, _ in candidates)
+            # 최고점 근처 항목 중에서 무작위로 골라 매번 같은 항목만 나오지 않도록 함
+            chosen = random.choice([item for score, item in candidates if score >= best - 0.5])
+
+            views = self._seen.setdefault(user_id, {})
+            views[chosen["id"]] = [t for t in views.get(chosen["id"], []) if now - t < window] + [now]
+            self._seen.move_to_end(user_id)
+            while len(self._seen) > TIP_POOL_MAX_TRACKED_USERS:
+                self._seen.popitem(last=False)
+            self._stats["served"] += 1
+            return chosen
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._reload_if_changed()
+            return {
+                "items": len(self._items),
+                "tips": sum(1 for item in self._items if item["kind"] == "tip"),
+                "strategies": sum(1 for item in self._items if item["kind"] == "strategy"),
+                "path": self.path,
+                **self._stats,
+            }
+
+
+tip_pool = TipPool()
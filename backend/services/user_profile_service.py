@@ -0,0 +1,163 @@
+# services/user_profile_service.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.models import (
+    MobilityLog, CreditsLedger, UserGarden, GardenLevel, Challenge, ChallengeMember, ChallengeStatus,
+)
+
+USER_PROFILE_TTL_SECONDS = int(os.getenv("USER_PROFILE_TTL_SECONDS", 600))
+USER_PROFILE_MAX_ENTRIES = int(os.getenv("USER_PROFILE_MAX_ENTRIES", 10000))
+PROFILE_HISTORY_DAYS = 30
+
+_cache: "OrderedDict[int, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0, "stale_puts_skipped": 0}
+# invalidate 마다 증가하는 순번. 계산을 시작한 뒤 그 사용자가 무효화됐으면 결과를 캐시에 넣지 않음
+_generation = 0
+# user_id -> 마지막으로 무효화된 순번 (최대 USER_PROFILE_MAX_ENTRIES 개, 넘으면 버린 순번을 _stale_before 로)
+_invalidated: "OrderedDict[int, int]" = OrderedDict()
+_stale_before = 0
+
+
+def _enum_value(value):
+    return value.value if hasattr(value, "value") else value
+
+
+class UserActivityProfileService:
+    """
+    챌린지 추천, 팁 선택 등에서 쓰는 사용자 활동 요약(feature vector)
+    - 수단별 이동 횟수/거리/절감량, 최근 활동일, 연속 활동일(streak), 최근 7일 절감량, 정원 레벨, 잔액
+    - 사용자별로 캐시하며, 이동 기록/크레딧 장부/챌린지 참여가 바뀌면 invalidate 로 무효화
+    """
+
+    @staticmethod
+    def get_profile(db: Session, user_id: int) -> Dict[str, Any]:
+        now = time.monotonic()
+        with _cache_lock:
+            cached = _cache.get(user_id)
+            if cached and now - cached[0] < USER_PROFILE_TTL_SECONDS:
+                _cache.move_to_end(user_id)
+                _stats["hits"] += 1
+                return cached[1]
+            _stats["misses"] += 1
+            generation = _generation
+
+        profile = UserActivityProfileService.compute_profile(db, user_id)
+        with _cache_lock:
+            if generation < _stale_before or _invalidated.get(user_id, 0) > generation:
+                # 계산하는 동안 이 사용자가 무효화됨 (principal_cache 와 같은 방식)
+                _stats["stale_puts_skipped"] += 1
+                return profile
+            _cache[user_id] = (now, profile)
+            _cache.move_to_end(user_id)
+            while len(_cache) > USER_PROFILE_MAX_ENTRIES:
+                _cache.popitem(last=False)
+        return profile
+
+    @staticmethod
+    def invalidate(user_id: int) -> None:
+        """이동 기록 / 크레딧 장부 / 정원 / 챌린지 참여 변경 후 호출"""
+        global _generation, _stale_before
+        with _cache_lock:
+            _generation += 1
+            _invalidated[user_id] = _generation
+            _invalidated.move_to_end(user_id)
+            while len(_invalidated) > USER_PROFILE_MAX_ENTRIES:
+                _, _stale_before = _invalidated.popitem(last=False)
+            if _cache.pop(user_id, None) is not None:
+                _stats["invalidations"] += 1
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        with _cache_lock:
+            total = _stats["hits"] + _stats["misses"]
+            return {**_stats, "entries": len(_cache), "hit_rate": round(_stats["hits"] / total, 4) if total else 0.0}
+
+    @staticmethod
+    def compute_profile(db: Session, user_id: int) -> Dict[str, Any]:
+        """캐시를 거치지 않고 DB 에서 프로필을 계산 (쿼리 5회)"""
+        today = datetime.utcnow().date()
+
+        # 1. 수단별 집계
+        modes = {}
+        last_trip_at: Optional[datetime] = None
+        mode_rows = db.query(
+            MobilityLog.mode,
+            func.count(MobilityLog.log_id),
+            func.sum(MobilityLog.distance_km),
+            func.sum(MobilityLog.co2_saved_g),
+            func.max(MobilityLog.started_at),
+        ).filter(MobilityLog.user_id == user_id).group_by(MobilityLog.mode).all()
+        for mode, trips, distance, saved, latest in mode_rows:
+            modes[_enum_value(mode)] = {
+                "trips": int(trips or 0),
+                "distance_km": round(float(distance or 0), 3),
+                "saved_g": round(float(saved or 0), 3),
+            }
+            if latest and (last_trip_at is None or latest > last_trip_at):
+                last_trip_at = latest
+
+        # 2. 최근 30일 일별 절감량 (최근 7일 그래프와 연속 활동일 계산용)
+        daily_rows = db.query(
+            func.date(MobilityLog.created_at),
+            func.sum(MobilityLog.co2_saved_g),
+        ).filter(
+            MobilityLog.user_id == user_id,
+            MobilityLog.created_at >= today - timedelta(days=PROFILE_HISTORY_DAYS),
+        ).group_by(func.date(MobilityLog.created_at)).all()
+        daily = {str(day): float(saved or 0) for day, saved in daily_rows}
+
+        streak_days = 0
+        cursor = today if str(today) in daily else today - timedelta(days=1)
+        while str(cursor) in daily:
+            streak_days += 1
+            cursor -= timedelta(days=1)
+
+        last7days = [
+            {"date": str(today - timedelta(days=offset)), "saved_g": daily.get(str(today - timedelta(days=offset)), 0.0)}
+            for offset in range(6, -1, -1)
+        ]
+
+        # 3. 정원 레벨
+        garden_level = db.query(GardenLevel.level_number).join(
+            UserGarden, UserGarden.current_level_id == GardenLevel.level_id
+        ).filter(UserGarden.user_id == user_id).scalar() or 1
+
+        # 4. 잔액
+        total_points = db.query(func.sum(CreditsLedger.points)).filter(CreditsLedger.user_id == user_id).scalar() or 0
+
+        # 5. 진행 중인 챌린지 목표 유형 (챌린지 수는 적으므로 조인 한 번)
+        goal_types = [
+            _enum_value(goal_type)
+            for (goal_type,) in db.query(Challenge.goal_type).join(ChallengeMember).filter(
+                ChallengeMember.user_id == user_id,
+                Challenge.status == ChallengeStatus.ACTIVE,
+            ).distinct().all()
+        ]
+
+        total_saved_g = sum(m["saved_g"] for m in modes.values())
+        return {
+            "user_id": user_id,
+            "mode_trip_counts": {mode: m["trips"] for mode, m in modes.items()},
+            "modes": modes,
+            "total_trips": sum(m["trips"] for m in modes.values()),
+            "total_saved_g": round(total_saved_g, 3),
+            "total_saved_kg": round(total_saved_g / 1000, 3),
+            "total_points": int(total_points),
+            "last7days": last7days,
+            "trips_active_days_30d": len(daily),
+            "last_trip_at": last_trip_at.isoformat() if last_trip_at else None,
+            "days_since_last_trip": (today - last_trip_at.date()).days if last_trip_at else None,
+            "streak_days": streak_days,
+            "garden_level": int(garden_level),
+            "active_goal_types": goal_types,
+            "computed_at": datetime.utcnow().isoformat(),
+        }
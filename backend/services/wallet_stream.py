@@ -0,0 +1,223 @@
+# services/wallet_stream.py
+import asyncio
+import hashlib
+import json
+import os
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Set
+
+from backend.services.ws_broker import WebSocketBroker
+
+# 연결이 조용할 때 보내는 SSE 주석(keepalive) 간격(초). 프록시가 유휴 연결을 끊지 않게 함
+WALLET_STREAM_KEEPALIVE_SECONDS = float(os.getenv("WALLET_STREAM_KEEPALIVE_SECONDS", 20))
+# 끊긴 EventSource 가 다시 연결하기까지 기다리는 시간(ms, SSE retry 필드)
+WALLET_STREAM_RETRY_MS = int(os.getenv("WALLET_STREAM_RETRY_MS", 3000))
+# long-poll 요청 하나가 변화를 기다리는 최대 시간(초)
+WALLET_LONG_POLL_TIMEOUT_SECONDS = float(os.getenv("WALLET_LONG_POLL_TIMEOUT_SECONDS", 25))
+# 변경 신호를 이 시간(초) 동안 모아 한 번만 다시 조회 (포인트 적립 + 이동 기록처럼 연달아 커밋되는 경우)
+WALLET_STREAM_COALESCE_SECONDS = float(os.getenv("WALLET_STREAM_COALESCE_SECONDS", 0.05))
+# 워커 하나가 동시에 유지하는 스트림/long-poll 수
+WALLET_STREAM_MAX_STREAMS = int(os.getenv("WALLET_STREAM_MAX_STREAMS", 20000))
+
+Loader = Callable[[int], Dict[str, Any]]
+
+
+class WalletStreamFull(Exception):
+    """동시 스트림 수 제한에 걸림"""
+
+
+class WalletUnavailable(Exception):
+    """지갑 상태를 불러오지 못함"""
+
+
+class _UserWallet:
+    """
+    사용자 한 명의 지갑 상태 (워커별). 같은 사용자의 탭/기기 스트림이 모두 공유
+    - event_id 는 상태 내용의 해시. 클라이언트의 Last-Event-ID 와 같으면 보낼 것이 없음
+    - updated 는 다음 변경 때 set 되고 새 Event 로 바뀜 (대기 중인 스트림 모두를 한 번에 깨움)
+    """
+
+    __slots__ = ("user_id", "state", "event_id", "changed", "pending", "listeners", "updated", "loading")
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.state: Optional[Dict[str, Any]] = None
+        self.event_id: Optional[str] = None
+        # 마지막 이벤트에서 바뀐 항목 (balance, garden, trip)
+        self.changed: list = []
+        # 아직 반영하지 않은 변경 신호
+        self.pending: Set[str] = set()
+        self.listeners = 0
+        self.updated = asyncio.Event()
+        self.loading: Optional[asyncio.Task] = None
+
+
+class WalletHub:
+    """
+    사용자별 지갑(잔액/정원/최근 이동) 변경을 SSE 스트림과 long-poll 로 전달
+    - 클라이언트가 주기적으로 잔액/정원/이동 기록을 다시 조회하던 것을, 커밋 직후 변경 신호(mark_changed)로 대체
+    - 변경 신호는 브로커로 모든 워커에 퍼지고, 그 사용자의 스트림이 있는 워커만 상태를 한 번 다시 조회해
+      모든 탭에 같은 이벤트를 보냄. 쉬는 탭은 Event 를 기다리는 코루틴 하나라 DB 를 전혀 건드리지 않음
+    - 이벤트는 항상 전체 상태(잔액, 탄소 절감량, 정원, 최근 이동)를 담고 ID 는 그 내용의 해시라 중복/누락에 안전:
+      재연결 시 Last-Event-ID 가 현재 상태의 ID 와 같으면 이어서 기다리고, 다르면(놓친 변경) 현재 상태 한 번 전송.
+      내용 기반이라 다른 워커로 재연결하거나 서버가 재시작돼도 같은 상태면 다시 보내지 않음
+    """
+
+    def __init__(self, broker: WebSocketBroker, loader: Loader,
+                 keepalive: float = WALLET_STREAM_KEEPALIVE_SECONDS,
+                 coalesce: float = WALLET_STREAM_COALESCE_SECONDS,
+                 max_streams: int = WALLET_STREAM_MAX_STREAMS):
+        self.broker = broker
+        self.loader = loader
+        self.keepalive = keepalive
+        self.coalesce = coalesce
+        self.max_streams = max_streams
+        self._wallets: Dict[int, _UserWallet] = {}
+        self._listeners = 0
+        self._stats = {
+            "streams_opened": 0, "polls": 0, "rejected": 0, "signals": 0, "reloads": 0,
+            "events": 0, "unchanged_reloads": 0, "resumed": 0, "load_errors": 0,
+        }
+
+    # ---- 변경 신호 ----
+
+    def mark_changed(self, user_id: int, changed: Iterable[str]) -> None:
+        """커밋 직후 호출 (어느 스레드에서나). 이 사용자를 보고 있는 모든 워커의 스트림에 새 상태를 보냄"""
+        if self.broker.local_only and user_id not in self._wallets:
+            # 워커 하나이고 이 사용자의 스트림이 없으면 할 일이 없음
+            return
+        self.broker.publish({"kind": "wallet", "user_id": user_id, "changed": sorted(set(changed))})
+
+    def handle_broker_message(self, message: Dict[str, Any]) -> None:
+        """브로커로 도착한 변경 신호 (이벤트 루프에서 호출)"""
+        wallet = self._wallets.get(message["user_id"])
+        if wallet is None:
+            return
+        self._stats["signals"] += 1
+        wallet.pending.update(message.get("changed") or ())
+        if wallet.loading is None or wallet.loading.done():
+            wallet.loading = asyncio.create_task(self._reload(wallet, self.coalesce))
+
+    async def _reload(self, wallet: _UserWallet, delay: float) -> None:
+        """pending 신호를 모아 상태를 다시 조회하고, 바뀌었으면 새 이벤트로 대기 중인 스트림을 깨움"""
+        while True:
+            if delay:
+                await asyncio.sleep(delay)
+            changed = sorted(wallet.pending)
+            wallet.pending.clear()
+            self._stats["reloads"] += 1
+            try:
+                state = await asyncio.to_thread(self.loader, wallet.user_id)
+            except Exception as e:
+                self._stats["load_errors"] += 1
+                print(f"[오류] 지갑 상태 조회 실패 (user {wallet.user_id}): {e}")
+                return
+            if state == wallet.state:
+                self._stats["unchanged_reloads"] += 1
+            else:
+                wallet.state = state
+                wallet.changed = changed
+                wallet.event_id = state_id(state)
+                self._stats["events"] += 1
+                updated, wallet.updated = wallet.updated, asyncio.Event()
+                updated.set()
+            if not wallet.pending:
+                return
+
+    # ---- 구독 ----
+
+    async def _acquire(self, user_id: int) -> _UserWallet:
+        if self._listeners >= self.max_streams:
+            self._stats["rejected"] += 1
+            raise WalletStreamFull()
+        wallet = self._wallets.get(user_id)
+        if wallet is None:
+            wallet = self._wallets[user_id] = _UserWallet(user_id)
+        wallet.listeners += 1
+        self._listeners += 1
+        try:
+            if wallet.state is None:
+                if wallet.loading is None or wallet.loading.done():
+                    wallet.pending.add("snapshot")
+                    wallet.loading = asyncio.create_task(self._reload(wallet, 0))
+                # 같은 사용자의 여러 탭이 동시에 열려도 조회는 한 번. 한 요청이 취소돼도 조회는 계속
+                await asyncio.shield(wallet.loading)
+            if wallet.state is None:
+                raise WalletUnavailable()
+        except BaseException:
+            self._release(wallet)
+            raise
+        return wallet
+
+    def _release(self, wallet: _UserWallet) -> None:
+        wallet.listeners -= 1
+        self._listeners -= 1
+        if wallet.listeners <= 0 and self._wallets.get(wallet.user_id) is wallet:
+            # 보는 탭이 없으면 상태를 버림 (다음 연결 때 다시 조회)
+            del self._wallets[wallet.user_id]
+
+    def _event(self, wallet: _UserWallet) -> Dict[str, Any]:
+        return {"user_id": wallet.user_id, **wallet.state, "changed": wallet.changed}
+
+    async def open_stream(self, user_id: int, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        SSE 스트림 준비: 제한/조회 실패는 여기서 예외로 알리고(응답 전), 성공하면 본문 생성기 반환
+        """
+        wallet = await self._acquire(user_id)
+        self._stats["streams_opened"] += 1
+        return self._stream(wallet, last_event_id)
+
+    async def _stream(self, wallet: _UserWallet, last_event_id: Optional[str]) -> AsyncIterator[str]:
+        try:
+            yield f"retry: {WALLET_STREAM_RETRY_MS}\n\n"
+            sent = last_event_id
+            if sent is not None and sent == wallet.event_id:
+                self._stats["resumed"] += 1
+            while True:
+                updated = wallet.updated
+                if wallet.event_id != sent:
+                    sent = wallet.event_id
+                    yield format_sse("wallet", sent, self._event(wallet))
+                    continue
+                try:
+                    await asyncio.wait_for(updated.wait(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self._release(wallet)
+
+    async def poll(self, user_id: int, since: Optional[str], timeout: float = WALLET_LONG_POLL_TIMEOUT_SECONDS) -> Optional[Dict[str, Any]]:
+        """
+        long-poll: since 와 다른 이벤트가 있으면 바로, 없으면 timeout 까지 기다렸다가 반환 (그래도 없으면 None)
+        반환 형식 {"id": 이벤트 ID, "event": "wallet", "data": {...}}
+        """
+        wallet = await self._acquire(user_id)
+        self._stats["polls"] += 1
+        try:
+            if wallet.event_id == since:
+                try:
+                    await asyncio.wait_for(wallet.updated.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    return None
+            return {"id": wallet.event_id, "event": "wallet", "data": self._event(wallet)}
+        finally:
+            self._release(wallet)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._wallets),
+            "listeners": self._listeners,
+            "max_streams": self.max_streams,
+            **self._stats,
+        }
+
+
+def state_id(state: Dict[str, Any]) -> str:
+    """상태 내용으로 정한 이벤트 ID (워커/재시작과 무관하게 같은 상태면 같은 ID)"""
+    canonical = json.dumps(state, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:20]
+
+
+def format_sse(event: str, event_id: str, data: Dict[str, Any]) -> str:
+    """SSE 이벤트 한 건 (data 는 한 줄 JSON)"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,298 @@
+# services/ws_broker.py
+import asyncio
+import json
+import os
+import struct
+import tempfile
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+# WebSocket 메시지를 워커 사이에 전달하는 방식: memory(워커 하나) / unix(같은 호스트의 여러 uvicorn 워커)
+WS_BROKER = os.getenv("WS_BROKER", "memory")
+# unix 브로커가 쓰는 소켓 경로 (같은 앱의 워커들은 같은 경로를 써야 함)
+WS_BROKER_SOCKET_PATH = os.getenv("WS_BROKER_SOCKET_PATH", os.path.join(tempfile.gettempdir(), "ecooo_ws_broker.sock"))
+# 허브 연결이 끊긴 동안 보관할 메시지 수와, 상대 워커 송신 버퍼가 이보다 크면 그 워커로 가는 메시지를 버림
+WS_BROKER_PENDING_LIMIT = int(os.getenv("WS_BROKER_PENDING_LIMIT", 1000))
+WS_BROKER_MAX_BUFFER_BYTES = int(os.getenv("WS_BROKER_MAX_BUFFER_BYTES", 4 * 1024 * 1024))
+WS_BROKER_RECONNECT_SECONDS = float(os.getenv("WS_BROKER_RECONNECT_SECONDS", 0.5))
+
+_HEADER = struct.Struct("!I")
+_MAX_FRAME_BYTES = 16 * 1024 * 1024
+_READ_CHUNK_BYTES = 256 * 1024
+
+Handler = Callable[[Dict[str, Any]], None]
+
+
+class WebSocketBroker:
+    """
+    WebSocket 전달 메시지(토픽 delta, 사용자 알림 등)를 모든 워커에 퍼뜨리는 브로커 인터페이스
+    - start(handler): 이 워커에 도착한 메시지마다 이벤트 루프에서 handler(message) 호출
+    - publish(message): 어느 스레드에서 호출해도 되며, 자기 워커를 포함한 모든 워커의 handler 로 전달
+    - message 는 JSON 으로 직렬화할 수 있는 dict
+    """
+
+    name = "base"
+    # True 면 메시지가 이 프로세스 밖으로 나가지 않음 (구독자가 없으면 발행을 생략해도 됨)
+    local_only = False
+
+    def __init__(self):
+        self._handler: Optional[Handler] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats = {"published": 0, "delivered": 0, "handler_errors": 0}
+
+    @property
+    def started(self) -> bool:
+        return self._loop is not None
+
+    async def start(self, handler: Handler) -> None:
+        self._handler = handler
+        self._loop = asyncio.get_running_loop()
+
+    async def close(self) -> None:
+        self._loop = None
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._publish(message)
+        else:
+            loop.call_soon_threadsafe(self._publish, message)
+
+    def _publish(self, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _deliver(self, message: Dict[str, Any]) -> None:
+        self._stats["delivered"] += 1
+        try:
+            self._handler(message)
+        except Exception as e:
+            self._stats["handler_errors"] += 1
+            print(f"[오류] 브로커 메시지 처리 실패: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "started": self.started, **self._stats}
+
+
+class InProcessBroker(WebSocketBroker):
+    """워커 하나일 때: 같은 프로세스 안에서 바로 전달"""
+
+    name = "memory"
+    local_only = True
+
+    def _publish(self, message: Dict[str, Any]) -> None:
+        self._stats["published"] += 1
+        self._deliver(message)
+
+
+async def _read_frames(reader: asyncio.StreamReader) -> AsyncIterator[Tuple[bytes, List[bytes]]]:
+    """
+    소켓에서 한 번에 읽은 만큼의 완성된 메시지들을 (길이 헤더 포함 원본 바이트, 본문 목록) 으로 반환
+    - 메시지마다 readexactly 를 두 번 await 하지 않으므로 초당 수만 건에서도 이벤트 루프 부담이 적고,
+      허브는 원본 바이트를 그대로 다른 워커에 넘길 수 있음
+    """
+    buffer = bytearray()
+    while True:
+        try:
+            chunk = await reader.read(_READ_CHUNK_BYTES)
+        except ConnectionError:
+            return
+        if not chunk:
+            return
+        buffer += chunk
+        payloads, offset = [], 0
+        while len(buffer) - offset >= _HEADER.size:
+            (length,) = _HEADER.unpack_from(buffer, offset)
+            if length > _MAX_FRAME_BYTES:
+                return
+            end = offset + _HEADER.size + length
+            if end > len(buffer):
+                break
+            payloads.append(bytes(buffer[offset + _HEADER.size:end]))
+            offset = end
+        if payloads:
+            raw = bytes(buffer[:offset])
+            del buffer[:offset]
+            yield raw, payloads
+
+
+def _frame(payload: bytes) -> bytes:
+    return _HEADER.pack(len(payload)) + payload
+
+
+class UnixSocketBroker(WebSocketBroker):
+    """
+    같은 호스트의 여러 워커 프로세스용 브로커 (외부 서비스 없이 Unix domain socket 사용)
+    - 잠금 파일(flock)을 먼저 잡은 워커가 허브가 되어 소켓을 열고, 나머지 워커는 허브에 접속
+    - 메시지 형식: 4바이트 길이 + JSON. 보낸 워커에는 바로 전달하고, 허브는 보낸 워커를 뺀 모든 워커에 전달
+    - 허브 워커가 죽으면 다른 워커가 잠금을 잡아 새 허브가 되고 나머지는 다시 접속 (그 사이 메시지는 일부 보관 후 전송)
+    - 허브로 가는 송신 버퍼가 WS_BROKER_MAX_BUFFER_BYTES 를 넘은 워커에는 메시지를 버림 (느린 워커가 허브를 막지 않게)
+    """
+
+    name = "unix"
+
+    def __init__(self, socket_path: str = WS_BROKER_SOCKET_PATH):
+        super().__init__()
+        self.socket_path = socket_path
+        self.role = "starting"
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Deque[bytes] = deque(maxlen=WS_BROKER_PENDING_LIMIT)
+        self._runner: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._stats.update({"forwarded_batches": 0, "dropped": 0, "reconnects": 0, "hub_elections": 0})
+
+    async def start(self, handler: Handler) -> None:
+        await super().start(handler)
+        self._stopping = False
+        self._runner = asyncio.create_task(self._run())
+        # 허브 선출/접속이 끝날 때까지 잠깐 기다려 시작 직후 메시지가 보관열로만 가지 않게 함
+        for _ in range(50):
+            if self.role in ("hub", "client"):
+                break
+            await asyncio.sleep(0.01)
+
+    async def close(self) -> None:
+        self._stopping = True
+        if self._runner is not None:
+            self._runner.cancel()
+        for writer in list(self._peers) + ([self._writer] if self._writer else []):
+            writer.close()
+        if self._server is not None:
+            self._server.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        await super().close()
+
+    # ---- 허브 선출 / 접속 ----
+
+    def _try_lock(self) -> bool:
+        # fcntl 은 POSIX 전용이라 unix 브로커를 쓸 때만 import (Windows 에서도 memory 브로커는 동작하도록)
+        import fcntl
+
+        fd = os.open(self.socket_path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            if self._try_lock():
+                await self._serve_hub()
+                return
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            except OSError:
+                # 허브가 아직 소켓을 열지 않았거나 방금 죽은 경우
+                await asyncio.sleep(WS_BROKER_RECONNECT_SECONDS)
+                continue
+            self.role = "client"
+            self._writer = writer
+            while self._pending:
+                writer.write(_frame(self._pending.popleft()))
+            async for _, payloads in _read_frames(reader):
+                for payload in payloads:
+                    self._deliver(json.loads(payload))
+                if self._stopping:
+                    break
+            self._writer = None
+            writer.close()
+            self.role = "reconnecting"
+            self._stats["reconnects"] += 1
+
+    async def _serve_hub(self) -> None:
+        # 잠금을 잡았으므로 남아 있는 소켓 파일은 죽은 허브의 것
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self._server = await asyncio.start_unix_server(self._handle_peer, path=self.socket_path)
+        self.role = "hub"
+        self._stats["hub_elections"] += 1
+        for payload in list(self._pending):
+            self._forward(payload, None)
+        self._pending.clear()
+        print(f"[알림] WebSocket 브로커 허브 시작 (pid {os.getpid()}, {self.socket_path})")
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._peers.add(writer)
+        try:
+            async for raw, payloads in _read_frames(reader):
+                self._forward_raw(raw, writer)
+                for payload in payloads:
+                    self._deliver(json.loads(payload))
+        except asyncio.CancelledError:
+            # 종료 중
+            pass
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    def _forward(self, payload: bytes, sender: Optional[asyncio.StreamWriter]) -> None:
+        self._forward_raw(_frame(payload), sender)
+
+    def _forward_raw(self, frames: bytes, sender: Optional[asyncio.StreamWriter]) -> None:
+        """허브: 길이 헤더가 붙은 메시지 묶음을 보낸 워커를 뺀 모든 워커에 전달"""
+        for peer in self._peers:
+            if peer is sender:
+                continue
+            if peer.transport.get_write_buffer_size() > WS_BROKER_MAX_BUFFER_BYTES:
+                self._stats["dropped"] += 1
+                continue
+            peer.write(frames)
+            self._stats["forwarded_batches"] += 1
+
+    # ---- 발행 ----
+
+    def _publish(self, message: Dict[str, Any]) -> None:
+        self._stats["published"] += 1
+        payload = json.dumps(message, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        if self.role == "hub":
+            self._forward(payload, None)
+        elif self._writer is not None:
+            if self._writer.transport.get_write_buffer_size() > WS_BROKER_MAX_BUFFER_BYTES:
+                self._stats["dropped"] += 1
+            else:
+                self._writer.write(_frame(payload))
+        else:
+            if len(self._pending) == self._pending.maxlen:
+                self._stats["dropped"] += 1
+            self._pending.append(payload)
+        # 자기 워커의 연결에는 허브를 거치지 않고 바로 전달
+        self._deliver(message)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "role": self.role,
+            "socket_path": self.socket_path,
+            "peers": len(self._peers),
+            "pending": len(self._pending),
+        }
+
+
+def create_broker(kind: str = WS_BROKER) -> WebSocketBroker:
+    if kind == "unix":
+        return UnixSocketBroker()
+    if kind != "memory":
+        print(f"[오류] 알 수 없는 WS_BROKER={kind}, memory 브로커를 사용합니다.")
+    return InProcessBroker()
+
+
+ws_broker = create_broker()
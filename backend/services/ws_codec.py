@@ -0,0 +1,85 @@
+# services/ws_codec.py
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple, Union
+
+from fastapi import WebSocket
+
+try:
+    import msgpack
+except ImportError:  # msgpack 이 없으면 JSON 만 사용
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# 클라이언트가 new WebSocket(url, ["ecooo.msgpack"]) 처럼 요청하는 서브프로토콜
+SUBPROTOCOLS = {"ecooo.msgpack": MSGPACK, "ecooo.json": JSON}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def encode(data: Dict[str, Any], codec: str) -> Union[str, bytes]:
+    """JSON 은 텍스트 프레임용 str, MessagePack 은 바이너리 프레임용 bytes"""
+    if codec == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True, default=_default)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def decode(text: Optional[str], data: Optional[bytes]) -> Dict[str, Any]:
+    """클라이언트가 보낸 프레임 해석: 텍스트는 JSON, 바이너리는 MessagePack"""
+    if text is None and data is not None:
+        if msgpack is None:
+            raise ValueError("MessagePack 프레임을 해석할 수 없습니다 (msgpack 미설치)")
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(text)
+
+
+class Payload:
+    """
+    여러 연결에 보내는 메시지 하나. 연결마다 인코딩이 달라도 인코딩별로 한 번만 직렬화
+    - 토픽 delta 처럼 구독자 수천 명에게 같은 내용을 보낼 때 사용
+    """
+
+    __slots__ = ("data", "_encoded")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self._encoded: Dict[str, Union[str, bytes]] = {}
+
+    def encode(self, codec: str) -> Union[str, bytes]:
+        encoded = self._encoded.get(codec)
+        if encoded is None:
+            encoded = self._encoded[codec] = encode(self.data, codec)
+        return encoded
+
+
+def negotiate(websocket: WebSocket) -> Tuple[str, Optional[str]]:
+    """
+    연결의 메시지 인코딩 결정: (codec, accept 때 돌려줄 서브프로토콜)
+    - 서브프로토콜 ecooo.msgpack 또는 쿼리 ?encoding=msgpack 이면 MessagePack (바이너리 프레임)
+    - 그 외에는 JSON. MessagePack 연결도 ping/pong 같은 단순 응답은 JSON 텍스트 프레임으로 받을 수 있음
+    - permessage-deflate 압축은 서버(uvicorn --ws-per-message-deflate)가 클라이언트 제안에 따라 협상하므로 여기서 다루지 않음
+    """
+    requested = websocket.scope.get("subprotocols") or []
+    for subprotocol in requested:
+        codec = SUBPROTOCOLS.get(subprotocol)
+        if codec == MSGPACK and msgpack is None:
+            continue
+        if codec is not None:
+            return codec, subprotocol
+    if websocket.query_params.get("encoding") == MSGPACK and msgpack is not None:
+        return MSGPACK, None
+    return JSON, None
+
+
+def deflate_offered(websocket: WebSocket) -> bool:
+    """클라이언트가 permessage-deflate 를 제안했는지 (서버 설정이 켜져 있으면 협상됨)"""
+    return "permessage-deflate" in websocket.headers.get("sec-websocket-extensions", "")
@@ -0,0 +1,427 @@
+# services/ws_manager.py
+import asyncio
+import itertools
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Union
+
+from fastapi import WebSocket
+
+from backend.services.chat_tracing import LatencyHistogram
+from backend.services.timer_wheel import TimerWheel
+from backend.services.ws_codec import JSON, Payload, deflate_offered, negotiate
+
+# 연결별 송신 대기열 최대 길이 (넘치면 오래된 메시지부터 버림)
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", 64))
+# 메시지 하나를 보내는 데 이 시간(초)을 넘기면 느린 클라이언트로 보고 연결 종료
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", 5))
+# 연속으로 이만큼 메시지를 버렸는데도 따라오지 못하면 연결 종료
+WS_MAX_CONSECUTIVE_DROPS = int(os.getenv("WS_MAX_CONSECUTIVE_DROPS", 256))
+# 사용자 한 명이 동시에 유지할 수 있는 연결 수 (탭/기기). 넘으면 가장 오래된 연결을 닫음
+WS_MAX_CONNECTIONS_PER_USER = int(os.getenv("WS_MAX_CONNECTIONS_PER_USER", 8))
+# 워커 프로세스 하나가 받는 최대 연결 수 (넘으면 새 연결을 거절)
+WS_MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", 20000))
+# 서버가 먼저 보내는 heartbeat: 이 시간(초) 동안 클라이언트에서 아무 메시지도 없으면 ping 전송 (0 이면 끔)
+WS_HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("WS_HEARTBEAT_INTERVAL_SECONDS", 25))
+# 이 시간(초) 동안 아무 메시지(pong 포함)도 받지 못하면 끊긴 연결(half-open)로 보고 정리
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", 75))
+# heartbeat 타이머 휠의 tick (초). ping/정리 시각의 정밀도
+WS_HEARTBEAT_TICK_SECONDS = float(os.getenv("WS_HEARTBEAT_TICK_SECONDS", 1))
+# 연결/종료 수(churn)를 집계하는 최근 구간 (분)
+WS_CHURN_WINDOW_MINUTES = int(os.getenv("WS_CHURN_WINDOW_MINUTES", 15))
+
+# 1013: Try Again Later (RFC 6455 확장 코드) - 클라이언트는 잠시 뒤 다시 연결하면 됨
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# 4000번대는 애플리케이션 정의 코드: 같은 사용자의 새 연결에 밀려 닫힘
+USER_CONNECTION_LIMIT_CLOSE_CODE = 4000
+# 클라이언트가 WS_IDLE_TIMEOUT_SECONDS 동안 응답이 없어 닫음
+IDLE_TIMEOUT_CLOSE_CODE = 4001
+
+
+class _Connection:
+    """
+    WebSocket 하나와 송신 대기열, 전용 송신 태스크
+    - 대기열 항목은 [coalesce_key, message] 리스트. 같은 key 의 메시지가 아직 안 나갔으면 내용만 최신으로 바꿈
+    - message 가 str 이면 그대로 텍스트 프레임, Payload 면 연결의 codec(JSON/MessagePack)으로 인코딩해서 전송
+    - 대기 중인 메시지가 없을 때는 고정 크기 필드와 빈 deque/dict, Event, 대기 중인 Task 하나만 가짐
+    """
+
+    __slots__ = ("id", "websocket", "user_id", "queue", "pending_keys", "wakeup", "writer",
+                 "consecutive_drops", "dropped", "sent", "closed", "connected_at", "topics",
+                 "codec", "deflate", "last_seen", "pinged_at")
+
+    def __init__(self, connection_id: str, websocket: WebSocket, user_id: Optional[int], codec: str = JSON):
+        self.id = connection_id
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: Deque[List[Any]] = deque()
+        self.pending_keys: Dict[str, List[Any]] = {}
+        self.wakeup = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        self.consecutive_drops = 0
+        self.dropped = 0
+        self.sent = 0
+        self.closed = False
+        self.connected_at = time.time()
+        # 구독 중인 토픽 (services/ws_topics.py)
+        self.topics: Set[str] = set()
+        self.codec = codec
+        self.deflate = False
+        # 클라이언트에서 마지막으로 메시지를 받은 시각 (time.monotonic)
+        self.last_seen = time.monotonic()
+        # 마지막 수신 뒤 heartbeat ping 을 보낸 시각 (없으면 None)
+        self.pinged_at: Optional[float] = None
+
+
+class ConnectionManager:
+    """
+    연결된 WebSocket 클라이언트 관리
+    - 연결마다 길이 제한이 있는 송신 대기열과 송신 태스크를 두고, broadcast 는 대기열에 넣기만 하므로
+      느리거나 끊긴 클라이언트 하나가 다른 클라이언트 전송을 막지 않음
+    - 느린 클라이언트 처리: 같은 종류(coalesce_key) 메시지는 최신 것으로 합치고, 대기열이 차면 가장 오래된 메시지를 버림.
+      계속 따라오지 못하거나 한 번 보내는 데 WS_SEND_TIMEOUT_SECONDS 를 넘기면 연결을 끊음
+    - 사용자 한 명이 여러 탭/기기로 동시에 연결할 수 있음. 연결마다 ID 를 붙이고
+      user_connections[user_id] 는 {connection_id: 연결} 이라 사용자별 전송과 정리가 연결 수와 무관하게 O(1)
+
+    제한 (워커 프로세스별)
+    - 사용자당 연결 수 WS_MAX_CONNECTIONS_PER_USER: 넘으면 그 사용자의 가장 오래된 연결을 4000 코드로 닫음
+    - 전체 연결 수 WS_MAX_CONNECTIONS: 넘으면 새 연결을 accept 하지 않고 거절
+    - 연결당 대기열 WS_SEND_QUEUE_SIZE 개 메시지. 쉬고 있는 연결은 대기열이 비어 있어 메모리가 일정함
+      (bench_websocket --memory 로 측정, Starlette WebSocket 객체와 소켓 버퍼는 별도)
+
+    heartbeat / 쉬는 연결 정리
+    - 모바일 망에서 끊긴(half-open) 연결은 보낼 때 실패하지 않아 그대로 남으므로, 받는 쪽 기준으로 판단
+    - 연결마다 sleep 태스크를 두지 않고 타이머 휠 하나(services/timer_wheel.py)와 tick 태스크 하나로 처리
+    - 타이머가 울리면 마지막 수신 시각(touch)을 보고: WS_HEARTBEAT_INTERVAL_SECONDS 동안 조용했으면 ping 전송,
+      WS_IDLE_TIMEOUT_SECONDS 동안 조용했고 ping 을 보낸 뒤로도 한 interval 이 지났으면 4001 코드로 닫음
+      (이벤트 루프가 잠시 멈췄던 경우 ping 도 받지 못한 연결을 닫지 않도록). 그 사이 받은 메시지가 있으면 다시 등록만 함
+    """
+
+    def __init__(
+        self,
+        queue_size: int = WS_SEND_QUEUE_SIZE,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+        max_consecutive_drops: int = WS_MAX_CONSECUTIVE_DROPS,
+        max_connections_per_user: int = WS_MAX_CONNECTIONS_PER_USER,
+        max_connections: int = WS_MAX_CONNECTIONS,
+        heartbeat_interval: float = WS_HEARTBEAT_INTERVAL_SECONDS,
+        idle_timeout: float = WS_IDLE_TIMEOUT_SECONDS,
+        heartbeat_tick: float = WS_HEARTBEAT_TICK_SECONDS,
+    ):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.max_consecutive_drops = max_consecutive_drops
+        self.max_connections_per_user = max_connections_per_user
+        self.max_connections = max_connections
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = max(idle_timeout, heartbeat_interval)
+        self._wheel = TimerWheel(tick=heartbeat_tick, now=time.monotonic())
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._ids = itertools.count(1)
+        self._id_prefix = f"{os.getpid():x}-"
+        self._connections: Dict[str, _Connection] = {}
+        # id(websocket) -> 연결 ID (WebSocket 객체는 해시할 수 없어 id 로 찾음)
+        self._socket_ids: Dict[int, str] = {}
+        self.user_connections: Dict[int, Dict[str, _Connection]] = {}
+        self._close_listeners: List[Callable[[_Connection], None]] = []
+        self._stats = {
+            "connected": 0, "disconnected": 0, "rejected": 0, "user_limit_evictions": 0, "enqueued": 0, "sent": 0,
+            "dropped": 0, "coalesced": 0, "send_errors": 0, "slow_consumer_disconnects": 0,
+            "bytes_sent": 0, "pings_sent": 0, "idle_disconnects": 0, "heartbeat_ticks": 0,
+        }
+        # 종료 원인별 수: client(정상 종료/수신 오류), idle, slow_consumer, send_error, user_limit
+        self._close_reasons: Dict[str, int] = {}
+        # 최근 WS_CHURN_WINDOW_MINUTES 분의 분 단위 [분, 연결 수, 종료 수]
+        self._churn: Deque[List[int]] = deque(maxlen=WS_CHURN_WINDOW_MINUTES)
+        self._send_ms = LatencyHistogram()
+        self._heartbeat_ms = LatencyHistogram()
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return [conn.websocket for conn in self._connections.values()]
+
+    async def connect(self, websocket: WebSocket, user_id: int = None) -> Optional[_Connection]:
+        """연결을 받아 등록. 전체 연결 수 제한에 걸리면 거절하고 None"""
+        if len(self._connections) >= self.max_connections:
+            self._stats["rejected"] += 1
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+            return None
+        codec, subprotocol = negotiate(websocket)
+        await websocket.accept(subprotocol=subprotocol)
+        conn = self.register(websocket, user_id, codec)
+        conn.deflate = deflate_offered(websocket)
+        return conn
+
+    def register(self, websocket: WebSocket, user_id: int = None, codec: str = JSON) -> _Connection:
+        """이미 accept 된 WebSocket 을 등록하고 송신 태스크 시작"""
+        conn = _Connection(f"{self._id_prefix}{next(self._ids)}", websocket, user_id, codec)
+        self._connections[conn.id] = conn
+        self._socket_ids[id(websocket)] = conn.id
+        if user_id:
+            user_conns = self.user_connections.setdefault(user_id, {})
+            while len(user_conns) >= self.max_connections_per_user:
+                # dict 는 추가된 순서를 유지하므로 첫 항목이 가장 오래된 연결
+                oldest = next(iter(user_conns.values()))
+                self._stats["user_limit_evictions"] += 1
+                self._close(oldest, USER_CONNECTION_LIMIT_CLOSE_CODE, "user_limit")
+            user_conns[conn.id] = conn
+        conn.writer = asyncio.create_task(self._writer(conn))
+        self._stats["connected"] += 1
+        self._count_churn(1)
+        if self.heartbeat_interval > 0:
+            self._wheel.schedule(conn.id, conn.last_seen + self.heartbeat_interval)
+            if self._heartbeat_task is None:
+                self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        return conn
+
+    def add_close_listener(self, listener: Callable[[_Connection], None]) -> None:
+        """연결이 정리될 때 호출할 함수 등록 (토픽 구독 해제 등)"""
+        self._close_listeners.append(listener)
+
+    def get(self, connection_id: str) -> Optional[_Connection]:
+        return self._connections.get(connection_id)
+
+    @staticmethod
+    def touch(conn: _Connection) -> None:
+        """클라이언트에서 메시지를 받았을 때 호출 (heartbeat 판단용, 타이머는 건드리지 않음)"""
+        conn.last_seen = time.monotonic()
+        conn.pinged_at = None
+
+    def disconnect(self, connection, user_id: int = None):
+        """연결 정리. _Connection 또는 WebSocket 을 받음 (user_id 는 이전 호출 형식 호환용)"""
+        if not isinstance(connection, _Connection):
+            connection = self._connections.get(self._socket_ids.get(id(connection)))
+        if connection is not None:
+            self._close(connection, None, "client")
+
+    def _close(self, conn: _Connection, close_code: Optional[int], reason: str) -> None:
+        """연결 정리 (여러 번 호출해도 안전). close_code 가 있으면 클라이언트에 종료 프레임 전송"""
+        if conn.closed:
+            return
+        conn.closed = True
+        self._connections.pop(conn.id, None)
+        self._wheel.cancel(conn.id)
+        self._socket_ids.pop(id(conn.websocket), None)
+        if conn.user_id:
+            user_conns = self.user_connections.get(conn.user_id)
+            if user_conns is not None:
+                user_conns.pop(conn.id, None)
+                if not user_conns:
+                    del self.user_connections[conn.user_id]
+        conn.queue.clear()
+        conn.pending_keys.clear()
+        self._stats["disconnected"] += 1
+        self._close_reasons[reason] = self._close_reasons.get(reason, 0) + 1
+        self._count_churn(2)
+        for listener in self._close_listeners:
+            try:
+                listener(conn)
+            except Exception as e:
+                print(f"[오류] WebSocket 연결 정리 중 오류: {e}")
+        current = asyncio.current_task()
+        if conn.writer is not None and conn.writer is not current:
+            conn.writer.cancel()
+        if close_code is not None:
+            asyncio.create_task(self._send_close(conn.websocket, close_code))
+
+    async def _send_close(self, websocket: WebSocket, code: int) -> None:
+        try:
+            await asyncio.wait_for(websocket.close(code=code), timeout=self.send_timeout)
+        except Exception:
+            pass
+
+    def _enqueue(self, conn: _Connection, message: Union[str, Payload], coalesce_key: Optional[str]) -> None:
+        if conn.closed:
+            return
+        self._stats["enqueued"] += 1
+        if coalesce_key is not None:
+            pending = conn.pending_keys.get(coalesce_key)
+            if pending is not None:
+                # 아직 보내지 못한 같은 종류의 메시지는 최신 내용으로 교체
+                pending[1] = message
+                self._stats["coalesced"] += 1
+                return
+        if len(conn.queue) >= self.queue_size:
+            oldest = conn.queue.popleft()
+            if oldest[0] is not None and conn.pending_keys.get(oldest[0]) is oldest:
+                del conn.pending_keys[oldest[0]]
+            conn.dropped += 1
+            conn.consecutive_drops += 1
+            self._stats["dropped"] += 1
+            if conn.consecutive_drops >= self.max_consecutive_drops:
+                self._stats["slow_consumer_disconnects"] += 1
+                self._close(conn, SLOW_CONSUMER_CLOSE_CODE, "slow_consumer")
+                return
+        entry = [coalesce_key, message]
+        conn.queue.append(entry)
+        if coalesce_key is not None:
+            conn.pending_keys[coalesce_key] = entry
+        conn.wakeup.set()
+
+    async def _writer(self, conn: _Connection) -> None:
+        """연결 전용 송신 태스크: 대기열에서 하나씩 꺼내 전송"""
+        try:
+            while not conn.closed:
+                if not conn.queue:
+                    conn.wakeup.clear()
+                    await conn.wakeup.wait()
+                    continue
+                entry = conn.queue.popleft()
+                if entry[0] is not None and conn.pending_keys.get(entry[0]) is entry:
+                    del conn.pending_keys[entry[0]]
+                data = entry[1]
+                if isinstance(data, Payload):
+                    data = data.encode(conn.codec)
+                send = conn.websocket.send_bytes if isinstance(data, bytes) else conn.websocket.send_text
+                started = time.perf_counter()
+                try:
+                    await asyncio.wait_for(send(data), timeout=self.send_timeout)
+                except asyncio.TimeoutError:
+                    self._stats["slow_consumer_disconnects"] += 1
+                    self._close(conn, SLOW_CONSUMER_CLOSE_CODE, "slow_consumer")
+                    return
+                except Exception:
+                    # 연결이 끊어진 경우 제거
+                    self._stats["send_errors"] += 1
+                    self._close(conn, None, "send_error")
+                    return
+                self._send_ms.observe((time.perf_counter() - started) * 1000)
+                conn.sent += 1
+                conn.consecutive_drops = 0
+                self._stats["sent"] += 1
+                # 압축 전 크기 (permessage-deflate 는 uvicorn 이 소켓에 쓸 때 적용)
+                self._stats["bytes_sent"] += len(data)
+        except asyncio.CancelledError:
+            pass
+
+    async def _heartbeat_loop(self) -> None:
+        """타이머 휠 tick 태스크 (연결이 하나도 없으면 끝나고, 다음 연결 때 다시 시작)"""
+        try:
+            while self._connections:
+                await asyncio.sleep(self._wheel.tick)
+                started = time.perf_counter()
+                now = time.monotonic()
+                # 같은 tick 에 ping 을 받는 연결들은 메시지 하나를 공유 (인코딩도 codec 별 한 번)
+                ping = Payload({"type": "ping", "timestamp": datetime.utcnow().isoformat()})
+                for connection_id in self._wheel.advance(now):
+                    conn = self._connections.get(connection_id)
+                    if conn is not None:
+                        self._heartbeat(conn, now, ping)
+                self._stats["heartbeat_ticks"] += 1
+                self._heartbeat_ms.observe((time.perf_counter() - started) * 1000)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._heartbeat_task = None
+
+    def _heartbeat(self, conn: _Connection, now: float, ping: Payload) -> None:
+        idle = now - conn.last_seen
+        if idle >= self.idle_timeout and conn.pinged_at is not None and now - conn.pinged_at >= self.heartbeat_interval:
+            self._stats["idle_disconnects"] += 1
+            self._close(conn, IDLE_TIMEOUT_CLOSE_CODE, "idle")
+            return
+        if idle >= self.heartbeat_interval:
+            self._stats["pings_sent"] += 1
+            conn.pinged_at = now
+            self._enqueue(conn, ping, "heartbeat")
+            # 응답이 없으면 다음 interval 에 다시 ping 하거나, 제한 시간을 넘겼으면 그때 정리
+            # (정리 시점은 마지막 수신 뒤 idle_timeout ~ idle_timeout + interval 사이)
+            self._wheel.schedule(conn.id, now + self.heartbeat_interval)
+        else:
+            # 그 사이 메시지를 받은 연결은 마지막 수신 시각 기준으로 다시 등록
+            self._wheel.schedule(conn.id, conn.last_seen + self.heartbeat_interval)
+
+    def _count_churn(self, column: int) -> None:
+        minute = int(time.time() // 60)
+        if not self._churn or self._churn[-1][0] != minute:
+            self._churn.append([minute, 0, 0])
+        self._churn[-1][column] += 1
+
+    def send(self, conn: _Connection, message: Union[str, Payload], coalesce_key: Optional[str] = None) -> None:
+        """특정 연결에 전송 (응답 메시지도 대기열을 거쳐야 송신 태스크와 순서가 섞이지 않음)"""
+        self._enqueue(conn, message, coalesce_key)
+
+    async def send_personal_message(self, message: str, user_id: int, coalesce_key: Optional[str] = None) -> int:
+        return self.send_to_user(user_id, message, coalesce_key)
+
+    def send_to_user(self, user_id: int, message: Union[str, Payload], coalesce_key: Optional[str] = None) -> int:
+        """사용자의 모든 연결(탭/기기)에 전송하고, 보낸 연결 수 반환"""
+        user_conns = self.user_connections.get(user_id)
+        if not user_conns:
+            return 0
+        targets = list(user_conns.values())
+        for conn in targets:
+            self._enqueue(conn, message, coalesce_key)
+        return len(targets)
+
+    async def broadcast(self, message: str, coalesce_key: Optional[str] = None):
+        self.send_to_all(message, coalesce_key)
+
+    def send_to_all(self, message: Union[str, Payload], coalesce_key: Optional[str] = None) -> None:
+        """모든 연결의 대기열에 넣고 바로 반환 (실제 전송은 연결별 송신 태스크가 동시에 진행)"""
+        # 순회 중 연결이 끊겨 dict 가 바뀔 수 있으므로 복사본으로 순회
+        for conn in list(self._connections.values()):
+            self._enqueue(conn, message, coalesce_key)
+
+    async def drain(self, timeout: float = 10.0) -> bool:
+        """모든 대기열이 빌 때까지 기다림 (벤치마크, 종료 처리용). 시간 안에 비면 True"""
+        deadline = time.perf_counter() + timeout
+        while any(conn.queue for conn in self._connections.values()):
+            if time.perf_counter() >= deadline:
+                return False
+            await asyncio.sleep(0.005)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        depths = [len(conn.queue) for conn in self._connections.values()]
+        codecs: Dict[str, int] = {}
+        for conn in self._connections.values():
+            codecs[conn.codec] = codecs.get(conn.codec, 0) + 1
+        return {
+            "connections": len(self._connections),
+            "users": len(self.user_connections),
+            "largest_user_connection_count": max((len(conns) for conns in self.user_connections.values()), default=0),
+            "queued_messages": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "backlogged_connections": sum(1 for depth in depths if depth >= self.queue_size // 2),
+            "codecs": codecs,
+            "deflate_offered": sum(1 for conn in self._connections.values() if conn.deflate),
+            **self._stats,
+            "close_reasons": dict(self._close_reasons),
+            "churn": self._churn_stats(),
+            "heartbeat": {**self._wheel.stats(), "running": self._heartbeat_task is not None,
+                          "tick_ms": self._heartbeat_ms.snapshot()},
+            "send_ms": self._send_ms.snapshot(),
+            "limits": {
+                "queue_size": self.queue_size,
+                "send_timeout_seconds": self.send_timeout,
+                "max_consecutive_drops": self.max_consecutive_drops,
+                "max_connections_per_user": self.max_connections_per_user,
+                "max_connections": self.max_connections,
+                "heartbeat_interval_seconds": self.heartbeat_interval,
+                "idle_timeout_seconds": self.idle_timeout,
+            },
+        }
+
+    def _churn_stats(self) -> Dict[str, Any]:
+        """최근 구간의 분당 연결/종료 수와 연결 나이"""
+        since = int(time.time() // 60) - WS_CHURN_WINDOW_MINUTES
+        recent = [bucket for bucket in self._churn if bucket[0] > since]
+        opened = sum(bucket[1] for bucket in recent)
+        closed = sum(bucket[2] for bucket in recent)
+        now = time.time()
+        ages = sorted(now - conn.connected_at for conn in self._connections.values())
+        return {
+            "window_minutes": WS_CHURN_WINDOW_MINUTES,
+            "opened": opened,
+            "closed": closed,
+            "opened_per_minute": round(opened / WS_CHURN_WINDOW_MINUTES, 2),
+            "closed_per_minute": round(closed / WS_CHURN_WINDOW_MINUTES, 2),
+            "median_age_seconds": round(ages[len(ages) // 2], 1) if ages else 0.0,
+            "oldest_age_seconds": round(ages[-1], 1) if ages else 0.0,
+        }
+
+
+connection_manager = ConnectionManager()
@@ -0,0 +1,531 @@
+# services/ws_topics.py
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import func
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services.chat_tracing import LatencyHistogram
+from backend.services.group_service import GroupService
+from backend.services.principal_cache import principal_cache
+from backend.services.ws_broker import WebSocketBroker, ws_broker
+from backend.services.wallet_stream import WalletHub
+from backend.services.ws_codec import Payload
+from backend.services.ws_manager import ConnectionManager, _Connection, connection_manager
+
+# 리더보드/그룹 랭킹을 다시 계산하는 간격(초). 그 사이 포인트/절감량 변화가 없으면 건너뜀
+WS_LEADERBOARD_TICK_SECONDS = float(os.getenv("WS_LEADERBOARD_TICK_SECONDS", 5))
+# 변화 신호가 없어도 이 시간(초)이 지나면 다시 계산 (다른 워커나 DB 직접 수정 반영)
+WS_LEADERBOARD_MAX_STALE_SECONDS = float(os.getenv("WS_LEADERBOARD_MAX_STALE_SECONDS", 60))
+WS_LEADERBOARD_SIZE = int(os.getenv("WS_LEADERBOARD_SIZE", 20))
+WS_MAX_TOPICS_PER_CONNECTION = int(os.getenv("WS_MAX_TOPICS_PER_CONNECTION", 32))
+
+LEADERBOARD = "leaderboard"
+GROUP_RANKING = "group_ranking"
+_RANKED_TOPICS = {LEADERBOARD: "user_id", GROUP_RANKING: "group_id"}
+
+
+def user_stats_topic(user_id: int) -> str:
+    return f"user_stats:{user_id}"
+
+
+def group_challenges_topic(group_id: int) -> str:
+    return f"group_challenges:{group_id}"
+
+
+def _parse_topic(topic: str) -> Tuple[Optional[str], Optional[int]]:
+    """토픽 이름을 (종류, ID) 로 분리. 알 수 없는 토픽이면 (None, None)"""
+    if topic in _RANKED_TOPICS:
+        return topic, None
+    kind, _, raw_id = topic.partition(":")
+    if kind in ("user_stats", "group_challenges") and raw_id.isdigit():
+        return kind, int(raw_id)
+    return None, None
+
+
+# ---- 스냅샷 조회 (asyncio.to_thread 로 실행) ----
+
+def _load_user_stats(user_id: int) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        balance = db.query(func.coalesce(func.sum(models.CreditsLedger.points), 0)).filter(
+            models.CreditsLedger.user_id == user_id
+        ).scalar()
+        trips, total_saved_g = db.query(
+            func.count(models.MobilityLog.log_id), func.coalesce(func.sum(models.MobilityLog.co2_saved_g), 0)
+        ).filter(models.MobilityLog.user_id == user_id).one()
+        last = db.query(models.MobilityLog).filter(models.MobilityLog.user_id == user_id).order_by(
+            models.MobilityLog.created_at.desc()
+        ).first()
+        return {
+            "balance": int(balance or 0),
+            "total_saved_g": round(float(total_saved_g or 0), 1),
+            "trips": int(trips or 0),
+            "last_trip": _trip_summary(last) if last else None,
+        }
+    finally:
+        db.close()
+
+
+def _load_garden(db, user_id: int) -> Dict[str, Any]:
+    row = (
+        db.query(models.UserGarden.waters_count, models.UserGarden.total_waters, models.GardenLevel.level_number,
+                 models.GardenLevel.level_name, models.GardenLevel.image_path, models.GardenLevel.required_waters)
+        .join(models.GardenLevel, models.GardenLevel.level_id == models.UserGarden.current_level_id)
+        .filter(models.UserGarden.user_id == user_id)
+        .first()
+    )
+    if row is None:
+        # 아직 물을 준 적 없는 정원 (routes/credits.get_garden_status 기본값과 같음)
+        return {"level_number": 1, "level_name": "씨앗단계", "image_path": "/images/0.png",
+                "waters_count": 0, "total_waters": 0, "required_waters": 10, "status": "IN_PROGRESS"}
+    return {
+        "level_number": row.level_number,
+        "level_name": row.level_name,
+        "image_path": row.image_path,
+        "waters_count": row.waters_count or 0,
+        "total_waters": row.total_waters or 0,
+        "required_waters": row.required_waters,
+        "status": "COMPLETED" if (row.waters_count or 0) >= row.required_waters else "IN_PROGRESS",
+    }
+
+
+def _load_wallet(user_id: int) -> Dict[str, Any]:
+    """SSE 지갑 스트림 상태: 본인 통계(잔액/탄소 절감량/최근 이동) + 정원"""
+    state = _load_user_stats(user_id)
+    db = SessionLocal()
+    try:
+        state["garden"] = _load_garden(db, user_id)
+    finally:
+        db.close()
+    return state
+
+
+def _load_group_challenges(group_id: int) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(
+                models.GroupChallenge.challenge_id,
+                models.GroupChallenge.title,
+                models.GroupChallenge.goal_value,
+                models.GroupChallenge.status,
+                func.coalesce(func.sum(models.GroupChallengeMember.contribution), 0).label("progress"),
+            )
+            .outerjoin(models.GroupChallengeMember,
+                       models.GroupChallengeMember.challenge_id == models.GroupChallenge.challenge_id)
+            .filter(
+                models.GroupChallenge.group_id == group_id,
+                models.GroupChallenge.status.in_([models.ChallengeStatus.UPCOMING, models.ChallengeStatus.ACTIVE]),
+            )
+            .group_by(models.GroupChallenge.challenge_id, models.GroupChallenge.title,
+                      models.GroupChallenge.goal_value, models.GroupChallenge.status)
+            .all()
+        )
+        return [
+            {
+                "challenge_id": row.challenge_id,
+                "title": row.title,
+                "goal_value": float(row.goal_value or 0),
+                "status": row.status.value if hasattr(row.status, "value") else row.status,
+                "progress": round(float(row.progress or 0), 1),
+            }
+            for row in rows
+        ]
+    finally:
+        db.close()
+
+
+def _load_leaderboard(limit: int) -> List[Dict[str, Any]]:
+    """포인트 합계 상위 사용자 (포인트와 절감량을 따로 집계해 조인 중복을 피함)"""
+    db = SessionLocal()
+    try:
+        credits = db.query(
+            models.CreditsLedger.user_id, func.sum(models.CreditsLedger.points).label("total_credits")
+        ).group_by(models.CreditsLedger.user_id).subquery()
+        saved = db.query(
+            models.MobilityLog.user_id, func.sum(models.MobilityLog.co2_saved_g).label("total_saved_g")
+        ).group_by(models.MobilityLog.user_id).subquery()
+        rows = (
+            db.query(models.User.user_id, models.User.username, credits.c.total_credits, saved.c.total_saved_g)
+            .join(credits, credits.c.user_id == models.User.user_id)
+            .outerjoin(saved, saved.c.user_id == models.User.user_id)
+            .order_by(credits.c.total_credits.desc(), models.User.user_id)
+            .limit(limit)
+            .all()
+        )
+        return [
+            {
+                "user_id": row.user_id,
+                "name": row.username,
+                "total_credits": int(row.total_credits or 0),
+                "carbon_reduced_kg": round(float(row.total_saved_g or 0) / 1000, 2),
+            }
+            for row in rows
+        ]
+    finally:
+        db.close()
+
+
+def _load_group_ranking(limit: int) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        return [
+            {key: row[key] for key in ("group_id", "group_name", "total_co2_saved", "member_count")}
+            for row in GroupService.get_global_group_ranking(db, limit)
+        ]
+    finally:
+        db.close()
+
+
+def _is_group_member(user_id: int, group_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return db.query(models.GroupMember.member_id).filter(
+            models.GroupMember.group_id == group_id,
+            models.GroupMember.user_id == user_id,
+            models.GroupMember.is_active == True,
+        ).first() is not None
+    finally:
+        db.close()
+
+
+def _trip_summary(log: models.MobilityLog) -> Dict[str, Any]:
+    mode = log.mode.value if hasattr(log.mode, "value") else log.mode
+    return {
+        "log_id": log.log_id,
+        "mode": mode,
+        "distance_km": float(log.distance_km or 0),
+        "co2_saved_g": round(float(log.co2_saved_g or 0), 1),
+        "points": log.points_earned or 0,
+        "at": log.created_at.isoformat() if log.created_at else None,
+    }
+
+
+def _rank_diff(previous: List[Dict[str, Any]], current: List[Dict[str, Any]], key: str) -> Optional[Dict[str, Any]]:
+    """
+    순위표 두 개의 차이: 순위나 값이 바뀐 항목만 set, 순위권 밖으로 나간 항목은 remove
+    - 클라이언트는 remove 를 지우고 set 항목을 rank 위치에 덮어쓰면 current 와 같아짐
+    """
+    before = {entry[key]: (rank, entry) for rank, entry in enumerate(previous, 1)}
+    changed = []
+    for rank, entry in enumerate(current, 1):
+        old = before.pop(entry[key], None)
+        if old is None or old[0] != rank or old[1] != entry:
+            changed.append({"rank": rank, **entry})
+    if not changed and not before:
+        return None
+    return {"set": changed, "remove": list(before.keys()), "size": len(current)}
+
+
+class TopicHub:
+    """
+    WebSocket 토픽 구독과 변경분(delta) 전송
+    - 토픽: user_stats:{user_id} (본인만), leaderboard, group_ranking, group_challenges:{group_id} (그룹 멤버만)
+    - 구독하면 현재 상태(snapshot)를 먼저 보내고, 이후에는 바뀐 부분만 delta 로 보냄.
+      토픽마다 seq 가 1씩 증가하므로 클라이언트는 빠진 번호가 보이면 resync 로 snapshot 을 다시 받으면 됨
+    - 발행(publish)은 브로커(services/ws_broker.py)를 거쳐 모든 워커에 전달되고, 각 워커는 자기 구독자가 있는 토픽만
+      메시지를 한 번 만들어 구독 연결의 송신 대기열에 넣음. 동기 라우트(스레드 풀)에서 호출해도 이벤트 루프로 넘겨서 처리
+    - 리더보드/그룹 랭킹은 구독자가 있을 때만 도는 공용 ticker 하나가 주기적으로 한 번 계산하고 이전 결과와의 차이를 보냄
+    """
+
+    def __init__(self, manager: ConnectionManager, broker: WebSocketBroker):
+        self.manager = manager
+        self.broker = broker
+        self._subscribers: Dict[str, Dict[str, _Connection]] = {}
+        self._seq: Dict[str, int] = {}
+        # (topic, 연결 ID) -> snapshot 을 읽는 동안 모아 둔 delta
+        self._loading: Dict[Tuple[str, str], List[Payload]] = {}
+        self._ticker: Optional[asyncio.Task] = None
+        self._ranked: Dict[str, List[Dict[str, Any]]] = {}
+        self._ranking_dirty = True
+        self._last_ranking_at = 0.0
+        self._stats = {"subscribed": 0, "rejected": 0, "published": 0, "deliveries": 0,
+                       "ticks": 0, "ticks_skipped": 0, "tick_errors": 0}
+        self._tick_ms = LatencyHistogram()
+        manager.add_close_listener(self._on_close)
+
+    # ---- 구독 ----
+
+    async def handle_message(self, conn: _Connection, message: Dict[str, Any]) -> bool:
+        """subscribe/unsubscribe/resync 메시지 처리. 토픽 메시지가 아니면 False"""
+        kind = message.get("type")
+        if kind not in ("subscribe", "unsubscribe", "resync"):
+            return False
+        # 이전 클라이언트는 subscription 필드로 보냄
+        topic = str(message.get("topic") or message.get("subscription") or "")
+        if kind == "unsubscribe":
+            self.unsubscribe(conn, topic)
+            self.manager.send(conn, Payload({"type": "unsubscribed", "topic": topic}))
+        else:
+            await self.subscribe(conn, topic)
+        return True
+
+    async def _authorize(self, conn: _Connection, topic: str) -> Optional[str]:
+        kind, target_id = _parse_topic(topic)
+        if kind is None:
+            return "unknown topic"
+        if kind == "user_stats" and conn.user_id != target_id:
+            return "forbidden"
+        if kind == "group_challenges":
+            if not conn.user_id or not await asyncio.to_thread(_is_group_member, conn.user_id, target_id):
+                return "forbidden"
+        if topic not in conn.topics and len(conn.topics) >= WS_MAX_TOPICS_PER_CONNECTION:
+            return "too many subscriptions"
+        return None
+
+    async def subscribe(self, conn: _Connection, topic: str) -> bool:
+        """
+        권한 확인 후 구독하고 snapshot 전송 (이미 구독 중이면 snapshot 만 다시 보냄)
+        - snapshot 을 읽는 동안 발행된 delta 를 잃지 않도록 먼저 구독자로 등록하고, 그동안의 delta 는 모아 두었다가
+          snapshot 다음에 보냄. snapshot 의 seq 는 읽기 시작 전 값 (그 뒤 delta 는 seq 가 이어짐)
+        """
+        # 앱 시작 이벤트 없이 라우터만 올린 경우(테스트 등)에도 동작하도록
+        await start_broker()
+        error = await self._authorize(conn, topic)
+        if error is not None:
+            self._stats["rejected"] += 1
+            self.manager.send(conn, Payload({"type": "error", "topic": topic, "detail": error}))
+            return False
+        is_new = topic not in conn.topics
+        if is_new:
+            conn.topics.add(topic)
+            self._subscribers.setdefault(topic, {})[conn.id] = conn
+        key = (topic, conn.id)
+        self._loading[key] = []
+        seq = self._seq.get(topic, 0)
+        try:
+            data = await self._snapshot(topic)
+        except Exception as e:
+            self._loading.pop(key, None)
+            if is_new:
+                self.unsubscribe(conn, topic)
+            print(f"[오류] 토픽 {topic} 스냅샷 조회 실패: {e}")
+            self.manager.send(conn, Payload({"type": "error", "topic": topic, "detail": "snapshot failed"}))
+            return False
+        buffered = self._loading.pop(key, [])
+        if conn.closed:
+            return False
+        if is_new:
+            self._stats["subscribed"] += 1
+        self.manager.send(conn, Payload({
+            "type": "subscribed", "topic": topic, "subscription": topic,
+            "seq": seq, "snapshot": data,
+        }))
+        for message in buffered:
+            self.manager.send(conn, message)
+        if topic in _RANKED_TOPICS and self._ticker is None:
+            self._ticker = asyncio.create_task(self._run_ticker())
+        return True
+
+    def unsubscribe(self, conn: _Connection, topic: str) -> None:
+        conn.topics.discard(topic)
+        subscribers = self._subscribers.get(topic)
+        if subscribers is not None:
+            subscribers.pop(conn.id, None)
+            if not subscribers:
+                del self._subscribers[topic]
+
+    def _on_close(self, conn: _Connection) -> None:
+        for topic in list(conn.topics):
+            self.unsubscribe(conn, topic)
+
+    async def _snapshot(self, topic: str) -> Any:
+        kind, target_id = _parse_topic(topic)
+        if kind == "user_stats":
+            return await asyncio.to_thread(_load_user_stats, target_id)
+        if kind == "group_challenges":
+            return await asyncio.to_thread(_load_group_challenges, target_id)
+        if topic not in self._ranked:
+            # 처음 구독될 때만 직접 계산하고, 이후에는 ticker 가 유지하는 최신 순위표를 씀
+            loader = _load_leaderboard if topic == LEADERBOARD else _load_group_ranking
+            self._ranked[topic] = await asyncio.to_thread(loader, WS_LEADERBOARD_SIZE)
+        return [{"rank": rank, **entry} for rank, entry in enumerate(self._ranked[topic], 1)]
+
+    # ---- 발행 ----
+
+    def publish(self, topic: str, data: Dict[str, Any]) -> None:
+        """모든 워커의 토픽 구독자에게 delta 전송 (어느 스레드에서 호출해도 됨)"""
+        if self.broker.local_only and topic not in self._subscribers:
+            return
+        self.broker.publish({"kind": "topic", "topic": topic, "data": data})
+
+    def _publish_now(self, topic: str, data: Dict[str, Any]) -> None:
+        subscribers = self._subscribers.get(topic)
+        if not subscribers:
+            return
+        seq = self._seq.get(topic, 0) + 1
+        self._seq[topic] = seq
+        # 구독자 인코딩(JSON/MessagePack)별로 한 번만 직렬화
+        message = Payload({"type": "delta", "topic": topic, "seq": seq, "data": data})
+        for conn in list(subscribers.values()):
+            buffer = self._loading.get((topic, conn.id))
+            if buffer is not None:
+                buffer.append(message)
+            else:
+                self.manager.send(conn, message)
+        self._stats["published"] += 1
+        self._stats["deliveries"] += len(subscribers)
+
+    def mark_rankings_dirty(self) -> None:
+        """포인트/절감량이 바뀌었음을 모든 워커에 알림 (다음 tick 에 순위 재계산)"""
+        if self.broker.local_only:
+            self._ranking_dirty = True
+        else:
+            self.broker.publish({"kind": "rankings_dirty"})
+
+    async def _run_ticker(self) -> None:
+        try:
+            while any(self._subscribers.get(topic) for topic in _RANKED_TOPICS):
+                await asyncio.sleep(WS_LEADERBOARD_TICK_SECONDS)
+                stale = time.monotonic() - self._last_ranking_at >= WS_LEADERBOARD_MAX_STALE_SECONDS
+                if not self._ranking_dirty and not stale:
+                    self._stats["ticks_skipped"] += 1
+                    continue
+                # 계산 중에 들어온 변경은 다음 tick 에 반영되도록 먼저 초기화
+                self._ranking_dirty = False
+                self._last_ranking_at = time.monotonic()
+                started = time.perf_counter()
+                await self._tick()
+                self._stats["ticks"] += 1
+                self._tick_ms.observe((time.perf_counter() - started) * 1000)
+        finally:
+            self._ticker = None
+
+    async def _tick(self) -> None:
+        for topic, key in _RANKED_TOPICS.items():
+            if not self._subscribers.get(topic):
+                # 구독자가 없는 동안의 순위표는 갱신하지 않으므로 버리고, 다음 구독 때 새로 계산
+                self._ranked.pop(topic, None)
+                continue
+            loader = _load_leaderboard if topic == LEADERBOARD else _load_group_ranking
+            try:
+                current = await asyncio.to_thread(loader, WS_LEADERBOARD_SIZE)
+            except Exception as e:
+                print(f"[오류] {topic} 계산 실패: {e}")
+                self._stats["tick_errors"] += 1
+                self._ranking_dirty = True
+                continue
+            diff = _rank_diff(self._ranked.get(topic, []), current, key)
+            self._ranked[topic] = current
+            if diff is not None:
+                self._publish_now(topic, diff)
+
+    def stats(self) -> Dict[str, Any]:
+        by_kind: Dict[str, Dict[str, int]] = {}
+        for topic, subscribers in self._subscribers.items():
+            kind = _parse_topic(topic)[0] or "unknown"
+            entry = by_kind.setdefault(kind, {"topics": 0, "subscriptions": 0})
+            entry["topics"] += 1
+            entry["subscriptions"] += len(subscribers)
+        return {
+            "topics": len(self._subscribers),
+            "by_kind": by_kind,
+            **self._stats,
+            "ticker_running": self._ticker is not None,
+            "tick_ms": self._tick_ms.snapshot(),
+        }
+
+
+topic_hub = TopicHub(connection_manager, ws_broker)
+# SSE 지갑 스트림 (routes/wallet.py). 변경 신호는 토픽과 같은 브로커로 워커 간 전달
+wallet_hub = WalletHub(ws_broker, _load_wallet)
+
+
+def _dispatch(message: Dict[str, Any]) -> None:
+    """브로커로 도착한 메시지를 이 워커의 연결에 전달"""
+    kind = message.get("kind")
+    if kind == "topic":
+        topic_hub._publish_now(message["topic"], message["data"])
+    elif kind == "rankings_dirty":
+        topic_hub._ranking_dirty = True
+    elif kind == "wallet":
+        wallet_hub.handle_broker_message(message)
+    elif kind == "principal":
+        principal_cache.invalidate(message["user_id"], publish=False)
+    elif kind == "user":
+        connection_manager.send_to_user(message["user_id"], _as_payload(message["message"]), message.get("coalesce_key"))
+    elif kind == "broadcast":
+        connection_manager.send_to_all(_as_payload(message["message"]), message.get("coalesce_key"))
+
+
+def _as_payload(message: Union[str, Dict[str, Any]]) -> Union[str, Payload]:
+    # dict 로 발행된 메시지는 연결마다 협상된 인코딩(JSON/MessagePack)으로 보냄
+    return Payload(message) if isinstance(message, dict) else message
+
+
+def _publish_principal_change(user_id: int) -> None:
+    # 워커 하나면 이미 이 워커의 캐시에서 지웠으므로 발행할 필요 없음
+    if not ws_broker.local_only:
+        ws_broker.publish({"kind": "principal", "user_id": user_id})
+
+
+principal_cache.set_publisher(_publish_principal_change)
+
+
+async def start_broker() -> None:
+    """브로커 시작 (앱 시작 시 호출, 여러 번 호출해도 한 번만 시작)"""
+    if not ws_broker.started:
+        await ws_broker.start(_dispatch)
+
+
+def publish_to_user(user_id: int, message: Union[str, Dict[str, Any]], coalesce_key: Optional[str] = None) -> None:
+    """사용자의 모든 연결(어느 워커에 있든)에 메시지 전송"""
+    ws_broker.publish({"kind": "user", "user_id": user_id, "message": message, "coalesce_key": coalesce_key})
+
+
+def publish_broadcast(message: Union[str, Dict[str, Any]], coalesce_key: Optional[str] = None) -> None:
+    """모든 워커의 모든 연결에 메시지 전송"""
+    ws_broker.publish({"kind": "broadcast", "message": message, "coalesce_key": coalesce_key})
+
+
+# ---- 도메인 이벤트 발행 헬퍼 (커밋 직후 호출) ----
+
+def publish_ledger_change(user_id: int, points: int) -> None:
+    """크레딧 적립/사용 반영"""
+    if points:
+        topic_hub.publish(user_stats_topic(user_id), {"inc": {"balance": int(points)}})
+        wallet_hub.mark_changed(user_id, ("balance",))
+    topic_hub.mark_rankings_dirty()
+
+
+def publish_trip(user_id: int, log: models.MobilityLog) -> None:
+    """이동 기록 저장 반영 (포인트 적립 포함)"""
+    summary = _trip_summary(log)
+    topic_hub.publish(user_stats_topic(user_id), {
+        "inc": {"balance": summary["points"], "total_saved_g": summary["co2_saved_g"], "trips": 1},
+        "last_trip": summary,
+    })
+    wallet_hub.mark_changed(user_id, ("balance", "trip"))
+    topic_hub.mark_rankings_dirty()
+
+
+def publish_trips(user_id: int, logs: List[models.MobilityLog]) -> None:
+    """이동 기록 여러 건 저장 반영 (/mobility/log/batch): 합계를 알림 한 번으로"""
+    if not logs:
+        return
+    summaries = [_trip_summary(log) for log in logs]
+    topic_hub.publish(user_stats_topic(user_id), {
+        "inc": {
+            "balance": sum(summary["points"] for summary in summaries),
+            "total_saved_g": round(sum(summary["co2_saved_g"] for summary in summaries), 1),
+            "trips": len(summaries),
+        },
+        "last_trip": max(summaries, key=lambda summary: summary["log_id"]),
+    })
+    wallet_hub.mark_changed(user_id, ("balance", "trip"))
+    topic_hub.mark_rankings_dirty()
+
+
+def publish_garden_change(user_id: int) -> None:
+    """정원 물주기/레벨 변화 반영"""
+    wallet_hub.mark_changed(user_id, ("garden",))
+
+
+def publish_group_challenge_progress(group_id: int, challenge_id: int, user_id: int, co2_saved: float) -> None:
+    topic_hub.publish(group_challenges_topic(group_id), {
+        "challenge_id": challenge_id, "user_id": user_id, "inc": {"progress": round(float(co2_saved), 1)},
+    })
@@ -0,0 +1,160 @@
+"""
+검색 결과 추출 요약(압축) 유틸리티
+- 웹/내부 문서 본문을 문단으로 나누고, 질의와의 BM25 점수가 높은 문단만 토큰 예산 안에 담음
+- MinHash 로 거의 같은 문단(공통 메뉴, 중복 기사 등)은 한 번만 포함
+"""
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from backend.utils.korean_text import search_terms
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
+PASSAGE_TARGET_CHARS = int(os.getenv("CONTEXT_PASSAGE_CHARS", 400))
+# 압축 전에 자르는 검색 결과 길이 상한 (압축 결과가 비어 원문을 그대로 쓸 때도 이 길이, 압축 도입 전과 같은 값)
+CONTEXT_FALLBACK_MAX_CHARS = int(os.getenv("CONTEXT_FALLBACK_MAX_CHARS", 20000))
+MIN_LINE_CHARS = 15            # 이보다 짧은 줄은 메뉴/버튼 텍스트로 보고 버림
+NEAR_DUPLICATE_THRESHOLD = 0.8 # MinHash 로 추정한 Jaccard 유사도
+MINHASH_PERMUTATIONS = 64
+SHINGLE_SIZE = 5
+
+_SECTION_RE = re.compile(r"^--- (.+?)의 내용 ---$", re.MULTILINE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?。])\s+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MINHASH_PARAMS = [
+    ((i * 0x9E3779B97F4A7C15 + 1) % _MERSENNE_PRIME, (i * 0xC2B2AE3D27D4EB4F + 7) % _MERSENNE_PRIME)
+    for i in range(1, MINHASH_PERMUTATIONS + 1)
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """Claude 토큰 수 근사치 (한글은 대략 글자당 1토큰, 그 외는 4글자당 1토큰)"""
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul + math.ceil((len(text) - hangul) / 4)
+
+
+def _split_long_line(line: str) -> List[str]:
+    """PASSAGE_TARGET_CHARS 보다 긴 줄은 문장 단위로 잘라서 여러 조각으로 나눔"""
+    if len(line) <= PASSAGE_TARGET_CHARS:
+        return [line]
+    pieces, current = [], ""
+    for sentence in _SENTENCE_RE.split(line):
+        if current and len(current) + len(sentence) + 1 > PASSAGE_TARGET_CHARS:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+        while len(current) > PASSAGE_TARGET_CHARS:
+            pieces.append(current[:PASSAGE_TARGET_CHARS])
+            current = current[PASSAGE_TARGET_CHARS:]
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_passages(search_results: str) -> List[Dict[str, str]]:
+    """perform_web_search / format_local_passages 형식의 텍스트를 출처별 문단 목록으로 분리"""
+    passages = []
+    headers = list(_SECTION_RE.finditer(search_results))
+    sections = []
+    if not headers:
+        sections.append(("", search_results))
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(search_results)
+        sections.append((header.group(1), search_results[header.end():end]))
+
+    for source, body in sections:
+        current = ""
+        for line in (line.strip() for line in body.splitlines()):
+            if len(line) < MIN_LINE_CHARS:
+                continue
+            for piece in _split_long_line(line):
+                if current and len(current) + len(piece) + 1 > PASSAGE_TARGET_CHARS:
+                    passages.append({"source": source, "text": current})
+                    current = ""
+                current = f"{current}\n{piece}" if current else piece
+        if current:
+            passages.append({"source": source, "text": current})
+    return passages
+
+
+def _bm25_scores(query: str, passages: List[Dict[str, str]], k1: float = 1.2, b: float = 0.75) -> List[float]:
+    query_terms = set(search_terms(query))
+    term_freqs = [Counter(search_terms(p["text"])) for p in passages]
+    lengths = [sum(tf.values()) for tf in term_freqs]
+    avg_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+    doc_freq = Counter(term for tf in term_freqs for term in query_terms if term in tf)
+
+    scores = []
+    for tf, length in zip(term_freqs, lengths):
+        score = 0.0
+        for term in query_terms:
+            freq = tf.get(term, 0)
+            if not freq:
+                continue
+            idf = math.log(1 + (len(passages) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * freq * (k1 + 1) / (freq + k1 * (1 - b + b * length / (avg_length or 1.0)))
+        scores.append(score)
+    return scores
+
+
+def _minhash(text: str) -> Tuple[int, ...]:
+    compact = re.sub(r"\s+", "", text)
+    shingles = {zlib.crc32(compact[i:i + SHINGLE_SIZE].encode("utf-8"))
+                for i in range(max(1, len(compact) - SHINGLE_SIZE + 1))}
+    return tuple(min((a * s + b) % _MERSENNE_PRIME for s in shingles) for a, b in _MINHASH_PARAMS)
+
+
+def _estimated_jaccard(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def compress_context(query: str, search_results: str, token_budget: int = CONTEXT_TOKEN_BUDGET) -> Tuple[str, Dict[str, int]]:
+    """
+    질의와 관련도가 높은 문단만 token_budget 안에 담은 컨텍스트와 압축 통계를 반환
+    - 선택된 문단은 원래 순서대로 출처별로 다시 묶음
+    """
+    passages = split_passages(search_results)
+    stats = {
+        "original_tokens": estimate_tokens(search_results),
+        "passages": len(passages),
+        "selected_passages": 0,
+        "duplicates_removed": 0,
+        "compressed_tokens": 0,
+    }
+    if not passages:
+        return "", stats
+
+    scores = _bm25_scores(query, passages)
+    ranked = sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+    # 질의 용어가 하나라도 등장한 문단이 있으면 관련 없는 문단(점수 0)은 버림
+    if scores[ranked[0]] > 0:
+        ranked = [i for i in ranked if scores[i] > 0]
+
+    selected, signatures, used_tokens = [], [], 0
+    for i in ranked:
+        tokens = estimate_tokens(passages[i]["text"])
+        if used_tokens + tokens > token_budget:
+            continue
+        signature = _minhash(passages[i]["text"])
+        if any(_estimated_jaccard(signature, other) >= NEAR_DUPLICATE_THRESHOLD for other in signatures):
+            stats["duplicates_removed"] += 1
+            continue
+        selected.append(i)
+        signatures.append(signature)
+        used_tokens += tokens
+
+    parts, current_source = [], None
+    for i in sorted(selected):
+        source = passages[i]["source"]
+        if source != current_source:
+            parts.append(f"--- {source}의 내용 ---" if source else "---")
+            current_source = source
+        parts.append(passages[i]["text"])
+
+    compressed = "\n".join(parts)
+    stats["selected_passages"] = len(selected)
+    stats["compressed_tokens"] = estimate_tokens(compressed)
+    return compressed, stats
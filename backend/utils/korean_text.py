@@ -0,0 +1,115 @@
+"""
+한국어 질의 정규화 / 유사도 유틸리티
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import List, Tuple
+
+# 조사 (긴 것부터 검사해야 '에서'가 '서'보다 먼저 제거됨)
+KOREAN_PARTICLES = sorted([
+    "은", "는", "이", "가", "을", "를", "의", "에", "에서", "에게", "한테", "께서",
+    "으로", "로", "와", "과", "랑", "이랑", "도", "만", "까지", "부터", "보다",
+    "이나", "나",
+], key=len, reverse=True)
+# 조사를 뗀 뒤 남아야 하는 최소 음절 수 ("인도" -> "인", "하나" -> "하" 처럼 명사 끝 글자를 떼지 않도록)
+PARTICLE_MIN_STEM = 2
+# 토큰화 규칙이 바뀌면 올림 (kb_local_index 가 이전 규칙으로 만든 문단 용어를 재사용하지 않도록)
+TOKENIZER_VERSION = 2
+
+# 질문 끝에 붙는 의미 없는 요청 표현
+QUERY_ENDINGS = sorted([
+    "알려줘", "알려주세요", "알려줄래", "알려줄래요", "가르쳐줘", "가르쳐주세요",
+    "뭐야", "뭐예요", "뭔가요", "무엇인가요", "인가요", "인가", "일까요", "할까요",
+    "있나요", "있어", "있어요", "해줘", "해주세요", "설명해줘", "설명해주세요",
+], key=len, reverse=True)
+
+_PUNCT_RE = re.compile(r"[^\w\s]", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+_HANGUL_RE = re.compile(r"[가-힣]")
+_NUMBER_RE = re.compile(r"\d+")
+_QUERY_ENDING_SET = frozenset(QUERY_ENDINGS)
+
+
+def _strip_suffix(token: str, suffixes: List[str], min_stem: int = 1) -> str:
+    for suffix in suffixes:
+        # 어간이 최소 min_stem 글자는 남아 있어야 함
+        if token.endswith(suffix) and len(token) - len(suffix) >= min_stem:
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    NFKC 정규화, 소문자화, 문장부호 제거 후 공백 단위로 나누고 조사를 떼어낸 토큰 목록
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _PUNCT_RE.sub(" ", text)
+    tokens = []
+    for token in _SPACE_RE.split(text.strip()):
+        if not token:
+            continue
+        if _HANGUL_RE.search(token):
+            token = _strip_suffix(token, QUERY_ENDINGS)
+            token = _strip_suffix(token, KOREAN_PARTICLES, PARTICLE_MIN_STEM)
+        tokens.append(token)
+    return tokens
+
+
+def normalize_query(text: str) -> str:
+    """
+    캐시 키로 쓸 정규화된 질의 문자열
+    - 예: "플라스틱을 어떻게 재활용하나요?" / "플라스틱 어떻게 재활용 하나요" 가 가까운 형태로 정리됨
+    - "알려줘" 처럼 요청 표현만으로 된 토큰은 빼서 "방법 알려줘" 와 "방법" 이 같은 키가 되도록 함
+    """
+    tokens = [token for token in tokenize(text) if token not in _QUERY_ENDING_SET]
+    if tokens:
+        tokens[-1] = _strip_suffix(tokens[-1], QUERY_ENDINGS)
+    return " ".join(tokens)
+
+
+def number_tokens(text: str) -> Tuple[str, ...]:
+    """질의에 나오는 숫자(연도, 금액 등) 목록. 숫자가 다른 질의는 유사도가 높아도 같은 질문으로 보지 않음"""
+    return tuple(_NUMBER_RE.findall(text or ""))
+
+
+def to_jamo(text: str) -> str:
+    """한글 음절을 초성/중성/종성 자모로 분해 (오타/띄어쓰기 차이에 강한 n-gram 비교용)"""
+    return unicodedata.normalize("NFD", text)
+
+
+def char_ngrams(text: str, n: int = 3) -> Counter:
+    """공백을 제거한 자모 문자열의 문자 n-gram 빈도"""
+    compact = to_jamo(text.replace(" ", ""))
+    if len(compact) <= n:
+        return Counter([compact]) if compact else Counter()
+    return Counter(compact[i:i + n] for i in range(len(compact) - n + 1))
+
+
+def cosine_similarity(a: Counter, b: Counter) -> float:
+    """두 n-gram 빈도 벡터의 코사인 유사도 (0.0 ~ 1.0)"""
+    if not a or not b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b.get(gram, 0) for gram, count in a.items())
+    if dot == 0:
+        return 0.0
+    norm_a = math.sqrt(sum(c * c for c in a.values()))
+    norm_b = math.sqrt(sum(c * c for c in b.values()))
+    return dot / (norm_a * norm_b)
+
+
+def search_terms(text: str) -> List[str]:
+    """
+    검색 색인용 용어 목록
+    - 조사를 뗀 토큰과 함께, 띄어쓰기 없이 붙여 쓴 복합어("탄소중립포인트")도 찾을 수 있도록
+      세 글자 이상의 한글 토큰은 음절 bigram을 추가
+    """
+    terms = []
+    for token in tokenize(text):
+        terms.append(token)
+        if len(token) >= 3 and _HANGUL_RE.search(token):
+            terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return terms
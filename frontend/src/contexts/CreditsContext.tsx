@@ -1,5 +1,6 @@
-import React, { createContext, useContext, useState, useEffect, ReactNode } from 'react';
+import React, { createContext, useContext, useState, useEffect, useRef, ReactNode } from 'react';
 import { useUser } from './UserContext'; // Import useUser
+import { subscribeWallet, WalletSubscription } from '../services/walletStream';
 
 interface CreditsData {
   totalCredits: number;
@@ -44,6 +45,7 @@ export const CreditsProvider: React.FC<{ children: ReactNode }> = ({ children })
   });
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const walletRef = useRef<WalletSubscription | null>(null);
 
   // 크레딧 데이터 가져오기
   const fetchCreditsData = async () => {
@@ -194,8 +196,9 @@ export const CreditsProvider: React.FC<{ children: ReactNode }> = ({ children })
     }
   };
 
-  // 크레딧 새로고침
+  // 크레딧 새로고침 (지갑 스트림이 연결돼 있으면 이미 최신 상태)
   const refreshCredits = async () => {
+    if (walletRef.current?.isLive()) return;
     await fetchCreditsData();
   };
 
@@ -222,11 +225,10 @@ export const CreditsProvider: React.FC<{ children: ReactNode }> = ({ children })
 
       const result = await response.json();
       
-      // 성공 후 서버에서 최신 크레딧 데이터를 다시 가져와 동기화합니다.
-      console.log("CreditsContext: waterGarden API call successful, fetching new credits data..."); // Debug log
-      await new Promise(resolve => setTimeout(resolve, 100)); // Add a small delay
-      await fetchCreditsData();
-      console.log("CreditsContext: fetchCreditsData completed after watering."); // Debug log
+      // 지갑 스트림이 연결돼 있으면 커밋 직후 새 잔액/정원이 도착하므로 다시 조회하지 않음
+      if (!walletRef.current?.isLive()) {
+        await fetchCreditsData();
+      }
       
       return { success: true, message: result.message || '정원에 물을 주었습니다!' };
     } catch (err) {
@@ -407,29 +409,29 @@ export const CreditsProvider: React.FC<{ children: ReactNode }> = ({ children })
     return () => window.removeEventListener('storage', handleStorageChange);
   }, [user?.id]); // user.id가 변경될 때마다 리스너 재등록
 
-  // 주기적으로 데이터 새로고침 (5분마다로 변경하여 초기화 문제 방지)
+  // 지갑 스트림 구독: 주기적으로 다시 조회하는 대신 서버가 잔액/정원/최근 이동 변경을 커밋 직후 보내줌
   useEffect(() => {
-    const interval = setInterval(() => {
-      // localStorage에 저장된 값이 있으면 우선 사용
-      const storedTotal = localStorage.getItem('credits_total');
-      const storedUpdate = localStorage.getItem('credits_last_update');
-      
-      if (storedTotal && storedUpdate) {
-        const storedTime = new Date(storedUpdate);
-        const now = new Date();
-        const diffMinutes = (now.getTime() - storedTime.getTime()) / (1000 * 60);
-        
-        // 5분 이내의 데이터면 서버에서 새로 가져오지 않음
-        if (diffMinutes < 5) {
-          return;
-        }
-      }
-      
-      fetchCreditsData();
-    }, 5 * 60 * 1000); // 5분
+    if (!user || !user.id) return;
+    const subscription = subscribeWallet((wallet) => {
+      setCreditsData(prev => ({
+        totalCredits: wallet.balance,
+        totalCarbonReduced: wallet.total_saved_g,
+        recentEarned: wallet.last_trip ? wallet.last_trip.points : prev.recentEarned,
+        lastUpdated: new Date().toISOString(),
+      }));
+      // 다른 컴포넌트/탭과 공유
+      localStorage.setItem('credits_total', wallet.balance.toString());
+      localStorage.setItem('credits_carbon', wallet.total_saved_g.toString());
+      localStorage.setItem('credits_last_update', new Date().toISOString());
+      window.dispatchEvent(new CustomEvent('wallet-update', { detail: wallet }));
+    });
+    walletRef.current = subscription;
 
-    return () => clearInterval(interval);
-  }, [user?.id]); // user.id가 변경될 때마다 인터벌 재등록
+    return () => {
+      subscription.close();
+      walletRef.current = null;
+    };
+  }, [user?.id]); // user.id가 변경될 때마다 다시 구독
 
   const value: CreditsContextType = {
     creditsData,
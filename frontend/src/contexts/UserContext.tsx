@@ -124,12 +124,12 @@ export const UserProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
 
     window.addEventListener('storage', handleStorageChange);
     
-    // 주기적으로 localStorage 확인 (같은 탭 내에서의 변경 감지)
-    const interval = setInterval(updateUserFromStorage, 1000);
+    // 같은 탭 내에서의 변경: CreditsContext 가 지갑 스트림 이벤트를 받으면 알려줌 (매초 확인하지 않음)
+    window.addEventListener('wallet-update', updateUserFromStorage);
 
     return () => {
       window.removeEventListener('storage', handleStorageChange);
-      clearInterval(interval);
+      window.removeEventListener('wallet-update', updateUserFromStorage);
     };
   }, []);
 
@@ -0,0 +1,124 @@
+const API_URL = process.env.REACT_APP_API_URL || "http://127.0.0.1:8000";
+
+export interface WalletGarden {
+  level_number: number;
+  level_name: string;
+  image_path: string;
+  waters_count: number;
+  total_waters: number;
+  required_waters: number;
+  status: 'IN_PROGRESS' | 'COMPLETED';
+}
+
+export interface WalletTrip {
+  log_id: number;
+  mode: string;
+  distance_km: number;
+  co2_saved_g: number;
+  points: number;
+  at: string | null;
+}
+
+// 서버가 보내는 지갑 상태 (항상 전체 상태)
+export interface WalletState {
+  user_id: number;
+  balance: number;
+  total_saved_g: number;
+  trips: number;
+  last_trip: WalletTrip | null;
+  garden: WalletGarden;
+  changed: string[]; // 이번 이벤트에서 바뀐 항목: balance, garden, trip, snapshot
+}
+
+export interface WalletSubscription {
+  close: () => void;
+  isLive: () => boolean; // 스트림/long-poll 로 변경을 받고 있는지
+}
+
+// EventSource 가 연속으로 이만큼 실패하면 long-poll 로 전환
+const MAX_STREAM_FAILURES = 3;
+
+/**
+ * 지갑(잔액/정원/최근 이동) 변경 구독
+ * - 기본은 SSE(EventSource). EventSource 는 헤더를 보낼 수 없어 토큰을 쿼리로 전달
+ * - EventSource 가 없거나 계속 연결에 실패하면 long-poll(/api/wallet/poll) 로 전환
+ * - 서버 이벤트는 전체 상태라서 받은 그대로 반영하면 됨
+ */
+export const subscribeWallet = (onUpdate: (state: WalletState) => void): WalletSubscription => {
+  const token = localStorage.getItem('access_token');
+  let closed = false;
+  let live = false;
+  let source: EventSource | null = null;
+  let pollAbort: AbortController | null = null;
+  let lastId: string | null = null;
+
+  const handle = (id: string | null, data: WalletState) => {
+    lastId = id;
+    live = true;
+    onUpdate(data);
+  };
+
+  const startPolling = async () => {
+    while (!closed) {
+      pollAbort = new AbortController();
+      try {
+        const query = lastId ? `?since=${encodeURIComponent(lastId)}` : '';
+        const response = await fetch(`${API_URL}/api/wallet/poll${query}`, {
+          headers: token ? { 'Authorization': `Bearer ${token}` } : {},
+          signal: pollAbort.signal,
+        });
+        if (response.status === 200) {
+          const event = await response.json();
+          handle(event.id, event.data);
+        } else if (response.status !== 204) {
+          live = false;
+          // 인증 실패나 서버 과부하: 잠시 쉬었다가 다시 시도
+          await new Promise(resolve => setTimeout(resolve, response.status === 401 ? 60000 : 5000));
+        }
+      } catch (err) {
+        if (closed) return;
+        live = false;
+        await new Promise(resolve => setTimeout(resolve, 5000));
+      }
+    }
+  };
+
+  if (!token) {
+    return { close: () => { closed = true; }, isLive: () => false };
+  }
+
+  if (typeof EventSource === 'undefined') {
+    startPolling();
+  } else {
+    let failures = 0;
+    source = new EventSource(`${API_URL}/api/wallet/stream?token=${encodeURIComponent(token)}`);
+    source.addEventListener('wallet', (e: MessageEvent) => {
+      failures = 0;
+      handle(e.lastEventId, JSON.parse(e.data));
+    });
+    source.onopen = () => {
+      failures = 0;
+    };
+    source.onerror = () => {
+      // EventSource 는 Last-Event-ID 를 보내며 스스로 재연결함. 계속 실패할 때만 long-poll 로 전환
+      // (401/503 처럼 재연결하지 않고 닫히는 응답이면 바로 전환)
+      live = false;
+      failures += 1;
+      if (source && (source.readyState === EventSource.CLOSED || failures >= MAX_STREAM_FAILURES)) {
+        source.close();
+        source = null;
+        startPolling();
+      }
+    };
+  }
+
+  return {
+    close: () => {
+      closed = true;
+      live = false;
+      if (source) source.close();
+      if (pollAbort) pollAbort.abort();
+    },
+    isLive: () => live,
+  };
+};